@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils.image_store import (
+    ImageStore,
+    ImageStoreError,
+    normalize,
+)
+
+MODULE = "wolskies.infrastructure.docker_image_sync"
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = True
+    _VALID_ARGS = frozenset(("images", "store"))
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        images = self._task.args.get("images") or []
+        store_path = self._task.args.get("store")
+        if not isinstance(images, list) or not store_path:
+            raise AnsibleActionFail("images (a list of image names) and store are required")
+        store_path = os.path.expanduser(str(store_path))
+
+        # Resolve and save on the controller, once per unique image
+        resolved = {}
+        saved = []
+        try:
+            store = ImageStore(store_path)
+            for name in sorted(set(normalize(str(image)) for image in images)):
+                image_id, blob, was_saved = store.ensure(name)
+                resolved[name] = (image_id, blob)
+                if was_saved:
+                    saved.append(image_id)
+        except (ImageStoreError, OSError) as e:
+            raise AnsibleActionFail("Image store %s: %s" % (store_path, e))
+
+        module_args = dict(
+            images=sorted(resolved),
+            store=store_path,
+            resolved=[dict(name=name, id=image_id) for name, (image_id, blob) in sorted(resolved.items())],
+        )
+        try:
+            query = self._execute_module(module_name=MODULE, module_args=module_args, task_vars=task_vars)
+            if query.get("failed"):
+                return query
+            missing = [image["name"] for image in query["images"] if image["action"] == "missing"]
+
+            if not missing or self._task.check_mode:
+                for image in query["images"]:
+                    if image["action"] == "missing":
+                        image["action"] = "loaded"
+                result.update(query)
+                result.update(changed=query["changed"] or bool(missing), saved=saved, transferred=0)
+                return result
+
+            # Send each missing tarball once, even when several names share an image
+            transferred = 0
+            sources = {}
+            shell = self._connection._shell
+            for name in missing:
+                image_id, blob = resolved[name]
+                if image_id in sources:
+                    continue
+                remote = shell.join_path(shell.tmpdir, os.path.basename(blob))
+                self._transfer_file(blob, remote)
+                sources[image_id] = remote
+                transferred += os.path.getsize(blob)
+            self._fixup_perms2([shell.tmpdir] + list(sources.values()))
+
+            for image in module_args["resolved"]:
+                if image["id"] in sources:
+                    image["src"] = sources[image["id"]]
+            loaded = self._execute_module(module_name=MODULE, module_args=module_args, task_vars=task_vars)
+            result.update(loaded)
+            result.update(saved=saved, transferred=transferred)
+            return result
+        finally:
+            self._remove_tmp_path(self._connection._shell.tmpdir)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import tempfile
+
+from ansible.errors import AnsibleActionFail
+from ansible.plugins.action import ActionBase
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.package_stage import missing
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils.package_store import (
+    PackageStore,
+    PackageStoreError,
+)
+
+MODULE = "wolskies.infrastructure.package_repo_sync"
+ARCHIVE = "staged-packages.tar"
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = True
+    _VALID_ARGS = frozenset(("direction", "store", "group", "path"))
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        args = dict((key, self._task.args.get(key)) for key in self._VALID_ARGS)
+        if args["direction"] not in ("pull", "push") or not all(args.values()):
+            raise AnsibleActionFail("direction (pull or push), store, group and path are required")
+        args["store"] = os.path.expanduser(str(args["store"]))
+
+        try:
+            store = PackageStore(args["store"])
+            stored = store.files(args["group"])
+        except (PackageStoreError, OSError) as e:
+            raise AnsibleActionFail("Package store %s: %s" % (args["store"], e))
+
+        shell = self._connection._shell
+        try:
+            status = self._execute_module(module_name=MODULE, module_args=args, task_vars=task_vars)
+            if status.get("failed"):
+                return status
+            if args["direction"] == "pull":
+                return self._pull(result, store, args, status["files"], task_vars)
+            if not stored and self._task.check_mode:
+                result.update(changed=True, files=[], removed=[], transferred=0)
+                return result
+            if not stored:
+                raise AnsibleActionFail("Nothing is staged for group %s in %s" % (args["group"], args["store"]))
+            return self._push(result, store, args, stored, status["files"], task_vars)
+        finally:
+            if shell.tmpdir:
+                self._remove_tmp_path(shell.tmpdir)
+
+    def _remote_archive(self):
+        shell = self._connection._shell
+        if not shell.tmpdir:
+            self._make_tmp_path()
+        return shell.join_path(shell.tmpdir, ARCHIVE)
+
+    def _pull(self, result, store, args, files, task_vars):
+        """Copy the files of the build host's repository that the store lacks."""
+        names = store.missing(args["group"], files)
+        transferred = sum(files[name]["size"] for name in names)
+        result.update(changed=bool(names), files=names, removed=[], transferred=transferred)
+        if self._task.check_mode:
+            return result
+
+        local = None
+        try:
+            if names:
+                remote = self._remote_archive()
+                packed = self._execute_module(
+                    module_name=MODULE, module_args=dict(args, pack=names, archive=remote), task_vars=task_vars
+                )
+                if packed.get("failed"):
+                    return packed
+                fd, local = tempfile.mkstemp(prefix=".pull-", suffix=".tar", dir=store.path)
+                os.close(fd)
+                self._connection.fetch_file(remote, local)
+            written, removed = store.update(args["group"], local, files)
+        except (PackageStoreError, OSError) as e:
+            raise AnsibleActionFail("Package store %s: %s" % (args["store"], e))
+        finally:
+            if local and os.path.exists(local):
+                os.unlink(local)
+        result.update(changed=bool(written or removed), files=written, removed=removed)
+        return result
+
+    def _push(self, result, store, args, stored, files, task_vars):
+        """Copy the stored files the target lacks and prune the ones it no longer needs."""
+        names = missing(files, stored)
+        stale = sorted(set(files) - set(stored))
+        transferred = sum(stored[name]["size"] for name in names)
+        result.update(changed=bool(names or stale), files=names, removed=stale, transferred=transferred)
+        if self._task.check_mode or not (names or stale):
+            return result
+
+        module_args = dict(args, files=stored)
+        local = None
+        try:
+            if names:
+                remote = self._remote_archive()
+                fd, local = tempfile.mkstemp(prefix=".push-", suffix=".tar")
+                os.close(fd)
+                store.pack(args["group"], names, local)
+                self._transfer_file(local, remote)
+                self._fixup_perms2([self._connection._shell.tmpdir, remote])
+                module_args["archive"] = remote
+        except (PackageStoreError, OSError) as e:
+            raise AnsibleActionFail("Package store %s: %s" % (args["store"], e))
+        finally:
+            if local and os.path.exists(local):
+                os.unlink(local)
+        synced = self._execute_module(module_name=MODULE, module_args=module_args, task_vars=task_vars)
+        if synced.get("failed"):
+            return synced
+        result.update(synced)
+        result.update(transferred=transferred)
+        return result
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: perf_metrics
+type: aggregate
+short_description: Record per-run performance counters as JSON
+version_added: "1.4.0"
+requirements:
+  - Enabled in configuration
+description:
+  - Counts the tasks a playbook run executed, the module invocations they made on managed hosts and the bytes of
+    module arguments and results exchanged, and writes them with the run's wall time to a JSON file.
+  - Each loop item is one module invocation. Skipped tasks and items, and actions that run on the controller
+    only (C(set_fact), C(debug), C(assert), includes and similar) are not invocations.
+  - The byte count covers the serialized module arguments and returned results. The module code that ansible-core
+    uploads for every invocation is not visible to callbacks and is not included.
+  - Used by C(scripts/benchmark_roles.py) to detect performance regressions.
+options:
+  output_file:
+    description: File the metrics are written to when the playbook ends.
+    type: path
+    required: true
+    ini:
+      - section: callback_perf_metrics
+        key: output_file
+    env:
+      - name: PERF_METRICS_FILE
+  slowest_tasks:
+    description: Number of slowest tasks listed in the output.
+    type: int
+    default: 10
+    ini:
+      - section: callback_perf_metrics
+        key: slowest_tasks
+    env:
+      - name: PERF_METRICS_SLOWEST_TASKS
+"""
+
+EXAMPLES = r"""
+# ansible.cfg
+# [defaults]
+# callbacks_enabled = wolskies.infrastructure.perf_metrics
+#
+# [callback_perf_metrics]
+# output_file = /tmp/converge-metrics.json
+"""
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+# Actions handled entirely on the controller; they never invoke a module on a host
+CONTROLLER_ACTIONS = frozenset(
+    [
+        "add_host",
+        "assert",
+        "debug",
+        "fail",
+        "group_by",
+        "import_playbook",
+        "import_role",
+        "import_tasks",
+        "include_role",
+        "include_tasks",
+        "include_vars",
+        "meta",
+        "pause",
+        "set_fact",
+        "set_stats",
+    ]
+)
+
+
+def _short_action(action):
+    for prefix in ("ansible.builtin.", "ansible.legacy."):
+        if action.startswith(prefix):
+            return action[len(prefix) :]  # noqa: E203
+    return action
+
+
+def _payload_size(data):
+    try:
+        return len(json.dumps(data, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _unpack(result):
+    """Task and result dictionary of a callback result on any ansible-core version."""
+    if hasattr(result, "result"):  # ansible-core >= 2.19
+        return result.task, result.result
+    return result._task, result._result
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "wolskies.infrastructure.perf_metrics"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.started = None
+        self.tasks = 0
+        self.invocations = 0
+        self.skipped = 0
+        self.changed = 0
+        self.failed = 0
+        self.payload_bytes = 0
+        self.task_seconds = {}
+        self._current = None
+
+    def _finish_task(self):
+        if self._current is not None:
+            name, started = self._current
+            self.task_seconds[name] = self.task_seconds.get(name, 0.0) + time.monotonic() - started
+            self._current = None
+
+    def _record(self, result, failed=False):
+        task, data = _unpack(result)
+        self.payload_bytes += _payload_size(task.args) + _payload_size(data)
+        if _short_action(task.action) in CONTROLLER_ACTIONS:
+            return
+
+        items = data.get("results") if isinstance(data.get("results"), list) and task.loop else [data]
+        for item in items:
+            if not isinstance(item, dict) or item.get("skipped"):
+                self.skipped += 1
+                continue
+            self.invocations += 1
+            self.changed += 1 if item.get("changed") else 0
+            self.failed += 1 if failed or item.get("failed") else 0
+
+    def v2_playbook_on_start(self, playbook):
+        self.started = time.monotonic()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._finish_task()
+        self.tasks += 1
+        self._current = (task.get_name(), time.monotonic())
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, failed=True)
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, failed=True)
+
+    def v2_runner_on_skipped(self, result):
+        self.skipped += 1
+
+    def metrics(self):
+        slowest = sorted(self.task_seconds.items(), key=lambda item: -item[1])[: self.get_option("slowest_tasks")]
+        return {
+            "seconds": round(time.monotonic() - self.started, 3) if self.started is not None else None,
+            "tasks": self.tasks,
+            "module_invocations": self.invocations,
+            "changed": self.changed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "payload_bytes": self.payload_bytes,
+            "slowest_tasks": [{"name": name, "seconds": round(seconds, 3)} for name, seconds in slowest],
+        }
+
+    def v2_playbook_on_stats(self, stats):
+        self._finish_task()
+        path = self.get_option("output_file")
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, "w") as f:
+            json.dump(self.metrics(), f, indent=2)
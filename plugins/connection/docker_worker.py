@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+name: docker_worker
+short_description: Run tasks in Docker containers, modules on a persistent Python worker
+description:
+  - The P(community.docker.docker#connection) connection plugin, except that pipelined modules are sent to a
+    long-lived Python interpreter in the container, reached over one C(docker exec), instead of a new C(docker exec)
+    and interpreter per task.
+  - The worker and a multiplexer on the controller keeping it alive between tasks are started by the first module
+    of a container; they exit after O(worker_idle_timeout) seconds without a module to run.
+  - Accepts every option and variable of P(community.docker.docker#connection). Molecule's Docker driver
+    containers can use it by setting C(ansible_connection) in the scenario's inventory.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+requirements:
+  - The community.docker collection
+extends_documentation_fragment:
+  - wolskies.infrastructure.worker
+seealso:
+  - plugin: wolskies.infrastructure.ssh_worker
+    plugin_type: connection
+"""
+
+EXAMPLES = r"""
+# molecule.yml
+provisioner:
+  name: ansible
+  inventory:
+    group_vars:
+      all:
+        ansible_connection: wolskies.infrastructure.docker_worker
+"""
+
+from ansible.errors import AnsibleError
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils.worker import (
+    WorkerConnection,
+    register_options,
+)
+
+try:
+    from ansible_collections.community.docker.plugins.connection.docker import DOCUMENTATION as DOCKER_DOCUMENTATION
+    from ansible_collections.community.docker.plugins.connection.docker import Connection as DockerConnection
+except ImportError:
+    raise AnsibleError("The wolskies.infrastructure.docker_worker connection plugin requires community.docker")
+
+register_options(__name__, __file__, DOCKER_DOCUMENTATION, DOCUMENTATION)
+
+
+class Connection(WorkerConnection, DockerConnection):
+    """Docker connection running pipelined modules on a persistent worker."""
+
+    def _worker_argv(self, cmd):
+        self._connect()
+        return self._build_exec_cmd([self._play_context.executable, "-c", cmd])
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+name: local_worker
+short_description: Run tasks on the controller, modules on a persistent Python worker
+description:
+  - The P(ansible.builtin.local#connection) connection plugin, except that pipelined modules are sent to a
+    long-lived Python interpreter instead of a new one per task.
+  - The worker and a multiplexer on the controller keeping it alive between tasks are started by the first module
+    of a host; they exit after O(worker_idle_timeout) seconds without a module to run.
+  - Accepts every option and variable of P(ansible.builtin.local#connection).
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+extends_documentation_fragment:
+  - wolskies.infrastructure.worker
+seealso:
+  - plugin: wolskies.infrastructure.ssh_worker
+    plugin_type: connection
+"""
+
+EXAMPLES = r"""
+# ansible-playbook -i localhost, -c wolskies.infrastructure.local_worker site.yml
+- hosts: localhost
+  vars:
+    ansible_connection: wolskies.infrastructure.local_worker
+  roles:
+    - wolskies.infrastructure.configure_system
+"""
+
+from ansible import constants as C
+from ansible.plugins.connection.local import DOCUMENTATION as LOCAL_DOCUMENTATION
+from ansible.plugins.connection.local import Connection as LocalConnection
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils.worker import (
+    WorkerConnection,
+    register_options,
+)
+
+register_options(__name__, __file__, LOCAL_DOCUMENTATION, DOCUMENTATION)
+
+
+class Connection(WorkerConnection, LocalConnection):
+    """Local connection running pipelined modules on a persistent worker."""
+
+    def _worker_argv(self, cmd):
+        self._connect()
+        executable = C.DEFAULT_EXECUTABLE.split()[0] if C.DEFAULT_EXECUTABLE else "/bin/sh"
+        return [executable, "-c", cmd]
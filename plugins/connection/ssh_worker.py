@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+name: ssh_worker
+short_description: Connect over SSH, running modules on a persistent Python worker
+description:
+  - The P(ansible.builtin.ssh#connection) connection plugin, except that pipelined modules are sent to a
+    long-lived Python interpreter on the target, reached over one SSH session, instead of a new SSH command and
+    interpreter per task.
+  - The worker and a multiplexer on the controller keeping the session open between tasks are started by the
+    first module of a host; they exit after O(worker_idle_timeout) seconds without a module to run.
+  - Accepts every option and variable of P(ansible.builtin.ssh#connection), C(ansible_ssh_common_args) and
+    C(ansible_ssh_private_key_file) for instance.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+extends_documentation_fragment:
+  - wolskies.infrastructure.worker
+notes:
+  - Hosts using password authentication run every task without the worker; use keys or an agent.
+  - With pipelining and C(become), C(requiretty) must be disabled in the target's sudoers, as for the base plugin.
+seealso:
+  - plugin: wolskies.infrastructure.local_worker
+    plugin_type: connection
+  - plugin: wolskies.infrastructure.docker_worker
+    plugin_type: connection
+"""
+
+EXAMPLES = r"""
+# ansible.cfg
+# [defaults]
+# transport = wolskies.infrastructure.ssh_worker
+
+# or per group in the inventory
+all:
+  vars:
+    ansible_connection: wolskies.infrastructure.ssh_worker
+    ansible_worker_idle_timeout: 120
+"""
+
+from ansible.plugins.connection.ssh import DOCUMENTATION as SSH_DOCUMENTATION
+from ansible.plugins.connection.ssh import Connection as SSHConnection
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils.worker import (
+    WorkerConnection,
+    register_options,
+)
+
+register_options(__name__, __file__, SSH_DOCUMENTATION, DOCUMENTATION)
+
+
+class Connection(WorkerConnection, SSHConnection):
+    """SSH connection running pipelined modules on a persistent worker."""
+
+    def _worker_usable(self):
+        # sshpass and SSH_ASKPASS only answer prompts of the ssh processes the base plugin runs itself
+        return not self.get_option("password") and super(Connection, self)._worker_usable()
+
+    def _worker_argv(self, cmd):
+        self.host = self.get_option("host") or self._play_context.remote_addr
+        return self._build_command(self.get_option("ssh_executable"), "ssh", self.host, cmd)
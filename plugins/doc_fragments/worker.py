@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    # Options of the persistent worker connection plugins
+    DOCUMENTATION = r"""
+options:
+  worker_dir:
+    description:
+      - Directory on the controller holding the sockets of the worker multiplexers, one per worker.
+      - Socket paths are limited to about 100 characters, so keep this short.
+    type: path
+    default: ~/.ansible/workers
+    ini:
+      - section: wolskies_worker
+        key: dir
+    env:
+      - name: ANSIBLE_WORKER_DIR
+    vars:
+      - name: ansible_worker_dir
+  worker_idle_timeout:
+    description: Seconds a worker stays alive without a module to run before it exits.
+    type: int
+    default: 60
+    ini:
+      - section: wolskies_worker
+        key: idle_timeout
+    env:
+      - name: ANSIBLE_WORKER_IDLE_TIMEOUT
+    vars:
+      - name: ansible_worker_idle_timeout
+notes:
+  - Only pipelined modules run on the worker, so pipelining is enabled by default. File transfers, C(raw),
+    C(script) and async tasks, and every module when pipelining is disabled, run through the base connection.
+  - One worker runs per target, remote user, become user and task C(environment). Each module still runs in its
+    own process, forked from the worker, so modules cannot affect each other; the module_utils imported by
+    earlier modules are imported in the worker already.
+  - Tasks needing a become password run without the worker.
+"""
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Package staging filters for configure_software.
+
+package_staging_groups
+    Group the play's hosts by distribution, release and architecture and
+    merge the package sets (_final_packages) of each group, so the packages
+    of a group are resolved and downloaded once, on one build host, for all
+    of its members.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from collections.abc import Mapping
+
+from ansible.errors import AnsibleFilterError
+
+MANAGERS = {"Debian": "apt", "Archlinux": "pacman"}
+
+
+def staging_group(facts):
+    """Staging group name of a host, e.g. ubuntu-noble-x86_64; None for unsupported families."""
+    if facts.get("os_family") not in MANAGERS:
+        return None
+    parts = [
+        facts.get("distribution"),
+        facts.get("distribution_release") or facts.get("distribution_version"),
+        facts.get("architecture"),
+    ]
+    if not all(parts):
+        raise AnsibleFilterError("Package staging needs facts; gather them before grouping hosts")
+    return "-".join(str(part).lower().replace(" ", "_") for part in parts)
+
+
+def package_staging_groups(hosts, hostvars, builders=None):
+    """Merge the package sets of hosts per staging group.
+
+    Only hosts with an APT or pacman package list are grouped, Arch hosts
+    with pacman.enable_aur excepted. builders maps a group name to the
+    inventory host that builds its repository; by default the first host of
+    the group builds it. Returns
+    ``{"groups": {name: group}, "hosts": {host: name}}`` where each group has
+    name, manager, builder, leader (the group host that runs the build and
+    pull tasks), hosts and packages (the union of the present packages).
+    """
+    builders = builders or {}
+    if not isinstance(builders, Mapping):
+        raise AnsibleFilterError("package_staging.builders must map group names to hosts")
+    groups = {}
+    members = {}
+    for host in hosts:
+        host_vars = hostvars[host]
+        facts = host_vars.get("ansible_facts") or {}
+        entries = (host_vars.get("_final_packages") or {}).get(facts.get("distribution")) or []
+        # AUR hosts build packages from upstream sources, so they install the regular way
+        aur = (host_vars.get("pacman") or {}).get("enable_aur", False)
+        name = staging_group(facts) if entries and not aur else None
+        if not name:
+            continue
+        group = groups.setdefault(
+            name,
+            dict(
+                name=name,
+                manager=MANAGERS[facts["os_family"]],
+                builder=builders.get(name, host),
+                leader=host,
+                hosts=[],
+                packages=set(),
+            ),
+        )
+        group["hosts"].append(host)
+        for entry in entries:
+            if isinstance(entry, Mapping):
+                if entry.get("state", "present") == "present":
+                    group["packages"].add(entry["name"])
+            else:
+                group["packages"].add(str(entry))
+        members[host] = name
+    for group in groups.values():
+        group["packages"] = sorted(group["packages"])
+    return dict(groups=groups, hosts=members)
+
+
+class FilterModule(object):
+    """configure_software package staging filters"""
+
+    def filters(self):
+        return {
+            "package_staging_groups": package_staging_groups,
+        }
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Service scheduling and interface aggregation filters for configure_services.
+
+service_waves
+    Merge services_group and services_host and topologically sort them into
+    waves. Every service in a wave depends only on services in earlier waves,
+    so the services of one wave can be deployed concurrently.
+
+service_aggregate
+    Collect the cross-cutting interface data (firewall rules, reverse proxy
+    config, backup paths, health checks) of every service in one pass, with
+    duplicates removed, so each concern is applied once.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+from collections.abc import Mapping
+
+from ansible.errors import AnsibleFilterError
+
+
+def _interface(role):
+    """Interface variable prefix of a role: its name without collection namespace."""
+    return role.rsplit(".", 1)[-1]
+
+
+def normalize_service(entry):
+    """Return a service entry as a dict with name, kind, depends_on and interface."""
+    if isinstance(entry, str):
+        entry = {"role": entry}
+    if not isinstance(entry, Mapping):
+        raise AnsibleFilterError("Service entries must be role names or dicts, got %r" % (entry,))
+
+    service = dict(entry)
+    if ("role" in service) == ("compose" in service):
+        raise AnsibleFilterError("Service %r must set exactly one of role or compose" % (service.get("name"),))
+    if "role" in service:
+        service["kind"] = "role"
+        service.setdefault("name", _interface(service["role"]))
+        service["interface"] = _interface(service["role"])
+    else:
+        if not service.get("name"):
+            raise AnsibleFilterError("Compose services need a name: %r" % (entry,))
+        service["kind"] = "compose"
+        service["interface"] = service["name"]
+
+    depends_on = service.get("depends_on") or []
+    if isinstance(depends_on, str):
+        depends_on = [depends_on]
+    service["depends_on"] = list(depends_on)
+    service.setdefault("enabled", True)
+    return service
+
+
+def service_waves(services_group, services_host=None):
+    """Merge service lists and sort them into dependency waves.
+
+    Host entries replace group entries of the same name. Returns a list of
+    waves, each ``{"index": n, "services": [...], "roles": [...], "compose": [...]}``
+    where services holds every normalized entry of the wave, roles the
+    role-backed ones and compose the compose-backed ones, ready to pass to
+    docker_compose_generic as docker_services. Order within a wave follows
+    declaration order.
+    """
+    merged = {}
+    order = []
+    for entry in list(services_group or []) + list(services_host or []):
+        service = normalize_service(entry)
+        if service["name"] not in merged:
+            order.append(service["name"])
+        merged[service["name"]] = service
+
+    for name in order:
+        missing = [d for d in merged[name]["depends_on"] if d not in merged]
+        if missing:
+            raise AnsibleFilterError("Service %s depends on undeclared service(s): %s" % (name, ", ".join(missing)))
+
+    pending = dict((name, set(merged[name]["depends_on"])) for name in order)
+    waves = []
+    while pending:
+        ready = [name for name in order if name in pending and not pending[name]]
+        if not ready:
+            raise AnsibleFilterError("Service dependency cycle between: %s" % ", ".join(sorted(pending)))
+        for name in ready:
+            del pending[name]
+        for remaining in pending.values():
+            remaining.difference_update(ready)
+
+        services = [merged[name] for name in ready]
+        waves.append(
+            {
+                "index": len(waves) + 1,
+                "services": services,
+                "roles": [s for s in services if s["kind"] == "role"],
+                "compose": [
+                    dict(s["compose"], name=s["name"], enabled=s["enabled"]) for s in services if s["kind"] == "compose"
+                ],
+            }
+        )
+    return waves
+
+
+def _key(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def service_aggregate(waves, exported=None):
+    """Aggregate interface data of every service in waves.
+
+    exported maps an interface prefix to the variables an install_* role
+    exported (``firewall_rules``, ``reverse_proxy_config``, ``backup_paths``,
+    ``health_check``). Values declared on the service entry itself
+    (``firewall_rules``, ``reverse_proxy``, ``backup_paths``, ``health_check``)
+    are merged with them. Firewall rules are deduplicated ignoring their
+    comment; disabled services contribute nothing.
+    """
+    exported = exported or {}
+    firewall_rules = []
+    seen_rules = set()
+    reverse_proxy = []
+    backup_paths = []
+    health_checks = []
+
+    for wave in waves:
+        for service in wave["services"]:
+            if not service["enabled"]:
+                continue
+            interface = exported.get(service["interface"]) or {}
+
+            for rule in list(interface.get("firewall_rules") or []) + list(service.get("firewall_rules") or []):
+                if not isinstance(rule, Mapping):
+                    raise AnsibleFilterError("Firewall rule of service %s must be a dict: %r" % (service["name"], rule))
+                rule = dict(rule)
+                if "protocol" in rule and "proto" not in rule:
+                    rule["proto"] = rule.pop("protocol")
+                key = _key(dict((k, v) for k, v in rule.items() if k != "comment"))
+                if key in seen_rules:
+                    continue
+                seen_rules.add(key)
+                rule.setdefault("comment", "%s service" % service["name"])
+                firewall_rules.append(rule)
+
+            proxy = service.get("reverse_proxy") or interface.get("reverse_proxy_config")
+            if proxy:
+                reverse_proxy.append(dict(proxy, service=service["name"]))
+
+            for path in list(interface.get("backup_paths") or []) + list(service.get("backup_paths") or []):
+                if path not in backup_paths:
+                    backup_paths.append(path)
+
+            check = service.get("health_check") or interface.get("health_check")
+            if check:
+                health_checks.append(dict(check, service=service["name"]))
+
+    return {
+        "firewall_rules": firewall_rules,
+        "reverse_proxy": reverse_proxy,
+        "backup_paths": sorted(backup_paths),
+        "health_checks": health_checks,
+    }
+
+
+class FilterModule(object):
+    """configure_services scheduling filters"""
+
+    def filters(self):
+        return {
+            "service_waves": service_waves,
+            "service_aggregate": service_aggregate,
+        }
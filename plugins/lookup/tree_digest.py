@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+name: tree_digest
+short_description: SHA-256 digest of controller files and directory trees
+description:
+  - Returns one SHA-256 hex digest over every regular file under the given paths on the controller,
+    recursing into subdirectories.
+  - The digest covers each file's path relative to its term and its content, so adding, removing,
+    renaming or editing any file changes it. Missing paths are skipped.
+  - C(__pycache__) directories and compiled Python files are ignored.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  _terms:
+    description: Files or directories to digest.
+    required: true
+    type: list
+    elements: path
+"""
+
+EXAMPLES = r"""
+- name: Digest the code of a role and the collection plugins
+  ansible.builtin.debug:
+    msg: "{{ lookup('wolskies.infrastructure.tree_digest', role_path ~ '/tasks', role_path ~ '/templates') }}"
+"""
+
+RETURN = r"""
+_raw:
+  description: One SHA-256 hex digest of all files under the terms, in a single-element list.
+  type: list
+  elements: str
+"""
+
+import hashlib
+import os
+
+from ansible.plugins.lookup import LookupBase
+
+IGNORED_DIRECTORIES = {"__pycache__"}
+IGNORED_SUFFIXES = (".pyc", ".pyo")
+
+
+def tree_files(path):
+    """Regular files under path as (relative name, absolute path), sorted; path itself if it is a file."""
+    if os.path.isfile(path):
+        return [(os.path.basename(path), path)]
+    files = []
+    for root, directories, names in os.walk(path):
+        directories[:] = [name for name in directories if name not in IGNORED_DIRECTORIES]
+        for name in names:
+            full = os.path.join(root, name)
+            if not name.endswith(IGNORED_SUFFIXES) and os.path.isfile(full):
+                files.append((os.path.relpath(full, path), full))
+    return sorted(files)
+
+
+def tree_digest(paths):
+    """SHA-256 hex digest of the relative names and contents of every file under paths."""
+    digest = hashlib.sha256()
+    # Only relative names go in, so the digest does not depend on where the tree is installed
+    for index, path in enumerate(paths):
+        digest.update(b"\0T%d" % index)
+        for name, full in tree_files(path):
+            digest.update(b"\0F%s\0%d\0" % (os.fsencode(name), os.path.getsize(full)))
+            with open(full, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LookupModule(LookupBase):
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        return [tree_digest([os.path.expanduser(str(term)) for term in terms])]
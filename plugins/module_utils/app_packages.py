@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Batched flatpak and snap package management.
+
+Used by the flatpak_batch and snap_batch modules. The installed set is read
+with a single `flatpak list` / `snap list`, the difference to the requested
+state is computed here, and every missing package is installed (or removed)
+in one `flatpak install` / `snap remove` call instead of one call per
+package. Results are still reported per package.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import re
+
+# Snaps other snaps depend on; removed after everything else
+BASE_SNAPS = re.compile(r"^(core\d*|bare|snapd)$")
+
+
+class CommandError(Exception):
+    """A package manager query failed, so no delta can be computed."""
+
+    def __init__(self, msg, rc, stderr):
+        super(CommandError, self).__init__(msg)
+        self.rc = rc
+        self.stderr = stderr
+
+
+def _last_line(text):
+    lines = (text or "").strip().splitlines()
+    return lines[-1].strip() if lines else ""
+
+
+def deduplicate(packages):
+    """Requested packages by name, in order; a later entry for the same name wins."""
+    by_name = {}
+    for package in packages:
+        by_name.pop(package["name"], None)
+        by_name[package["name"]] = package
+    return list(by_name.values())
+
+
+# =============================================================================
+# FLATPAK
+# =============================================================================
+
+
+def flatpak_id(name):
+    """Application ID of a flatpak name, without a //branch suffix."""
+    return name.split("//", 1)[0]
+
+
+def flatpak_installed(run, flatpak, method):
+    """Application and runtime IDs installed for the system or user installation."""
+    rc, out, err = run([flatpak, "list", "--%s" % method, "--columns=application"])
+    if rc != 0:
+        raise CommandError("Failed to list installed flatpaks", rc, err)
+    return set(line.strip() for line in out.splitlines() if line.strip())
+
+
+def flatpak_commands(flatpak, method, remote, install, remove):
+    """(argv, names, action) for one install and one uninstall transaction."""
+    commands = []
+    if install:
+        argv = [flatpak, "install", "--%s" % method, "--noninteractive", "-y", remote]
+        commands.append((argv + [p["name"] for p in install], [p["name"] for p in install], "installed"))
+    if remove:
+        argv = [flatpak, "uninstall", "--%s" % method, "--noninteractive", "-y"]
+        commands.append((argv + [p["name"] for p in remove], [p["name"] for p in remove], "removed"))
+    return commands
+
+
+# =============================================================================
+# SNAP
+# =============================================================================
+
+
+def snap_installed(run, snap):
+    """Names of the installed snaps."""
+    rc, out, err = run([snap, "list"])
+    if rc != 0:
+        if "no snaps" in (err + out).lower():
+            return set()
+        raise CommandError("Failed to list installed snaps", rc, err)
+    return set(line.split()[0] for line in out.splitlines()[1:] if line.strip())
+
+
+def snap_commands(snap, install, remove):
+    """(argv, names, action) batches for snap.
+
+    snap only accepts --classic and --channel with a single name, so those
+    installs run one per package; all others share one call. Base snaps are
+    removed in a second call after the snaps that use them.
+    """
+    commands = []
+    plain = [p["name"] for p in install if not p.get("classic") and not p.get("channel")]
+    if plain:
+        commands.append(([snap, "install"] + plain, plain, "installed"))
+    for package in install:
+        if package.get("classic") or package.get("channel"):
+            argv = [snap, "install", package["name"]]
+            if package.get("classic"):
+                argv.append("--classic")
+            if package.get("channel"):
+                argv.append("--channel=%s" % package["channel"])
+            commands.append((argv, [package["name"]], "installed"))
+    for bases in (False, True):
+        names = [p["name"] for p in remove if bool(BASE_SNAPS.match(p["name"])) == bases]
+        if names:
+            commands.append(([snap, "remove"] + names, names, "removed"))
+    return commands
+
+
+# =============================================================================
+# DELTA AND EXECUTION
+# =============================================================================
+
+
+def plan(packages, installed, key=None):
+    """Split requested packages into (install, remove) against the installed set."""
+    key = key or (lambda name: name)
+    install = [p for p in packages if p.get("state", "present") == "present" and key(p["name"]) not in installed]
+    remove = [p for p in packages if p.get("state", "present") == "absent" and key(p["name"]) in installed]
+    return install, remove
+
+
+def apply(run, query, packages, commands, key=None, check_mode=False):
+    """Run the batched commands and return one result per requested package.
+
+    query() returns the installed set; it is called again only when a batch
+    fails, to tell which of its packages did reach their state. Each result
+    has name, state, action (installed, removed, unchanged or failed),
+    changed and msg.
+    """
+    key = key or (lambda name: name)
+    results = dict(
+        (p["name"], dict(name=p["name"], state=p.get("state", "present"), action="unchanged", changed=False, msg=""))
+        for p in packages
+    )
+    failed = {}
+    for argv, names, action in commands:
+        if not check_mode:
+            rc, out, err = run(argv)
+            if rc != 0:
+                failed.update((name, _last_line(err or out) or "rc=%d" % rc) for name in names)
+                continue
+        for name in names:
+            results[name].update(action=action, changed=True)
+
+    if failed:
+        installed = query()
+        for name, msg in failed.items():
+            result = results[name]
+            present = key(name) in installed
+            if (result["state"] == "present") == present:
+                result.update(action="installed" if present else "removed", changed=True)
+            else:
+                result.update(action="failed", msg=msg)
+    return [results[p["name"]] for p in packages]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+APT package index freshness.
+
+The index is stale when it is older than the allowed age or when any APT
+source or keyring changed after the last successful update. Both the
+apt_cache module and other collection modules that install packages use
+this to refresh the index at most once per run.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import glob
+import os
+import time
+
+UPDATE_STAMP = "/var/lib/apt/periodic/update-success-stamp"
+LISTS_DIR = "/var/lib/apt/lists"
+
+# Anything that changes what `apt-get update` would fetch or accept
+SOURCE_PATTERNS = [
+    "/etc/apt/sources.list",
+    "/etc/apt/sources.list.d/*",
+    "/etc/apt/trusted.gpg",
+    "/etc/apt/trusted.gpg.d/*",
+    "/etc/apt/keyrings/*",
+    "/usr/share/keyrings/*",
+]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def last_update_time():
+    """Time of the last successful update, as the apt module determines it."""
+    stamp = _mtime(UPDATE_STAMP)
+    if stamp is not None:
+        return stamp
+    return _mtime(LISTS_DIR) or 0
+
+
+def sources_changed_time(patterns=None):
+    """Most recent modification time of any APT source or keyring.
+
+    Directory mtimes are included so removed files count as changes too.
+    """
+    newest = 0
+    for pattern in patterns or SOURCE_PATTERNS:
+        paths = glob.glob(pattern)
+        directory = os.path.dirname(pattern) if "*" in pattern else None
+        if directory:
+            paths.append(directory)
+        for path in paths:
+            mtime = _mtime(path)
+            if mtime is not None and mtime > newest:
+                newest = mtime
+    return newest
+
+
+def staleness(valid_time, force=False, now=None):
+    """Return the reason the index needs an update, or None when it is fresh."""
+    if force:
+        return "forced"
+    now = time.time() if now is None else now
+    updated = last_update_time()
+    if not updated:
+        return "never updated"
+    if sources_changed_time() > updated:
+        return "sources changed"
+    if now - updated > valid_time:
+        return "older than %ds" % valid_time
+    return None
+
+
+def mark_updated():
+    """Record a successful update the same way APT::Periodic does."""
+    directory = os.path.dirname(UPDATE_STAMP)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(UPDATE_STAMP, "a"):
+        pass
+    os.utime(UPDATE_STAMP, None)
+
+
+def update(module, valid_time, force=False):
+    """Run `apt-get update` when the index is stale.
+
+    Returns (updated, reason). Fails the module if the update fails.
+    """
+    reason = staleness(valid_time, force)
+    if reason is None or module.check_mode:
+        return False, reason
+
+    apt_get = module.get_bin_path("apt-get", required=True)
+    rc, out, err = module.run_command(
+        [apt_get, "update", "-q"],
+        environ_update={"DEBIAN_FRONTEND": "noninteractive", "LANG": "C"},
+    )
+    if rc != 0:
+        module.fail_json(msg="Failed to update apt cache (%s)" % reason, rc=rc, stdout=out, stderr=err)
+    mark_updated()
+    return True, reason
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+APT source file parsing.
+
+Used by the apt_sources module to read every one-line (.list) and deb822
+(.sources) source file of a host in one pass and normalize the entries to
+the repository dicts configure_software's apt_repositories_* variables and
+ansible.builtin.deb822_repository take.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import glob
+import os
+import re
+
+DEFAULT_PATHS = ["/etc/apt/sources.list", "/etc/apt/sources.list.d"]
+
+# One-line option names -> repository keys
+ONE_LINE_OPTIONS = {
+    "arch": "architectures",
+    "signed-by": "signed_by",
+    "trusted": "trusted",
+}
+
+ONE_LINE = re.compile(r"^(deb|deb-src)\s+(?:\[([^\]]*)\]\s+)?(\S+)\s+(\S+)((?:\s+\S+)*)\s*$")
+
+
+def _bool(value):
+    return str(value).strip().lower() in ("yes", "true", "1")
+
+
+def _name(path):
+    return re.sub(r"\.(list|sources)$", "", os.path.basename(path))
+
+
+def source_files(paths=None):
+    """Source files in APT's order: sources.list, then sources.list.d sorted by name."""
+    files = []
+    for path in paths or DEFAULT_PATHS:
+        if os.path.isdir(path):
+            found = glob.glob(os.path.join(path, "*.list")) + glob.glob(os.path.join(path, "*.sources"))
+            files.extend(sorted(found))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+
+def parse_one_line(text):
+    """Entries of a one-line format file, one per line and suite."""
+    entries = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        match = ONE_LINE.match(line)
+        if not match:
+            continue
+        kind, options, uri, suite, components = match.groups()
+        entry = dict(types=[kind], uris=[uri], suites=[suite], components=components.split(), enabled=True)
+        for option in (options or "").split():
+            key, _, value = option.partition("=")
+            if key in ONE_LINE_OPTIONS:
+                entry[ONE_LINE_OPTIONS[key]] = value.split(",") if key == "arch" else value
+        entries.append(entry)
+    return entries
+
+
+def deb822_stanzas(text):
+    """Field dicts of a deb822 file; continuation lines are joined with newlines, ' .' is an empty line."""
+    stanzas, fields, key = [], {}, None
+    for line in text.splitlines() + [""]:
+        if line.startswith("#"):
+            continue
+        if not line.strip():
+            if fields:
+                stanzas.append(fields)
+            fields, key = {}, None
+        elif line[0] in " \t" and key:
+            value = line.strip()
+            fields[key] += "\n" + ("" if value == "." else value)
+        elif ":" in line:
+            key, _, value = line.partition(":")
+            key = key.strip().lower()
+            fields[key] = value.strip()
+    return stanzas
+
+
+def parse_deb822(text):
+    """Entries of a deb822 file, one per stanza with at least URIs and Suites."""
+    entries = []
+    for fields in deb822_stanzas(text):
+        if not fields.get("uris") or not fields.get("suites"):
+            continue
+        entry = dict(
+            types=fields.get("types", "deb").split(),
+            uris=fields["uris"].split(),
+            suites=fields["suites"].split(),
+            components=fields.get("components", "").split(),
+            enabled=_bool(fields.get("enabled", "yes")),
+        )
+        if fields.get("signed-by"):
+            entry["signed_by"] = fields["signed-by"].strip()
+        if fields.get("architectures"):
+            entry["architectures"] = fields["architectures"].split()
+        if fields.get("trusted"):
+            entry["trusted"] = fields["trusted"]
+        entries.append(entry)
+    return entries
+
+
+# =============================================================================
+# NORMALIZATION
+# =============================================================================
+
+
+def merge_one_line(entries):
+    """Merge one-line entries that differ only in type or suite into deb822-shaped ones.
+
+    A stanza stands for every type x URI x suite combination, so suites are
+    gathered per type and types merged only when their suite lists match.
+    """
+    groups = []
+    index = {}
+    for entry in entries:
+        rest = dict((k, v) for k, v in entry.items() if k not in ("types", "suites"))
+        key = repr(sorted(rest.items()))
+        if key not in index:
+            index[key] = len(groups)
+            groups.append((rest, {}))
+        suites = groups[index[key]][1].setdefault(entry["types"][0], [])
+        suites.extend(suite for suite in entry["suites"] if suite not in suites)
+
+    merged = []
+    for rest, by_type in groups:
+        by_suites = {}
+        for kind, suites in by_type.items():
+            by_suites.setdefault(tuple(suites), []).append(kind)
+        for suites, kinds in by_suites.items():
+            merged.append(dict(rest, types=kinds, suites=list(suites)))
+    return merged
+
+
+def resolve_signed_by(entry, key_mapping):
+    """The entry's own Signed-By, else the key of the first mapped domain in its URIs."""
+    if entry.get("signed_by"):
+        return entry["signed_by"]
+    for domain, key in (key_mapping or {}).items():
+        if key and any(domain in uri for uri in entry["uris"]):
+            return key
+    return None
+
+
+def _single(values):
+    return values[0] if len(values) == 1 else values
+
+
+def repository(name, entry, key_mapping):
+    """An entry in apt_repositories_host / deb822_repository form."""
+    result = dict(
+        name=name,
+        types=_single(entry["types"]),
+        uris=_single(entry["uris"]),
+        suites=_single(entry["suites"]),
+        components=entry["components"],
+        signed_by=resolve_signed_by(entry, key_mapping),
+        state="present",
+        enabled=entry["enabled"],
+    )
+    if entry.get("architectures"):
+        result["architectures"] = entry["architectures"]
+    if entry.get("trusted") is not None:
+        result["trusted"] = _bool(entry["trusted"])
+    return result
+
+
+def identity(repo):
+    """What makes two repositories equivalent: everything but their name."""
+    return repr(sorted((key, value) for key, value in repo.items() if key != "name"))
+
+
+def read_repositories(paths=None, key_mapping=None, read=None):
+    """Parse every source file once.
+
+    Returns (repositories, files, duplicates). Names come from the file name;
+    a file with several entries names them name, name-2, ... . An entry equal
+    to one already seen in an earlier file is dropped and listed in
+    duplicates with the name it duplicates.
+    """
+    read = read or read_file
+    repositories, files, duplicates = [], [], []
+    seen, names = {}, set()
+    for path in source_files(paths):
+        text = read(path)
+        if text is None:
+            continue
+        files.append(path)
+        if path.endswith(".sources"):
+            entries = parse_deb822(text)
+        else:
+            entries = merge_one_line(parse_one_line(text))
+        for number, entry in enumerate(entries, 1):
+            name = _name(path) if number == 1 else "%s-%d" % (_name(path), number)
+            if name in names:
+                # docker.list and docker.sources with different content
+                name += "-list" if path.endswith(".list") else "-sources"
+            repo = repository(name, entry, key_mapping)
+            key = identity(repo)
+            if key in seen:
+                duplicates.append(dict(name=name, file=path, same_as=seen[key]))
+                continue
+            seen[key] = name
+            names.add(name)
+            repositories.append(repo)
+    return repositories, files, duplicates
+
+
+def read_file(path):
+    """File contents, or None when it cannot be read."""
+    try:
+        with open(path) as f:
+            return f.read()
+    except (IOError, OSError, UnicodeDecodeError):
+        return None
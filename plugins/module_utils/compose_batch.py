@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Concurrent Docker Compose project deployment.
+
+Used by the docker_compose_batch module to bring many compose projects up
+or down at once with a bounded number of parallel `docker compose` calls.
+Images are pulled for every project before any container is touched, and
+a project is recreated only when its rendered files or its images changed.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+COMPOSE_FILE = "docker-compose.yml"
+ENV_FILE = ".env"
+HASH_FILE = ".config-hash"
+
+# Progress events compose prints to stderr when it acts on a resource; an
+# up -d that finds everything running only prints "Running"
+CHANGE_EVENTS = re.compile(
+    r"^\s*(Container|Network|Volume)\s+\S+\s+(Creat|Recreat|Start|Stopp|Remov|Kill)(ing|ed)\b",
+    re.MULTILINE,
+)
+
+
+def config_hash(path):
+    """SHA-256 over the project's rendered compose and .env files."""
+    digest = hashlib.sha256()
+    for name in (COMPOSE_FILE, ENV_FILE):
+        digest.update(name.encode("utf-8") + b"\0")
+        try:
+            with open(os.path.join(path, name), "rb") as f:
+                digest.update(f.read())
+        except (IOError, OSError):
+            digest.update(b"\0missing")
+    return digest.hexdigest()
+
+
+def stored_hash(path):
+    """Config hash recorded by the last successful deployment, or None."""
+    try:
+        with open(os.path.join(path, HASH_FILE)) as f:
+            return f.read().strip() or None
+    except (IOError, OSError):
+        return None
+
+
+def store_hash(path, value):
+    with open(os.path.join(path, HASH_FILE), "w") as f:
+        f.write(value + "\n")
+
+
+def _compose(docker, project):
+    path = project["path"]
+    return [docker, "compose", "--project-directory", path, "-f", os.path.join(path, COMPOSE_FILE)]
+
+
+def compose_command(docker, project, recreate=False):
+    """Return the docker compose argv that brings one project to its state."""
+    command = _compose(docker, project)
+    if project.get("state", "present") == "absent":
+        return command + ["down", "--remove-orphans"]
+    command += ["up", "--detach", "--remove-orphans"]
+    if recreate:
+        command.append("--force-recreate")
+    return command
+
+
+def pull_command(docker, project):
+    # Images that cannot be pulled (local builds, offline registries) are left to `up`
+    return _compose(docker, project) + ["pull", "--quiet", "--ignore-pull-failures"]
+
+
+def compose_changed(output):
+    """Whether compose output shows any resource being created, started, stopped or removed."""
+    return bool(CHANGE_EVENTS.search(output or ""))
+
+
+def containers(run, docker, project):
+    """Return (configured image, image ID, running) for each of the project's containers."""
+    rc, out, err = run(_compose(docker, project) + ["ps", "--quiet", "--all"])
+    ids = out.split()
+    if rc != 0 or not ids:
+        return []
+    rc, out, err = run([docker, "inspect", "--format", "{{.Config.Image}} {{.Image}} {{.State.Running}}"] + ids)
+    if rc != 0:
+        return []
+    result = []
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) == 3:
+            result.append((fields[0], fields[1], fields[2] == "true"))
+    return result
+
+
+def images_changed(run, docker, current):
+    """Whether any image tag now resolves to a different ID than its container runs."""
+    running = dict((image, image_id) for image, image_id, _ in current)
+    if not running:
+        return False
+    names = sorted(running)
+    rc, out, err = run([docker, "image", "inspect", "--format", "{{.Id}}"] + names)
+    if rc != 0:
+        return True
+    return out.split() != [running[name] for name in names]
+
+
+def plan_project(run, docker, project):
+    """Decide how a project is deployed.
+
+    Returns (recreate, reasons, hash). A project is recreated when its config
+    hash differs from the one recorded at its last deployment or when one of
+    its images now has a different ID. Projects deployed before the hash was
+    recorded are left to compose's own change detection.
+    """
+    current = containers(run, docker, project)
+    if project.get("state", "present") == "absent":
+        return False, ["disabled"] if current else [], None
+    digest = config_hash(project["path"])
+    if not current:
+        return False, ["not created"], digest
+
+    reasons = []
+    previous = stored_hash(project["path"])
+    if previous is not None and previous != digest:
+        reasons.append("config changed")
+    if images_changed(run, docker, current):
+        reasons.append("image changed")
+    if project.get("recreate"):
+        reasons.append("forced")
+    recreate = bool(reasons)
+    if not all(running for _, _, running in current):
+        reasons.append("not running")
+    return recreate, reasons, digest
+
+
+def pull_project(run, docker, project):
+    started = time.time()
+    run(pull_command(docker, project))
+    return round(time.time() - started, 2)
+
+
+def deploy_project(run, docker, project, pull_duration=0.0, check_mode=False):
+    """Bring one project to its state and return its result with timing."""
+    state = project.get("state", "present")
+    recreate, reasons, digest = plan_project(run, docker, project)
+    result = dict(
+        name=project["name"],
+        state=state,
+        reasons=reasons,
+        recreated=recreate,
+        rc=0,
+        pull_duration=pull_duration,
+        duration=0.0,
+        downtime=0.0,
+        stderr="",
+    )
+
+    if check_mode:
+        if recreate:
+            action = "recreated"
+        elif state == "absent":
+            action = "removed" if reasons else "unchanged"
+        elif reasons:
+            action = "created" if "not created" in reasons else "started"
+        else:
+            action = "unchanged"
+        result.update(changed=action != "unchanged", action=action)
+        return result
+    if state == "absent" and not reasons:
+        result.update(changed=False, action="unchanged")
+        return result
+
+    started = time.time()
+    rc, out, err = run(compose_command(docker, project, recreate))
+    result["duration"] = round(time.time() - started, 2)
+    result["rc"] = rc
+    if rc != 0:
+        result.update(changed=False, action="failed", stderr=err)
+        return result
+
+    changed = recreate or compose_changed(err + out)
+    if recreate:
+        # Images are already local, so the containers are down only while compose swaps them
+        result["downtime"] = result["duration"]
+        action = "recreated"
+    elif state == "absent":
+        action = "removed" if changed else "unchanged"
+    elif "not created" in reasons:
+        action = "created"
+    else:
+        action = "started" if changed else "unchanged"
+    result.update(changed=changed, action=action)
+
+    if digest is not None and digest != stored_hash(project["path"]):
+        store_hash(project["path"], digest)
+    return result
+
+
+def deploy_projects(run, docker, projects, parallelism=4, pull=True, check_mode=False):
+    """Deploy projects with at most parallelism concurrent compose calls.
+
+    run is called with an argv list and returns (rc, stdout, stderr). When
+    pull is set, images for every present project are pulled before any
+    container is touched. Results are returned in the order of projects; a
+    failed project does not stop the others.
+    """
+    if not projects:
+        return []
+    workers = max(1, min(parallelism, len(projects)))
+    pulls = [0.0] * len(projects)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if pull and not check_mode:
+            futures = dict(
+                (i, pool.submit(pull_project, run, docker, project))
+                for i, project in enumerate(projects)
+                if project.get("state", "present") == "present"
+            )
+            for i, future in futures.items():
+                pulls[i] = future.result()
+        futures = [
+            pool.submit(deploy_project, run, docker, project, pulls[i], check_mode)
+            for i, project in enumerate(projects)
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Normalization, hashing and diffing of discovered host state.
+
+Shared by the discovery_index module and any controller-side tooling that
+needs to compare two discovery snapshots.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS collector_state (
+    host TEXT NOT NULL,
+    collector TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    state TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    changed_at REAL NOT NULL,
+    PRIMARY KEY (host, collector)
+)
+"""
+
+
+def canonical(value):
+    """Return value with every list sorted so collection order never registers as drift."""
+    if isinstance(value, dict):
+        return dict((str(k), canonical(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        items = [canonical(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    return value
+
+
+def state_hash(value):
+    """SHA-256 of the canonical JSON form of a collector state."""
+    encoded = json.dumps(canonical(value), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _item_key(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def diff_state(previous, current, path=""):
+    """Return a list of drift changes between two canonical states.
+
+    Dicts are compared key by key, lists as sets of items and anything else
+    by value. Each change has a dotted ``path`` and a ``change`` of added,
+    removed or changed.
+    """
+    changes = []
+    if isinstance(previous, dict) and isinstance(current, dict):
+        for key in sorted(set(previous) | set(current)):
+            child = "%s.%s" % (path, key) if path else key
+            if key not in previous:
+                changes.append({"path": child, "change": "added", "value": current[key]})
+            elif key not in current:
+                changes.append({"path": child, "change": "removed", "value": previous[key]})
+            else:
+                changes.extend(diff_state(previous[key], current[key], child))
+    elif isinstance(previous, list) and isinstance(current, list):
+        before = dict((_item_key(v), v) for v in previous)
+        after = dict((_item_key(v), v) for v in current)
+        for key in sorted(set(after) - set(before)):
+            changes.append({"path": path, "change": "added", "value": after[key]})
+        for key in sorted(set(before) - set(after)):
+            changes.append({"path": path, "change": "removed", "value": before[key]})
+    elif previous != current:
+        changes.append({"path": path, "change": "changed", "from": previous, "to": current})
+    return changes
+
+
+class StateIndex:
+    """SQLite index of the last observed state per (host, collector)."""
+
+    def __init__(self, path, timeout=30):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # Many forks update the index concurrently; WAL lets readers proceed during writes
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def hashes(self, host):
+        rows = self.connection.execute("SELECT collector, hash FROM collector_state WHERE host = ?", (host,))
+        return dict(rows.fetchall())
+
+    def state(self, host, collector):
+        row = self.connection.execute(
+            "SELECT state FROM collector_state WHERE host = ? AND collector = ?", (host, collector)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, host, observed, now=None, record=True):
+        """Compare observed collector states with the index and record them.
+
+        Only collectors whose hash differs from the stored one are loaded and
+        diffed. Returns (drift, baselined) where drift maps collector names to
+        change lists and baselined lists collectors seen for the first time.
+        With record=False the index is compared but left untouched.
+        """
+        now = time.time() if now is None else now
+        stored = self.hashes(host)
+        drift = {}
+        baselined = []
+
+        with self.connection:
+            for collector, value in sorted(observed.items()):
+                current = canonical(value)
+                digest = state_hash(current)
+                if stored.get(collector) == digest:
+                    if record:
+                        self.connection.execute(
+                            "UPDATE collector_state SET observed_at = ? WHERE host = ? AND collector = ?",
+                            (now, host, collector),
+                        )
+                    continue
+
+                if collector in stored:
+                    drift[collector] = diff_state(self.state(host, collector), current)
+                else:
+                    baselined.append(collector)
+
+                if record:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO collector_state "
+                        "(host, collector, hash, state, observed_at, changed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (host, collector, digest, json.dumps(current, sort_keys=True), now, now),
+                    )
+        return drift, baselined
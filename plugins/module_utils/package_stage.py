@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Offline package staging for configure_software.
+
+A build host resolves the merged package set of a distribution/release
+group, downloads it with its dependency closure into a directory and turns
+that directory into a flat repository (apt-ftparchive for APT, repo-add for
+pacman). The directory is described by a manifest of file names, sizes and
+SHA-256 digests, which the package_repo_sync action uses to move only
+changed files between the build host, the controller store and the targets.
+Targets install from the staged repository alone, with no upstream sources.
+
+Used by the package_stage, package_repo_sync and staged_packages modules and
+by the package_store on the controller.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+from contextlib import contextmanager
+
+MANIFEST = ".manifest.json"
+CHUNK = 1024 * 1024
+
+APT_INDEX = ["Packages", "Release"]
+PACMAN_REPO = "wolskies-staged"
+PACMAN_INDEX = [PACMAN_REPO + ".db", PACMAN_REPO + ".db.tar.gz", PACMAN_REPO + ".files", PACMAN_REPO + ".files.tar.gz"]
+
+# Dependency kinds apt installs by default; Suggests and negative relations are left out
+APT_DEPENDS = [
+    "--recurse",
+    "--no-suggests",
+    "--no-conflicts",
+    "--no-breaks",
+    "--no-replaces",
+    "--no-enhances",
+]
+
+
+class StagingError(Exception):
+    """A package manager command failed or a staged file does not match the manifest."""
+
+
+def _check(result, what):
+    rc, out, err = result
+    if rc != 0:
+        raise StagingError("%s failed (rc=%d): %s" % (what, rc, (err or out).strip()))
+    return out
+
+
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan(path):
+    """{name: {sha256, size}} of the repository files in path; hidden files are working state."""
+    files = {}
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if name.startswith(".") or not os.path.isfile(full):
+            continue
+        files[name] = dict(sha256=file_sha256(full), size=os.path.getsize(full))
+    return files
+
+
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def write_manifest(path, files):
+    temporary = os.path.join(path, MANIFEST + ".tmp")
+    with open(temporary, "w") as f:
+        json.dump(files, f, indent=2, sort_keys=True)
+    os.replace(temporary, os.path.join(path, MANIFEST))
+
+
+def recorded(path):
+    """Manifest entries whose file is still present with its recorded size."""
+    if not os.path.isdir(path):
+        return {}
+    return dict(
+        (name, entry)
+        for name, entry in read_manifest(path).items()
+        if os.path.isfile(os.path.join(path, name)) and os.path.getsize(os.path.join(path, name)) == entry["size"]
+    )
+
+
+def missing(have, want):
+    """Names in want whose digest differs from, or is absent in, have."""
+    return sorted(name for name, entry in want.items() if have.get(name, {}).get("sha256") != entry["sha256"])
+
+
+def prune(path, keep):
+    """Remove repository files not in keep; returns the removed names."""
+    removed = []
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if not name.startswith(".") and name not in keep and (os.path.isfile(full) or os.path.islink(full)):
+            os.unlink(full)
+            removed.append(name)
+    return removed
+
+
+def pack(path, names, archive):
+    """Write the named files of path into an uncompressed tar; packages are compressed already."""
+    with tarfile.open(archive, "w") as tar:
+        for name in names:
+            tar.add(os.path.join(path, name), arcname=name, recursive=False)
+    return archive
+
+
+@contextmanager
+def _empty():
+    yield []
+
+
+def unpack(archive, path, files):
+    """Extract archive into path and make path hold exactly the files of the manifest.
+
+    Members that are not plain files named in the manifest are ignored.
+    Every extracted file is checked against its digest before it replaces
+    the previous copy. Without an archive only stale files are pruned.
+    Returns (written, removed).
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    written = []
+    with tarfile.open(archive) if archive else _empty() as tar:
+        for member in tar:
+            name = member.name
+            if not member.isfile() or name not in files or "/" in name or name.startswith("."):
+                continue
+            temporary = os.path.join(path, "." + name + ".tmp")
+            source = tar.extractfile(member)
+            with open(temporary, "wb") as f:
+                shutil.copyfileobj(source, f, CHUNK)
+            if file_sha256(temporary) != files[name]["sha256"]:
+                os.unlink(temporary)
+                raise StagingError("%s does not match its manifest digest" % name)
+            os.replace(temporary, os.path.join(path, name))
+            written.append(name)
+    removed = prune(path, files)
+    write_manifest(path, files)
+    return sorted(written), removed
+
+
+# =============================================================================
+# BUILD HOST
+# =============================================================================
+
+
+def package_names(entries, state="present"):
+    """Names of the package entries (dicts with name/state, or plain names) in the given state."""
+    names = []
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            if entry.get("state", "present") == state and entry.get("name"):
+                names.append(entry["name"])
+        elif state == "present":
+            names.append(str(entry))
+    return sorted(set(names))
+
+
+def apt_closure(run, names):
+    """Every real package apt would need to install names on an empty system."""
+    out = _check(run(["apt-cache", "depends"] + APT_DEPENDS + names), "apt-cache depends")
+    # Dependencies are indented; <name> marks a virtual package that some listed package provides
+    return sorted(set(line.strip() for line in out.splitlines() if line.strip() and line[0] not in " \t<|"))
+
+
+def apt_files(run, packages):
+    """{file name: {package, size, sha256}} of the archives apt would download for packages."""
+    out = _check(run(["apt-get", "download", "--print-uris"] + packages), "apt-get download --print-uris")
+    files = {}
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) != 4 or not fields[3].upper().startswith("SHA256:"):
+            continue
+        files[fields[1]] = dict(package=fields[1].split("_", 1)[0], size=int(fields[2]), sha256=fields[3][7:].lower())
+    return files
+
+
+def stage_apt(run, path, names):
+    """Download the closure of names into path and index it as a flat repository.
+
+    Only archives that are missing or differ from the mirror are downloaded.
+    Returns the downloaded file names.
+    """
+    files = apt_files(run, apt_closure(run, names)) if names else {}
+    have = recorded(path)
+    stale = missing(have, files)
+    if stale:
+        packages = sorted(set(files[name]["package"] for name in stale))
+        _check(run(["apt-get", "download"] + packages, cwd=path), "apt-get download")
+    prune(path, files)
+
+    packages_index = _check(run(["apt-ftparchive", "packages", "."], cwd=path), "apt-ftparchive packages")
+    with open(os.path.join(path, "Packages"), "w") as f:
+        f.write(packages_index)
+    release = _check(run(["apt-ftparchive", "release", "."], cwd=path), "apt-ftparchive release")
+    with open(os.path.join(path, "Release"), "w") as f:
+        f.write(release)
+    write_manifest(path, scan(path))
+    return stale
+
+
+def stage_pacman(run, path, names):
+    """Download the closure of names into path and index it as the wolskies-staged repository.
+
+    Resolution uses an empty local database in path/.pacman-db, so the full
+    closure is downloaded regardless of what the build host has installed.
+    pacman skips archives already in path. Returns the downloaded file names.
+    """
+    dbpath = os.path.join(path, ".pacman-db")
+    for directory in (os.path.join(dbpath, "local"), os.path.join(dbpath, "sync")):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+    _check(run(["pacman", "-Sy", "--noconfirm", "--dbpath", dbpath]), "pacman -Sy")
+    files = []
+    if names:
+        out = _check(
+            run(["pacman", "-Sp", "--noconfirm", "--dbpath", dbpath, "--print-format", "%l"] + names), "pacman -Sp"
+        )
+        files = [line.strip().rsplit("/", 1)[-1] for line in out.splitlines() if "://" in line]
+    before = set(os.listdir(path))
+    if files:
+        _check(run(["pacman", "-Sw", "--noconfirm", "--dbpath", dbpath, "--cachedir", path] + names), "pacman -Sw")
+    downloaded = sorted(name for name in files if name not in before)
+
+    prune(path, set(files))
+    database = os.path.join(path, PACMAN_REPO + ".db.tar.gz")
+    if files:
+        _check(run(["repo-add", "-q", database] + [os.path.join(path, name) for name in files]), "repo-add")
+    # repo-add links <repo>.db to the tarball; files are what gets synced, so store copies
+    for name in (PACMAN_REPO + ".db", PACMAN_REPO + ".files"):
+        link = os.path.join(path, name)
+        if os.path.islink(link):
+            target = os.path.realpath(link)
+            os.unlink(link)
+            shutil.copyfile(target, link)
+    write_manifest(path, scan(path))
+    return downloaded
+
+
+# =============================================================================
+# TARGETS
+# =============================================================================
+
+
+def apt_options(path):
+    """apt-get options that make the staged repository its only source."""
+    return [
+        "-o",
+        "Dir::Etc::SourceList=%s" % os.path.join(path, ".staged.list"),
+        "-o",
+        "Dir::Etc::SourceParts=-",
+        "-o",
+        "Dir::State::Lists=%s" % os.path.join(path, ".lists"),
+        "-o",
+        "APT::Get::List-Cleanup=0",
+    ]
+
+
+def write_source(manager, path):
+    """Write the source definition that points the package manager at path."""
+    if manager == "apt":
+        lists = os.path.join(path, ".lists", "partial")
+        if not os.path.isdir(lists):
+            os.makedirs(lists)
+        with open(os.path.join(path, ".staged.list"), "w") as f:
+            f.write("deb [trusted=yes] file:%s ./\n" % path)
+        return
+    # Packages were verified against the Arch keyring when the build host downloaded them
+    # and against the manifest digests on every transfer since
+    with open(os.path.join(path, ".pacman.conf"), "w") as f:
+        f.write("[options]\nArchitecture = auto\nSigLevel = Optional TrustAll\n\n")
+        f.write("[%s]\nServer = file://%s\n" % (PACMAN_REPO, path))
+
+
+def installed(run, manager):
+    """{package: version} of the installed packages."""
+    if manager == "apt":
+        out = _check(run(["dpkg-query", "-W", "-f=${Package} ${Version} ${db:Status-Abbrev}\n"]), "dpkg-query")
+        return dict(
+            (fields[0], fields[1])
+            for fields in (line.split() for line in out.splitlines())
+            if len(fields) == 3 and fields[2].startswith("ii")
+        )
+    out = _check(run(["pacman", "-Q"]), "pacman -Q")
+    return dict(line.split()[:2] for line in out.splitlines() if len(line.split()) >= 2)
+
+
+def install_commands(manager, path, install, remove):
+    """Commands that install from the staged repository only and remove packages."""
+    commands = []
+    if manager == "apt":
+        options = apt_options(path)
+        if install:
+            commands.append(["apt-get", "update", "-q"] + options)
+            commands.append(["apt-get", "install", "-y", "-q"] + options + install)
+        if remove:
+            commands.append(["apt-get", "remove", "-y", "-q"] + options + remove)
+        return commands
+    config = os.path.join(path, ".pacman.conf")
+    if install:
+        commands.append(["pacman", "-Sy", "--noconfirm", "--needed", "--config", config] + install)
+    if remove:
+        commands.append(["pacman", "-R", "--noconfirm"] + remove)
+    return commands
+
+
+def install_staged(run, manager, path, entries, check_mode=False):
+    """Bring the package entries to their state from the staged repository.
+
+    Returns one result per package with name, state, action (installed,
+    removed or unchanged), version and changed.
+    """
+    before = installed(run, manager)
+    present = package_names(entries, "present")
+    absent = package_names(entries, "absent")
+    install = [name for name in present if name not in before]
+    remove = [name for name in absent if name in before]
+
+    after = before
+    if (install or remove) and not check_mode:
+        write_source(manager, path)
+        for argv in install_commands(manager, path, install, remove):
+            _check(run(argv), " ".join(argv[:2]))
+        after = installed(run, manager)
+
+    results = []
+    for name in present + absent:
+        state = "present" if name in present else "absent"
+        action = "unchanged"
+        if name in install:
+            action = "installed"
+        elif name in remove:
+            action = "removed"
+        if not check_mode and action != "unchanged" and (name in after) != (state == "present"):
+            raise StagingError("%s is not %s after staging; is it in the staged repository?" % (name, state))
+        results.append(
+            dict(name=name, state=state, action=action, version=after.get(name), changed=action != "unchanged")
+        )
+    return results
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Declarative state assertions evaluated on the managed host.
+
+Used by the verify_state module so a molecule verify playbook can check
+files, services, packages, sysctl values and command output in one module
+execution instead of one command/stat/slurp round trip plus an assert per
+check. Each assertion is a dict whose kind is given by the one key of
+KINDS it carries (file, service, package, sysctl or command).
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import grp
+import os
+import pwd
+import re
+import shlex
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+KINDS = ("file", "service", "package", "sysctl", "command")
+
+# Keys every assertion may carry besides its kind-specific ones
+COMMON_KEYS = ("name", "when", "fail_msg")
+
+KEYS = {
+    "file": ("state", "mode", "owner", "group", "contains", "absent_content"),
+    "service": ("active", "enabled"),
+    "package": ("installed",),
+    "sysctl": ("value",),
+    "command": ("rc", "stdout", "stderr", "stdout_absent"),
+}
+
+FILE_STATES = ("file", "directory", "link", "exists", "absent")
+
+# Package managers in lookup order: (binary, argv prefix to query one package).
+# dpkg-query also knows removed packages whose config files remain, so its
+# status must end in "ok installed"; the others exit non-zero for those.
+PACKAGE_QUERIES = (
+    ("dpkg-query", ["-W", "-f=${Status} ${Version}"]),
+    ("pacman", ["-Q"]),
+    ("rpm", ["-q"]),
+)
+
+
+class InvalidAssertion(Exception):
+    """An assertion is malformed; reported as a failed result, not raised to the caller."""
+
+
+def assertion_kind(assertion):
+    """The kind of an assertion: the one key of KINDS it carries."""
+    kinds = [kind for kind in KINDS if kind in assertion]
+    if len(kinds) != 1:
+        raise InvalidAssertion("assertion needs exactly one of %s, got %s" % (", ".join(KINDS), kinds or "none"))
+    kind = kinds[0]
+    unknown = sorted(set(assertion) - set((kind,) + KEYS[kind] + COMMON_KEYS))
+    if unknown:
+        raise InvalidAssertion("unsupported keys for a %s assertion: %s" % (kind, ", ".join(unknown)))
+    return kind
+
+
+def default_name(kind, assertion):
+    return "%s %s" % (kind, assertion[kind] if isinstance(assertion[kind], str) else " ".join(assertion[kind]))
+
+
+def _search(pattern, text):
+    return re.search(pattern, text, re.MULTILINE) is not None
+
+
+def _mode(value):
+    """Normalize a mode given as '0644', '644', 0o644 or 420 to '0644'."""
+    if isinstance(value, int):
+        return "%04o" % value
+    return "%04o" % int(str(value), 8)
+
+
+class Context:
+    """Host access shared by the assertions of one run.
+
+    run is called with an argv list and returns (rc, stdout, stderr);
+    get_bin_path returns the path of an executable or None. The package
+    manager is looked up once and reused.
+    """
+
+    def __init__(self, run, get_bin_path):
+        self.run = run
+        self.get_bin_path = get_bin_path
+        self._package_query = None
+
+    def package_query(self):
+        if self._package_query is None:
+            for binary, args in PACKAGE_QUERIES:
+                path = self.get_bin_path(binary)
+                if path:
+                    self._package_query = [path] + args
+                    break
+            else:
+                raise InvalidAssertion("no supported package manager found (dpkg, pacman, rpm)")
+        return self._package_query
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+# Each check returns (actual, [failure messages]); no messages means passed.
+
+
+def check_file(ctx, assertion):
+    path = assertion["file"]
+    state = assertion.get("state", "exists")
+    if state not in FILE_STATES:
+        raise InvalidAssertion("state must be one of %s" % ", ".join(FILE_STATES))
+    try:
+        st = os.lstat(path)
+    except OSError:
+        st = None
+
+    if st is None:
+        return {"exists": False}, [] if state == "absent" else ["%s does not exist" % path]
+    actual = {
+        "exists": True,
+        "type": "link" if stat.S_ISLNK(st.st_mode) else "directory" if stat.S_ISDIR(st.st_mode) else "file",
+        "mode": "%04o" % stat.S_IMODE(st.st_mode),
+    }
+    if state == "absent":
+        return actual, ["%s exists" % path]
+    failures = []
+    if state != "exists" and actual["type"] != state:
+        failures.append("%s is a %s, expected a %s" % (path, actual["type"], state))
+
+    if "owner" in assertion or "group" in assertion:
+        actual["owner"] = _name(pwd.getpwuid, st.st_uid, "pw_name")
+        actual["group"] = _name(grp.getgrgid, st.st_gid, "gr_name")
+    for key, ident in (("owner", st.st_uid), ("group", st.st_gid)):
+        if key in assertion and str(assertion[key]) not in (actual[key], str(ident)):
+            failures.append("%s %s is %s, expected %s" % (path, key, actual[key], assertion[key]))
+    if "mode" in assertion and actual["mode"] != _mode(assertion["mode"]):
+        failures.append("%s mode is %s, expected %s" % (path, actual["mode"], _mode(assertion["mode"])))
+
+    if "contains" in assertion or "absent_content" in assertion:
+        try:
+            with open(path, "rb") as f:
+                content = f.read().decode("utf-8", errors="replace")
+        except (IOError, OSError) as e:
+            return actual, failures + ["cannot read %s: %s" % (path, e)]
+        for pattern in _patterns(assertion.get("contains")):
+            if not _search(pattern, content):
+                failures.append("%s does not match %r" % (path, pattern))
+        for pattern in _patterns(assertion.get("absent_content")):
+            if _search(pattern, content):
+                failures.append("%s unexpectedly matches %r" % (path, pattern))
+    return actual, failures
+
+
+def _name(lookup, ident, attribute):
+    try:
+        return getattr(lookup(ident), attribute)
+    except KeyError:
+        return str(ident)
+
+
+def _patterns(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def check_service(ctx, assertion):
+    name = assertion["service"]
+    systemctl = ctx.get_bin_path("systemctl")
+    if not systemctl:
+        raise InvalidAssertion("systemctl not found")
+    expected = dict((key, bool(assertion.get(key, True))) for key in ("active", "enabled") if key in assertion)
+    if not expected:
+        expected = {"active": True}
+
+    actual = {}
+    failures = []
+    for key, verb in (("active", "is-active"), ("enabled", "is-enabled")):
+        if key not in expected:
+            continue
+        rc, out, err = ctx.run([systemctl, verb, name])
+        actual[key] = (out.strip() or err.strip() or "rc=%d" % rc).splitlines()[0]
+        if (rc == 0) != expected[key]:
+            failures.append("%s is %s, expected %s" % (name, actual[key], key if expected[key] else "not " + key))
+    return actual, failures
+
+
+def check_package(ctx, assertion):
+    name = assertion["package"]
+    expected = bool(assertion.get("installed", True))
+    query = ctx.package_query()
+    rc, out, err = ctx.run(query + [name])
+    installed = rc == 0
+    if installed and os.path.basename(query[0]) == "dpkg-query":
+        _, marker, out = out.partition(" ok installed")
+        installed = bool(marker)
+    actual = {"installed": installed, "version": out.strip() if installed else None}
+    if installed != expected:
+        return actual, ["%s is %s" % (name, "installed" if installed else "not installed")]
+    return actual, []
+
+
+def check_sysctl(ctx, assertion):
+    key = assertion["sysctl"]
+    path = os.path.join("/proc/sys", *key.split("."))
+    try:
+        with open(path) as f:
+            value = f.read()
+    except (IOError, OSError):
+        sysctl = ctx.get_bin_path("sysctl")
+        if not sysctl:
+            raise InvalidAssertion("%s not readable and sysctl not found" % path)
+        rc, value, err = ctx.run([sysctl, "-n", key])
+        if rc != 0:
+            return None, ["sysctl %s: %s" % (key, err.strip() or "not found")]
+    actual = " ".join(value.split())
+    if "value" in assertion and actual != " ".join(str(assertion["value"]).split()):
+        return actual, ["%s is %s, expected %s" % (key, actual, assertion["value"])]
+    return actual, []
+
+
+def check_command(ctx, assertion):
+    command = assertion["command"]
+    argv = shlex.split(command) if isinstance(command, str) else [str(arg) for arg in command]
+    rc, out, err = ctx.run(argv)
+    actual = {"rc": rc, "stdout": out, "stderr": err}
+    failures = []
+    expected_rc = assertion.get("rc", 0)
+    if expected_rc is not None and rc != int(expected_rc):
+        failures.append("exit code %s, expected %s" % (rc, expected_rc))
+    for pattern in _patterns(assertion.get("stdout")):
+        if not _search(pattern, out):
+            failures.append("stdout does not match %r" % pattern)
+    for pattern in _patterns(assertion.get("stderr")):
+        if not _search(pattern, err):
+            failures.append("stderr does not match %r" % pattern)
+    for pattern in _patterns(assertion.get("stdout_absent")):
+        if _search(pattern, out):
+            failures.append("stdout unexpectedly matches %r" % pattern)
+    return actual, failures
+
+
+CHECKS = {
+    "file": check_file,
+    "service": check_service,
+    "package": check_package,
+    "sysctl": check_sysctl,
+    "command": check_command,
+}
+
+
+# =============================================================================
+# EVALUATION
+# =============================================================================
+
+
+def evaluate(ctx, assertion):
+    """Result dict for one assertion; malformed assertions and errors count as failed."""
+    started = time.time()
+    result = {"name": assertion.get("name"), "type": None, "passed": False, "skipped": False, "msg": ""}
+    try:
+        kind = assertion_kind(assertion)
+        result["type"] = kind
+        result["name"] = result["name"] or default_name(kind, assertion)
+        if not assertion.get("when", True):
+            result.update(passed=True, skipped=True, msg="skipped", duration=0.0)
+            return result
+        actual, failures = CHECKS[kind](ctx, assertion)
+        result["actual"] = actual
+    except InvalidAssertion as e:
+        failures = [str(e)]
+    except Exception as e:  # a broken assertion must not hide the results of the others
+        failures = ["%s: %s" % (type(e).__name__, e)]
+
+    result["passed"] = not failures
+    if failures:
+        result["msg"] = assertion.get("fail_msg") or "; ".join(failures)
+    result["duration"] = round(time.time() - started, 4)
+    return result
+
+
+def evaluate_all(ctx, assertions, parallelism=4):
+    """Evaluate assertions with at most parallelism running at once; results keep their order."""
+    if not assertions:
+        return []
+    workers = max(1, min(parallelism, len(assertions)))
+    if workers == 1:
+        return [evaluate(ctx, assertion) for assertion in assertions]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda assertion: evaluate(ctx, assertion), assertions))
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: apt_cache
+short_description: Refresh the APT package index only when it is stale
+description:
+  - Runs C(apt-get update) only when the package index is older than O(valid_time), when an APT source
+    or keyring changed after the last successful update, or when O(force) is set.
+  - Records each update in C(/var/lib/apt/periodic/update-success-stamp), the stamp C(ansible.builtin.apt)
+    uses for C(cache_valid_time), so every role sharing this module refreshes the index at most once per run.
+  - Like C(ansible.builtin.apt) with only C(update_cache), an index refresh does not report C(changed).
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  valid_time:
+    description:
+      - Maximum age in seconds of the package index before it is refreshed.
+      - Set it fleet-wide with C(module_defaults) for C(wolskies.infrastructure.apt_cache).
+    type: int
+    default: 3600
+  force:
+    description: Refresh the index regardless of its age.
+    type: bool
+    default: false
+notes:
+  - Supports check mode; the index is reported as it would be refreshed but not updated.
+"""
+
+EXAMPLES = r"""
+- name: Ensure APT cache is fresh
+  wolskies.infrastructure.apt_cache:
+  become: true
+
+- name: Install packages
+  ansible.builtin.apt:
+    name: [git, curl]
+    state: present
+  become: true
+
+# Allow a day-old index across the whole play
+- hosts: all
+  module_defaults:
+    wolskies.infrastructure.apt_cache:
+      valid_time: 86400
+"""
+
+RETURN = r"""
+cache_updated:
+  description: Whether C(apt-get update) ran.
+  returned: always
+  type: bool
+reason:
+  description: Why the index was considered stale, or null when it was fresh.
+  returned: always
+  type: str
+  sample: sources changed
+cache_update_time:
+  description: Time of the last successful update as a Unix timestamp.
+  returned: always
+  type: int
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.apt_cache import last_update_time, update
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            valid_time=dict(type="int", default=3600),
+            force=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+
+    updated, reason = update(module, module.params["valid_time"], module.params["force"])
+    module.exit_json(
+        changed=False,
+        cache_updated=updated,
+        reason=reason,
+        cache_update_time=int(last_update_time()),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: apt_sources
+short_description: Read all APT source files and normalize them to repository definitions
+description:
+  - Reads C(/etc/apt/sources.list) and every C(.list) and C(.sources) file in C(/etc/apt/sources.list.d) in one
+    module execution and parses both the one-line and the deb822 format.
+  - Returns the repositories in the form of C(apt_repositories_host) entries of the C(configure_software) role,
+    which is also the option set of C(ansible.builtin.deb822_repository).
+  - One-line C(deb) and C(deb-src) lines of the same URI, and lines that differ only in suite, are merged into one
+    repository when the result describes exactly the same sources.
+  - C(signed_by) is the file's own C(Signed-By) or C(signed-by=) option (a keyring path or an inline key). When the
+    file has none, it is the key of the first O(key_mapping) domain found in the repository's URIs.
+  - A repository equal to one already read from an earlier file is returned only once; the dropped copies are
+    listed in RV(duplicates).
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  paths:
+    description: Source files, or directories whose C(.list) and C(.sources) files are read.
+    type: list
+    elements: path
+    default: [/etc/apt/sources.list, /etc/apt/sources.list.d]
+  key_mapping:
+    description:
+      - Signing key URL by domain, for repositories whose source file does not name a key.
+      - A domain mapped to null leaves C(signed_by) unset.
+    type: dict
+    default: {}
+notes:
+  - Supports check mode; the module only reads files.
+  - Repositories are named after their file. A file with several repositories names the second one C(<name>-2)
+    and so on.
+"""
+
+EXAMPLES = r"""
+- name: Read APT sources
+  wolskies.infrastructure.apt_sources:
+    key_mapping:
+      docker.com: https://download.docker.com/linux/ubuntu/gpg
+  register: apt_sources
+
+- name: Manage the same repositories elsewhere
+  ansible.builtin.set_fact:
+    apt_repositories_host: "{{ {ansible_distribution: apt_sources.repositories} }}"
+"""
+
+RETURN = r"""
+repositories:
+  description: Repositories in C(apt_repositories_host) form, in the order APT reads them.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: docker
+      types: deb
+      uris: https://download.docker.com/linux/ubuntu
+      suites: noble
+      components: [stable]
+      signed_by: /etc/apt/keyrings/docker.asc
+      state: present
+      enabled: true
+      architectures: [amd64]
+files:
+  description: Source files that were read.
+  returned: always
+  type: list
+  elements: str
+duplicates:
+  description: Repositories dropped because an earlier file already defines the same sources.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: docker-ce
+      file: /etc/apt/sources.list.d/docker-ce.list
+      same_as: docker
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.apt_sources import (
+    DEFAULT_PATHS,
+    read_file,
+    read_repositories,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            paths=dict(type="list", elements="path", default=DEFAULT_PATHS),
+            key_mapping=dict(type="dict", default={}),
+        ),
+        supports_check_mode=True,
+    )
+
+    def read(path):
+        text = read_file(path)
+        if text is None:
+            module.warn("Could not read APT source file %s" % path)
+        return text
+
+    repositories, files, duplicates = read_repositories(module.params["paths"], module.params["key_mapping"], read)
+    module.exit_json(changed=False, repositories=repositories, files=files, duplicates=duplicates)
+
+
+if __name__ == "__main__":
+    main()
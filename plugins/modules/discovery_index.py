@@ -0,0 +1,153 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: discovery_index
+short_description: Record discovered host state in an incremental index and report drift
+description:
+  - Stores the normalized state of each discovery collector in a SQLite index keyed by host and collector.
+  - Collectors whose state hash matches the index are skipped; only changed collectors are loaded and diffed.
+  - Each difference is appended to a JSON-lines event log as a structured drift event.
+  - "Intended to run on the controller with C(delegate_to: localhost)."
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  host:
+    description: Inventory hostname the state belongs to.
+    type: str
+    required: true
+  collectors:
+    description: Mapping of collector name to the state it discovered.
+    type: dict
+    required: true
+  index:
+    description: Path of the SQLite state index. Created if missing.
+    type: path
+    required: true
+  events:
+    description: Path of the JSON-lines drift event log. Events are not written when omitted.
+    type: path
+notes:
+  - The first observation of a host/collector pair is recorded as a baseline and produces no drift events.
+  - Safe to run from many forks at once; SQLite locking serializes index writes.
+"""
+
+EXAMPLES = r"""
+- name: Record discovered state and report drift
+  wolskies.infrastructure.discovery_index:
+    host: "{{ inventory_hostname }}"
+    index: "{{ playbook_dir }}/.discovery/index.sqlite"
+    events: "{{ playbook_dir }}/.discovery/drift.jsonl"
+    collectors:
+      packages: "{{ discovery_packages_host }}"
+      firewall:
+        enabled: "{{ discovery_firewall_enabled }}"
+        rules: "{{ discovery_firewall_rules }}"
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+drift:
+  description: Drift events produced by this run.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - host: web01
+      collector: packages
+      path: ""
+      change: added
+      value: nginx
+      timestamp: "2026-01-01T00:00:00Z"
+drifted:
+  description: Collectors whose state changed since the last observation.
+  returned: always
+  type: list
+  elements: str
+baselined:
+  description: Collectors observed for the first time.
+  returned: always
+  type: list
+  elements: str
+unchanged:
+  description: Collectors whose state hash matched the index.
+  returned: always
+  type: list
+  elements: str
+"""
+
+import fcntl
+import json
+import os
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.drift import StateIndex
+
+
+def append_events(path, events):
+    """Append events to a JSON-lines file in one locked write."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    payload = "".join(json.dumps(event, sort_keys=True) + "\n" for event in events)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(payload)
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            host=dict(type="str", required=True),
+            collectors=dict(type="dict", required=True),
+            index=dict(type="path", required=True),
+            events=dict(type="path"),
+        ),
+        supports_check_mode=True,
+    )
+
+    host = module.params["host"]
+    now = time.time()
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now))
+
+    index = StateIndex(module.params["index"])
+    try:
+        drift, baselined = index.update(host, module.params["collectors"], now, record=not module.check_mode)
+    except Exception as e:  # sqlite3 errors carry no useful type hierarchy for users
+        module.fail_json(msg="Failed to update discovery index %s: %s" % (module.params["index"], e))
+    finally:
+        index.close()
+
+    events = []
+    for collector, changes in sorted(drift.items()):
+        for change in changes:
+            event = dict(host=host, collector=collector, timestamp=timestamp)
+            event.update(change)
+            events.append(event)
+
+    if events and module.params["events"] and not module.check_mode:
+        append_events(module.params["events"], events)
+
+    module.exit_json(
+        changed=bool(events),
+        drift=events,
+        drifted=sorted(drift),
+        baselined=baselined,
+        unchanged=sorted(set(module.params["collectors"]) - set(drift) - set(baselined)),
+    )
+
+
+if __name__ == "__main__":
+    main()
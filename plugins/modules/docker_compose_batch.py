@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: docker_compose_batch
+short_description: Bring many Docker Compose projects up or down concurrently
+description:
+  - Runs C(docker compose up --detach) or C(docker compose down) for a list of project directories, with at most
+    O(parallelism) projects deploying at the same time.
+  - Images of every project are pulled concurrently before any running container is touched, so pull time does not
+    add to downtime.
+  - A project is recreated only when the SHA-256 of its rendered C(docker-compose.yml) and C(.env) differs from the
+    one recorded at its last deployment (stored in C(.config-hash) in the project directory), when one of its image
+    tags now resolves to a different image ID than its containers run, or when O(projects[].recreate) is set.
+  - Reports the duration of each project and, for recreated projects, how long its containers were down.
+  - A failed project does not stop the others; the module fails after all projects finished.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  projects:
+    description: Compose projects to deploy.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description: Name used when reporting the project.
+        type: str
+        required: true
+      path:
+        description: Project directory holding C(docker-compose.yml).
+        type: path
+        required: true
+      state:
+        description: Whether the project should be running or removed.
+        type: str
+        choices: [present, absent]
+        default: present
+      recreate:
+        description: Recreate the project's containers even if their configuration and images are unchanged.
+        type: bool
+        default: false
+  parallelism:
+    description: Maximum number of projects pulled or deployed at the same time.
+    type: int
+    default: 4
+  pull:
+    description: Pull the images of every present project before deploying any of them.
+    type: bool
+    default: true
+requirements:
+  - Docker with the Compose v2 plugin on the target host
+notes:
+  - Supports check mode. Images are not pulled, so only images already present on the host are compared, and
+    the config hash is taken from the files as they are on disk.
+"""
+
+EXAMPLES = r"""
+- name: Bring up Docker Compose services
+  wolskies.infrastructure.docker_compose_batch:
+    parallelism: 6
+    projects:
+      - name: nginx
+        path: /srv/docker/nginx
+      - name: postgres
+        path: /srv/docker/postgres
+        recreate: true
+      - name: legacy
+        path: /srv/docker/legacy
+        state: absent
+  become: true
+"""
+
+RETURN = r"""
+projects:
+  description: Result of each project, in the order given.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: nginx
+      state: present
+      action: recreated
+      reasons: [image changed]
+      recreated: true
+      changed: true
+      rc: 0
+      pull_duration: 12.8
+      duration: 3.41
+      downtime: 3.41
+      stderr: ""
+duration:
+  description: Wall-clock seconds for the whole batch.
+  returned: always
+  type: float
+"""
+
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.compose_batch import deploy_projects
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            projects=dict(
+                type="list",
+                elements="dict",
+                required=True,
+                options=dict(
+                    name=dict(type="str", required=True),
+                    path=dict(type="path", required=True),
+                    state=dict(type="str", choices=["present", "absent"], default="present"),
+                    recreate=dict(type="bool", default=False),
+                ),
+            ),
+            parallelism=dict(type="int", default=4),
+            pull=dict(type="bool", default=True),
+        ),
+        supports_check_mode=True,
+    )
+
+    docker = module.get_bin_path("docker", required=True)
+    started = time.time()
+    results = deploy_projects(
+        module.run_command,
+        docker,
+        module.params["projects"],
+        module.params["parallelism"],
+        pull=module.params["pull"],
+        check_mode=module.check_mode,
+    )
+    duration = round(time.time() - started, 2)
+
+    failed = [r["name"] for r in results if r["rc"] != 0]
+    if failed:
+        module.fail_json(
+            msg="Docker Compose failed for: %s" % ", ".join(failed),
+            changed=any(r["changed"] for r in results),
+            projects=results,
+            duration=duration,
+        )
+    module.exit_json(changed=any(r["changed"] for r in results), projects=results, duration=duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: docker_image_sync
+short_description: Distribute Docker images from a controller-side store instead of a registry
+description:
+  - Resolves each image on the controller, saves it once with C(docker save) into a content-addressed store named
+    after its image ID, and copies to each target only the tarballs of images the target does not have.
+  - Targets run C(docker load) instead of C(docker pull); no registry access is needed on the controller or the
+    targets.
+  - The same image used by several services or hosts is saved and stored once.
+  - Images are looked up in the controller's Docker first. When it is missing there, the store's C(refs.json)
+    index is used, so a store copied from another machine works without a local Docker daemon.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  images:
+    description: Image names to make available on the target, for example C(nginx:alpine).
+    type: list
+    elements: str
+    required: true
+  store:
+    description: Directory on the controller holding the image store. Created if missing.
+    type: path
+    required: true
+  resolved:
+    description:
+      - Set by the action plugin; not meant to be set in tasks.
+      - The images resolved on the controller, with the target-side path of their tarball when it was transferred.
+    type: list
+    elements: dict
+    default: []
+    suboptions:
+      name:
+        description: Image name.
+        type: str
+        required: true
+      id:
+        description: Image ID.
+        type: str
+        required: true
+      src:
+        description: Tarball to load when the target does not have the image.
+        type: path
+requirements:
+  - Docker on the target host
+  - Docker on the controller, unless every image is already in the store
+notes:
+  - Implemented as an action plugin; the module part runs on the target to compare image IDs and load tarballs.
+  - Tarballs are the unit of transfer; images whose ID the target already has are never sent.
+  - Supports check mode; images that would be loaded are reported without transferring them.
+"""
+
+EXAMPLES = r"""
+- name: Sync service images from the controller store
+  wolskies.infrastructure.docker_image_sync:
+    store: "{{ playbook_dir }}/.docker-images"
+    images:
+      - nginx:alpine
+      - postgres:15
+  become: true
+"""
+
+RETURN = r"""
+images:
+  description: Result for each image.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: nginx:alpine
+      id: sha256:4a2b...
+      action: loaded
+saved:
+  description: Image IDs written to the controller store by this task.
+  returned: always
+  type: list
+  elements: str
+transferred:
+  description: Bytes of tarballs copied to the target.
+  returned: always
+  type: int
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+def local_images(module, docker):
+    """Return (image IDs, tag to ID) for the images on this host."""
+    rc, out, err = module.run_command(
+        [docker, "image", "ls", "--all", "--no-trunc", "--format", "{{.ID}} {{.Repository}}:{{.Tag}}"]
+    )
+    if rc != 0:
+        module.fail_json(msg="Failed to list Docker images: %s" % err.strip())
+    ids = set()
+    tags = {}
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) != 2:
+            continue
+        ids.add(fields[0])
+        tags[fields[1]] = fields[0]
+    return ids, tags
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            images=dict(type="list", elements="str", required=True),
+            store=dict(type="path", required=True),
+            resolved=dict(
+                type="list",
+                elements="dict",
+                default=[],
+                options=dict(
+                    name=dict(type="str", required=True),
+                    id=dict(type="str", required=True),
+                    src=dict(type="path"),
+                ),
+            ),
+        ),
+        supports_check_mode=True,
+    )
+
+    docker = module.get_bin_path("docker", required=True)
+    ids, tags = local_images(module, docker)
+    results = []
+    changed = False
+    for image in module.params["resolved"]:
+        name, image_id, src = image["name"], image["id"], image["src"]
+        if image_id not in ids:
+            if not src:
+                results.append(dict(name=name, id=image_id, action="missing"))
+                continue
+            if not module.check_mode:
+                rc, out, err = module.run_command([docker, "load", "--quiet", "--input", src])
+                if rc != 0:
+                    module.fail_json(msg="docker load of %s failed: %s" % (name, err.strip()), images=results)
+            ids.add(image_id)
+            action = "loaded"
+        elif tags.get(name) != image_id:
+            action = "tagged"
+        else:
+            results.append(dict(name=name, id=image_id, action="present"))
+            continue
+
+        # A loaded tarball restores its own tags; tag explicitly for images saved under another name
+        if not module.check_mode:
+            rc, out, err = module.run_command([docker, "tag", image_id, name])
+            if rc != 0:
+                module.fail_json(msg="Failed to tag %s as %s: %s" % (image_id, name, err.strip()), images=results)
+        tags[name] = image_id
+        changed = True
+        results.append(dict(name=name, id=image_id, action=action))
+
+    module.exit_json(changed=changed, images=results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: flatpak_batch
+short_description: Install and remove many flatpaks in one transaction
+description:
+  - Reads the installed flatpaks once with C(flatpak list), then installs every missing package with a single
+    C(flatpak install) and removes every unwanted one with a single C(flatpak uninstall).
+  - Compared with looping C(community.general.flatpak), which lists the installation and starts a transaction
+    per package, runtimes shared by several applications are resolved and downloaded once.
+  - Reports the action taken for each package. When a transaction fails the installation is listed again, so
+    packages that did reach their state are still reported as changed and only the others as failed.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  packages:
+    description: Flatpaks to manage.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description: Application ID, optionally with a branch (C(org.gimp.GIMP) or C(org.gimp.GIMP//stable)).
+        type: str
+        required: true
+      state:
+        description: Whether the flatpak should be installed.
+        type: str
+        choices: [present, absent]
+        default: present
+  remote:
+    description: Remote new flatpaks are installed from.
+    type: str
+    default: flathub
+  method:
+    description: Whether to manage the system-wide or the current user's installation.
+    type: str
+    choices: [system, user]
+    default: system
+requirements:
+  - flatpak 1.2 or later on the target host
+notes:
+  - Supports check mode.
+  - An installed flatpak is matched by application ID only, so changing the branch of an installed flatpak
+    is not detected.
+"""
+
+EXAMPLES = r"""
+- name: Manage flatpak packages
+  wolskies.infrastructure.flatpak_batch:
+    packages:
+      - name: org.mozilla.firefox
+      - name: org.gimp.GIMP
+      - name: com.spotify.Client
+        state: absent
+  become: true
+"""
+
+RETURN = r"""
+packages:
+  description: Result of each package, in the order given.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: org.mozilla.firefox
+      state: present
+      action: installed
+      changed: true
+      msg: ""
+installed:
+  description: Flatpaks installed by this run.
+  returned: always
+  type: list
+  elements: str
+removed:
+  description: Flatpaks removed by this run.
+  returned: always
+  type: list
+  elements: str
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.app_packages import (
+    CommandError,
+    apply,
+    deduplicate,
+    flatpak_commands,
+    flatpak_id,
+    flatpak_installed,
+    plan,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            packages=dict(
+                type="list",
+                elements="dict",
+                required=True,
+                options=dict(
+                    name=dict(type="str", required=True),
+                    state=dict(type="str", choices=["present", "absent"], default="present"),
+                ),
+            ),
+            remote=dict(type="str", default="flathub"),
+            method=dict(type="str", choices=["system", "user"], default="system"),
+        ),
+        supports_check_mode=True,
+    )
+
+    flatpak = module.get_bin_path("flatpak", required=True)
+    method = module.params["method"]
+
+    def run(argv):
+        return module.run_command(argv, environ_update={"LANG": "C", "LC_ALL": "C"})
+
+    def query():
+        return flatpak_installed(run, flatpak, method)
+
+    packages = deduplicate(module.params["packages"])
+    try:
+        install, remove = plan(packages, query(), key=flatpak_id)
+        commands = flatpak_commands(flatpak, method, module.params["remote"], install, remove)
+        results = apply(run, query, packages, commands, key=flatpak_id, check_mode=module.check_mode)
+    except CommandError as e:
+        module.fail_json(msg=str(e), rc=e.rc, stderr=e.stderr)
+
+    summary = dict(
+        changed=any(r["changed"] for r in results),
+        packages=results,
+        installed=[r["name"] for r in results if r["action"] == "installed"],
+        removed=[r["name"] for r in results if r["action"] == "removed"],
+    )
+    failed = [r["name"] for r in results if r["action"] == "failed"]
+    if failed:
+        module.fail_json(msg="flatpak failed for: %s" % ", ".join(failed), **summary)
+    module.exit_json(**summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: package_repo_sync
+short_description: Move a staged package repository between a build host, the controller and targets
+description:
+  - Synchronizes a flat package repository built by M(wolskies.infrastructure.package_stage) through a store on
+    the controller, one directory per staging group.
+  - With O(direction=pull) the repository in O(path) on the build host is copied into the store. With
+    O(direction=push) the stored repository is copied to O(path) on the target.
+  - Both sides keep a C(.manifest.json) of file names, sizes and SHA-256 digests. Only files whose digest differs
+    are sent, packed into a single uncompressed tar archive per task, and files no longer in the repository are
+    removed.
+  - Every received file is checked against its digest before it replaces the previous copy.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  direction:
+    description: C(pull) copies from the host into the store, C(push) from the store to the host.
+    type: str
+    choices: [pull, push]
+    required: true
+  store:
+    description: Directory on the controller holding the staged repositories. Created if missing.
+    type: path
+    required: true
+  group:
+    description: Staging group, the store subdirectory of the repository, for example C(ubuntu-noble-x86_64).
+    type: str
+    required: true
+  path:
+    description: Repository directory on the host.
+    type: path
+    required: true
+  pack:
+    description:
+      - Set by the action plugin; not meant to be set in tasks.
+      - Files of O(path) to pack into O(archive) for a pull.
+    type: list
+    elements: str
+  archive:
+    description:
+      - Set by the action plugin; not meant to be set in tasks.
+      - Tar archive to write for a pull, or to unpack into O(path) for a push.
+    type: path
+  files:
+    description:
+      - Set by the action plugin; not meant to be set in tasks.
+      - Manifest O(path) must match after a push.
+    type: dict
+notes:
+  - Implemented as an action plugin; the module part runs on the host to report its manifest and pack or unpack
+    archives.
+  - Supports check mode; the files that would be transferred or removed are reported without changing anything.
+seealso:
+  - module: wolskies.infrastructure.package_stage
+  - module: wolskies.infrastructure.staged_packages
+"""
+
+EXAMPLES = r"""
+- name: Pull the staged repository from the build host
+  wolskies.infrastructure.package_repo_sync:
+    direction: pull
+    store: "{{ playbook_dir }}/.staged-packages"
+    group: ubuntu-noble-x86_64
+    path: /var/cache/wolskies/package-build/ubuntu-noble-x86_64
+  delegate_to: build01
+  run_once: true
+
+- name: Push it to every host of the group
+  wolskies.infrastructure.package_repo_sync:
+    direction: push
+    store: "{{ playbook_dir }}/.staged-packages"
+    group: ubuntu-noble-x86_64
+    path: /var/cache/wolskies/staged-packages
+  become: true
+"""
+
+RETURN = r"""
+files:
+  description: Files transferred by this task; for the module part alone, the host's manifest.
+  returned: always
+  type: raw
+  sample: [htop_3.3.0-4build1_amd64.deb, Packages, Release]
+removed:
+  description: Files removed because they are no longer part of the repository.
+  returned: always
+  type: list
+  elements: str
+transferred:
+  description: Bytes of repository files sent.
+  returned: always
+  type: int
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.package_stage import (
+    StagingError,
+    pack,
+    recorded,
+    unpack,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            direction=dict(type="str", choices=["pull", "push"], required=True),
+            store=dict(type="path", required=True),
+            group=dict(type="str", required=True),
+            path=dict(type="path", required=True),
+            pack=dict(type="list", elements="str"),
+            archive=dict(type="path"),
+            files=dict(type="dict"),
+        ),
+        supports_check_mode=True,
+    )
+    path = module.params["path"]
+
+    if module.params["pack"]:
+        if not module.params["archive"]:
+            module.fail_json(msg="pack needs an archive to write")
+        try:
+            pack(path, module.params["pack"], module.params["archive"])
+        except (IOError, OSError) as e:
+            module.fail_json(msg="Failed to pack %s: %s" % (path, e))
+        module.exit_json(changed=False, files=module.params["pack"], removed=[])
+
+    if module.params["files"] is not None:
+        if module.check_mode:
+            module.exit_json(changed=False, files=[], removed=[])
+        try:
+            written, removed = unpack(module.params["archive"], path, module.params["files"])
+        except (StagingError, IOError, OSError) as e:
+            module.fail_json(msg="Failed to update %s: %s" % (path, e))
+        module.exit_json(changed=bool(written or removed), files=written, removed=removed)
+
+    module.exit_json(changed=False, files=recorded(path), removed=[])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: package_stage
+short_description: Download packages and their dependency closure into a local flat repository
+description:
+  - Runs on a build host of the same distribution, release and architecture as the targets. Resolves the full
+    dependency closure of O(packages) as if nothing were installed, and downloads every package of it into O(path).
+  - For C(apt), the closure follows C(Depends), C(Pre-Depends) and C(Recommends), which is what C(apt-get install)
+    installs by default. The directory is indexed with C(apt-ftparchive) as a flat repository.
+  - For C(pacman), the closure is resolved against an empty local database in C(<path>/.pacman-db) and the
+    directory is indexed with C(repo-add) as the C(wolskies-staged) repository.
+  - Only packages that are missing from O(path) or whose version changed on the mirrors are downloaded. Packages no
+    longer in the closure are removed.
+  - Writes C(<path>/.manifest.json) for M(wolskies.infrastructure.package_repo_sync).
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  manager:
+    description: Package manager of the group.
+    type: str
+    choices: [apt, pacman]
+    required: true
+  packages:
+    description:
+      - Packages to stage, as names or C(manage_packages_*) entries with C(name) and C(state).
+      - Entries with C(state=absent) are ignored.
+    type: list
+    elements: raw
+    required: true
+  path:
+    description: Repository directory on the build host. Created if missing.
+    type: path
+    required: true
+  cache_valid_time:
+    description: For C(apt), refresh the package index first when it is older than this many seconds.
+    type: int
+    default: 3600
+requirements:
+  - apt-utils (C(apt-ftparchive)) on APT build hosts
+notes:
+  - Does not support check mode.
+  - The build host needs access to the mirrors; the targets do not.
+seealso:
+  - module: wolskies.infrastructure.package_repo_sync
+  - module: wolskies.infrastructure.staged_packages
+"""
+
+EXAMPLES = r"""
+- name: Stage the packages of the Ubuntu 24.04 hosts
+  wolskies.infrastructure.package_stage:
+    manager: apt
+    packages: "{{ _final_packages['Ubuntu'] }}"
+    path: /var/cache/wolskies/package-build/ubuntu-noble-x86_64
+  delegate_to: build01
+  run_once: true
+  become: true
+"""
+
+RETURN = r"""
+packages:
+  description: Requested package names that were staged.
+  returned: always
+  type: list
+  elements: str
+downloaded:
+  description: Files downloaded by this run.
+  returned: always
+  type: list
+  elements: str
+files:
+  description: Manifest of the repository, file name to C(sha256) and C(size).
+  returned: always
+  type: dict
+"""
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.apt_cache import update
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.package_stage import (
+    StagingError,
+    package_names,
+    read_manifest,
+    stage_apt,
+    stage_pacman,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            manager=dict(type="str", choices=["apt", "pacman"], required=True),
+            packages=dict(type="list", elements="raw", required=True),
+            path=dict(type="path", required=True),
+            cache_valid_time=dict(type="int", default=3600),
+        ),
+        supports_check_mode=False,
+    )
+    manager, path = module.params["manager"], module.params["path"]
+    names = package_names(module.params["packages"])
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    def run(argv, cwd=None):
+        return module.run_command(argv, cwd=cwd, environ_update=dict(DEBIAN_FRONTEND="noninteractive", LC_ALL="C"))
+
+    try:
+        if manager == "apt":
+            update(module, module.params["cache_valid_time"])
+            downloaded = stage_apt(run, path, names)
+        else:
+            downloaded = stage_pacman(run, path, names)
+    except (StagingError, IOError, OSError) as e:
+        module.fail_json(msg=str(e), packages=names)
+
+    module.exit_json(changed=bool(downloaded), packages=names, downloaded=downloaded, files=read_manifest(path))
+
+
+if __name__ == "__main__":
+    main()
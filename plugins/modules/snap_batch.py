@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: snap_batch
+short_description: Install and remove many snaps with one snap call each way
+description:
+  - Reads the installed snaps once with C(snap list), then installs every missing snap with a single C(snap install)
+    and removes every unwanted one with a single C(snap remove).
+  - snap accepts C(--classic) and C(--channel) only with a single snap name, so snaps that set O(packages[].classic)
+    or O(packages[].channel) are installed one call each.
+  - Base snaps (C(core), C(core18) and later, C(bare), C(snapd)) are removed in a second call after the snaps that
+    use them.
+  - Reports the action taken for each snap. When a call fails the installed snaps are listed again, so snaps that
+    did reach their state are still reported as changed and only the others as failed.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  packages:
+    description: Snaps to manage.
+    type: list
+    elements: dict
+    default: []
+    suboptions:
+      name:
+        description: Snap name.
+        type: str
+        required: true
+      state:
+        description: Whether the snap should be installed.
+        type: str
+        choices: [present, absent]
+        default: present
+      classic:
+        description: Install the snap in classic confinement.
+        type: bool
+        default: false
+      channel:
+        description: Channel to install the snap from.
+        type: str
+  remove_all:
+    description:
+      - Remove every installed snap, base snaps last. Snaps listed in O(packages) with O(packages[].state=present)
+        are kept.
+    type: bool
+    default: false
+requirements:
+  - snapd on the target host
+notes:
+  - Supports check mode.
+  - O(packages[].channel) applies when a snap is installed; an installed snap is not switched to another channel.
+"""
+
+EXAMPLES = r"""
+- name: Manage snap packages
+  wolskies.infrastructure.snap_batch:
+    packages:
+      - name: code
+        classic: true
+      - name: discord
+      - name: spotify
+      - name: chromium
+        state: absent
+  become: true
+
+- name: Remove all installed snap packages
+  wolskies.infrastructure.snap_batch:
+    remove_all: true
+  become: true
+"""
+
+RETURN = r"""
+packages:
+  description: Result of each snap, in the order given, followed by those removed by O(remove_all).
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: code
+      state: present
+      action: installed
+      changed: true
+      msg: ""
+installed:
+  description: Snaps installed by this run.
+  returned: always
+  type: list
+  elements: str
+removed:
+  description: Snaps removed by this run.
+  returned: always
+  type: list
+  elements: str
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.app_packages import (
+    CommandError,
+    apply,
+    deduplicate,
+    plan,
+    snap_commands,
+    snap_installed,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            packages=dict(
+                type="list",
+                elements="dict",
+                default=[],
+                options=dict(
+                    name=dict(type="str", required=True),
+                    state=dict(type="str", choices=["present", "absent"], default="present"),
+                    classic=dict(type="bool", default=False),
+                    channel=dict(type="str"),
+                ),
+            ),
+            remove_all=dict(type="bool", default=False),
+        ),
+        supports_check_mode=True,
+    )
+
+    snap = module.get_bin_path("snap", required=True)
+
+    def run(argv):
+        return module.run_command(argv, environ_update={"LANG": "C", "LC_ALL": "C"})
+
+    def query():
+        return snap_installed(run, snap)
+
+    packages = deduplicate(module.params["packages"])
+    try:
+        installed = query()
+        if module.params["remove_all"]:
+            requested = set(p["name"] for p in packages)
+            packages += [dict(name=name, state="absent") for name in sorted(installed - requested)]
+        install, remove = plan(packages, installed)
+        results = apply(run, query, packages, snap_commands(snap, install, remove), check_mode=module.check_mode)
+    except CommandError as e:
+        module.fail_json(msg=str(e), rc=e.rc, stderr=e.stderr)
+
+    summary = dict(
+        changed=any(r["changed"] for r in results),
+        packages=results,
+        installed=[r["name"] for r in results if r["action"] == "installed"],
+        removed=[r["name"] for r in results if r["action"] == "removed"],
+    )
+    failed = [r["name"] for r in results if r["action"] == "failed"]
+    if failed:
+        module.fail_json(msg="snap failed for: %s" % ", ".join(failed), **summary)
+    module.exit_json(**summary)
+
+
+if __name__ == "__main__":
+    main()
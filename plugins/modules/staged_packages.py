@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: staged_packages
+short_description: Install packages from a staged local repository only
+description:
+  - Installs the missing packages of O(packages) in one package manager call, using the repository in O(path) as
+    the only package source. Upstream mirrors are never contacted.
+  - For C(apt), the staged repository is read through its own source list and list directory in O(path), so the
+    host's sources and package lists are left untouched.
+  - For C(pacman), a C(pacman.conf) naming only the C(wolskies-staged) repository is written to O(path).
+  - Packages with C(state=absent) are removed with the host's own configuration.
+  - Installed packages are left at their version, like C(state=present) of the package manager modules.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  manager:
+    description: Package manager of the host.
+    type: str
+    choices: [apt, pacman]
+    required: true
+  packages:
+    description: Package names, or C(manage_packages_*) entries with C(name) and optional C(state).
+    type: list
+    elements: raw
+    required: true
+  path:
+    description: Staged repository on the host, as written by M(wolskies.infrastructure.package_repo_sync).
+    type: path
+    required: true
+notes:
+  - Supports check mode; the packages that would be installed or removed are reported.
+  - A package that is not installed after the run, for example because it was not staged, fails the task.
+seealso:
+  - module: wolskies.infrastructure.package_stage
+  - module: wolskies.infrastructure.package_repo_sync
+"""
+
+EXAMPLES = r"""
+- name: Install packages from the staged repository
+  wolskies.infrastructure.staged_packages:
+    manager: apt
+    path: /var/cache/wolskies/staged-packages
+    packages:
+      - htop
+      - name: telnet
+        state: absent
+  become: true
+"""
+
+RETURN = r"""
+packages:
+  description: Result for each package.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: htop
+      state: present
+      action: installed
+      version: 3.3.0-4build1
+      changed: true
+installed:
+  description: Names of the packages installed.
+  returned: always
+  type: list
+  elements: str
+removed:
+  description: Names of the packages removed.
+  returned: always
+  type: list
+  elements: str
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.package_stage import (
+    StagingError,
+    install_staged,
+)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            manager=dict(type="str", choices=["apt", "pacman"], required=True),
+            packages=dict(type="list", elements="raw", required=True),
+            path=dict(type="path", required=True),
+        ),
+        supports_check_mode=True,
+    )
+
+    def run(argv, cwd=None):
+        return module.run_command(argv, cwd=cwd, environ_update=dict(DEBIAN_FRONTEND="noninteractive", LC_ALL="C"))
+
+    try:
+        results = install_staged(
+            run, module.params["manager"], module.params["path"], module.params["packages"], module.check_mode
+        )
+    except (StagingError, IOError, OSError) as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(
+        changed=any(r["changed"] for r in results),
+        packages=results,
+        installed=[r["name"] for r in results if r["action"] == "installed"],
+        removed=[r["name"] for r in results if r["action"] == "removed"],
+    )
+
+
+if __name__ == "__main__":
+    main()
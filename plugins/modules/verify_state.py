@@ -0,0 +1,145 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: verify_state
+short_description: Evaluate many declarative state assertions on a host in one execution
+description:
+  - Checks files, services, packages, sysctl values and command output on the managed host and reports a result for
+    every assertion.
+  - Meant for molecule C(verify.yml) playbooks. A list of assertions replaces one C(command), C(stat) or C(slurp)
+    task plus an C(assert) task per check, so a verify phase costs one module round trip per host instead of one per
+    check.
+  - Each assertion is a dict with exactly one of the keys C(file), C(service), C(package), C(sysctl) or C(command),
+    which selects its kind; the other keys it accepts depend on that kind (see O(assertions)).
+  - Assertions never change the host. A malformed assertion, or one that raises an error, counts as failed without
+    stopping the others.
+version_added: "1.4.0"
+author:
+  - wolskies.infrastructure contributors
+options:
+  assertions:
+    description:
+      - Assertions to evaluate. Every assertion accepts C(name) (reported instead of a generated name), C(fail_msg)
+        (reported instead of the generated failure message) and C(when) (a boolean, usually templated on the
+        controller; a false C(when) reports the assertion as skipped).
+      - "C(file: <path>) with C(state) (V(exists) default, V(file), V(directory), V(link) or V(absent)), C(mode)
+        (octal string such as V('0644')), C(owner) and C(group) (name or numeric ID), C(contains) and
+        C(absent_content) (a regular expression or list of them, matched per line against the file content)."
+      - "C(service: <unit>) with C(active) and C(enabled) (booleans; C(active=true) when neither is given), checked
+        with C(systemctl is-active) and C(systemctl is-enabled)."
+      - "C(package: <name>) with C(installed) (default V(true)), queried with C(dpkg-query), C(pacman) or C(rpm),
+        whichever the host has."
+      - "C(sysctl: <key>) with C(value), read from C(/proc/sys) (C(sysctl -n) as a fallback) and compared with
+        whitespace normalized."
+      - "C(command: <command line or argv list>) with C(rc) (default V(0), V(null) to accept any), C(stdout),
+        C(stderr) and C(stdout_absent) (regular expressions or lists of them). The command runs without a shell."
+    type: list
+    elements: dict
+    required: true
+  parallelism:
+    description: Maximum number of assertions evaluated at the same time.
+    type: int
+    default: 4
+  fail_on_failure:
+    description: Fail the task when any assertion fails. When false, the results are returned for the play to handle.
+    type: bool
+    default: true
+notes:
+  - Supports check mode; assertions only read state, so they run normally.
+"""
+
+EXAMPLES = r"""
+- name: Verify the configured host state
+  wolskies.infrastructure.verify_state:
+    assertions:
+      - name: REQ-OS-003 timezone
+        command: timedatectl show --property=Timezone --value
+        stdout: "^{{ domain_timezone }}$"
+        when: "{{ ansible_virtualization_type != 'docker' }}"
+      - file: /etc/ssh/sshd_config
+        mode: "0600"
+        contains: ^PermitRootLogin no$
+      - file: /home/testdev/.terminfo
+        state: directory
+        owner: testdev
+      - service: fail2ban
+        active: true
+        enabled: true
+      - package: telnet
+        installed: false
+      - sysctl: net.ipv4.ip_forward
+        value: 0
+  become: true
+"""
+
+RETURN = r"""
+results:
+  description: Result of each assertion, in the order given.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - name: file /etc/ssh/sshd_config
+      type: file
+      passed: false
+      skipped: false
+      msg: "/etc/ssh/sshd_config mode is 0644, expected 0600"
+      actual: {exists: true, type: file, mode: "0644"}
+      duration: 0.0002
+passed:
+  description: Number of assertions that passed, skipped ones included.
+  returned: always
+  type: int
+failures:
+  description: Names of the assertions that failed.
+  returned: always
+  type: list
+  elements: str
+duration:
+  description: Wall-clock seconds for all assertions.
+  returned: always
+  type: float
+"""
+
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.verify_state import Context, evaluate_all
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            assertions=dict(type="list", elements="dict", required=True),
+            parallelism=dict(type="int", default=4),
+            fail_on_failure=dict(type="bool", default=True),
+        ),
+        supports_check_mode=True,
+    )
+
+    ctx = Context(module.run_command, lambda name: module.get_bin_path(name, required=False))
+    started = time.time()
+    results = evaluate_all(ctx, module.params["assertions"], module.params["parallelism"])
+    duration = round(time.time() - started, 4)
+
+    failed = [r["name"] for r in results if not r["passed"]]
+    summary = dict(
+        changed=False, results=results, passed=len(results) - len(failed), failures=failed, duration=duration
+    )
+    if failed and module.params["fail_on_failure"]:
+        module.fail_json(
+            msg="%d of %d assertions failed: %s" % (len(failed), len(results), ", ".join(failed)), **summary
+        )
+    module.exit_json(**summary)
+
+
+if __name__ == "__main__":
+    main()
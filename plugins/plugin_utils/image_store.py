@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Content-addressed Docker image store on the controller.
+
+Each image is saved once with `docker save` into a gzip tarball named after
+its image ID, so the same image used by many services or hosts is stored and
+saved only once. A refs.json index maps image names to IDs, which lets a
+store copied from another machine be used without a Docker daemon or
+registry on the controller.
+
+Layout::
+
+    <store>/refs.json
+    <store>/sha256/<hex>.tar.gz
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import fcntl
+import gzip
+import json
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+
+CHUNK = 1024 * 1024
+
+
+class ImageStoreError(Exception):
+    """Raised when an image cannot be resolved or saved."""
+
+
+def normalize(name):
+    """Add the implicit :latest tag Docker uses for untagged names."""
+    if "@" in name or ":" in name.rsplit("/", 1)[-1]:
+        return name
+    return name + ":latest"
+
+
+def _run(argv):
+    try:
+        process = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        return 127, "", str(e)
+    return process.returncode, process.stdout.decode("utf-8", "replace"), process.stderr.decode("utf-8", "replace")
+
+
+@contextmanager
+def _locked(path):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ImageStore:
+    """Images saved on the controller, keyed by image ID."""
+
+    def __init__(self, path, docker="docker", run=_run):
+        self.path = path
+        self.docker = docker
+        self.run = run
+        self.blobs = os.path.join(path, "sha256")
+        if not os.path.isdir(self.blobs):
+            os.makedirs(self.blobs)
+
+    def blob_path(self, image_id):
+        return os.path.join(self.blobs, image_id.split(":", 1)[-1] + ".tar.gz")
+
+    def refs(self):
+        try:
+            with open(os.path.join(self.path, "refs.json")) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def add_ref(self, name, image_id):
+        refs_path = os.path.join(self.path, "refs.json")
+        with _locked(refs_path + ".lock"):
+            refs = self.refs()
+            if refs.get(name) == image_id:
+                return
+            refs[name] = image_id
+            temporary = "%s.%d.tmp" % (refs_path, os.getpid())
+            with open(temporary, "w") as f:
+                json.dump(refs, f, indent=2, sort_keys=True)
+            os.replace(temporary, refs_path)
+
+    def resolve(self, name):
+        """Image ID for name from the controller's Docker, falling back to the store's refs."""
+        rc, out, err = self.run([self.docker, "image", "inspect", "--format", "{{.Id}}", name])
+        if rc == 0 and out.strip():
+            return out.strip()
+        image_id = self.refs().get(name)
+        if image_id and os.path.exists(self.blob_path(image_id)):
+            return image_id
+        raise ImageStoreError(
+            "Image %s is neither in the controller's Docker nor in the store %s; "
+            "pull or load it on the controller once" % (name, self.path)
+        )
+
+    def save(self, name, image_id, destination):
+        """docker save name into a gzip tarball at destination."""
+        temporary = "%s.%d.tmp" % (destination, os.getpid())
+        try:
+            process = subprocess.Popen([self.docker, "save", name], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            raise ImageStoreError("Cannot run docker save for %s: %s" % (name, e))
+        try:
+            with gzip.open(temporary, "wb", compresslevel=1) as f:
+                shutil.copyfileobj(process.stdout, f, CHUNK)
+            err = process.stderr.read()
+            if process.wait() != 0:
+                raise ImageStoreError("docker save %s failed: %s" % (name, err.decode("utf-8", "replace").strip()))
+            os.replace(temporary, destination)
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+
+    def ensure(self, name):
+        """Make sure the image for name is in the store.
+
+        Returns (image ID, tarball path, saved) where saved tells whether this
+        call wrote the tarball. Concurrent callers for the same image wait for
+        the first one instead of saving it twice.
+        """
+        name = normalize(name)
+        image_id = self.resolve(name)
+        blob = self.blob_path(image_id)
+        saved = False
+        if not os.path.exists(blob):
+            with _locked(blob + ".lock"):
+                if not os.path.exists(blob):
+                    self.save(name, image_id, blob)
+                    saved = True
+        self.add_ref(name, image_id)
+        return image_id, blob, saved
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Staged package repositories on the controller.
+
+Each staging group (distribution, release and architecture) has a directory
+holding the flat repository its build host produced, described by the same
+.manifest.json the build host and the targets keep. Only files whose digest
+differs are pulled from the build host or pushed to a target, so a refresh
+moves each changed package across the network once per host.
+
+Layout::
+
+    <store>/<group>/.manifest.json
+    <store>/<group>/Packages, Release, *.deb           (APT)
+    <store>/<group>/wolskies-staged.db, *.pkg.tar.zst  (pacman)
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import fcntl
+import os
+import re
+from contextlib import contextmanager
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import package_stage
+
+GROUP_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class PackageStoreError(Exception):
+    """Raised when a group name is invalid or a stored repository is unusable."""
+
+
+@contextmanager
+def _locked(path):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class PackageStore:
+    """Staged repositories on the controller, one directory per staging group."""
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def group_path(self, group):
+        if not GROUP_NAME.match(group or ""):
+            raise PackageStoreError("Invalid staging group name %r" % (group,))
+        path = os.path.join(self.path, group)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        return path
+
+    def files(self, group):
+        """Manifest of the group's stored repository: {name: {sha256, size}}."""
+        return package_stage.recorded(self.group_path(group))
+
+    def missing(self, group, want):
+        """Names in the manifest want that the store lacks or holds in another version."""
+        return package_stage.missing(self.files(group), want)
+
+    def pack(self, group, names, archive):
+        """Write the named files of the group into a tar archive for a target."""
+        return package_stage.pack(self.group_path(group), names, archive)
+
+    def update(self, group, archive, files):
+        """Make the group match the manifest files, taking new files from archive.
+
+        Concurrent pulls of the same group wait for each other. Returns
+        (written, removed).
+        """
+        path = self.group_path(group)
+        with _locked(path + ".lock"):
+            try:
+                return package_stage.unpack(archive, path, files)
+            except package_stage.StagingError as e:
+                raise PackageStoreError("Group %s: %s" % (group, e))
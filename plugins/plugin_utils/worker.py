@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Persistent Python workers for the worker connection plugins.
+
+A pipelined module normally costs one transport command per task: a new
+shell and Python interpreter on the target, which then unpacks the module's
+AnsiballZ payload and imports the module and its module_utils from scratch.
+The worker connection plugins (ssh_worker, local_worker, docker_worker)
+send such payloads to a long-lived interpreter on the target instead
+(plugins/plugin_utils/worker_remote.py), kept alive between tasks by a
+multiplexer on the controller (plugins/plugin_utils/worker_mux.py) that
+listens on a Unix socket::
+
+    <worker_dir>/<key>.sock
+
+One worker runs per transport command, so per target, user, become user
+and task environment; the key is a digest of the command that starts it.
+Anything that is not a pipelined module, file transfers, raw and script
+tasks and async tasks included, goes through the base connection
+unchanged, as do modules when the worker cannot be started.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shlex
+import socket
+import subprocess
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+
+import yaml
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils.common.text.converters import to_text
+from ansible.utils.display import Display
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils import worker_remote
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils.worker_remote import read_frame, write_frame
+
+display = Display()
+
+MUX_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker_mux.py")
+
+WRAPPER_MARKER = b"_ANSIBALLZ_WRAPPER = True"
+
+# Random per task, so it must not be part of the worker key
+BECOME_SUCCESS = re.compile(r"BECOME-SUCCESS-[a-z]+")
+
+
+class WorkerError(Exception):
+    """Raised when a worker cannot be started; the task runs without it."""
+
+    first = False
+
+
+@contextmanager
+def _locked(path):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def register_options(name, path, base_documentation, documentation):
+    """Register the options of the base plugin and of a worker plugin together.
+
+    Called with the worker plugin's module name and file when it is
+    imported, before the plugin loader reads its DOCUMENTATION (the loader
+    keys plugin options by module name), so every option and variable of
+    the base plugin works unchanged for its worker variant. Pipelining is on
+    by default, since only pipelined modules reach the worker.
+    """
+    from ansible import constants as C
+    from ansible.plugins.loader import fragment_loader
+    from ansible.utils.plugin_docs import add_fragments
+
+    if C.config.has_configuration_definition("connection", name):
+        return
+    options = {}
+    for source in (base_documentation, documentation):
+        doc = yaml.safe_load(source)
+        add_fragments(doc, path, fragment_loader=fragment_loader)
+        options.update(doc.get("options") or {})
+    if "pipelining" in options:
+        options["pipelining"] = dict(options["pipelining"], default=True)
+    C.config.initialize_plugin_configuration_definitions("connection", name, options)
+
+
+def pipelined_interpreter(in_data):
+    """Interpreter of the AnsiballZ payload in_data, or None when in_data is not one."""
+    if not in_data or not in_data.startswith(b"#!"):
+        return None
+    shebang, dummy, rest = in_data.partition(b"\n")
+    if rest.find(WRAPPER_MARKER, 0, 65536) < 0:
+        return None
+    return to_text(shebang[2:]).strip() or None
+
+
+def _quoted(cmd, index):
+    """Whether position index of the shell command cmd is inside quotes."""
+    single = double = escaped = False
+    for char in cmd[:index]:
+        if escaped:
+            escaped = False
+        elif char == "\\" and not single:
+            escaped = True
+        elif char == "'" and not double:
+            single = not single
+        elif char == '"' and not single:
+            double = not double
+    return single or double
+
+
+def worker_command(cmd, interpreter):
+    """cmd with its interpreter started as the worker's REPL, or None when cmd does not run interpreter.
+
+    The interpreter is usually quoted as part of a become or environment
+    wrapper; alone, it is the bare argument of a shell's -c and gets quoted.
+    """
+    index = cmd.rfind(interpreter)
+    if index < 0:
+        return None
+    end = index + len(interpreter)
+    if not _quoted(cmd, index) and cmd[:index].endswith("-c "):
+        return cmd[:index] + shlex.quote(interpreter + " -q -i") + cmd[end:]
+    return cmd[:end] + " -q -i" + cmd[end:]
+
+
+def worker_key(argv):
+    """Name of the worker started by argv, the same for every task of a target."""
+    normalized = [BECOME_SUCCESS.sub("BECOME-SUCCESS", to_text(arg)) for arg in argv]
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()[:24]
+
+
+_BOOTSTRAP = []
+
+
+def bootstrap():
+    """The line that turns the REPL started by a worker command into a worker."""
+    if not _BOOTSTRAP:
+        with open(worker_remote.__file__, "rb") as f:
+            source = base64.b64encode(zlib.compress(f.read(), 9)).decode("ascii")
+        _BOOTSTRAP.append('exec(__import__("zlib").decompress(__import__("base64").b64decode("%s")))\n' % source)
+    return _BOOTSTRAP[0]
+
+
+def _connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def start(path, argv, idle_timeout):
+    """Start the multiplexer and worker for argv, listening at path."""
+    try:
+        process = subprocess.Popen(
+            [sys.executable, MUX_SCRIPT, path, str(idle_timeout)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError as e:
+        raise WorkerError("cannot start the worker multiplexer: %s" % e)
+    spec = json.dumps(dict(argv=[to_text(arg) for arg in argv], bootstrap=bootstrap()))
+    process.stdin.write(spec.encode("utf-8") + b"\n")
+    process.stdin.close()
+    status = process.stdout.readline().decode("utf-8", "replace").strip()
+    process.stdout.close()
+    if status != "READY":
+        process.wait()
+        raise WorkerError(status.partition(" ")[2] if status.startswith("ERROR ") else "multiplexer exited")
+
+
+def connect(worker_dir, argv, idle_timeout):
+    """A connection to the worker started by argv, starting it first if it is not running.
+
+    A worker that failed to start is not tried again for idle_timeout
+    seconds, so the tasks of a host it cannot run on do not each wait for
+    the attempt; WorkerError.first tells the first failure from the others.
+    """
+    worker_dir = os.path.expanduser(worker_dir)
+    if not os.path.isdir(worker_dir):
+        os.makedirs(worker_dir, 0o700)
+    path = os.path.join(worker_dir, worker_key(argv) + ".sock")
+    client = _connect(path)
+    if client is None:
+        # Several forks may run tasks for the same target (delegation, run_once)
+        with _locked(path + ".lock"):
+            client = _connect(path)
+            if client is None:
+                failed = path + ".failed"
+                if os.path.exists(failed) and time.time() - os.path.getmtime(failed) < idle_timeout:
+                    raise WorkerError(
+                        "the worker failed to start %d seconds ago" % (time.time() - os.path.getmtime(failed))
+                    )
+                try:
+                    start(path, argv, idle_timeout)
+                except WorkerError as e:
+                    with open(failed, "w") as f:
+                        f.write("%s\n" % e)
+                    e.first = True
+                    raise
+                if os.path.exists(failed):
+                    os.unlink(failed)
+                client = _connect(path)
+    if client is None:
+        raise WorkerError("worker at %s is not listening" % path)
+    return client
+
+
+def run(client, payload):
+    """Run payload on the worker behind client; returns (rc, stdout, stderr)."""
+    try:
+        write_frame(client.fileno(), payload)
+        response = read_frame(client.fileno())
+    except (OSError, EOFError) as e:
+        raise AnsibleConnectionFailure("Lost the module worker: %s" % e)
+    finally:
+        client.close()
+    if response is None:
+        raise AnsibleConnectionFailure("The module worker closed the connection without a result")
+    result = json.loads(response.decode("utf-8"))
+    if "error" in result:
+        raise AnsibleConnectionFailure("The module worker failed: %s" % result["error"])
+    return result["rc"], base64.b64decode(result["stdout"]), base64.b64decode(result["stderr"])
+
+
+class WorkerConnection:
+    """Mixin running pipelined modules on a persistent worker.
+
+    Goes before the base connection plugin class; subclasses implement
+    _worker_argv(cmd), the argv running cmd on the target the way the base
+    plugin would, or None when the worker cannot be used for this task.
+    """
+
+    def _worker_argv(self, cmd):
+        raise NotImplementedError
+
+    def _worker_usable(self):
+        if getattr(self._shell, "_IS_WINDOWS", False):
+            return False
+        # Password prompts need a terminal or the base plugin's prompt handling
+        return not (self.become and self.become.expect_prompt())
+
+    def exec_command(self, cmd, in_data=None, sudoable=True):
+        interpreter = pipelined_interpreter(in_data)
+        command = worker_command(cmd, interpreter) if interpreter and self._worker_usable() else None
+        argv = self._worker_argv(command) if command else None
+        if argv:
+            try:
+                client = connect(self.get_option("worker_dir"), argv, self.get_option("worker_idle_timeout"))
+            except (WorkerError, OSError) as e:
+                if getattr(e, "first", False):
+                    display.warning("Running modules on %s without a worker: %s" % (self._play_context.remote_addr, e))
+                display.vvv("WORKER UNAVAILABLE, RUNNING WITHOUT IT: %s" % e, host=self._play_context.remote_addr)
+            else:
+                display.vvv("WORKER EXEC %s" % to_text(cmd), host=self._play_context.remote_addr)
+                return run(client, in_data)
+        return super(WorkerConnection, self).exec_command(cmd, in_data=in_data, sudoable=sudoable)
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Controller-side multiplexer keeping one module worker alive across tasks.
+
+Ansible forks a new process and opens a new connection for every task, so
+a worker started by a connection plugin would die with the task. Like the
+ControlMaster of OpenSSH, the first task for a target instead starts this
+process in the background::
+
+    python worker_mux.py SOCKET IDLE_TIMEOUT
+
+It reads the command starting the worker and the bootstrap line from its
+stdin as JSON, starts the worker, answers READY or ERROR <reason> on its
+stdout and then serves tasks on the Unix socket SOCKET: one connection per
+module run, carrying one request and one response frame. Each connection
+gets a thread, which passes the request on to the worker tagged with an id;
+the worker runs requests concurrently, so tasks of several forks sharing a
+worker do not wait for each other. A task that goes away before its answer
+(the timeout keyword, an interrupt) has its module killed.
+
+It exits, taking the worker with it, once no task has been in flight for
+IDLE_TIMEOUT seconds or when the worker goes away. A worker answering
+RESTART, whose imported code is out of date, is replaced by a new one,
+which gets that request and every later one; the old worker exits when its
+last request is done.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import itertools
+import json
+import os
+import select
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from .worker_remote import CANCEL, READY, REQUEST, RESPONSE, RESTART, RUN, read_frame, write_frame
+except ImportError:
+    # Run as a script, next to worker_remote.py
+    from worker_remote import CANCEL, READY, REQUEST, RESPONSE, RESTART, RUN, read_frame, write_frame
+
+# Seconds a worker gets to print READY after the bootstrap line
+START_TIMEOUT = 60
+
+
+class MuxError(Exception):
+    """Raised when the worker cannot be started or stops answering."""
+
+
+def start_worker(argv, bootstrap, timeout=START_TIMEOUT):
+    """Start argv, send bootstrap and wait for READY; returns the process.
+
+    Whatever the command prints before READY, such as the success marker of
+    a become method, is discarded; with its stderr it is the error on failure.
+    """
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=errors)
+    try:
+        os.write(process.stdin.fileno(), bootstrap.encode("utf-8"))
+    except BrokenPipeError:
+        # The command exited before reading it; its status and stderr tell why
+        pass
+    received = b""
+    deadline = time.time() + timeout
+    while READY + b"\n" not in received:
+        remaining = deadline - time.time()
+        if remaining <= 0 or not select.select([process.stdout], [], [], remaining)[0]:
+            reason = "did not start within %d seconds" % timeout
+            break
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if not chunk:
+            reason = "exited with %s" % process.wait()
+            break
+        received += chunk
+    else:
+        return process
+    process.kill()
+    process.wait()
+    errors.seek(0)
+    output = (errors.read() or received).decode("utf-8", "replace").replace(">>> ", "").strip()
+    raise MuxError("worker %s: %s" % (reason, output))
+
+
+def listen(path):
+    """A Unix socket listening at path, replacing a stale one atomically."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    temporary = "%s.%d" % (path, os.getpid())
+    server.bind(temporary)
+    os.chmod(temporary, 0o600)
+    server.listen(16)
+    os.rename(temporary, path)
+    return server
+
+
+def error_response(message):
+    return json.dumps(dict(error=message)).encode("utf-8")
+
+
+class Request:
+    """The module run of one task connection."""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.worker = None
+        self.id = None
+        self.response = None
+        # Set once the task's thread stops waiting; nothing is delivered after that
+        self.closed = False
+        # Written to when the response is in, so the task's thread wakes up
+        self.answered, self.notify = os.pipe()
+
+
+class Worker:
+    """A worker process and the requests in flight on it."""
+
+    def __init__(self, process):
+        self.process = process
+        self.pending = {}  # request id -> Request
+        self.retiring = False
+        self.write_lock = threading.Lock()
+
+    def send(self, request_id, operation, payload=b""):
+        with self.write_lock:
+            write_frame(self.process.stdin.fileno(), REQUEST.pack(request_id, operation) + payload)
+
+    def close(self):
+        """Close the worker's input; it exits when its children are done."""
+        with self.write_lock:
+            if not self.process.stdin.closed:
+                self.process.stdin.close()
+
+
+class Mux:
+    """Routes the requests of concurrent task connections to the current worker and its responses back."""
+
+    def __init__(self, process, restart):
+        # restart() starts the worker replacing one that answers RESTART
+        self.restart = restart
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.active = 0
+        # Written to whenever the main loop should look at active and worker again
+        self.wake, self.waker = os.pipe()
+        with self.lock:
+            self.worker = self.attach(process)
+
+    def attach(self, process):
+        worker = Worker(process)
+        threading.Thread(target=self.read_responses, args=(worker,), daemon=True).start()
+        return worker
+
+    def poke(self):
+        os.write(self.waker, b".")
+
+    def submit(self, request):
+        """Send request to the current worker."""
+        with self.lock:
+            worker = self.worker
+            if worker is None:
+                raise MuxError("the worker is gone")
+            request.worker, request.id = worker, next(self.ids)
+            worker.pending[request.id] = request
+        try:
+            worker.send(request.id, RUN, request.payload)
+        except OSError as e:
+            with self.lock:
+                worker.pending.pop(request.id, None)
+            raise MuxError("lost the worker: %s" % e)
+
+    def respond(self, request, response):
+        with self.lock:
+            if not request.closed:
+                request.response = response
+                os.write(request.notify, b".")
+
+    def retire(self, worker):
+        """Close the input of a replaced worker once its last request is done."""
+        with self.lock:
+            done = worker.retiring and not worker.pending
+        if done:
+            worker.close()
+
+    def replace(self, old, request):
+        """Retire old, whose code is out of date, and run request on its successor."""
+        with self.lock:
+            if request.closed:
+                return
+            if self.worker is old:
+                old.retiring = True
+                try:
+                    self.worker = self.attach(self.restart())
+                except MuxError as e:
+                    self.worker = None
+                    request.response = error_response(str(e))
+                    os.write(request.notify, b".")
+                    return
+        try:
+            self.submit(request)
+        except MuxError as e:
+            self.respond(request, error_response(str(e)))
+
+    def read_responses(self, worker):
+        """Deliver the responses of worker until it exits (runs in a thread per worker)."""
+        stdout = worker.process.stdout.fileno()
+        header = RESPONSE.size
+        while True:
+            try:
+                frame = read_frame(stdout)
+            except (OSError, EOFError):
+                frame = None
+            if frame is None:
+                break
+            (request_id,) = RESPONSE.unpack_from(frame)
+            with self.lock:
+                request = worker.pending.pop(request_id, None)
+            if request is None:
+                continue  # cancelled
+            response = frame[header:]
+            if response == RESTART:
+                self.replace(worker, request)
+            else:
+                self.respond(request, response)
+            self.retire(worker)
+        status = worker.process.wait()
+        with self.lock:
+            orphans = list(worker.pending.values())
+            worker.pending.clear()
+            if worker is self.worker:
+                self.worker = None
+        for request in orphans:
+            self.respond(request, error_response("worker exited with %s" % status))
+        self.poke()
+
+    def handle(self, client):
+        """Serve one task connection (runs in a thread per connection)."""
+        request = None
+        try:
+            try:
+                payload = read_frame(client.fileno())
+            except (OSError, EOFError):
+                payload = None
+            if payload is None:
+                return
+            request = Request(payload)
+            try:
+                self.submit(request)
+            except MuxError as e:
+                response = error_response(str(e))
+            else:
+                # The task sends nothing more, so the client only becomes readable when it goes away
+                select.select([client, request.answered], [], [])
+                with self.lock:
+                    request.closed = True
+                    response = request.response
+                    if response is None:
+                        request.worker.pending.pop(request.id, None)
+                if response is None:
+                    self.cancel(request)
+                    return
+            try:
+                write_frame(client.fileno(), response)
+            except OSError:
+                # The task went away after all; its module has finished anyway
+                pass
+        finally:
+            if request is not None:
+                with self.lock:
+                    request.closed = True
+                os.close(request.answered)
+                os.close(request.notify)
+            client.close()
+            with self.lock:
+                self.active -= 1
+            self.poke()
+
+    def cancel(self, request):
+        """Kill the module of a task that went away, so later tasks do not wait for it."""
+        try:
+            request.worker.send(request.id, CANCEL)
+        except OSError:
+            pass
+        self.retire(request.worker)
+
+    def close(self):
+        """Wait for the tasks in flight, then stop the worker."""
+        while True:
+            with self.lock:
+                if not self.active:
+                    worker = self.worker
+                    break
+            select.select([self.wake], [], [])
+            os.read(self.wake, 4096)
+        if worker is not None:
+            worker.close()
+            worker.process.wait()
+
+
+def remove(path, inode):
+    """Unlink the socket at path unless another multiplexer has replaced it."""
+    try:
+        if os.stat(path).st_ino == inode:
+            os.unlink(path)
+    except OSError:
+        pass
+
+
+def serve(path, idle_timeout, mux, server):
+    """Serve tasks until idle_timeout passes without one in flight or the worker exits."""
+    inode = os.stat(path).st_ino
+    draining = False
+    try:
+        while True:
+            with mux.lock:
+                busy = mux.active
+                gone = mux.worker is None
+            if gone or (draining and not busy):
+                return
+            timeout = None if busy else 0 if draining else idle_timeout
+            ready = select.select([server, mux.wake], [], [], timeout)[0]
+            if mux.wake in ready:
+                os.read(mux.wake, 4096)
+            if server in ready:
+                client = server.accept()[0]
+                with mux.lock:
+                    mux.active += 1
+                threading.Thread(target=mux.handle, args=(client,), daemon=True).start()
+            elif not ready:
+                if draining:
+                    return
+                # Idle: stop taking tasks, but serve those that connected in the meantime
+                remove(path, inode)
+                draining = True
+    finally:
+        remove(path, inode)
+        server.close()
+        mux.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path, idle_timeout = argv[0], max(float(argv[1]), 1)
+    spec = json.loads(sys.stdin.readline())
+    process = None
+    try:
+        process = start_worker(spec["argv"], spec["bootstrap"])
+        server = listen(path)
+    except (MuxError, OSError) as e:
+        if process is not None:
+            process.kill()
+        sys.stdout.write("ERROR %s\n" % e)
+        return 1
+    sys.stdout.write("READY\n")
+    sys.stdout.flush()
+    null = os.open(os.devnull, os.O_RDWR)
+    os.dup2(null, 0)
+    os.dup2(null, 1)
+    mux = Mux(process, lambda: start_worker(spec["argv"], spec["bootstrap"]))
+    serve(path, idle_timeout, mux, server)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+"""
+Python worker that runs pipelined Ansible modules on a target.
+
+This file is not imported on the target: the worker connection plugins send
+its source to the remote interpreter, started as ``python -q -i`` in place
+of the interpreter of a pipelined module, as a single bootstrap line. The
+worker then prints READY and serves requests until its input closes.
+
+Each request carries an id and either RUN with one AnsiballZ payload,
+exactly what the interpreter would have read from stdin, or CANCEL for the
+request of that id. Each response carries the id it answers and a JSON
+object with the exit status and the base64 encoded stdout and stderr of the
+module. Both are framed with a 4-byte big-endian length.
+
+Every payload runs in a child forked from the worker, in its own process
+group, so modules cannot leave state behind for the next one and several
+run at the same time; responses go out in the order the children finish.
+CANCEL kills the process group of a request whose task went away. The
+worker exits once its input closes and its children are done. The
+module_utils of each payload are
+extracted into a cache directory at the front of sys.path and, once the
+response is sent, imported by the worker itself; later children inherit
+them already imported instead of unpacking and importing them again.
+
+A payload carrying a changed version of a file the worker has imported (the
+collection or ansible-core changed on the controller while the worker was
+idle) is not run: the worker answers RESTART, and the multiplexer sends it
+and every later payload to a fresh worker instead.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import json
+import os
+import re
+import select
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import traceback
+import zipfile
+from io import BytesIO
+
+READY = b"WOLSKIES-WORKER-READY"
+
+# The response to a payload that needs a fresh worker
+RESTART = b"WOLSKIES-WORKER-RESTART"
+
+HEADER = struct.Struct(">I")
+
+# Requests start with their id and operation, responses with the id they answer
+REQUEST = struct.Struct(">Ic")
+RESPONSE = struct.Struct(">I")
+RUN = b"R"
+CANCEL = b"C"
+
+ZIP_DATA = re.compile(rb"zip_data='([A-Za-z0-9+/=]+)'")
+
+# Imported before the first module runs; everything else is learnt from the payloads
+PRELOAD = ["ansible.module_utils.basic", "ansible.module_utils._internal._ansiballz._loader"]
+
+MODULE_UTILS = re.compile(r"^(ansible/module_utils/|ansible_collections/[^/]+/[^/]+/plugins/module_utils/).*\.py$")
+
+
+def read_exactly(fd, size):
+    """size bytes from fd, or None when it closes first."""
+    chunks = []
+    while size:
+        chunk = os.read(fd, min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(fd):
+    """The next length-prefixed frame from fd, or None at end of input."""
+    header = read_exactly(fd, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    data = read_exactly(fd, size) if size else b""
+    if data is None:
+        raise EOFError("input closed in the middle of a frame")
+    return data
+
+
+def write_frame(fd, data):
+    view = memoryview(HEADER.pack(len(data)) + data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def module_name(path):
+    """Dotted module name of a .py file inside the payload zip."""
+    name = path[: -len(".py")].replace("/", ".")
+    return name[: -len(".__init__")] if name.endswith(".__init__") else name
+
+
+def unpack_payload(payload, cache, crcs):
+    """Extract the .py files of the payload's zip into cache; returns the module_utils names it holds.
+
+    crcs maps the files already extracted to their CRC, so only new or
+    changed files are written. Returns None, extracting nothing, when a
+    changed file belongs to a module the worker has already imported.
+    """
+    match = ZIP_DATA.search(payload)
+    if not match:
+        return []
+    names = []
+    with zipfile.ZipFile(BytesIO(base64.b64decode(match.group(1)))) as archive:
+        infos = [
+            info
+            for info in archive.infolist()
+            if info.filename.endswith(".py") and not info.filename.startswith("/") and ".." not in info.filename
+        ]
+        for info in infos:
+            if info.filename in crcs and crcs[info.filename] != info.CRC and module_name(info.filename) in sys.modules:
+                return None
+        for info in infos:
+            if crcs.get(info.filename) != info.CRC:
+                path = os.path.join(cache, info.filename)
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                # Children of other requests may be importing from the cache
+                temporary = "%s.%d.tmp" % (path, os.getpid())
+                with open(temporary, "wb") as f:
+                    f.write(archive.read(info))
+                os.replace(temporary, path)
+                crcs[info.filename] = info.CRC
+            if MODULE_UTILS.match(info.filename) and "/_extensions/" not in info.filename:
+                names.append(module_name(info.filename))
+    return names
+
+
+def preload(names):
+    """Import names in the worker, ignoring module_utils that need what the target lacks."""
+    for name in names:
+        if name in sys.modules:
+            continue
+        try:
+            __import__(name)
+        except Exception:
+            sys.modules.pop(name, None)
+
+
+def exit_status(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+class Child:
+    """A payload running as __main__ in a forked child, in a process group of its own."""
+
+    def __init__(self, request_id, payload, names, close_fds=()):
+        self.request_id = request_id
+        self.names = names
+        self.stdout = tempfile.TemporaryFile()
+        self.stderr = tempfile.TemporaryFile()
+        # Becomes readable when the child exits and the pipe's only writer goes with it
+        self.exited, writer = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.pid = os.fork()
+        if self.pid == 0:
+            os.close(self.exited)
+            run_child(payload, self.stdout, self.stderr, close_fds)
+        os.close(writer)
+        try:
+            os.setpgid(self.pid, self.pid)
+        except OSError:  # the child already did, or has exited
+            pass
+
+    def kill(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def poll(self):
+        """(rc, stdout, stderr) once the child has exited, else None."""
+        pid, status = os.waitpid(self.pid, os.WNOHANG)
+        if not pid:
+            return None
+        os.close(self.exited)
+        output = []
+        for f in (self.stdout, self.stderr):
+            f.seek(0)
+            output.append(f.read())
+            f.close()
+        return exit_status(status), output[0], output[1]
+
+
+def run_child(payload, stdout, stderr, close_fds):
+    """Body of a Child: run payload with its output in stdout and stderr, then exit."""
+    rc = 1
+    try:
+        os.setpgid(0, 0)
+        for fd in close_fds:
+            os.close(fd)
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(stdout.fileno(), 1)
+        os.dup2(stderr.fileno(), 2)
+        try:
+            code = compile(payload, "<ansible module>", "exec")
+            exec(code, {"__name__": "__main__", "__builtins__": __builtins__})
+            rc = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                rc = e.code or 0
+            else:
+                sys.stderr.write("%s\n" % e.code)
+        except BaseException:
+            traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(rc & 0xFF)
+
+
+def serve(in_fd=0, out_fd=1):
+    """Answer requests from in_fd on out_fd until in_fd closes and every child is done, then exit."""
+    # Requests and responses get their own descriptors; 0 and 1 go to /dev/null
+    # so nothing the worker or an imported module prints can corrupt a frame
+    in_fd, out_fd = os.dup(in_fd), os.dup(out_fd)
+    null = os.open(os.devnull, os.O_RDWR)
+    os.dup2(null, 0)
+    os.dup2(null, 1)
+    cache = tempfile.mkdtemp(prefix="ansible-worker-")
+    sys.path.insert(0, cache)
+    # A rewritten file of the same size could otherwise match its stale .pyc
+    sys.dont_write_bytecode = True
+    status = 0
+    try:
+        os.write(out_fd, READY + b"\n")
+        crcs = {}
+        loaded = False
+        children = {}  # request id -> Child
+        reading = True
+        while reading or children:
+            watched = [child.exited for child in children.values()] + ([in_fd] if reading else [])
+            # The timeout catches children whose exit pipe a forked grandchild keeps open
+            ready = select.select(watched, [], [], 1 if children else None)[0]
+            if in_fd in ready:
+                frame = read_frame(in_fd)
+                if frame is None:
+                    reading = False
+                    continue
+                request_id, operation = REQUEST.unpack_from(frame)
+                header = REQUEST.size
+                if operation == CANCEL:
+                    if request_id in children:
+                        children[request_id].kill()
+                    continue
+                payload = frame[header:]
+                names = unpack_payload(payload, cache, crcs)
+                if names is None:
+                    write_frame(out_fd, RESPONSE.pack(request_id) + RESTART)
+                    continue
+                if not loaded:
+                    preload(PRELOAD)
+                    loaded = True
+                close_fds = [in_fd, out_fd] + [child.exited for child in children.values()]
+                children[request_id] = Child(request_id, payload, names, close_fds)
+            for child in list(children.values()):
+                result = child.poll()
+                if result is None:
+                    continue
+                del children[child.request_id]
+                rc, stdout, stderr = result
+                response = dict(
+                    rc=rc, stdout=base64.b64encode(stdout).decode(), stderr=base64.b64encode(stderr).decode()
+                )
+                write_frame(out_fd, RESPONSE.pack(child.request_id) + json.dumps(response).encode())
+                preload(child.names)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+        sys.stderr.flush()
+        os._exit(status)
+
+
+if __name__ == "__main__":
+    serve()
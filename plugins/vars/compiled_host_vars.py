@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) wolskies.infrastructure contributors
+# MIT License (see LICENSE)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+name: compiled_host_vars
+short_description: Load host_vars and group_vars through a compiled sidecar cache
+version_added: "1.4.0"
+requirements:
+  - Enabled in configuration
+description:
+  - Drop-in replacement for C(ansible.builtin.host_group_vars) aimed at large discovery-generated host_vars trees.
+  - Each vars file is parsed as YAML once; the result is stored next to it in a hidden C(.<file>.compiled)
+    sidecar serialized with Python's C(marshal) format.
+  - A sidecar is reused only while the file path, modification time (ns) and size recorded in it match the file
+    and it was written by the same Python version. Changed files fall back to YAML and refresh their sidecar.
+  - Files are loaded lazily, only for the hosts and groups Ansible asks for.
+  - Vault-encrypted files and files holding vaulted values or other non-plain data are never cached and are
+    always loaded through YAML.
+  - Template trust (C(!unsafe)) is preserved across the cache.
+options:
+  stage:
+    ini:
+      - key: stage
+        section: vars_compiled_host_vars
+    env:
+      - name: ANSIBLE_VARS_PLUGIN_STAGE
+  cache_dir:
+    description:
+      - Directory for compiled files instead of sidecars next to each vars file, for read-only inventories or
+        to keep compiled files out of version control.
+    type: path
+    ini:
+      - key: cache_dir
+        section: vars_compiled_host_vars
+    env:
+      - name: ANSIBLE_COMPILED_HOST_VARS_CACHE_DIR
+  _valid_extensions:
+    default: [".yml", ".yaml", ".json"]
+    description:
+      - "Check all of these extensions when looking for 'variable' files which should be YAML or JSON or vaulted
+        versions of these."
+    env:
+      - name: ANSIBLE_YAML_FILENAME_EXT
+    ini:
+      - key: yaml_valid_extensions
+        section: defaults
+    type: list
+    elements: string
+extends_documentation_fragment:
+  - vars_plugin_staging
+notes:
+  - Replace C(host_group_vars) rather than adding to it, or every file is loaded twice.
+  - Add C(.*.compiled) to C(.gitignore) when using sidecars.
+"""
+
+EXAMPLES = r"""
+# ansible.cfg
+# [defaults]
+# vars_plugins_enabled = wolskies.infrastructure.compiled_host_vars
+#
+# [vars_compiled_host_vars]
+# cache_dir = ~/.cache/ansible/compiled_host_vars
+"""
+
+import copy
+import hashlib
+import marshal
+import os
+import sys
+
+from ansible.errors import AnsibleError, AnsibleParserError
+from ansible.module_utils.common.text.converters import to_bytes, to_native
+from ansible.plugins.vars import BaseVarsPlugin
+from ansible.utils.path import basedir
+from ansible.utils.vars import combine_vars
+
+try:
+    from ansible.inventory.group import InventoryObjectType
+except ImportError:  # ansible-core < 2.16
+    InventoryObjectType = None
+
+try:
+    from ansible.template import is_trusted_as_template, trust_as_template
+
+    TRUST_TAGGING = True
+except ImportError:  # ansible-core < 2.19 templates every string not marked unsafe
+    from ansible.utils.unsafe_proxy import AnsibleUnsafe, wrap_var
+
+    TRUST_TAGGING = False
+
+# Bump when the layout of compiled files changes
+FORMAT = 1
+PYTHON = tuple(sys.version_info[:2])
+TEMPLATE_MARKERS = ("{{", "{%", "{#")
+
+CANONICAL_PATHS = {}  # type: dict[str, str]
+FOUND = {}  # type: dict[str, list[str]]
+NAK = set()  # type: set[str]
+LOADED = {}  # type: dict[str, tuple]
+
+
+class NotCompilable(Exception):
+    """Raised for vars data that cannot be stored in a compiled file."""
+
+
+def _has_template(value):
+    return any(marker in value for marker in TEMPLATE_MARKERS)
+
+
+def _is_templatable(value):
+    if TRUST_TAGGING:
+        return is_trusted_as_template(value)
+    return not isinstance(value, AnsibleUnsafe)
+
+
+def _compile_key(key):
+    # Keys are never templated, so they are stored as plain values
+    if isinstance(key, str):
+        return str(key)
+    if key is None or type(key) is bool:
+        return key
+    if isinstance(key, int):
+        return int(key)
+    if isinstance(key, float):
+        return float(key)
+    raise NotCompilable(type(key).__name__)
+
+
+def compile_vars(value, templates=None):
+    """Convert loaded vars to plain marshal-able types.
+
+    Strings that contain template markers and may be templated are stored as
+    1-tuples so their trust survives the round trip; YAML never yields tuples.
+    Every string with template markers is added to templates, if given.
+    """
+    if isinstance(value, dict):
+        return dict((_compile_key(k), compile_vars(v, templates)) for k, v in value.items())
+    if isinstance(value, list):
+        return [compile_vars(v, templates) for v in value]
+    if isinstance(value, str):
+        plain = str(value)
+        if not _has_template(plain):
+            return plain
+        if templates is not None:
+            templates.append(plain)
+        return (plain,) if _is_templatable(value) else plain
+    if value is None or type(value) in (bool, int, float):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    raise NotCompilable(type(value).__name__)
+
+
+def restore_vars(value):
+    """Inverse of compile_vars."""
+    if isinstance(value, dict):
+        return dict((k, restore_vars(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [restore_vars(v) for v in value]
+    if isinstance(value, tuple):
+        return trust_as_template(value[0]) if TRUST_TAGGING else value[0]
+    if isinstance(value, str) and not TRUST_TAGGING and _has_template(value):
+        return wrap_var(value)
+    return value
+
+
+class VarsModule(BaseVarsPlugin):
+
+    is_stateless = True
+
+    def compiled_path(self, path):
+        cache_dir = self.get_option("cache_dir")
+        if cache_dir:
+            digest = hashlib.sha1(to_bytes(path)).hexdigest()
+            return os.path.join(cache_dir, digest + ".compiled")
+        directory, name = os.path.split(path)
+        return os.path.join(directory, "." + name + ".compiled")
+
+    def read_compiled(self, path, stat):
+        """Return restored vars for path, or None if the compiled file is missing or stale."""
+        try:
+            with open(self.compiled_path(path), "rb") as f:
+                header, has_templates, data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if header != (FORMAT, PYTHON, path, stat.st_mtime_ns, stat.st_size):
+            return None
+        # Most discovery output holds no templates and needs no restore walk
+        return restore_vars(data) if has_templates else data
+
+    def write_compiled(self, path, stat, value):
+        templates = []
+        data = compile_vars(value, templates)
+        compiled = self.compiled_path(path)
+        temporary = "%s.%d.tmp" % (compiled, os.getpid())
+        try:
+            directory = os.path.dirname(compiled)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(temporary, "wb") as f:
+                marshal.dump(((FORMAT, PYTHON, path, stat.st_mtime_ns, stat.st_size), bool(templates), data), f)
+            os.replace(temporary, compiled)
+        except OSError as e:
+            # A read-only inventory only loses the speedup
+            self._display.vvvv("compiled_host_vars: not caching %s: %s" % (path, to_native(e)))
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+    def load_file(self, loader, path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        # Vars plugins run once per stage; keep restored data for the rest of the run.
+        # Callers get their own copy, as from DataLoader's cache, so they can modify it.
+        loaded = LOADED.get(path)
+        if loaded is not None and loaded[0] == signature:
+            return copy.deepcopy(loaded[1])
+
+        data = self.read_compiled(path, stat)
+        if data is not None:
+            LOADED[path] = (signature, data)
+            return copy.deepcopy(data)
+
+        with open(path, "rb") as f:
+            encrypted = b"$ANSIBLE_VAULT" in f.read()
+
+        if TRUST_TAGGING:
+            new_data = loader.load_from_file(path, cache="all", unsafe=True, trusted_as_template=True)
+        else:
+            new_data = loader.load_from_file(path, cache="all", unsafe=True)
+        if not encrypted:
+            try:
+                self.write_compiled(path, stat, new_data)
+            except NotCompilable as e:
+                self._display.vvvv("compiled_host_vars: not caching %s: holds %s data" % (path, e))
+        return new_data
+
+    def load_found_files(self, loader, data, found_files):
+        for found in found_files:
+            new_data = self.load_file(loader, found)
+            if new_data:  # ignore empty files
+                try:
+                    data = combine_vars(data, new_data)
+                except AnsibleError as e:
+                    raise AnsibleParserError("Could not process %r: %s" % (found, to_native(e)))
+        return data
+
+    def get_vars(self, loader, path, entities, cache=True):
+        """parses the inventory file"""
+
+        if not isinstance(entities, list):
+            entities = [entities]
+
+        # realpath is expensive
+        try:
+            realpath_basedir = CANONICAL_PATHS[path]
+        except KeyError:
+            CANONICAL_PATHS[path] = realpath_basedir = os.path.realpath(basedir(path))
+
+        data = {}
+        for entity in entities:
+            entity_name = getattr(entity, "name", None)
+            if not entity_name:
+                raise AnsibleParserError("Supplied entity must be Host or Group, got %s instead" % (type(entity)))
+
+            # avoid 'chroot' type inventory hostnames /path/to/chroot
+            if entity_name[0] == os.path.sep:
+                continue
+
+            subdir = self.entity_subdir(entity)
+            opath = os.path.join(realpath_basedir, subdir)
+            key = "%s.%s" % (entity_name, opath)
+
+            try:
+                if cache:
+                    if opath in NAK:
+                        continue
+                    if key in FOUND:
+                        data = self.load_found_files(loader, data, FOUND[key])
+                        continue
+
+                found_files = []
+                if os.path.isdir(opath):
+                    self._display.debug("\tprocessing dir %s" % opath)
+                    FOUND[key] = found_files = loader.find_vars_files(opath, entity_name)
+                elif not os.path.exists(opath):
+                    # cache missing dirs so we don't have to keep looking for things beneath the
+                    NAK.add(opath)
+                else:
+                    self._display.warning("Found %s that is not a directory, skipping: %s" % (subdir, opath))
+                    # cache non-directory matches
+                    NAK.add(opath)
+
+                data = self.load_found_files(loader, data, found_files)
+            except AnsibleParserError:
+                raise
+            except Exception as e:
+                raise AnsibleParserError(to_native(e))
+        return data
+
+    @staticmethod
+    def entity_subdir(entity):
+        if InventoryObjectType is not None:
+            entity_type = getattr(entity, "base_type", None)
+            if entity_type is InventoryObjectType.HOST:
+                return "host_vars"
+            if entity_type is InventoryObjectType.GROUP:
+                return "group_vars"
+        else:
+            from ansible.inventory.group import Group
+            from ansible.inventory.host import Host
+
+            if isinstance(entity, Host):
+                return "host_vars"
+            if isinstance(entity, Group):
+                return "group_vars"
+        raise AnsibleParserError("Supplied entity must be Host or Group, got %s instead" % (type(entity)))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Role performance regression benchmark on local molecule containers.
+
+For each target, a role (roles/<role>/molecule/default) or a collection
+scenario (molecule/<scenario>), the benchmark:
+
+1. creates and prepares the scenario's containers (not timed)
+2. converges twice with the wolskies.infrastructure.perf_metrics callback
+   enabled: a cold converge, then an idempotent rerun
+3. destroys the containers (unless --keep)
+
+For both converges it records wall time, tasks executed, module invocations
+on the hosts, changed results and module payload bytes. The results are
+compared with tests/performance/baselines/role_converge.json. A metric
+regresses when it grows beyond its threshold; the run then exits non-zero.
+
+    python scripts/benchmark_roles.py configure_software
+    python scripts/benchmark_roles.py minimal configure_system --keep
+    python scripts/benchmark_roles.py configure_software --update       # accept as the new baseline
+
+The collection must be installed where molecule finds it (just install-local),
+so the callback plugin loads from the version under test.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+ROLES_DIR = COLLECTION_ROOT / "roles"
+SCENARIOS_DIR = COLLECTION_ROOT / "molecule"
+BASELINE_FILE = COLLECTION_ROOT / "tests" / "performance" / "baselines" / "role_converge.json"
+CALLBACK = "wolskies.infrastructure.perf_metrics"
+
+RUNS = ["cold", "idempotent"]
+
+# Allowed relative growth per metric before it counts as a regression
+THRESHOLDS = {
+    "seconds": 0.25,
+    "tasks": 0.10,
+    "module_invocations": 0.10,
+    "payload_bytes": 0.25,
+    "changed": 0.0,
+}
+
+# Timing differences below this many seconds are noise, whatever the ratio
+SECONDS_FLOOR = 2.0
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+
+def resolve_target(target: str) -> Tuple[Path, str]:
+    """Directory to run molecule in and scenario name for a role or collection scenario."""
+    if (ROLES_DIR / target / "molecule" / "default" / "molecule.yml").exists():
+        return ROLES_DIR / target, "default"
+    if (SCENARIOS_DIR / target / "molecule.yml").exists():
+        return COLLECTION_ROOT, target
+    raise ValueError(f"{target}: neither roles/{target}/molecule/default nor molecule/{target} exists")
+
+
+def callback_environment(metrics_file: Path) -> Dict[str, str]:
+    env = dict(os.environ)
+    enabled = [name for name in env.get("ANSIBLE_CALLBACKS_ENABLED", "").split(",") if name.strip()]
+    if CALLBACK not in enabled:
+        enabled.append(CALLBACK)
+    env["ANSIBLE_CALLBACKS_ENABLED"] = ",".join(enabled)
+    env["PERF_METRICS_FILE"] = str(metrics_file)
+    return env
+
+
+def molecule(command: List[str], action: str, scenario: str, cwd: Path, env: Optional[Dict[str, str]] = None):
+    args = command + [action, "-s", scenario]
+    completed = subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stdout[-4000:] + completed.stderr[-4000:])
+        raise RuntimeError(f"{' '.join(args)} failed in {cwd} (exit {completed.returncode})")
+
+
+def benchmark(target: str, command: List[str], keep: bool = False) -> Dict[str, Any]:
+    """Cold and idempotent converge metrics for one target."""
+    cwd, scenario = resolve_target(target)
+    results: Dict[str, Any] = {}
+    molecule(command, "destroy", scenario, cwd)
+    try:
+        molecule(command, "create", scenario, cwd)
+        molecule(command, "prepare", scenario, cwd)
+        with tempfile.TemporaryDirectory(prefix="benchmark-roles-") as tmp:
+            for run in RUNS:
+                metrics_file = Path(tmp) / f"{run}.json"
+                started = time.monotonic()
+                molecule(command, "converge", scenario, cwd, env=callback_environment(metrics_file))
+                wall = time.monotonic() - started
+                metrics = json.loads(metrics_file.read_text())
+                metrics["wall_seconds"] = round(wall, 3)
+                results[run] = metrics
+    finally:
+        if not keep:
+            molecule(command, "destroy", scenario, cwd)
+    return results
+
+
+# =============================================================================
+# BASELINE
+# =============================================================================
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("targets", {})
+
+
+def save_baseline(baseline: Dict[str, Any], path: Path = BASELINE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"targets": dict(sorted(baseline.items()))}, indent=2) + "\n", encoding="utf-8")
+
+
+def regressions(
+    target: str, current: Dict[str, Any], previous: Dict[str, Any], thresholds: Dict[str, float] = THRESHOLDS
+) -> List[str]:
+    """Metrics of target that grew beyond their threshold against the baseline."""
+    found = []
+    for run in RUNS:
+        before = previous.get(run) or {}
+        after = current.get(run) or {}
+        for metric, threshold in thresholds.items():
+            if metric not in before or metric not in after:
+                continue
+            old, new = before[metric], after[metric]
+            if metric == "seconds" and new - old < SECONDS_FLOOR:
+                continue
+            if new > old * (1 + threshold):
+                growth = f"+{100 * (new - old) / old:.0f}%" if old else "was 0"
+                found.append(f"{target} {run} {metric}: {old} -> {new} ({growth}, allowed {100 * threshold:.0f}%)")
+    return found
+
+
+def format_report(target: str, current: Dict[str, Any], previous: Dict[str, Any]) -> str:
+    lines = [f"{target}:"]
+    for run in RUNS:
+        metrics = current[run]
+        before = previous.get(run) or {}
+        cells = []
+        for metric in ["seconds", "tasks", "module_invocations", "changed", "payload_bytes"]:
+            cell = f"{metric}={metrics.get(metric)}"
+            if metric in before:
+                cell += f" (baseline {before[metric]})"
+            cells.append(cell)
+        lines.append(f"  {run:<11} " + ", ".join(cells))
+    slowest = current["cold"].get("slowest_tasks") or []
+    if slowest:
+        lines.append("  slowest cold tasks:")
+        lines.extend(f"    {task['seconds']:8.2f}s  {task['name']}" for task in slowest[:5])
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("targets", nargs="+", help="Roles with a molecule/default scenario, or collection scenarios")
+    parser.add_argument("--update", action="store_true", help="Write the results to the baseline instead of comparing")
+    parser.add_argument("--keep", action="store_true", help="Leave the containers running afterwards")
+    parser.add_argument(
+        "--threshold", type=float, help=f"Allowed relative growth of timings (default {THRESHOLDS['seconds']})"
+    )
+    parser.add_argument("--molecule", default="molecule", help="Command that runs molecule (e.g. 'uv run molecule')")
+    args = parser.parse_args(argv)
+
+    thresholds = dict(THRESHOLDS)
+    if args.threshold is not None:
+        thresholds["seconds"] = args.threshold
+    command = shlex.split(args.molecule)
+
+    baseline = load_baseline()
+    found = []
+    for target in args.targets:
+        try:
+            current = benchmark(target, command, keep=args.keep)
+        except (ValueError, RuntimeError) as e:
+            print(f"✗ {e}")
+            return 2
+        previous = baseline.get(target, {})
+        print(format_report(target, current, previous))
+        if args.update:
+            baseline[target] = current
+        else:
+            found.extend(regressions(target, current, previous, thresholds))
+
+    if args.update:
+        save_baseline(baseline)
+        print(f"\n✓ Baseline updated: {BASELINE_FILE.relative_to(COLLECTION_ROOT)}")
+        return 0
+    if found:
+        print("\nRegressions:")
+        for regression in found:
+            print(f"  ✗ {regression}")
+        return 1
+    print("\n✓ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Incremental documentation pipeline for wolskies.infrastructure.
+
+Builds docs/generated/ from the role metadata (meta/main.yml,
+meta/argument_specs.yml, defaults/main.yml) and the Software Requirements
+Document in one run:
+
+- every input file is parsed once and the result is cached on disk keyed by
+  the SHA-256 of its content, so unchanged files are never parsed again
+- the SRD is indexed once (srd_index.py, cached by content hash) and the
+  index is shared by all roles and the collection overview
+- roles are rendered in parallel across a process pool
+- an output file is written only when its content changed, so its mtime is
+  kept and sphinx-build stays incremental
+
+    python scripts/docs_pipeline.py                  # all roles and the overview
+    python scripts/docs_pipeline.py install_go       # one role
+    python scripts/docs_pipeline.py --jobs 1 --no-cache
+
+A per-stage timing report shows where build time goes. Rendering itself is
+done by generate_enhanced_docs.py (roles) and generate_collection_docs.py
+(collection overview).
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+import generate_collection_docs
+import generate_enhanced_docs
+import srd_index
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+ROLES_DIR = COLLECTION_ROOT / "roles"
+OUTPUT_DIR = COLLECTION_ROOT / "docs" / "generated"
+SRD_FILE = srd_index.SRD_FILE
+CACHE_FILE = COLLECTION_ROOT / ".cache" / "docs_pipeline.pickle"
+
+# Bump when the cached data format changes
+CACHE_VERSION = 1
+
+ROLE_INPUTS = ["meta/main.yml", "meta/argument_specs.yml", "defaults/main.yml"]
+
+STAGES = ["scan", "parse", "render", "write"]
+
+
+# =============================================================================
+# TIMING
+# =============================================================================
+
+
+class StageTimer:
+    """Accumulated seconds per pipeline stage."""
+
+    def __init__(self):
+        self.seconds = dict((stage, 0.0) for stage in STAGES)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    def add(self, timings: Dict[str, float]):
+        for name, seconds in timings.items():
+            self.seconds[name] += seconds
+
+
+# =============================================================================
+# PARSED-INPUT CACHE
+# =============================================================================
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class InputCache:
+    """Parsed YAML keyed by the SHA-256 of the file it came from.
+
+    A full run drops entries it did not use when saving, so the file only
+    holds the current tree; runs over a subset of roles keep everything.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.entries: Dict[str, Any] = {}
+        self.used: set = set()
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            self.entries = self._load(path)
+
+    @staticmethod
+    def _load(path: Path) -> Dict[str, Any]:
+        try:
+            with open(path, "rb") as f:
+                version, entries = pickle.load(f)  # nosec B301 - local cache written by this script
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            return {}
+        return entries if version == CACHE_VERSION else {}
+
+    def lookup(self, digest: str) -> Tuple[bool, Any]:
+        self.used.add(digest)
+        if digest in self.entries:
+            self.hits += 1
+            return True, self.entries[digest]
+        self.misses += 1
+        return False, None
+
+    def store(self, digest: str, data: Any):
+        self.entries[digest] = data
+        self.used.add(digest)
+
+    def save(self, prune: bool = True):
+        if self.path is None:
+            return
+        entries = self.entries
+        if prune:
+            entries = dict((digest, data) for digest, data in entries.items() if digest in self.used)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(temporary, "wb") as f:
+            pickle.dump((CACHE_VERSION, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.path)
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+
+def discover_roles(names: List[str]) -> List[str]:
+    """Roles to document: those named, or every role with an argument_specs.yml."""
+    if names:
+        missing = [name for name in names if not (ROLES_DIR / name).is_dir()]
+        for name in missing:
+            print(f"Warning: Role {name} not found")
+        return sorted(name for name in names if name not in missing)
+    return sorted(
+        role_dir.name
+        for role_dir in ROLES_DIR.iterdir()
+        if role_dir.is_dir() and (role_dir / "meta" / "argument_specs.yml").exists()
+    )
+
+
+def scan_role(role_name: str, cache: InputCache) -> Dict[str, Tuple[str, bool, Any]]:
+    """Hash a role's input files and resolve them against the cache.
+
+    Returns {relative path: (digest, cached, parsed data or raw bytes)}.
+    Missing files are left out.
+    """
+    inputs = {}
+    for relative in ROLE_INPUTS:
+        path = ROLES_DIR / role_name / relative
+        try:
+            raw = path.read_bytes()
+        except OSError:
+            continue
+        digest = content_hash(raw)
+        cached, data = cache.lookup(digest)
+        inputs[relative] = (digest, True, data) if cached else (digest, False, raw)
+    return inputs
+
+
+def parse_yaml(relative: str, raw: bytes) -> Any:
+    try:
+        return yaml.safe_load(raw)
+    except yaml.YAMLError as e:
+        print(f"Warning: Could not load {relative}: {e}")
+        return None
+
+
+def build_role(job: Tuple[str, Dict[str, Tuple[str, bool, Any]], List[Dict[str, str]]]) -> Dict[str, Any]:
+    """Parse the uncached inputs of one role and render its page (runs in a worker)."""
+    role_name, inputs, requirements = job
+    role_path = ROLES_DIR / role_name
+    timings = dict((stage, 0.0) for stage in STAGES)
+
+    started = time.perf_counter()
+    parsed = {}
+    data = {}
+    for relative, (digest, cached, value) in inputs.items():
+        if not cached:
+            value = parse_yaml(f"{role_name}/{relative}", value)
+            parsed[digest] = value
+        data[str(role_path / relative)] = value
+    timings["parse"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rst = generate_enhanced_docs.generate_role_documentation(
+        role_name, role_path, load=lambda path: data.get(str(path)), requirements=requirements
+    )
+    timings["render"] = time.perf_counter() - started
+    return dict(name=role_name, output=f"role_{role_name}.rst", rst=rst, parsed=parsed, timings=timings)
+
+
+def build_collection(index: srd_index.SrdIndex) -> Dict[str, Any]:
+    """Render the collection overview (runs in a worker)."""
+    started = time.perf_counter()
+    rst = generate_collection_docs.generate_collection_overview(index)
+    timings = dict((stage, 0.0) for stage in STAGES)
+    timings["render"] = time.perf_counter() - started
+    return dict(name="collection", output="collection_overview.rst", rst=rst, parsed={}, timings=timings)
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write content to path unless it already holds exactly that; returns whether it wrote."""
+    encoded = content.encode("utf-8")
+    try:
+        if path.read_bytes() == encoded:
+            return False
+    except OSError:
+        pass
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(encoded)
+    os.replace(temporary, path)
+    return True
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+
+def run_pipeline(
+    roles: List[str],
+    collection: bool = True,
+    jobs: Optional[int] = None,
+    cache_file: Optional[Path] = CACHE_FILE,
+    output_dir: Path = OUTPUT_DIR,
+    prune: bool = True,
+) -> Dict[str, Any]:
+    """Build the requested pages and return a summary with per-stage timings.
+
+    prune drops cache entries this run did not use; pass False when building
+    only some of the roles.
+    """
+    started = time.perf_counter()
+    timer = StageTimer()
+    cache = InputCache(cache_file)
+
+    with timer.stage("scan"):
+        srd_cache = None if cache_file is None else cache_file.parent / srd_index.CACHE_FILE.name
+        index = srd_index.load_index(SRD_FILE, srd_cache) if SRD_FILE.exists() else None
+        role_jobs = []
+        for role_name in roles:
+            requirements = generate_enhanced_docs.extract_srd_requirements(role_name, index) if index else []
+            role_jobs.append((role_name, scan_role(role_name, cache), requirements))
+    if collection and index is None:
+        print(f"Warning: SRD not found at {SRD_FILE}; skipping collection overview")
+        collection = False
+
+    workers = jobs or os.cpu_count() or 1
+    results = []
+    if workers == 1:
+        results = [build_role(job) for job in role_jobs]
+        if collection:
+            results.append(build_collection(index))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(build_role, job) for job in role_jobs]
+            if collection:
+                futures.append(pool.submit(build_collection, index))
+            results = [future.result() for future in futures]
+
+    written = []
+    unchanged = []
+    with timer.stage("write"):
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for result in results:
+            timer.add(result["timings"])
+            for digest, data in result["parsed"].items():
+                cache.store(digest, data)
+            output = output_dir / result["output"]
+            (written if write_if_changed(output, result["rst"]) else unchanged).append(output)
+        cache.save(prune)
+
+    return dict(
+        written=written,
+        unchanged=unchanged,
+        stages=timer.seconds,
+        total=time.perf_counter() - started,
+        workers=workers,
+        cache_hits=cache.hits,
+        cache_misses=cache.misses,
+    )
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    lines = [f"✓ Generated {path}" for path in summary["written"]]
+    lines.append(
+        f"\n{len(summary['written'])} written, {len(summary['unchanged'])} unchanged; "
+        f"inputs parsed {summary['cache_misses']}, cached {summary['cache_hits']}"
+    )
+    busy = sum(summary["stages"].values()) or 1.0
+    lines.append(f"Stage timings ({summary['workers']} workers; parse and render summed over workers):")
+    for stage, seconds in sorted(summary["stages"].items(), key=lambda item: -item[1]):
+        lines.append(f"  {stage:<8} {seconds:8.3f}s {100 * seconds / busy:5.1f}%")
+    lines.append(f"  {'total':<8} {summary['total']:8.3f}s wall")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("roles", nargs="*", help="Roles to document (default: every role with argument_specs.yml)")
+    parser.add_argument(
+        "--target", choices=["all", "roles", "collection"], default="all", help="Pages to build (default: all)"
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Parse every input and do not update the cache")
+    args = parser.parse_args(argv)
+
+    roles = discover_roles(args.roles) if args.target in ("all", "roles") else []
+    summary = run_pipeline(
+        roles,
+        collection=args.target in ("all", "collection") and not args.roles,
+        jobs=args.jobs,
+        cache_file=None if args.no_cache else CACHE_FILE,
+        prune=args.target == "all" and not args.roles,
+    )
+    print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,45 +11,25 @@ comprehensive RST documentation for the overall collection, including:
 """
 
 import re
-from pathlib import Path
+import sys
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+import srd_index
 
-def load_srd_content() -> str:
-    """Load the SRD content for processing."""
-    srd_file = Path(__file__).parent.parent / "docs" / "archive" / "SOFTWARE_REQUIREMENTS_DOCUMENT.md"
+SRD_FILE = srd_index.SRD_FILE
 
-    if not srd_file.exists():
-        raise FileNotFoundError(f"SRD not found at {srd_file}")
 
-    with open(srd_file, "r") as f:
-        return f.read()
+def load_srd_index() -> srd_index.SrdIndex:
+    """Load the (cached) SRD index for processing."""
+    if not SRD_FILE.exists():
+        raise FileNotFoundError(f"SRD not found at {SRD_FILE}")
 
+    return srd_index.load_index(SRD_FILE)
 
-def extract_section_content(content: str, section_title: str, subsection_level: int = 2) -> str:
-    """Extract a specific section from markdown content."""
-    # Create pattern for section header
-    header_pattern = "#" * subsection_level + r"\s+" + re.escape(section_title)
 
-    # Find section start
-    section_match = re.search(header_pattern, content, re.IGNORECASE)
-    if not section_match:
-        return ""
-
-    start_pos = section_match.start()
-
-    # Find next section of same or higher level
-    next_header_pattern = r"\n#{1," + str(subsection_level) + r"}\s+"
-    # Split string to avoid flake8/black conflict
-    content_slice = content[start_pos + 1 :]  # noqa: E203
-    next_section = re.search(next_header_pattern, content_slice)
-
-    if next_section:
-        end_pos = start_pos + 1 + next_section.start()
-        section_content = content[start_pos:end_pos]
-    else:
-        section_content = content[start_pos:]
-
-    return section_content.strip()
+def extract_section_content(index: srd_index.SrdIndex, section_title: str, subsection_level: int = 2) -> str:
+    """Extract a specific section, heading included, from the SRD."""
+    return index.section_text(index.find_section(section_title, subsection_level))
 
 
 def convert_markdown_table_to_rst(md_table: str) -> str:
@@ -94,68 +74,185 @@ def convert_markdown_table_to_rst(md_table: str) -> str:
     return "\n".join(rst_lines)
 
 
-def markdown_to_rst(content: str) -> str:
-    """Convert markdown content to RST format."""
-
-    def replace_header(match):
-        """Replace header with properly sized underline."""
-        level = len(match.group(1))
-        title = match.group(2)
-        if level == 2:
-            underline = "=" * len(title)
-        elif level == 3:
-            underline = "-" * len(title)
-        elif level == 4:
-            underline = "~" * len(title)
-        elif level == 5:
-            underline = "^" * len(title)
+HEADER = re.compile(r"(#{2,5})\s+(.+)$")
+HEADER_UNDERLINES = {2: "=", 3: "-", 4: "~", 5: "^"}
+FENCE_OPEN = re.compile(r"^(.*?)```(\w*)$")
+FENCE_CLOSE = "```"
+TABLE_HEADER = re.compile(r"\|[^|]+\|[^|]+\|")
+TABLE_SEPARATOR = re.compile(r"\|[-:|]+\|")
+TABLE_ROW = re.compile(r"\|[^|]*\|")
+
+
+def _convert_blocks(lines: Iterable[str], closable: bool = True) -> Iterator[Tuple[str, bool]]:
+    """Convert headers, code fences and tables line by line.
+
+    Yields (line, verbatim) pairs; verbatim lines (code block content and
+    header underlines) are left alone by the inline pass. Tables need a
+    compact |---|---| separator row. A fence never closed is dropped with the
+    blank lines after it and its content converted as ordinary markdown;
+    closable is False for that content, which holds no closing fence.
+    """
+    fence: Optional[Tuple[str, str, List[str]]] = None
+    table: List[str] = []
+    skip_blank = False
+
+    for line in lines:
+        if fence is not None:
+            # The line after the opening fence is always content
+            if fence[2] and line.startswith(FENCE_CLOSE):
+                prefix, language, content = fence
+                yield f"{prefix}.. code-block:: {language}", False
+                yield "", False
+                for code in content:
+                    yield code, True
+                yield line[len(FENCE_CLOSE) :], False  # noqa: E203
+                fence = None
+            else:
+                fence[2].append(line)
+            continue
+
+        if skip_blank:
+            if not line.strip():
+                continue
+            skip_blank = False
+
+        if table:
+            if len(table) == 1 and TABLE_SEPARATOR.match(line) or len(table) > 1 and TABLE_ROW.match(line):
+                table.append(line)
+                continue
+            yield from _flush_table(table)
+            table = []
+
+        opener = FENCE_OPEN.match(line)
+        if opener and closable:
+            fence = (opener.group(1), opener.group(2), [])
+            continue
+        if opener:
+            yield opener.group(1), False
+            skip_blank = True
+            continue
+
+        if TABLE_HEADER.match(line):
+            table.append(line)
+            continue
+
+        header = HEADER.match(line)
+        if header:
+            title = header.group(2)
+            yield title, False
+            yield HEADER_UNDERLINES[len(header.group(1))] * len(title), True
+            continue
+
+        yield line, False
+
+    if table:
+        yield from _flush_table(table)
+    if fence is not None:
+        prefix, language, content = fence
+        yield from _convert_blocks([f"{prefix}```{language}"] + content, closable=False)
+
+
+def _flush_table(table: List[str]) -> Iterator[Tuple[str, bool]]:
+    if len(table) < 3:
+        for line in table:
+            yield line, False
+        return
+    for line in convert_markdown_table_to_rst("\n".join(table)).split("\n"):
+        yield line, False
+
+
+def _convert_code_spans(items: Iterable[Tuple[str, bool]]) -> Iterator[str]:
+    """Turn `code` into ``code``, pairing backticks in document order.
+
+    A backtick left unpaired at the end of a line may be closed on a later
+    line, so lines are held back until it is paired or the input ends.
+    """
+    held: List[str] = []
+    pending: Optional[int] = None  # column of the unpaired backtick in held[0]
+
+    for line, verbatim in items:
+        if verbatim:
+            if held:
+                held.append(line)
+            else:
+                yield line
+            continue
+
+        doubled: List[int] = []
+        held_open = pending is not None  # the unpaired backtick is in held[0]
+        opener: Optional[int] = None
+        for column, char in enumerate(line):
+            if char != "`":
+                continue
+            if held_open:
+                held[0] = held[0][:pending] + "`" + held[0][pending:]
+                pending = None
+                held_open = False
+                doubled.append(column)
+            elif opener is None or opener == column - 1:
+                opener = column
+            else:
+                doubled.extend((opener, column))
+                opener = None
+
+        if doubled:
+            parts = []
+            previous = 0
+            for column in doubled:
+                parts.append(line[previous:column])
+                parts.append("`")
+                previous = column
+            parts.append(line[previous:])
+            converted = "".join(parts)
         else:
-            underline = "-" * len(title)
-        return f"{title}\n{underline}"
-
-    # Convert headers with proper underline lengths (handle ## through ##### headers)
-    content = re.sub(r"^(#{2,5})\s+(.+)$", replace_header, content, flags=re.MULTILINE)
-
-    # Convert markdown code blocks to RST
-    content = re.sub(
-        r"```(\w+)?\n(.*?)\n```",
-        r".. code-block:: \1\n\n\2\n",
-        content,
-        flags=re.DOTALL,
-    )
+            converted = line
+
+        if not held_open and held:
+            yield from held
+            held = []
+        if held_open:
+            held.append(converted)
+        elif opener is None:
+            yield converted
+        else:
+            pending = opener + sum(1 for column in doubled if column < opener)
+            held = [converted]
 
-    # Clean up incomplete code blocks (```yaml without closing ```)
-    content = re.sub(r"```\w*\s*$", "", content, flags=re.MULTILINE)
+    yield from held
 
-    # Convert bold text
-    content = re.sub(r"\*\*([^*]+)\*\*", r"**\1**", content)
 
-    # Convert code spans
-    content = re.sub(r"`([^`]+)`", r"``\1``", content)
+def _collapse_blank_lines(lines: Iterable[str]) -> Iterator[str]:
+    previous_blank = False
+    for line in lines:
+        blank = line == ""
+        if not (blank and previous_blank):
+            yield line
+        previous_blank = blank
 
-    # Convert markdown tables to RST
-    table_pattern = r"\|[^|]+\|[^|]+\|.*?\n\|[-:|]+\|.*?\n(?:\|[^|]*\|.*?\n)+"
-    for table_match in re.finditer(table_pattern, content, re.MULTILINE | re.DOTALL):
-        rst_table = convert_markdown_table_to_rst(table_match.group(0))
-        content = content.replace(table_match.group(0), rst_table)
 
-    # Clean up multiple newlines
-    content = re.sub(r"\n{3,}", "\n\n", content)
+def markdown_to_rst(content: str) -> str:
+    """Convert markdown content to RST format.
 
-    return content.strip()
+    A single streaming pass over the lines: block structure (headers, code
+    fences, tables), then code spans, then blank-line collapsing, each as a
+    generator stage, so the cost is linear in the size of the document.
+    """
+    blocks = _convert_blocks(content.split("\n"))
+    return "\n".join(_collapse_blank_lines(_convert_code_spans(blocks))).strip()
 
 
-def generate_collection_overview() -> str:
+def generate_collection_overview(index: Optional[srd_index.SrdIndex] = None) -> str:
     """Generate the main collection overview documentation."""
-    srd_content = load_srd_content()
+    if index is None:
+        index = load_srd_index()
 
     # Extract key sections
-    overview_section = extract_section_content(srd_content, "1. Collection Overview")
-    requirements_section = extract_section_content(srd_content, "2. Collection-Wide Requirements")
+    overview_section = extract_section_content(index, "1. Collection Overview")
+    requirements_section = extract_section_content(index, "2. Collection-Wide Requirements")
 
     # Extract known issues and future requirements
-    issues_section = extract_section_content(srd_content, "4. Known Issues and Limitations")
-    future_section = extract_section_content(srd_content, "5. Future Requirements")
+    issues_section = extract_section_content(index, "4. Known Issues and Limitations")
+    future_section = extract_section_content(index, "5. Future Requirements")
 
     # Convert to RST
     overview_rst = markdown_to_rst(overview_section) if overview_section else ""
@@ -310,30 +407,10 @@ This collection is maintained by the wolskies infrastructure team.
 
 def main():
     """Generate collection-level documentation."""
-    script_dir = Path(__file__).parent
-    collection_root = script_dir.parent
-    docs_dir = collection_root / "docs" / "generated"
-
-    print("Generating collection-level documentation...")
-
-    try:
-        # Generate main collection overview
-        rst_content = generate_collection_overview()
-
-        # Write to file
-        output_file = docs_dir / "collection_overview.rst"
-        with open(output_file, "w") as f:
-            f.write(rst_content)
-
-        print(f"✓ Generated {output_file}")
-
-    except Exception as e:
-        print(f"✗ Error generating collection documentation: {e}")
-        return 1
+    import docs_pipeline
 
-    print(f"\nCollection documentation generated in {docs_dir}")
-    return 0
+    return docs_pipeline.main(["--target", "collection"] + sys.argv[1:])
 
 
 if __name__ == "__main__":
-    exit(main())
+    sys.exit(main())
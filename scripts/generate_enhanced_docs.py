@@ -16,7 +16,11 @@ import sys
 import yaml
 import re
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
+
+import srd_index
+
+SRD_FILE = srd_index.SRD_FILE
 
 
 def load_yaml_file(file_path: Path) -> Optional[Dict[str, Any]]:
@@ -43,28 +47,28 @@ def format_description_list(description: Any) -> str:
         return ""
 
 
-def extract_argument_specs(role_path: Path) -> Dict[str, Any]:
+def extract_argument_specs(role_path: Path, load: Callable = load_yaml_file) -> Dict[str, Any]:
     """Extract formal variable specifications from argument_specs.yml."""
     argument_specs_file = role_path / "meta" / "argument_specs.yml"
 
     if not argument_specs_file.exists():
         return {}
 
-    specs = load_yaml_file(argument_specs_file) or {}
+    specs = load(argument_specs_file) or {}
     return specs.get("argument_specs", {}).get("main", {})
 
 
-def extract_role_variables(role_path: Path) -> List[Dict[str, str]]:
+def extract_role_variables(role_path: Path, load: Callable = load_yaml_file) -> List[Dict[str, str]]:
     """Extract comprehensive variable documentation from argument_specs.yml and defaults."""
     variables = []
 
     # Primary source: argument_specs.yml (formal API specification)
-    main_spec = extract_argument_specs(role_path)
+    main_spec = extract_argument_specs(role_path, load)
     options = main_spec.get("options", {})
 
     # Load defaults for default values
     defaults_file = role_path / "defaults" / "main.yml"
-    defaults_data = load_yaml_file(defaults_file) or {}
+    defaults_data = load(defaults_file) or {}
 
     for var_name, var_spec in options.items():
         # Format type with proper RST styling
@@ -135,81 +139,48 @@ def extract_role_variables(role_path: Path) -> List[Dict[str, str]]:
     return sorted(variables, key=lambda x: (x["required"] == "No", x["name"]))
 
 
-def extract_srd_requirements(role_name: str) -> List[Dict[str, str]]:
-    """Extract REQ-XX-NNN requirements from SRD for the specified role."""
-    requirements = []
-    srd_file = (
-        Path(__file__).parent.parent / "docs" / "SOFTWARE_REQUIREMENTS_DOCUMENT.md"
-    )
+def requirement_description(text: str) -> str:
+    """Convert an SRD requirement description to RST."""
+    # Remove markdown formatting for RST
+    description = re.sub(r"`([^`]+)`", r"``\1``", text)
+
+    # Fix RST reference issues - remove trailing underscores after code snippets
+    description = re.sub(r"``([^`]+)``_", r"``\1``", description)
+
+    # Clean up markdown strikethrough and other formatting artifacts
+    description = re.sub(r"~~+$", "", description.strip())
+
+    # Remove implementation sections and other clutter
+    description = re.sub(r"\*\*Implementation\*\*:.*", "", description, flags=re.DOTALL)
+    return description.strip()
 
-    if not srd_file.exists():
-        return requirements
+
+def extract_srd_requirements(role_name: str, index: Optional[srd_index.SrdIndex] = None) -> List[Dict[str, str]]:
+    """Extract REQ-XX-NNN requirements from SRD for the specified role.
+
+    index is a shared srd_index.SrdIndex; the cached index of SRD_FILE is
+    loaded when not given.
+    """
+    requirements = []
 
     try:
-        with open(srd_file, "r") as f:
-            content = f.read()
-
-        # Find the section for this role (flexible matching)
-        role_patterns = [
-            rf"###\s+3\.\d+\s+{re.escape(role_name.replace('_', ' ').title())}",
-            rf"###\s+3\.\d+\s+{re.escape(role_name.replace('_', ' '))}",
-            rf"###.*{re.escape(role_name)}",
-        ]
-
-        section_match = None
-        for pattern in role_patterns:
-            section_match = re.search(pattern, content, re.IGNORECASE)
-            if section_match:
-                break
-
-        if section_match:
-            # Extract content from this section until the next ### section
-            start_pos = section_match.end()
-            next_section = re.search(r"\n###\s+", content[start_pos:])
-            end_pos = start_pos + next_section.start() if next_section else len(content)
-            role_content = content[start_pos:end_pos]
-
-            # Find all REQ-XX-NNN requirements with descriptions
-            # More precise pattern to capture only the immediate description after REQ-
-            req_pattern = (
-                r"\*\*(REQ-[A-Z]+-\d+)\*\*:?\s*(.+?)(?=\n(?:\*\*REQ-[A-Z]+-\d+|"
-                r"\*\*Implementation\*\*|###|_Removed|_Deprecated|\n\n|$))"
-            )
-            req_matches = re.findall(
-                req_pattern, role_content, re.DOTALL | re.MULTILINE
-            )
-
-            for req_id, req_description in req_matches:
-                # Clean up description
-                description = re.sub(r"\s+", " ", req_description.strip())
-                description = re.sub(r"\n+", " ", description)
-
-                # Remove markdown formatting for RST
-                description = re.sub(r"`([^`]+)`", r"``\1``", description)
-
-                # Fix RST reference issues - remove trailing underscores after code snippets
-                description = re.sub(r"``([^`]+)``_", r"``\1``", description)
-
-                # Clean up markdown strikethrough and other formatting artifacts
-                description = re.sub(r"~~+$", "", description.strip())
-
-                # Remove implementation sections and other clutter
-                description = re.sub(
-                    r"\*\*Implementation\*\*:.*", "", description, flags=re.DOTALL
-                )
-                description = description.strip()
-
-                # Skip empty descriptions, very short ones, or removed/deprecated items
-                if (
-                    description
-                    and len(description) > 20
-                    and not description.startswith("**")
-                    and not description.startswith("_Removed:")
-                    and not description.startswith("_Deprecated:")
-                ):
-                    requirements.append(
-                        {"id": req_id.strip(), "description": description}
-                    )
+        if index is None:
+            if not SRD_FILE.exists():
+                return requirements
+            index = srd_index.load_index(SRD_FILE)
+
+        for requirement in index.role_requirements(role_name):
+            description = requirement_description(requirement["text"])
+
+            # Skip empty descriptions, very short ones, or removed/deprecated items
+            if (
+                description
+                and len(description) > 20
+                and not description.startswith("**")
+                and not description.startswith("_Removed:")
+                and not description.startswith("_Deprecated:")
+            ):
+                requirements.append({"id": requirement["id"], "description": description})
 
     except Exception as e:
         print(f"Warning: Could not extract SRD requirements for {role_name}: {e}")
@@ -217,25 +188,21 @@ def extract_srd_requirements(role_name: str) -> List[Dict[str, str]]:
     return requirements
 
 
-def extract_meta_information(role_path: Path) -> Dict[str, str]:
+def extract_meta_information(role_path: Path, load: Callable = load_yaml_file) -> Dict[str, str]:
     """Extract role metadata information."""
     meta_file = role_path / "meta" / "main.yml"
-    meta_data = load_yaml_file(meta_file) or {}
+    meta_data = load(meta_file) or {}
 
     galaxy_info = meta_data.get("galaxy_info", {})
-    argument_specs = extract_argument_specs(role_path)
+    argument_specs = extract_argument_specs(role_path, load)
 
     return {
         "author": galaxy_info.get("author", "wolskies"),
         "license": galaxy_info.get("license", "MIT"),
         "min_ansible": galaxy_info.get("min_ansible_version", "2.15"),
         "platforms": galaxy_info.get("platforms", []),
-        "description": argument_specs.get(
-            "short_description", "No description available"
-        ),
-        "long_description": format_description_list(
-            argument_specs.get("description", "")
-        ),
+        "description": argument_specs.get("short_description", "No description available"),
+        "long_description": format_description_list(argument_specs.get("description", "")),
     }
 
 
@@ -323,13 +290,23 @@ def generate_requirements_section(requirements: List[Dict[str, str]]) -> str:
     return "\n".join(lines) + "\n"
 
 
-def generate_role_documentation(role_name: str, role_path: Path) -> str:
-    """Generate comprehensive RST documentation for a role."""
+def generate_role_documentation(
+    role_name: str,
+    role_path: Path,
+    load: Callable = load_yaml_file,
+    requirements: Optional[List[Dict[str, str]]] = None,
+) -> str:
+    """Generate comprehensive RST documentation for a role.
+
+    load parses a role file and requirements are the role's SRD requirements;
+    docs_pipeline.py passes cached versions of both.
+    """
 
     # Extract all information
-    meta_info = extract_meta_information(role_path)
-    variables = extract_role_variables(role_path)
-    requirements = extract_srd_requirements(role_name)
+    meta_info = extract_meta_information(role_path, load)
+    variables = extract_role_variables(role_path, load)
+    if requirements is None:
+        requirements = extract_srd_requirements(role_name)
 
     # Generate title
     title = f"{role_name.replace('_', ' ').title()} Role"
@@ -450,47 +427,11 @@ This role is maintained by """
 
 
 def main():
-    """Generate documentation for all roles or a specific role."""
-    if len(sys.argv) > 1:
-        role_name = sys.argv[1]
-        roles = [role_name]
-    else:
-        # Find all roles with argument_specs.yml
-        roles_dir = Path(__file__).parent.parent / "roles"
-        roles = []
-        for role_dir in roles_dir.iterdir():
-            if (
-                role_dir.is_dir()
-                and (role_dir / "meta" / "argument_specs.yml").exists()
-            ):
-                roles.append(role_dir.name)
-
-    output_dir = Path(__file__).parent.parent / "docs" / "generated"
-    output_dir.mkdir(exist_ok=True)
-
-    for role_name in sorted(roles):
-        role_path = Path(__file__).parent.parent / "roles" / role_name
-
-        if not role_path.exists():
-            print(f"Warning: Role {role_name} not found")
-            continue
-
-        print(f"Generating documentation for {role_name}...")
-
-        try:
-            rst_content = generate_role_documentation(role_name, role_path)
-
-            output_file = output_dir / f"role_{role_name}.rst"
-            with open(output_file, "w") as f:
-                f.write(rst_content)
-
-            print(f"✓ Generated {output_file}")
-
-        except Exception as e:
-            print(f"✗ Error generating documentation for {role_name}: {e}")
+    """Generate documentation for all roles or the roles named on the command line."""
+    import docs_pipeline
 
-    print(f"\nDocumentation generated in {output_dir}")
+    return docs_pipeline.main(["--target", "roles"] + sys.argv[1:])
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic inventory of N hosts for controller scaling tests.
+
+Each host gets M packages, K users and R firewall rules, laid out the way a
+real inventory for this collection is:
+
+- hosts.yml with one group per distribution (ubuntu, debian, archlinux)
+- group_vars/all.yml with the domain settings and manage_packages_all
+- group_vars/<distribution>.yml with manage_packages_group,
+  apt_repositories_group and the facts the roles read (ansible_os_family,
+  ansible_distribution, ...), since the hosts do not exist to gather them
+- host_vars/<host>/discovered.yml rendered from the discovery role's
+  simple_host_vars.yml.j2, so it has exactly the shape discovery writes
+  (users, firewall rules, services, installed packages)
+- host_vars/<host>/main.yml with manage_packages_host and host_hostname
+
+Half of a host's packages come from the all level, a quarter from its group
+and the rest from the host itself, so the roles' combine(list_merge='append')
+sees all three levels. Output is deterministic for a given --seed.
+
+    python scripts/generate_fleet.py -o /tmp/fleet --hosts 1000
+    python scripts/generate_fleet.py -o /tmp/fleet --hosts 100 --packages 400 --users 10 --rules 50
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+HOST_VARS_TEMPLATE = COLLECTION_ROOT / "roles" / "discovery" / "templates" / "simple_host_vars.yml.j2"
+
+# group name -> facts of the hosts in it
+DISTRIBUTIONS = {
+    "ubuntu": {
+        "ansible_system": "Linux",
+        "ansible_os_family": "Debian",
+        "ansible_distribution": "Ubuntu",
+        "ansible_distribution_version": "24.04",
+        "ansible_distribution_major_version": "24",
+        "ansible_distribution_release": "noble",
+    },
+    "debian": {
+        "ansible_system": "Linux",
+        "ansible_os_family": "Debian",
+        "ansible_distribution": "Debian",
+        "ansible_distribution_version": "12",
+        "ansible_distribution_major_version": "12",
+        "ansible_distribution_release": "bookworm",
+    },
+    "archlinux": {
+        "ansible_system": "Linux",
+        "ansible_os_family": "Archlinux",
+        "ansible_distribution": "Archlinux",
+        "ansible_distribution_version": "rolling",
+        "ansible_distribution_major_version": "rolling",
+        "ansible_distribution_release": "rolling",
+    },
+}
+
+SERVICES = ["ssh", "cron", "rsyslog", "systemd-timesyncd", "fail2ban", "nginx", "docker", "postgresql"]
+SHELLS = ["/bin/bash", "/bin/zsh", "/usr/bin/fish"]
+
+
+def package_names(prefix: str, count: int) -> List[str]:
+    return [f"{prefix}-{i:05d}" for i in range(count)]
+
+
+def level_sizes(packages: int) -> Tuple[int, int, int]:
+    """Packages per host contributed by the all, group and host levels."""
+    all_level = packages // 2
+    group_level = packages // 4
+    return all_level, group_level, packages - all_level - group_level
+
+
+def host_names(hosts: int) -> List[Tuple[str, str]]:
+    """(hostname, group) pairs, distributions assigned round-robin."""
+    groups = list(DISTRIBUTIONS)
+    return [(f"{groups[i % len(groups)]}-{i:05d}", groups[i % len(groups)]) for i in range(hosts)]
+
+
+# =============================================================================
+# HOST VARIABLES
+# =============================================================================
+
+
+def discovery_vars(
+    hostname: str, group: str, index: int, packages: int, users: int, rules: int, seed: int
+) -> Dict[str, Any]:
+    """Variables simple_host_vars.yml.j2 reads, as the discovery role would set them for this host."""
+    rng = random.Random(seed * 1000003 + index)
+    facts = DISTRIBUTIONS[group]
+    all_level, group_level, host_level = level_sizes(packages)
+    installed = (
+        package_names("common", all_level)
+        + package_names(group, group_level)
+        + package_names(f"host{index:05d}", host_level)
+    )
+    firewall_rules = []
+    for r in range(rules):
+        rule = {"rule": rng.choice(["allow", "allow", "deny", "limit"]), "port": str(1024 + (index + r) % 60000)}
+        rule["proto"] = rng.choice(["tcp", "udp"])
+        if r % 3 == 0:
+            rule["source"] = f"10.{r % 256}.{index % 256}.0/24"
+        if r % 5 == 0:
+            rule["comment"] = f"synthetic rule {r}"
+        firewall_rules.append(rule)
+    return dict(
+        facts,
+        inventory_hostname=hostname,
+        discovery_domain_name="fleet.example.com",
+        discovery_domain_timezone="UTC",
+        discovery_domain_locale="en_US.UTF-8",
+        discovery_domain_language="en_US.UTF-8",
+        discovery_domain_timesync_enabled=True,
+        users=[
+            {
+                "name": f"user{u:03d}",
+                "shell": rng.choice(SHELLS),
+                "git": {"user_name": f"User {u}", "user_email": f"user{u}@fleet.example.com"},
+            }
+            for u in range(users)
+        ],
+        discovery_hostname=hostname,
+        discovery_services_enabled=sorted(rng.sample(SERVICES, 4)),
+        discovery_services_disabled=[],
+        discovery_services_masked=[],
+        discovery_sysctl_current={},
+        discovery_udev_rules=[],
+        discovery_firewall_enabled=rules > 0,
+        discovery_firewall_package="ufw" if rules > 0 else "",
+        discovery_firewall_rules=firewall_rules,
+        discovery_fail2ban_detected=True,
+        discovery_fail2ban_enabled=index % 2 == 0,
+        discovery_packages_host=installed,
+        discovery_homebrew_casks=[],
+        discovery_homebrew_taps=[],
+        discovery_repositories=[],
+        discovery_snap_packages=[],
+        discovery_flatpak_packages=[],
+        discovery_macos_preferences={},
+    )
+
+
+def _generate_hosts(job: Tuple[str, List[Tuple[int, str, str]], int, int, int, int]) -> int:
+    """Write the host_vars of a batch of hosts; returns bytes written."""
+    sys.path.insert(0, str(COLLECTION_ROOT / "scripts"))
+    import validate_templates
+
+    output, batch, packages, users, rules, seed = job
+    env = validate_templates.build_environment(str(HOST_VARS_TEMPLATE.parent))
+    template = env.get_template(HOST_VARS_TEMPLATE.name)
+    written = 0
+    for index, hostname, group in batch:
+        host_dir = Path(output) / "host_vars" / hostname
+        host_dir.mkdir(parents=True, exist_ok=True)
+        variables = discovery_vars(hostname, group, index, packages, users, rules, seed)
+        discovered = template.render(variables)
+        host_level = level_sizes(packages)[2]
+        desired = yaml.safe_dump(
+            {
+                "host_hostname": hostname,
+                "manage_packages_host": {
+                    DISTRIBUTIONS[group]["ansible_distribution"]: [
+                        {"name": name} for name in package_names(f"host{index:05d}", host_level)
+                    ]
+                },
+            },
+            sort_keys=False,
+        )
+        (host_dir / "discovered.yml").write_text(discovered, encoding="utf-8")
+        (host_dir / "main.yml").write_text("---\n" + desired, encoding="utf-8")
+        written += len(discovered) + len(desired)
+    return written
+
+
+# =============================================================================
+# INVENTORY
+# =============================================================================
+
+
+def generate_fleet(
+    output: Path,
+    hosts: int,
+    packages: int = 200,
+    users: int = 5,
+    rules: int = 20,
+    seed: int = 0,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Write a synthetic inventory to output (replacing it); returns a summary."""
+    if output.exists():
+        shutil.rmtree(output)
+    (output / "group_vars").mkdir(parents=True)
+    names = host_names(hosts)
+    all_level, group_level, _ = level_sizes(packages)
+
+    inventory: Dict[str, Any] = {"all": {"children": {}}}
+    for group in DISTRIBUTIONS:
+        members = dict((hostname, None) for hostname, host_group in names if host_group == group)
+        inventory["all"]["children"][group] = {"hosts": members}
+    (output / "hosts.yml").write_text("---\n" + yaml.safe_dump(inventory, sort_keys=False), encoding="utf-8")
+
+    distributions = [facts["ansible_distribution"] for facts in DISTRIBUTIONS.values()]
+    all_vars = {
+        "domain_name": "fleet.example.com",
+        "domain_timezone": "UTC",
+        "manage_packages_all": dict(
+            (distribution, [{"name": name} for name in package_names("common", all_level)])
+            for distribution in distributions
+        ),
+    }
+    (output / "group_vars" / "all.yml").write_text("---\n" + yaml.safe_dump(all_vars, sort_keys=False))
+    for group, facts in DISTRIBUTIONS.items():
+        group_vars = dict(facts)
+        group_vars["manage_packages_group"] = {
+            facts["ansible_distribution"]: [{"name": name} for name in package_names(group, group_level)]
+        }
+        if facts["ansible_os_family"] == "Debian":
+            group_vars["apt_repositories_group"] = {
+                facts["ansible_distribution"]: [
+                    {
+                        "name": f"{group}-extra",
+                        "uris": f"https://packages.fleet.example.com/{group}",
+                        "suites": facts["ansible_distribution_release"],
+                    }
+                ]
+            }
+        (output / "group_vars" / f"{group}.yml").write_text("---\n" + yaml.safe_dump(group_vars, sort_keys=False))
+
+    indexed = [(i, hostname, group) for i, (hostname, group) in enumerate(names)]
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(indexed)))
+    batches = [indexed[i::workers] for i in range(workers)]
+    host_jobs = [(str(output), batch, packages, users, rules, seed) for batch in batches if batch]
+    if workers <= 1:
+        written = sum(_generate_hosts(job) for job in host_jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            written = sum(pool.map(_generate_hosts, host_jobs))
+    return {"hosts": hosts, "packages": packages, "users": users, "rules": rules, "host_vars_bytes": written}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Inventory directory (replaced if present)")
+    parser.add_argument("-n", "--hosts", type=int, default=100, help="Number of hosts (default: 100)")
+    parser.add_argument("-m", "--packages", type=int, default=200, help="Packages per host (default: 200)")
+    parser.add_argument("-k", "--users", type=int, default=5, help="Users per host (default: 5)")
+    parser.add_argument("-r", "--rules", type=int, default=20, help="Firewall rules per host (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    summary = generate_fleet(args.output, args.hosts, args.packages, args.users, args.rules, args.seed, args.jobs)
+    print(
+        f"✓ {summary['hosts']} hosts × {summary['packages']} packages × {summary['users']} users × "
+        f"{summary['rules']} firewall rules written to {args.output} "
+        f"({summary['host_vars_bytes'] / 1e6:.1f} MB of host_vars)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Find slow task patterns in the collection's roles and playbooks.
+
+Task files are read through a YAML loader that keeps each task's line, and
+checked for patterns that cost remote calls or controller time on every run:
+
+- package-loop         a package module that accepts a list (apt, pacman,
+                       flatpak, snap, ...) called once per loop item
+- include-loop         include_tasks/include_role inside a loop, which
+                       re-reads the file and re-runs its tasks per item
+- set-fact-accumulate  set_fact growing a list or dict from its own value in
+                       a loop, one controller round and one copy per item
+- update-cache         update_cache: true, a package index download every
+                       run instead of only when the index is stale
+- unguarded-command    command/shell without creates/removes, so it runs on
+                       every host on every run (cargo install, go install)
+
+Each finding carries an estimate of the remote calls the task makes per host,
+from the size of the variable its loop iterates over (LOOP_SIZES, or --size
+NAME=N). Findings are printed most expensive first as file:line.
+
+Known findings are recorded in tests/performance/baselines/lint_performance.json;
+only new ones fail, so the check can run as a pre-commit hook:
+
+    python scripts/lint_performance.py                      # whole collection
+    python scripts/lint_performance.py roles/x/tasks/main.yml
+    python scripts/lint_performance.py --all --format json  # include baselined findings
+    python scripts/lint_performance.py --update             # rewrite the baseline
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import yaml
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = COLLECTION_ROOT / "tests" / "performance" / "baselines" / "lint_performance.json"
+TASK_GLOBS = ["roles/*/tasks/**/*.yml", "roles/*/handlers/**/*.yml", "playbooks/*.yml"]
+
+# Typical items per loop source on one host. Package, user and firewall rule
+# counts match the defaults of generate_fleet.py.
+LOOP_SIZES = {
+    "_final_packages": 200,
+    "_final_repositories": 3,
+    "flatpak_packages": 20,
+    "snap_packages": 20,
+    "node_packages": 10,
+    "rust_packages": 10,
+    "go_packages": 10,
+    "users": 5,
+    "regular_user_names": 5,
+    "user_details.results": 5,
+    "getent_passwd": 40,
+    "firewall.rules": 20,
+    "firewall_rules": 20,
+}
+DEFAULT_LOOP_SIZE = 10
+
+# Keys of a task that are not its module
+TASK_KEYWORDS = {
+    "name",
+    "action",
+    "args",
+    "any_errors_fatal",
+    "async",
+    "become",
+    "become_exe",
+    "become_flags",
+    "become_method",
+    "become_user",
+    "changed_when",
+    "check_mode",
+    "collections",
+    "connection",
+    "debugger",
+    "delay",
+    "delegate_facts",
+    "delegate_to",
+    "diff",
+    "environment",
+    "failed_when",
+    "ignore_errors",
+    "ignore_unreachable",
+    "listen",
+    "local_action",
+    "loop",
+    "loop_control",
+    "module_defaults",
+    "no_log",
+    "notify",
+    "poll",
+    "register",
+    "remote_user",
+    "retries",
+    "run_once",
+    "tags",
+    "throttle",
+    "timeout",
+    "until",
+    "vars",
+    "when",
+}
+
+# Modules that run on the controller only
+LOCAL_MODULES = {
+    "add_host",
+    "assert",
+    "debug",
+    "fail",
+    "group_by",
+    "include_role",
+    "include_tasks",
+    "include_vars",
+    "import_role",
+    "import_tasks",
+    "meta",
+    "set_fact",
+    "set_stats",
+}
+
+# Package modules whose name option takes a list, so one call can install many
+BATCH_PACKAGE_MODULES = {
+    "apt",
+    "dnf",
+    "package",
+    "yum",
+    "pacman",
+    "flatpak",
+    "snap",
+    "homebrew",
+    "homebrew_cask",
+    "pip",
+    "cargo",
+    "npm",
+}
+
+COMMAND_MODULES = {"command", "shell"}
+INCLUDE_MODULES = {"include_tasks", "include_role"}
+
+LOOP_SOURCE = re.compile(r"{{-?\s*\(*\s*([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)")
+JINJA_EXPRESSION = re.compile(r"{{.*?}}|{%.*?%}", re.S)
+
+
+# =============================================================================
+# TASK LOADING
+# =============================================================================
+
+
+class Mapping(dict):
+    """A YAML mapping that remembers the 1-based line it starts on."""
+
+    line = 0
+
+
+class LineLoader(yaml.SafeLoader):
+    pass
+
+
+def _construct_mapping(loader: LineLoader, node: yaml.MappingNode) -> Iterator[Mapping]:
+    data = Mapping()
+    data.line = node.start_mark.line + 1
+    yield data
+    data.update(loader.construct_mapping(node))
+
+
+LineLoader.add_constructor("tag:yaml.org,2002:map", _construct_mapping)
+
+
+def load_tasks(path: Path) -> List[Mapping]:
+    """Top-level tasks of a task file, or the tasks/handlers of a playbook's plays."""
+    try:
+        data = yaml.load(path.read_text(encoding="utf-8"), Loader=LineLoader)  # nosec B506 - SafeLoader subclass
+    except (OSError, yaml.YAMLError):
+        return []
+    if not isinstance(data, list):
+        return []
+    tasks = []
+    for entry in data:
+        if not isinstance(entry, Mapping):
+            continue
+        if "hosts" in entry or "import_playbook" in entry or "ansible.builtin.import_playbook" in entry:
+            for section in ("pre_tasks", "tasks", "post_tasks", "handlers"):
+                tasks.extend(item for item in entry.get(section) or [] if isinstance(item, Mapping))
+        else:
+            tasks.append(entry)
+    return tasks
+
+
+def walk(tasks: List[Mapping]) -> Iterator[Mapping]:
+    """Every task, descending into block/rescue/always."""
+    for task in tasks:
+        if any(section in task for section in ("block", "rescue", "always")):
+            for section in ("block", "rescue", "always"):
+                yield from walk([item for item in task.get(section) or [] if isinstance(item, Mapping)])
+        else:
+            yield task
+
+
+def task_module(task: Mapping) -> Optional[str]:
+    """The task's module as written (FQCN or short name)."""
+    for key in task:
+        if key not in TASK_KEYWORDS and not key.startswith("with_"):
+            return key
+    return None
+
+
+def short_name(module: Optional[str]) -> str:
+    return (module or "").rsplit(".", 1)[-1]
+
+
+def module_args(task: Mapping, module: str) -> Dict[str, Any]:
+    """The module's options, merging free-form args: and the task's args: section."""
+    value = task.get(module)
+    args = dict(value) if isinstance(value, dict) else {}
+    if isinstance(value, str) and short_name(module) in COMMAND_MODULES:
+        args["cmd"] = value
+    if isinstance(task.get("args"), dict):
+        args.update(task["args"])
+    return args
+
+
+def loop_expression(task: Mapping) -> Any:
+    if "loop" in task:
+        return task["loop"]
+    for key, value in task.items():
+        if key.startswith("with_"):
+            return value
+    return None
+
+
+def loop_var(task: Mapping) -> str:
+    control = task.get("loop_control")
+    return control.get("loop_var", "item") if isinstance(control, dict) else "item"
+
+
+def mentions(value: Any, name: str) -> bool:
+    """Whether a templated value refers to the variable name."""
+    pattern = re.compile(r"(?<![\w.])" + re.escape(name) + r"\b")
+    if isinstance(value, str):
+        return any(pattern.search(expression) for expression in JINJA_EXPRESSION.findall(value))
+    if isinstance(value, dict):
+        return any(mentions(item, name) for item in value.values())
+    if isinstance(value, list):
+        return any(mentions(item, name) for item in value)
+    return False
+
+
+# =============================================================================
+# COST ESTIMATION
+# =============================================================================
+
+
+def loop_source(expression: Any) -> Optional[str]:
+    """The variable a loop iterates over: users | default([]) -> users."""
+    if isinstance(expression, str):
+        match = LOOP_SOURCE.search(expression)
+        return match.group(1) if match else None
+    return None
+
+
+def loop_size(expression: Any, sizes: Dict[str, int]) -> int:
+    """Estimated items in a loop: literal lists count themselves, variables use sizes."""
+    if expression is None:
+        return 1
+    if isinstance(expression, list):
+        return len(expression)
+    source = loop_source(expression)
+    if source is None:
+        return DEFAULT_LOOP_SIZE
+    parts = source.split(".")
+    for start in range(len(parts)):
+        candidate = ".".join(parts[start:])
+        if candidate in sizes:
+            return sizes[candidate]
+    return DEFAULT_LOOP_SIZE
+
+
+def include_target(task: Mapping, module: str, path: Path) -> List[Path]:
+    """Task files an include_tasks can load; templated parts of the name match any file."""
+    value = task.get(module)
+    name = value.get("file") if isinstance(value, dict) else value
+    if not isinstance(name, str) or short_name(module) == "include_role":
+        return []
+    pattern = JINJA_EXPRESSION.sub("*", name)
+    return sorted(Path(match) for match in glob.glob(str(path.parent / pattern)))
+
+
+def remote_calls(tasks: List[Mapping], path: Path, sizes: Dict[str, int], seen: Optional[Set[Path]] = None) -> int:
+    """Estimated remote calls per host to run a list of tasks once."""
+    seen = set(seen or ()) | {path}
+    total = 0
+    for task in walk(tasks):
+        module = task_module(task)
+        items = loop_size(loop_expression(task), sizes)
+        if short_name(module) in ("include_tasks", "import_tasks"):
+            targets = [target for target in include_target(task, module, path) if target not in seen]
+            per_item = max((remote_calls(load_tasks(target), target, sizes, seen) for target in targets), default=0)
+            total += items * per_item
+        elif short_name(module) not in LOCAL_MODULES:
+            total += items
+    return total
+
+
+# =============================================================================
+# RULES
+# =============================================================================
+
+
+def finding(rule: str, path: Path, task: Mapping, calls: int, items: int, message: str) -> Dict[str, Any]:
+    return {
+        "rule": rule,
+        "file": str(path.relative_to(COLLECTION_ROOT)) if path.is_relative_to(COLLECTION_ROOT) else str(path),
+        "line": task.line,
+        "task": str(task.get("name", "")),
+        "calls": calls,
+        "items": items,
+        "message": message,
+    }
+
+
+def check_task(task: Mapping, path: Path, sizes: Dict[str, int], registered: Set[str]) -> List[Dict[str, Any]]:
+    """Findings for one task; registered holds the variables the file registers, for command guards."""
+    module = task_module(task)
+    if module is None:
+        return []
+    name = short_name(module)
+    args = module_args(task, module)
+    expression = loop_expression(task)
+    looped = expression is not None
+    items = loop_size(expression, sizes)
+    source = loop_source(expression) or "the loop"
+    found = []
+
+    if looped and name in BATCH_PACKAGE_MODULES and mentions(args.get("name"), loop_var(task)):
+        found.append(
+            finding(
+                "package-loop",
+                path,
+                task,
+                items,
+                items,
+                f"{name} runs once per item of {source} (~{items} calls); pass the whole list as name",
+            )
+        )
+
+    if looped and name in INCLUDE_MODULES:
+        per_item = max(
+            (remote_calls(load_tasks(target), target, sizes, {path}) for target in include_target(task, module, path)),
+            default=0,
+        )
+        found.append(
+            finding(
+                "include-loop",
+                path,
+                task,
+                items * per_item,
+                items,
+                f"{name} is loaded and run once per item of {source} (~{items} includes, "
+                f"~{items * per_item} remote calls); loop inside the included tasks instead",
+            )
+        )
+
+    if looped and name == "set_fact":
+        grown = [key for key, value in args.items() if key != "cacheable" and mentions(value, key)]
+        if grown:
+            found.append(
+                finding(
+                    "set-fact-accumulate",
+                    path,
+                    task,
+                    0,
+                    items,
+                    f"set_fact rebuilds {', '.join(grown)} once per item of {source} (~{items} rounds, "
+                    "quadratic copying); build it in one expression with map/select/selectattr",
+                )
+            )
+
+    if args.get("update_cache") in (True, "true", "yes") and "cache_valid_time" not in args:
+        found.append(
+            finding(
+                "update-cache",
+                path,
+                task,
+                items,
+                items,
+                f"{name} downloads the package index on every run; use wolskies.infrastructure.apt_cache "
+                "(apt) or refresh only when the index is older than a threshold",
+            )
+        )
+
+    # Handlers run only when notified, and a when on a registered probe result is a guard
+    when = task.get("when")
+    conditions = ["{{ %s }}" % condition for condition in (when if isinstance(when, list) else [when]) if condition]
+    guarded = {"creates", "removes"} & set(args) or any(mentions(conditions, var) for var in registered)
+    if name in COMMAND_MODULES and path.parent.name != "handlers" and not guarded:
+        if task.get("changed_when") not in (False, "false"):
+            found.append(
+                finding(
+                    "unguarded-command",
+                    path,
+                    task,
+                    items,
+                    items,
+                    f"{name} runs on every host on every run (~{items} calls) with no creates/removes guard",
+                )
+            )
+    return found
+
+
+def lint_file(path: Path, sizes: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """Findings for one task file or playbook."""
+    sizes = LOOP_SIZES if sizes is None else sizes
+    tasks = list(walk(load_tasks(path)))
+    registered = set(task["register"] for task in tasks if isinstance(task.get("register"), str))
+    found = []
+    for task in tasks:
+        found.extend(check_task(task, path, sizes, registered))
+    return found
+
+
+def task_files(paths: List[str]) -> List[Path]:
+    """Files to lint: the given ones that are task files or playbooks, or all of them."""
+    if not paths:
+        files: Set[Path] = set()
+        for pattern in TASK_GLOBS:
+            files.update(Path(match) for match in glob.glob(str(COLLECTION_ROOT / pattern), recursive=True))
+        return sorted(files)
+    selected = []
+    for path in paths:
+        resolved = Path(path).resolve()
+        relative = str(resolved.relative_to(COLLECTION_ROOT)) if resolved.is_relative_to(COLLECTION_ROOT) else path
+        if re.match(r"^(roles/[^/]+/(tasks|handlers)/.*|playbooks/[^/]+)\.ya?ml$", relative) and resolved.exists():
+            selected.append(resolved)
+    return selected
+
+
+def rank(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(findings, key=lambda f: (-f["calls"], -f["items"], f["file"], f["line"]))
+
+
+def finding_key(item: Dict[str, Any]) -> str:
+    """Baseline identity of a finding; task names survive edits that shift lines."""
+    return f"{item['rule']}|{item['file']}|{item['task']}"
+
+
+def load_baseline(path: Path) -> Set[str]:
+    if not path.exists():
+        return set()
+    return set(json.loads(path.read_text(encoding="utf-8")).get("findings", []))
+
+
+def save_baseline(path: Path, findings: List[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"findings": sorted(set(map(finding_key, findings)))}, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def parse_sizes(values: List[str]) -> Dict[str, int]:
+    sizes = dict(LOOP_SIZES)
+    for value in values:
+        name, _, count = value.partition("=")
+        if not name or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"--size expects NAME=N, got {value!r}")
+        sizes[name] = int(count)
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="Task files or playbooks (default: every one in the collection)")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    parser.add_argument("--size", action="append", default=[], metavar="NAME=N", help="Items in a loop source")
+    parser.add_argument("--all", action="store_true", help="Report baselined findings as well as new ones")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Known findings file")
+    parser.add_argument("--update", action="store_true", help="Write the findings as the new baseline")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = parse_sizes(args.size)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    files = task_files(args.files)
+    findings = rank([item for path in files for item in lint_file(path, sizes)])
+
+    if args.update:
+        save_baseline(args.baseline, findings)
+        print(f"✓ {len(findings)} findings written to {args.baseline}")
+        return 0
+
+    known = load_baseline(args.baseline)
+    new = [item for item in findings if finding_key(item) not in known]
+    shown = findings if args.all else new
+    if args.format == "json":
+        print(json.dumps({"files": len(files), "findings": shown, "new": len(new)}, indent=2))
+    else:
+        for item in shown:
+            print(f"{item['file']}:{item['line']}: [{item['rule']}] {item['task']}: {item['message']}")
+        if new:
+            print(f"❌ {len(new)} new performance findings in {len(files)} files", file=sys.stderr)
+        else:
+            print(f"✓ No new performance findings in {len(files)} files ({len(findings)} baselined)")
+    return 1 if new else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
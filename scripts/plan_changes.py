@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Offline change planner for wolskies.infrastructure.
+
+Diffs the desired state in an inventory (manage_packages_*, host_services,
+firewall, users) against the host_vars written by the discovery role and
+predicts, per host, what a real run would change. No connection is made to
+any host, so a whole inventory can be planned in seconds.
+
+Discovery output must live outside the desired-state inventory, for example
+by running the discovery role against a separate inventory directory:
+
+    python scripts/plan_changes.py -i inventory/hosts.yml -d discovered/host_vars
+    python scripts/plan_changes.py -i inventory/hosts.yml -d discovered/host_vars \\
+        --format json --limit-file plan.limit
+    ansible-playbook site.yml -i inventory/hosts.yml --limit @plan.limit
+
+Items the discovery role does not capture (for example toolchain packages or
+deny rules) are reported as unknown rather than guessed.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+# Inventory variables consumed by the planner
+PLANNED_VARIABLES = [
+    "manage_packages_all",
+    "manage_packages_group",
+    "manage_packages_host",
+    "host_services",
+    "firewall",
+    "users",
+]
+
+TOOLCHAINS = ["nodejs", "rust", "go"]
+
+FIREWALL_RULE_FIELDS = ["rule", "port", "proto", "src", "name"]
+
+
+# =============================================================================
+# DISCOVERED STATE
+# =============================================================================
+
+
+def load_discovered(discovered_dir: Path, host: str) -> Optional[Dict[str, Any]]:
+    """Load discovered host_vars for a host, or None if discovery never ran."""
+    for candidate in (
+        discovered_dir / host / "vars.yml",
+        discovered_dir / f"{host}.yml",
+        discovered_dir / host,
+    ):
+        if candidate.is_file():
+            with open(candidate, "r") as f:
+                return yaml.safe_load(f) or {}
+    return None
+
+
+def discovered_distribution(discovered: Dict[str, Any]) -> Optional[str]:
+    """Return the distribution recorded by discovery."""
+    platform = discovered.get("discovery_platform") or {}
+    if platform.get("distribution"):
+        return platform["distribution"]
+
+    # Older discovery output only reveals the distribution through package keys
+    host_packages = ((discovered.get("packages") or {}).get("present") or {}).get("host") or {}
+    if len(host_packages) == 1:
+        return next(iter(host_packages))
+    return None
+
+
+def discovered_packages(discovered: Dict[str, Any], distribution: str) -> Optional[set]:
+    """Return the set of package names discovered on the host."""
+    if "manage_packages_host" in discovered:
+        items = (discovered["manage_packages_host"] or {}).get(distribution, [])
+    elif "packages" in discovered:
+        items = (((discovered["packages"] or {}).get("present") or {}).get("host") or {}).get(distribution, [])
+    else:
+        return None
+    return {package_name(item) for item in items or []}
+
+
+# =============================================================================
+# NORMALIZATION
+# =============================================================================
+
+
+def package_name(item: Any) -> str:
+    """Return the name of a package entry given as a string or a dict."""
+    if isinstance(item, dict):
+        return str(item.get("name", ""))
+    return str(item)
+
+
+def service_name(name: str) -> str:
+    """Normalize a systemd unit name so 'nginx' and 'nginx.service' compare equal."""
+    name = str(name)
+    return name[: -len(".service")] if name.endswith(".service") else name
+
+
+def firewall_rule_key(rule: Dict[str, Any]) -> Tuple[str, ...]:
+    """Normalize a firewall rule to a comparable tuple.
+
+    Accepts both the configure_operating_system interface (proto/src or
+    protocol/source aliases) and the shape written by discovery.
+    """
+    normalized = {
+        "rule": rule.get("rule", "allow"),
+        "port": rule.get("port"),
+        "proto": rule.get("proto", rule.get("protocol")),
+        "src": rule.get("src", rule.get("source")),
+        "name": rule.get("name"),
+    }
+    if normalized["src"] in ("any", "Anywhere"):
+        normalized["src"] = None
+    return tuple(
+        str(normalized[field]).lower() if normalized[field] is not None else "" for field in FIREWALL_RULE_FIELDS
+    )
+
+
+def describe_rule(key: Tuple[str, ...]) -> str:
+    """Render a normalized firewall rule for reports."""
+    return " ".join(f"{field}={value}" for field, value in zip(FIREWALL_RULE_FIELDS, key) if value)
+
+
+def merge_packages(desired: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Merge manage_packages_* the same way configure_software does (list_merge='append')."""
+    merged: Dict[str, List[Any]] = {}
+    for level in ("manage_packages_all", "manage_packages_group", "manage_packages_host"):
+        for distribution, items in (desired.get(level) or {}).items():
+            merged.setdefault(distribution, []).extend(items or [])
+    return merged
+
+
+# =============================================================================
+# PLANNING
+# =============================================================================
+
+
+def change(area: str, action: str, item: str) -> Dict[str, str]:
+    return {"area": area, "action": action, "item": item}
+
+
+def unknown(area: str, item: str, reason: str) -> Dict[str, str]:
+    return {"area": area, "item": item, "reason": reason}
+
+
+def plan_packages(desired: Dict[str, Any], discovered: Dict[str, Any], distribution: Optional[str]):
+    """Plan package installs and removals for the host's distribution."""
+    changes, unknowns = [], []
+    wanted = merge_packages(desired)
+    if not any(wanted.values()):
+        return changes, unknowns
+
+    if distribution is None:
+        unknowns.append(unknown("packages", "*", "distribution not recorded by discovery"))
+        return changes, unknowns
+
+    installed = discovered_packages(discovered, distribution) or set()
+
+    for item in wanted.get(distribution, []):
+        name = package_name(item)
+        state = item.get("state", "present") if isinstance(item, dict) else "present"
+        if state == "absent" and name in installed:
+            changes.append(change("packages", "remove", name))
+        elif state != "absent" and name not in installed:
+            changes.append(change("packages", "install", name))
+    return changes, unknowns
+
+
+def plan_services(desired: Dict[str, Any], discovered: Dict[str, Any]):
+    """Plan systemd service enable/disable/mask operations."""
+    changes, unknowns = [], []
+    wanted = desired.get("host_services") or {}
+    current = discovered.get("host_services") or {}
+
+    current_state = {
+        action: {service_name(s) for s in current[action]} if action in current else None
+        for action in ("enable", "disable", "mask")
+    }
+
+    for action in ("enable", "disable", "mask"):
+        for service in wanted.get(action) or []:
+            name = service_name(service)
+            if current_state[action] is None:
+                if action == "mask":
+                    unknowns.append(unknown("services", name, "masked services not recorded by discovery"))
+                else:
+                    changes.append(change("services", action, name))
+            elif name not in current_state[action]:
+                changes.append(change("services", action, name))
+    return changes, unknowns
+
+
+def plan_firewall(desired: Dict[str, Any], discovered: Dict[str, Any], os_family: Optional[str]):
+    """Plan firewall state and rule additions/deletions."""
+    changes, unknowns = [], []
+    wanted = desired.get("firewall") or {}
+    current = discovered.get("firewall") or {}
+
+    if not wanted.get("enabled", False):
+        return changes, unknowns
+
+    if not current.get("enabled", False):
+        changes.append(change("firewall", "enable", wanted.get("package", "ufw")))
+
+    if os_family == "Darwin":
+        return changes, unknowns
+
+    existing = {firewall_rule_key(rule) for rule in current.get("rules") or []}
+    for rule in wanted.get("rules") or []:
+        key = firewall_rule_key(rule)
+        if key[0] != "allow" or rule.get("direction", "in") != "in":
+            # Discovery only records incoming allow rules
+            unknowns.append(unknown("firewall", describe_rule(key), "only incoming allow rules are discovered"))
+        elif rule.get("delete", False):
+            if key in existing:
+                changes.append(change("firewall", "delete", describe_rule(key)))
+        elif key not in existing:
+            changes.append(change("firewall", "add", describe_rule(key)))
+    return changes, unknowns
+
+
+def plan_users(desired: Dict[str, Any], discovered: Dict[str, Any]):
+    """Plan user toolchain entries.
+
+    configure_users never creates accounts, so a desired user missing from the
+    host is reported as unknown rather than as a change.
+    """
+    changes, unknowns = [], []
+    current = {user.get("name"): user for user in discovered.get("users") or [] if isinstance(user, dict)}
+
+    for user in desired.get("users") or []:
+        name = user.get("name")
+        if not name or name == "root":
+            continue
+        if name not in current:
+            unknowns.append(unknown("users", name, "account not present on host; configure_users skips it"))
+            continue
+
+        for tool in TOOLCHAINS:
+            packages = [package_name(p) for p in (user.get(tool) or {}).get("packages") or []]
+            if not packages:
+                continue
+            if tool not in current[name]:
+                unknowns.append(unknown("users", f"{name}/{tool}", "toolchain packages not recorded by discovery"))
+                continue
+            installed = {package_name(p) for p in (current[name].get(tool) or {}).get("packages") or []}
+            for package in packages:
+                if package not in installed:
+                    changes.append(change("users", f"{tool}-install", f"{name}/{package}"))
+    return changes, unknowns
+
+
+def plan_host(
+    host: str,
+    desired: Dict[str, Any],
+    discovered: Optional[Dict[str, Any]],
+    distribution: Optional[str] = None,
+    os_family: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Plan all changes for a single host."""
+    result: Dict[str, Any] = {"host": host, "status": "unchanged", "changes": [], "unknown": []}
+
+    if discovered is None:
+        result["status"] = "undiscovered"
+        return result
+
+    platform = discovered.get("discovery_platform") or {}
+    distribution = discovered_distribution(discovered) or distribution
+    os_family = platform.get("os_family") or os_family
+    result["distribution"] = distribution
+
+    for changes, unknowns in (
+        plan_packages(desired, discovered, distribution),
+        plan_services(desired, discovered),
+        plan_firewall(desired, discovered, os_family),
+        plan_users(desired, discovered),
+    ):
+        result["changes"].extend(changes)
+        result["unknown"].extend(unknowns)
+
+    if result["changes"]:
+        result["status"] = "changed"
+    elif result["unknown"]:
+        result["status"] = "unknown"
+    return result
+
+
+# =============================================================================
+# INVENTORY
+# =============================================================================
+
+
+def load_inventory(sources: List[str], vault_password_file: Optional[str] = None):
+    """Load an inventory with Ansible's own loaders so group/host precedence matches a real run."""
+    from ansible.inventory.manager import InventoryManager
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.parsing.vault import VaultSecret
+    from ansible.vars.manager import VariableManager
+
+    loader = DataLoader()
+    if vault_password_file:
+        secret = Path(vault_password_file).read_bytes().strip()
+        loader.set_vault_secrets([("default", VaultSecret(secret))])
+    inventory = InventoryManager(loader=loader, sources=sources)
+    return loader, inventory, VariableManager(loader=loader, inventory=inventory)
+
+
+def desired_state(loader, variable_manager, host) -> Dict[str, Any]:
+    """Resolve and template the planned variables for a host."""
+    from ansible.template import Templar
+
+    host_vars = variable_manager.get_vars(host=host, include_hostvars=False)
+    templar = Templar(loader=loader, variables=host_vars)
+    desired = {name: templar.template(host_vars[name]) for name in PLANNED_VARIABLES if name in host_vars}
+    desired["ansible_distribution"] = host_vars.get("ansible_distribution")
+    desired["ansible_os_family"] = host_vars.get("ansible_os_family")
+    return json.loads(json.dumps(desired, default=str))
+
+
+def build_plan(
+    sources: List[str],
+    discovered_dir: Path,
+    limit: Optional[str] = None,
+    vault_password_file: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Plan every host in the inventory."""
+    started = time.monotonic()
+    loader, inventory, variable_manager = load_inventory(sources, vault_password_file)
+    if limit:
+        inventory.subset(limit)
+
+    hosts = []
+    for host in inventory.get_hosts():
+        try:
+            desired = desired_state(loader, variable_manager, host)
+        except Exception as e:  # noqa: BLE001 - a broken host must not abort the whole plan
+            hosts.append({"host": host.name, "status": "error", "error": str(e), "changes": [], "unknown": []})
+            continue
+        hosts.append(
+            plan_host(
+                host.name,
+                desired,
+                load_discovered(discovered_dir, host.name),
+                desired.get("ansible_distribution"),
+                desired.get("ansible_os_family"),
+            )
+        )
+
+    return {"hosts": hosts, "summary": summarize(hosts), "elapsed_seconds": round(time.monotonic() - started, 3)}
+
+
+def summarize(hosts: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    summary: Dict[str, int] = {"total": 0, "changed": 0, "unchanged": 0, "unknown": 0, "undiscovered": 0, "error": 0}
+    for host in hosts:
+        summary["total"] += 1
+        summary[host["status"]] += 1
+    return summary
+
+
+def hosts_to_run(plan: Dict[str, Any], include_unknown: bool = True) -> List[str]:
+    """Return the hosts that need a real run."""
+    statuses = {"changed", "undiscovered", "error"}
+    if include_unknown:
+        statuses.add("unknown")
+    return [host["host"] for host in plan["hosts"] if host["status"] in statuses]
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+
+def format_text(plan: Dict[str, Any]) -> str:
+    lines = []
+    for host in plan["hosts"]:
+        if host["status"] == "unchanged":
+            continue
+        lines.append(f"{host['host']}: {host['status']}")
+        if host.get("error"):
+            lines.append(f"  ! {host['error']}")
+        for item in host["changes"]:
+            lines.append(f"  ~ {item['area']}: {item['action']} {item['item']}")
+        for item in host["unknown"]:
+            lines.append(f"  ? {item['area']}: {item['item']} ({item['reason']})")
+
+    summary = plan["summary"]
+    lines.append(
+        f"Plan: {summary['changed']} changed, {summary['unknown']} unknown, "
+        f"{summary['undiscovered']} undiscovered, {summary['error']} error, "
+        f"{summary['unchanged']} unchanged of {summary['total']} hosts ({plan['elapsed_seconds']}s)"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-i", "--inventory", action="append", required=True, help="Desired-state inventory source")
+    parser.add_argument("-d", "--discovered", required=True, type=Path, help="Directory of discovered host_vars")
+    parser.add_argument("-l", "--limit", help="Ansible host pattern to plan")
+    parser.add_argument("--vault-password-file", help="Vault password file for encrypted inventory")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--limit-file", type=Path, help="Write hosts needing a run, for --limit @FILE")
+    parser.add_argument(
+        "--ignore-unknown", action="store_true", help="Do not target hosts whose only items are unknown"
+    )
+    parser.add_argument(
+        "--detailed-exitcode", action="store_true", help="Exit 2 when any host needs a run, 0 when none do"
+    )
+    args = parser.parse_args()
+
+    if not args.discovered.is_dir():
+        print(f"Error: discovered host_vars directory not found at {args.discovered}", file=sys.stderr)
+        sys.exit(1)
+
+    plan = build_plan(args.inventory, args.discovered, args.limit, args.vault_password_file)
+    targets = hosts_to_run(plan, include_unknown=not args.ignore_unknown)
+
+    if args.format == "json":
+        print(json.dumps(plan, indent=2, sort_keys=True))
+    else:
+        print(format_text(plan))
+
+    if args.limit_file:
+        args.limit_file.write_text("".join(f"{host}\n" for host in targets))
+
+    if args.detailed_exitcode and targets:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
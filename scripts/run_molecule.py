@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Run the molecule scenarios of the collection in parallel, skipping unchanged ones.
+
+A scenario is either a role's roles/<role>/molecule/default or a collection
+scenario under molecule/<name>. Its content hash covers the scenario
+directory and the playbooks it imports, every role it reaches through
+wolskies.infrastructure role references (include_role, import_role, meta
+dependencies), transitively, and the collection's plugins, galaxy.yml and
+requirements.yml. For example configure_users also hashes install_rust,
+install_go, install_nodejs, install_neovim and install_terminfo.
+
+- a scenario whose hash matches its last green run is skipped; the hashes
+  live in .cache/molecule_runs.json
+- the remaining scenarios run `molecule test` concurrently on a worker pool
+  sized to the machine; scenarios that share a platform (container) name
+  run one after another in the same lane so they never collide
+- delegated-driver scenarios (vm_test) need real VMs and only run when
+  named explicitly
+- a JSON summary and a JUnit report with per-scenario durations are written
+  to tests/output/, with each scenario's log under tests/output/molecule/
+
+    python scripts/run_molecule.py                      # everything that changed
+    python scripts/run_molecule.py configure_users minimal -j 2
+    python scripts/run_molecule.py --force --molecule "uv run molecule"
+    python scripts/run_molecule.py --dry-run            # show what would run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from xml.etree import ElementTree
+
+import yaml
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+ROLES_DIR = COLLECTION_ROOT / "roles"
+SCENARIOS_DIR = COLLECTION_ROOT / "molecule"
+STATE_FILE = COLLECTION_ROOT / ".cache" / "molecule_runs.json"
+OUTPUT_DIR = COLLECTION_ROOT / "tests" / "output"
+COLLECTION_NAME = "wolskies.infrastructure"
+
+# Collection files every scenario depends on besides its roles
+SHARED_PATHS = ["plugins", "galaxy.yml", "requirements.yml"]
+
+# Bump when the hash inputs change
+STATE_VERSION = 1
+
+ROLE_REFERENCE = re.compile(re.escape(COLLECTION_NAME) + r"\.([A-Za-z0-9_]+)")
+PLAYBOOK_REFERENCE = re.compile(r"import_playbook:\s*[\"']?([^\"'\s{}]+)")
+SKIPPED_NAMES = {"__pycache__", ".pytest_cache"}
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+
+class Scenario:
+    """One molecule scenario and where molecule has to run it from."""
+
+    def __init__(self, name: str, cwd: Path, scenario: str, directory: Path, role: Optional[str] = None):
+        self.name = name
+        self.cwd = cwd
+        self.scenario = scenario
+        self.directory = directory
+        self.role = role
+        config = yaml.safe_load((directory / "molecule.yml").read_text(encoding="utf-8")) or {}
+        self.driver = (config.get("driver") or {}).get("name", "docker")
+        self.platforms = [platform["name"] for platform in config.get("platforms") or [] if "name" in platform]
+
+    def __repr__(self):
+        return f"Scenario({self.name})"
+
+
+def discover_scenarios() -> Dict[str, Scenario]:
+    """Role default scenarios, named after the role, then collection scenarios."""
+    scenarios = {}
+    for molecule_file in sorted(ROLES_DIR.glob("*/molecule/default/molecule.yml")):
+        role = molecule_file.parents[2].name
+        scenarios[role] = Scenario(role, ROLES_DIR / role, "default", molecule_file.parent, role=role)
+    for molecule_file in sorted(SCENARIOS_DIR.glob("*/molecule.yml")):
+        name = molecule_file.parent.name
+        scenarios[name] = Scenario(name, COLLECTION_ROOT, name, molecule_file.parent)
+    return scenarios
+
+
+def select(scenarios: Dict[str, Scenario], names: List[str]) -> List[Scenario]:
+    """The named scenarios, or every non-delegated one when none are named."""
+    if not names:
+        return [scenario for scenario in scenarios.values() if scenario.driver != "delegated"]
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        raise ValueError(f"unknown scenario(s): {', '.join(unknown)} (available: {', '.join(scenarios)})")
+    return [scenarios[name] for name in names]
+
+
+# =============================================================================
+# CONTENT HASHES
+# =============================================================================
+
+
+def tree_files(path: Path, exclude: Optional[Path] = None) -> List[Path]:
+    """Files under path (or path itself), sorted, skipping caches and the exclude subtree."""
+    if path.is_file():
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIPPED_NAMES and Path(root, d) != exclude)
+        files.extend(Path(root, name) for name in sorted(names) if not name.endswith(".pyc"))
+    return files
+
+
+def referenced_roles(files: List[Path], roles: Set[str]) -> Set[str]:
+    """Collection roles named in the YAML of files (FQCN references and meta dependencies)."""
+    found = set()
+    for path in files:
+        if path.suffix not in (".yml", ".yaml"):
+            continue
+        text = path.read_text(encoding="utf-8", errors="replace")
+        found.update(name for name in ROLE_REFERENCE.findall(text) if name in roles)
+        if path.name in ("main.yml", "main.yaml") and path.parent.name == "meta":
+            meta = yaml.safe_load(text) or {}
+            for dependency in meta.get("dependencies") or []:
+                name = dependency.get("role") or dependency.get("name") if isinstance(dependency, dict) else dependency
+                if isinstance(name, str) and name.rsplit(".", 1)[-1] in roles:
+                    found.add(name.rsplit(".", 1)[-1])
+    return found
+
+
+def scenario_files(scenario: Scenario) -> List[Path]:
+    """The scenario directory plus the playbooks it imports, e.g. playbooks/configure_system.yml."""
+    files = tree_files(scenario.directory)
+    pending = list(files)
+    while pending:
+        path = pending.pop()
+        if path.suffix not in (".yml", ".yaml"):
+            continue
+        for reference in PLAYBOOK_REFERENCE.findall(path.read_text(encoding="utf-8", errors="replace")):
+            playbook = (path.parent / reference).resolve()
+            if playbook.is_file() and playbook not in files:
+                files.append(playbook)
+                pending.append(playbook)
+    return files
+
+
+def role_files(role: str) -> List[Path]:
+    """A role's files without its own molecule scenarios, which only matter to those scenarios."""
+    return tree_files(ROLES_DIR / role, exclude=ROLES_DIR / role / "molecule")
+
+
+def role_closure(scenario: Scenario) -> List[str]:
+    """Roles the scenario exercises, following role references transitively."""
+    roles = set(path.name for path in ROLES_DIR.iterdir() if path.is_dir())
+    pending = referenced_roles(scenario_files(scenario), roles)
+    if scenario.role:
+        pending.add(scenario.role)
+    closure: Set[str] = set()
+    while pending:
+        role = pending.pop()
+        if role in closure:
+            continue
+        closure.add(role)
+        pending |= referenced_roles(role_files(role), roles) - closure
+    return sorted(closure)
+
+
+def scenario_hash(scenario: Scenario) -> str:
+    digest = hashlib.sha256(str(STATE_VERSION).encode())
+    files = scenario_files(scenario)
+    for role in role_closure(scenario):
+        files.extend(role_files(role))
+    for shared in SHARED_PATHS:
+        if (COLLECTION_ROOT / shared).exists():
+            files.extend(tree_files(COLLECTION_ROOT / shared))
+    for path in files:
+        digest.update(str(path.relative_to(COLLECTION_ROOT)).encode() + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def load_state(path: Path = STATE_FILE) -> Dict[str, str]:
+    """Hash of each scenario's last green run, as {scenario: hash}."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+        return {}
+    return data.get("green", {})
+
+
+def save_state(green: Dict[str, str], path: Path = STATE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "green": green}, f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+# =============================================================================
+# EXECUTION
+# =============================================================================
+
+
+def lanes(scenarios: List[Scenario]) -> List[List[Scenario]]:
+    """Group scenarios that share a platform name; each group runs sequentially."""
+    groups: List[List[Scenario]] = []
+    for scenario in scenarios:
+        names = set(scenario.platforms)
+        overlapping = [group for group in groups if any(names & set(other.platforms) for other in group)]
+        merged = [scenario]
+        for group in overlapping:
+            groups.remove(group)
+            merged = group + merged
+        groups.append(merged)
+    return groups
+
+
+def default_jobs() -> int:
+    """Concurrent scenarios: one per two CPUs, since each runs several systemd containers."""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def run_scenario(scenario: Scenario, command: List[str], log_dir: Path) -> Dict[str, Any]:
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_file = log_dir / f"{scenario.name}.log"
+    argv = command + ["test", "-s", scenario.scenario]
+    started = time.monotonic()
+    with open(log_file, "w", encoding="utf-8") as log:
+        try:
+            returncode = subprocess.run(argv, cwd=scenario.cwd, stdout=log, stderr=subprocess.STDOUT).returncode
+        except OSError as e:
+            log.write(f"{' '.join(argv)}: {e}\n")
+            returncode = 127
+    return {
+        "status": "passed" if returncode == 0 else "failed",
+        "returncode": returncode,
+        "duration": round(time.monotonic() - started, 2),
+        "log": str(log_file),
+    }
+
+
+def log_tail(path: str, lines: int = 40) -> str:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+    except OSError:
+        return ""
+
+
+def run(
+    scenarios: List[Scenario],
+    command: List[str],
+    jobs: Optional[int] = None,
+    force: bool = False,
+    dry_run: bool = False,
+    state_file: Path = STATE_FILE,
+    log_dir: Path = OUTPUT_DIR / "molecule",
+    runner=run_scenario,
+) -> List[Dict[str, Any]]:
+    """Run the scenarios that changed since their last green run; one result per scenario, in order."""
+    green = load_state(state_file)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for scenario in scenarios:
+        digest = scenario_hash(scenario)
+        result = {"scenario": scenario.name, "hash": digest, "duration": 0.0}
+        if not force and green.get(scenario.name) == digest:
+            result["status"] = "skipped"
+        elif dry_run:
+            result["status"] = "pending"
+        else:
+            pending.append(scenario)
+        results[scenario.name] = result
+
+    lock = threading.Lock()
+
+    def run_lane(lane: List[Scenario]):
+        for scenario in lane:
+            print(f"▶ {scenario.name}", flush=True)
+            outcome = runner(scenario, command, log_dir)
+            with lock:
+                results[scenario.name].update(outcome)
+                if outcome["status"] == "passed":
+                    green[scenario.name] = results[scenario.name]["hash"]
+                else:
+                    green.pop(scenario.name, None)
+                save_state(green, state_file)
+            print(
+                f"{'✓' if outcome['status'] == 'passed' else '✗'} {scenario.name} ({outcome['duration']}s)", flush=True
+            )
+
+    scheduled = lanes(pending)
+    workers = max(1, min(jobs or default_jobs(), len(scheduled)))
+    if scheduled:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run_lane, scheduled))
+    return [results[scenario.name] for scenario in scenarios]
+
+
+# =============================================================================
+# REPORTS
+# =============================================================================
+
+
+def write_json(results: List[Dict[str, Any]], path: Path, duration: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    counts = dict(
+        (status, sum(1 for r in results if r["status"] == status)) for status in ("passed", "failed", "skipped")
+    )
+    path.write_text(
+        json.dumps({"duration": duration, **counts, "scenarios": results}, indent=2) + "\n", encoding="utf-8"
+    )
+
+
+def write_junit(results: List[Dict[str, Any]], path: Path, duration: float):
+    suite = ElementTree.Element(
+        "testsuite",
+        name="molecule",
+        tests=str(len(results)),
+        failures=str(sum(1 for r in results if r["status"] == "failed")),
+        skipped=str(sum(1 for r in results if r["status"] in ("skipped", "pending"))),
+        time=f"{duration:.2f}",
+    )
+    for result in results:
+        case = ElementTree.SubElement(
+            suite, "testcase", classname="molecule", name=result["scenario"], time=f"{result['duration']:.2f}"
+        )
+        if result["status"] == "failed":
+            failure = ElementTree.SubElement(case, "failure", message=f"molecule test exited {result['returncode']}")
+            failure.text = log_tail(result["log"])
+        elif result["status"] in ("skipped", "pending"):
+            message = "unchanged since last green run" if result["status"] == "skipped" else "dry run"
+            ElementTree.SubElement(case, "skipped", message=message)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ElementTree.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help="Role or collection scenario names (default: all but delegated)")
+    parser.add_argument("-j", "--jobs", type=int, help=f"Concurrent scenarios (default: {default_jobs()})")
+    parser.add_argument("--force", action="store_true", help="Run scenarios even if unchanged since their last pass")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which scenarios would run")
+    parser.add_argument("--molecule", default="molecule", help="Command that runs molecule (e.g. 'uv run molecule')")
+    parser.add_argument("--json", type=Path, default=OUTPUT_DIR / "molecule-results.json", help="JSON summary path")
+    parser.add_argument("--junit", type=Path, default=OUTPUT_DIR / "molecule-junit.xml", help="JUnit report path")
+    args = parser.parse_args(argv)
+
+    try:
+        scenarios = select(discover_scenarios(), args.scenarios)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+
+    started = time.monotonic()
+    results = run(scenarios, shlex.split(args.molecule), jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    duration = round(time.monotonic() - started, 2)
+    write_json(results, args.json, duration)
+    write_junit(results, args.junit, duration)
+
+    print()
+    for result in results:
+        print(f"  {result['status']:<8} {result['duration']:>8.2f}s  {result['scenario']}")
+    failed = [result["scenario"] for result in results if result["status"] == "failed"]
+    print(f"\n{len(results)} scenarios in {duration}s; reports: {args.json}, {args.junit}")
+    if failed:
+        print(f"✗ Failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
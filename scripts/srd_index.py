@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Single-pass index of the Software Requirements Document.
+
+The SRD markdown is tokenized once into a section tree and a map of
+REQ-XX-NNN requirements, and the result is cached in .cache/srd_index.json
+keyed by the SHA-256 of the document. The docs generators share one index
+instead of each re-reading and regex-scanning the SRD.
+
+The command line reports what the index knows about roles:
+
+    python scripts/srd_index.py show configure_users   # a role's requirements
+    python scripts/srd_index.py coverage               # requirements referenced by role files
+    python scripts/srd_index.py missing                # untested and undefined requirements
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+SRD_FILE = COLLECTION_ROOT / "docs" / "archive" / "SOFTWARE_REQUIREMENTS_DOCUMENT.md"
+CACHE_FILE = COLLECTION_ROOT / ".cache" / "srd_index.json"
+ROLES_DIR = COLLECTION_ROOT / "roles"
+
+# Bump when the indexed data changes shape or meaning
+INDEX_VERSION = 1
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*$")
+SECTION_NUMBER = re.compile(r"^(\d+(?:\.\d+)*)\.?\s+(.*)$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+REQUIREMENT = re.compile(r"\*\*(REQ-[A-Z]+-\d+[a-z]?)\*\*:?")
+REQUIREMENT_REFERENCE = re.compile(r"\bREQ-[A-Z]+-\d+[a-z]?\b")
+# Lines that end a requirement's description
+DESCRIPTION_END = re.compile(r"^(\*\*REQ-[A-Z]+-\d|\*\*Implementation\*\*|###|_Removed|_Deprecated)")
+
+REFERENCE_SUFFIXES = {".yml", ".yaml", ".j2", ".py"}
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[\s_-]+", " ", name.strip().lower())
+
+
+# =============================================================================
+# TOKENIZER
+# =============================================================================
+
+
+def parse(text: str) -> Dict[str, Any]:
+    """Tokenize SRD markdown into sections and requirements in one pass over its lines.
+
+    Sections are {level, title, number, line, end, parent}; end is the line
+    index of the next heading at the same or a higher level. Headings inside
+    code fences are ignored. Requirements are keyed by ID and hold the
+    whitespace-collapsed description, the line, the enclosing section and a
+    status of active, removed (struck through or _Removed) or deprecated.
+    """
+    lines = text.split("\n")
+    sections: List[Dict[str, Any]] = []
+    requirements: Dict[str, Dict[str, Any]] = {}
+    open_sections: List[int] = []
+    fence = None
+    description: Optional[List[str]] = None
+    current: Optional[Dict[str, Any]] = None
+
+    def finish():
+        if current is not None:
+            text = re.sub(r"\s+", " ", " ".join(description).strip())
+            current["text"] = text
+            if current["status"] == "active" and text.startswith("_Removed"):
+                current["status"] = "removed"
+            elif current["status"] == "active" and text.startswith("_Deprecated"):
+                current["status"] = "deprecated"
+
+    for number, line in enumerate(lines):
+        # A requirement's description runs until a blank line or a terminating line
+        if current is not None:
+            if description or line.strip():
+                if line == "" or HEADING.match(line) or (description and DESCRIPTION_END.match(line)):
+                    finish()
+                    current = description = None
+                else:
+                    description.append(line)
+                    continue
+            else:
+                continue
+
+        marker = FENCE.match(line)
+        if marker:
+            fence = None if fence == marker.group(1) else (fence or marker.group(1))
+        heading = HEADING.match(line) if fence is None else None
+        if heading:
+            level = len(heading.group(1))
+            while open_sections and sections[open_sections[-1]]["level"] >= level:
+                sections[open_sections.pop()]["end"] = number
+            numbered = SECTION_NUMBER.match(heading.group(2))
+            sections.append(
+                {
+                    "level": level,
+                    "title": heading.group(2),
+                    "number": numbered.group(1) if numbered else None,
+                    "name": numbered.group(2) if numbered else heading.group(2),
+                    "line": number,
+                    "end": len(lines),
+                    "parent": open_sections[-1] if open_sections else None,
+                }
+            )
+            open_sections.append(len(sections) - 1)
+            continue
+
+        requirement = REQUIREMENT.search(line)
+        if requirement and requirement.group(1) not in requirements:
+            current = requirements[requirement.group(1)] = {
+                "id": requirement.group(1),
+                "line": number,
+                "section": open_sections[-1] if open_sections else None,
+                "status": "removed" if line.lstrip().startswith("~~") else "active",
+            }
+            rest = line[requirement.end() :]  # noqa: E203
+            description = [rest] if rest.strip() else []
+
+    finish()
+    return {"sections": sections, "requirements": requirements}
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+
+class SrdIndex:
+    """Sections and requirements of one SRD, with lookups by title and role."""
+
+    def __init__(self, text: str, data: Dict[str, Any]):
+        self.lines = text.split("\n")
+        self.sections = data["sections"]
+        self.requirements = data["requirements"]
+
+    @classmethod
+    def from_text(cls, text: str) -> "SrdIndex":
+        return cls(text, parse(text))
+
+    def find_section(self, title: str, level: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """First section whose heading starts with title (case-insensitive)."""
+        title = title.lower()
+        for section in self.sections:
+            if (level is None or section["level"] == level) and section["title"].lower().startswith(title):
+                return section
+        return None
+
+    def section_text(self, section: Optional[Dict[str, Any]]) -> str:
+        """Markdown of a section, heading included, up to the next heading at its level or above."""
+        if section is None:
+            return ""
+        return "\n".join(self.lines[section["line"] : section["end"]]).strip()  # noqa: E203
+
+    def role_section(self, role_name: str) -> Optional[Dict[str, Any]]:
+        """The role's section: a numbered 3.x section named after it, else a heading mentioning it."""
+        wanted = _normalize(role_name)
+        for section in self.sections:
+            if (
+                section["level"] == 3
+                and (section["number"] or "").startswith("3.")
+                and _normalize(section["name"]) == wanted
+            ):
+                return section
+        for section in self.sections:
+            if section["level"] >= 3 and role_name.lower() in section["title"].lower():
+                return section
+        return None
+
+    def requirements_in(self, section: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if section is None:
+            return []
+        return sorted(
+            (r for r in self.requirements.values() if section["line"] <= r["line"] < section["end"]),
+            key=lambda r: r["line"],
+        )
+
+    def role_requirements(self, role_name: str) -> List[Dict[str, Any]]:
+        """Requirements defined in the role's section, in document order."""
+        return self.requirements_in(self.role_section(role_name))
+
+    def role_section_for(self, requirement_ids: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """The level-3 section defining most of requirement_ids, for roles renamed since the SRD was written."""
+        counts: Dict[int, int] = {}
+        for requirement_id in requirement_ids:
+            position = (self.requirements.get(requirement_id) or {}).get("section")
+            while position is not None and self.sections[position]["level"] > 3:
+                position = self.sections[position]["parent"]
+            if position is not None and self.sections[position]["level"] == 3:
+                counts[position] = counts.get(position, 0) + 1
+        if not counts:
+            return None
+        return self.sections[max(sorted(counts), key=lambda position: counts[position])]
+
+    def to_data(self) -> Dict[str, Any]:
+        return {"sections": self.sections, "requirements": self.requirements}
+
+
+def load_index(srd_file: Path = SRD_FILE, cache_file: Optional[Path] = CACHE_FILE) -> SrdIndex:
+    """Index of srd_file, reusing the cached index while the document is unchanged."""
+    raw = srd_file.read_bytes()
+    text = raw.decode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if cache_file is not None:
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            if cached.get("version") == INDEX_VERSION and cached.get("sha256") == digest:
+                return SrdIndex(text, cached["index"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = SrdIndex.from_text(text)
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(temporary, "w") as f:
+            json.dump({"version": INDEX_VERSION, "sha256": digest, "index": index.to_data()}, f)
+        os.replace(temporary, cache_file)
+    return index
+
+
+# =============================================================================
+# REPORTS
+# =============================================================================
+
+
+def role_references(roles_dir: Path = ROLES_DIR) -> Dict[str, Dict[str, List[str]]]:
+    """Requirement IDs mentioned in each role's files: {role: {id: [relative paths]}}."""
+    references: Dict[str, Dict[str, List[str]]] = {}
+    for role_dir in sorted(p for p in roles_dir.iterdir() if p.is_dir()):
+        found: Dict[str, List[str]] = {}
+        for path in sorted(role_dir.rglob("*")):
+            if path.suffix not in REFERENCE_SUFFIXES or not path.is_file():
+                continue
+            try:
+                text = path.read_text(errors="replace")
+            except OSError:
+                continue
+            for requirement_id in sorted(set(REQUIREMENT_REFERENCE.findall(text))):
+                found.setdefault(requirement_id, []).append(str(path.relative_to(role_dir)))
+        references[role_dir.name] = found
+    return references
+
+
+def coverage(index: SrdIndex, references: Dict[str, Dict[str, List[str]]]) -> List[Dict[str, Any]]:
+    """Per role: its SRD section, the requirements it references and which of those the SRD defines.
+
+    A role without a section of its own name is matched to the section
+    defining most of the requirements it references.
+    """
+    report = []
+    for role_name, found in sorted(references.items()):
+        section = index.role_section(role_name) or index.role_section_for(found)
+        defined = [r["id"] for r in index.requirements_in(section) if r["status"] == "active"]
+        report.append(
+            {
+                "role": role_name,
+                "section": section["title"] if section else None,
+                "defined": defined,
+                "referenced": sorted(found),
+                "untested": [i for i in defined if i not in found],
+                "undefined": sorted(i for i in found if i not in index.requirements),
+            }
+        )
+    return report
+
+
+def missing(index: SrdIndex, references: Dict[str, Dict[str, List[str]]]) -> Dict[str, Any]:
+    """Active SRD requirements no role references, and referenced IDs the SRD does not define."""
+    referenced: Dict[str, List[str]] = {}
+    for role_name, found in references.items():
+        for requirement_id in found:
+            referenced.setdefault(requirement_id, []).append(role_name)
+    return {
+        "untested": [
+            {"id": r["id"], "section": index.sections[r["section"]]["title"] if r["section"] is not None else None}
+            for r in sorted(index.requirements.values(), key=lambda r: r["line"])
+            if r["status"] == "active" and r["id"] not in referenced
+        ],
+        "undefined": [
+            {"id": i, "roles": sorted(roles)} for i, roles in sorted(referenced.items()) if i not in index.requirements
+        ],
+    }
+
+
+def format_requirements(requirements: Iterable[Dict[str, Any]]) -> str:
+    lines = []
+    for requirement in requirements:
+        status = "" if requirement["status"] == "active" else f" [{requirement['status']}]"
+        lines.append(f"{requirement['id']}{status}: {requirement['text']}")
+    return "\n".join(lines) or "(no requirements)"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--srd", type=Path, default=SRD_FILE, help="SRD markdown file")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="Requirements of a role's SRD section")
+    show.add_argument("role")
+    commands.add_parser("coverage", help="Requirements referenced by each role's files")
+    commands.add_parser("missing", help="Untested SRD requirements and references to undefined ones")
+    args = parser.parse_args(argv)
+
+    index = load_index(args.srd, CACHE_FILE if args.srd == SRD_FILE else None)
+
+    if args.command == "show":
+        section = index.role_section(args.role)
+        result: Any = {"role": args.role, "section": section and section["title"]}
+        result["requirements"] = index.requirements_in(section)
+        text = f"{args.role}: {result['section'] or 'no SRD section'}\n" + format_requirements(result["requirements"])
+    elif args.command == "coverage":
+        result = coverage(index, role_references())
+        text = "\n".join(
+            f"{r['role']:<28} {len(r['referenced']):>3} referenced, {len(r['defined']):>3} in SRD section"
+            f" ({r['section'] or 'none'}), {len(r['untested'])} untested, {len(r['undefined'])} undefined"
+            for r in result
+        )
+    else:
+        result = missing(index, role_references())
+        text = "\n".join(
+            [f"Untested ({len(result['untested'])}):"]
+            + [f"  {r['id']}  {r['section']}" for r in result["untested"]]
+            + [f"Undefined ({len(result['undefined'])}):"]
+            + [f"  {r['id']}  {', '.join(r['roles'])}" for r in result["undefined"]]
+        )
+
+    print(json.dumps(result, indent=2) if args.format == "json" else text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
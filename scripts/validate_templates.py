@@ -2,100 +2,279 @@
 """
 Validate Jinja2 templates for syntax errors.
 This script is used by pre-commit hooks and CI/CD pipelines.
+
+Templates are compiled against Ansible's own filter and test plugins, the
+filters shipped in this collection and, by fully qualified name, those of any
+installed collection, so an unknown filter or test is reported just as
+ansible-core would report it. Only ansible.builtin plugins resolve by short
+name; role templates have no collections keyword to search.
+
+- one Jinja environment is built per template directory and reused for
+  every template in it
+- directories are validated in parallel across a process pool
+- a template whose content hash passed last time is skipped; the cache in
+  .cache/validate_templates.json is dropped whenever ansible-core, Jinja2,
+  the collection filters or this script change
+
+    python scripts/validate_templates.py roles/*/templates/*.j2
+    python scripts/validate_templates.py --jobs 1 --no-cache FILE...
 """
 
+import argparse
+import hashlib
+import importlib.util
+import json
 import os
 import sys
-from jinja2 import Environment, FileSystemLoader, StrictUndefined, TemplateSyntaxError
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+COLLECTION_ROOT = Path(__file__).resolve().parent.parent
+COLLECTION_NAME = "wolskies.infrastructure"
+FILTER_PLUGINS = COLLECTION_ROOT / "plugins" / "filter"
+CACHE_FILE = COLLECTION_ROOT / ".cache" / "validate_templates.json"
+
+# Bump when the cache format or the validation rules change
+CACHE_VERSION = 2
+
+
+# =============================================================================
+# JINJA ENVIRONMENT
+# =============================================================================
+
+
+def _register(plugins: Dict[str, Callable], name: str, function: Callable):
+    plugins[name] = function
+    if name.startswith("ansible.builtin."):
+        plugins[name.rsplit(".", 1)[-1]] = function
+
+
+class PluginMap(dict):
+    """Jinja filters or tests that resolve other fully qualified names through Ansible's plugin loader."""
+
+    def __init__(self, plugins: Dict[str, Callable], loader: Any):
+        super().__init__(plugins)
+        self.loader = loader
+
+    def __missing__(self, name: str) -> Callable:
+        plugin = None
+        if "." in name:
+            try:
+                plugin = self.loader.get(name)
+            except KeyError:  # collection not installed
+                pass
+        if plugin is None:
+            raise KeyError(name)
+        self[name] = plugin.j2_function
+        return plugin.j2_function
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
 
+    def __contains__(self, name: object) -> bool:
+        return self.get(name) is not None
 
-def validate_template(template_path):
-    """Validate a single Jinja2 template."""
-    template_dir = os.path.dirname(template_path)
-    template_name = os.path.basename(template_path)
+
+@lru_cache(maxsize=None)
+def ansible_plugins() -> Tuple[Dict[str, Callable], Dict[str, Callable]]:
+    """Ansible's filters and tests plus this collection's filters, loaded once per process."""
+    from ansible.plugins.loader import filter_loader, test_loader
 
     try:
-        # Create environment with custom filters to simulate Ansible
-        env = Environment(
-            loader=FileSystemLoader(template_dir),
-            undefined=StrictUndefined,
-            autoescape=True,
-        )
-
-        # Add dummy Ansible filters to prevent validation errors
-        # These just return empty strings but allow syntax validation
-        ansible_filters = [
-            "basename",
-            "dirname",
-            "expanduser",
-            "realpath",
-            "b64decode",
-            "b64encode",
-            "from_yaml",
-            "to_yaml",
-            "to_nice_yaml",
-            "from_json",
-            "to_json",
-            "regex_replace",
-            "regex_search",
-            "dict2items",
-            "items2dict",
-            "unique",
-            "difference",
-            "intersect",
-            "union",
-            "selectattr",
-            "rejectattr",
-            "map",
-            "select",
-            "reject",
-            "flatten",
-            "join",
-        ]
-
-        for filter_name in ansible_filters:
-            env.filters[filter_name] = lambda *args, **kwargs: ""  # noqa: B023
-
-        # Parse the template to check for syntax errors
-        env.get_template(template_name)
-        return True, None
-    except TemplateSyntaxError as e:
-        return False, f"Syntax error at line {e.lineno}: {e.message}"
-    except Exception as e:
-        return False, str(e)
-
-
-def main():
-    """Main function to validate all templates passed as arguments."""
-    if len(sys.argv) < 2:
-        print("Usage: validate_templates.py <template_files...>")
-        sys.exit(1)
+        from ansible.plugins.loader import init_plugin_loader
+    except ImportError:  # ansible-core < 2.15 sets up the collection finder on import
+        pass
+    else:
+        init_plugin_loader()
 
-    errors = []
+    filters: Dict[str, Callable] = {}
+    tests: Dict[str, Callable] = {}
+    for plugin in filter_loader.all():
+        _register(filters, plugin.ansible_name, plugin.j2_function)
+    for plugin in test_loader.all():
+        _register(tests, plugin.ansible_name, plugin.j2_function)
+
+    # Loaded from the source tree, so the filters under test are validated even
+    # when another version of the collection is installed
+    for path in sorted(FILTER_PLUGINS.glob("[!_]*.py")):
+        spec = importlib.util.spec_from_file_location(f"_validate_templates_{path.stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for name, function in module.FilterModule().filters().items():
+            filters[f"{COLLECTION_NAME}.{name}"] = function
+
+    return filters, tests
+
+
+def build_environment(template_dir: str):
+    """A Jinja environment configured like ansible-core's, loading from template_dir."""
+    from ansible import constants as C
+    from ansible.plugins.loader import filter_loader, test_loader
+    from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+    filters, tests = ansible_plugins()
+    env = Environment(
+        loader=FileSystemLoader(template_dir),
+        undefined=StrictUndefined,
+        extensions=C.DEFAULT_JINJA2_EXTENSIONS,
+        trim_blocks=True,
+        autoescape=False,
+    )
+    env.filters = PluginMap({**env.filters, **filters}, filter_loader)
+    env.tests = PluginMap({**env.tests, **tests}, test_loader)
+    return env
+
+
+def validate_directory(job: Tuple[str, List[str]]) -> List[Tuple[str, Optional[str]]]:
+    """Compile the named templates of one directory (runs in a worker).
+
+    Returns (template path, error or None) for each template.
+    """
+    from jinja2 import TemplateSyntaxError
+
+    template_dir, names = job
+    env = build_environment(template_dir)
+    results = []
+    for name in names:
+        path = os.path.join(template_dir, name)
+        try:
+            env.get_template(name)
+            results.append((path, None))
+        except TemplateSyntaxError as e:
+            results.append((path, f"Syntax error at line {e.lineno}: {e.message}"))
+        except Exception as e:
+            results.append((path, str(e)))
+    return results
 
-    for template_file in sys.argv[1:]:
-        if not os.path.exists(template_file):
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+
+def environment_signature() -> str:
+    """Hash of everything besides the template itself that decides whether it is valid."""
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    # Version files are located without importing the packages, which keeps
+    # a run where every template is cached fast
+    versions = []
+    for module in ("ansible.release", "jinja2"):
+        spec = importlib.util.find_spec(module)
+        versions.append(Path(spec.origin) if spec and spec.origin else None)
+    for path in versions + [Path(__file__).resolve()] + sorted(FILTER_PLUGINS.glob("*.py")):
+        digest.update(path.read_bytes() if path else b"missing")
+    return digest.hexdigest()
+
+
+def load_cache(path: Optional[Path], signature: str) -> Dict[str, str]:
+    """Content hashes of templates that passed, as {digest: template path}."""
+    if path is None:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("environment") != signature:
+        return {}
+    return data.get("valid", {})
+
+
+def save_cache(path: Optional[Path], signature: str, valid: Dict[str, str]):
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump({"environment": signature, "valid": valid}, f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+
+def validate_templates(
+    template_files: List[str], jobs: Optional[int] = None, cache_file: Optional[Path] = CACHE_FILE
+) -> Dict[str, Any]:
+    """Validate templates, skipping those whose content passed before.
+
+    Returns {"errors": [...], "validated": [(path, error or None), ...],
+    "cached": [...]} with the errors as "path: message" strings.
+    """
+    signature = environment_signature()
+    previous = load_cache(cache_file, signature)
+
+    errors = []
+    cached = []
+    digests = {}
+    directories: Dict[str, List[str]] = {}
+    for template_file in template_files:
+        try:
+            with open(template_file, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
             errors.append(f"File not found: {template_file}")
             continue
+        if digest in previous:
+            cached.append(template_file)
+            continue
+        digests[template_file] = digest
+        template_dir, name = os.path.split(template_file)
+        directories.setdefault(template_dir, []).append(name)
 
-        print(f"Validating: {template_file}")
-        valid, error = validate_template(template_file)
+    jobs_list = sorted(directories.items())
+    workers = min(jobs or os.cpu_count() or 1, len(jobs_list))
+    if workers <= 1:
+        results = [result for job in jobs_list for result in validate_directory(job)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [result for batch in pool.map(validate_directory, jobs_list) for result in batch]
 
-        if valid:
-            print("  ✓ Valid")
+    # Drop the hashes of earlier versions of the templates validated now
+    valid = dict((digest, path) for digest, path in previous.items() if path not in digests)
+    for path, error in results:
+        if error is None:
+            valid[digests[path]] = path
         else:
-            print(f"  ✗ Invalid: {error}")
-            errors.append(f"{template_file}: {error}")
+            errors.append(f"{path}: {error}")
+    if results:
+        save_cache(cache_file, signature, valid)
 
-    if errors:
+    return dict(errors=errors, validated=results, cached=cached)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main function to validate all templates passed as arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("templates", nargs="+", help="Template files to validate")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Validate every template and do not update the cache")
+    args = parser.parse_args(argv)
+
+    summary = validate_templates(args.templates, jobs=args.jobs, cache_file=None if args.no_cache else CACHE_FILE)
+
+    for template_file, error in summary["validated"]:
+        print(f"Validating: {template_file}")
+        print(f"  ✗ Invalid: {error}" if error else "  ✓ Valid")
+    if summary["cached"]:
+        print(f"Skipped {len(summary['cached'])} unchanged template(s) that passed before")
+
+    if summary["errors"]:
         print("\nValidation failed! Errors found:")
-        for error in errors:
+        for error in summary["errors"]:
             print(f"  - {error}")
-        sys.exit(1)
-    else:
-        print("\nAll templates are valid!")
-        sys.exit(0)
+        return 1
+
+    print("\nAll templates are valid!")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Controller-side scaling benchmark on synthetic fleets of growing size.
+
+For each fleet size N (default 10, 100, 1000 and 5000 hosts) a synthetic
+inventory is generated with scripts/generate_fleet.py and the controller
+work the collection causes is run through ansible-core's own inventory,
+variable manager and templar, phase by phase:
+
+- render      discovery's simple_host_vars.yml.j2 for every host (the
+              generator itself, run in-process)
+- inventory   parse hosts.yml
+- host_vars   load and merge group_vars and host_vars for every host
+- combine     configure_software's manage-packages-<family>.yml: the
+              combine(list_merge='append') set_facts and the tasks using them
+- firewall    configure_operating_system's security-Linux.yml, looping
+              over the host's firewall rules
+- users       configure_users: the users loop and configure-single-user.yml
+              templated once per user
+
+Tasks are templated as the strategy would before handing them to a module
+(conditionals, loops, arguments, set_fact results fed forward); modules are
+never executed, so no host and no connection is needed.
+
+The first three phases cover the whole fleet. Role templating costs about
+a second of CPU per host, independent of the other hosts except through
+variables such as groups, so the last three run on --sample hosts spread
+evenly over the fleet (all hosts with --sample 0) and the fleet total is
+extrapolated from their per-host cost.
+
+Each size runs in a fresh process and reports, per phase, controller CPU
+seconds (estimated for sampled phases, marked ~), CPU milliseconds per host
+and the process's peak RSS at the end of the phase. The growth exponent of
+every phase's CPU time between the two largest sizes is printed as well
+(1.0 is linear).
+
+    python tests/performance/bench_fleet_scale.py
+    python tests/performance/bench_fleet_scale.py --sizes 10 100 --packages 500 --users 20 --rules 100
+    python tests/performance/bench_fleet_scale.py --json fleet-scale.json
+"""
+
+import argparse
+import json
+import math
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+COLLECTION_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(COLLECTION_ROOT / "scripts"))
+
+import generate_fleet  # noqa: E402
+
+ROLES_DIR = COLLECTION_ROOT / "roles"
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_SAMPLE = 50
+PHASES = ["render", "inventory", "host_vars", "combine", "firewall", "users"]
+
+# Task keywords that are not the action of a task
+TASK_KEYWORDS = {
+    "name",
+    "when",
+    "loop",
+    "loop_control",
+    "register",
+    "become",
+    "become_user",
+    "tags",
+    "changed_when",
+    "failed_when",
+    "ignore_errors",
+    "notify",
+    "vars",
+    "delegate_to",
+    "run_once",
+    "check_mode",
+    "no_log",
+    "environment",
+    "block",
+    "rescue",
+    "always",
+    "until",
+    "retries",
+    "delay",
+    "args",
+    "with_items",
+    "with_dict",
+}
+
+
+# =============================================================================
+# TASK TEMPLATING
+# =============================================================================
+
+
+class TaskRunner:
+    """Templates task files the way the strategy does before running a module.
+
+    Conditionals are evaluated, loops expanded and every argument templated
+    per loop item; set_fact results are added to the variables so later
+    tasks see them. Includes are not followed and nothing is executed.
+    Templating errors (typically a registered result that would only exist
+    after a real run) are counted and the task is skipped.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.tasks: Dict[Path, List[Dict[str, Any]]] = {}
+        self.templated = 0
+        self.errors = 0
+
+    def load(self, path: Path) -> List[Dict[str, Any]]:
+        if path not in self.tasks:
+            self.tasks[path] = self.loader.load_from_file(str(path), trusted_as_template=True) or []
+        return self.tasks[path]
+
+    def run(self, path: Path, variables: Dict[str, Any]):
+        self._run_list(self.load(path), dict(variables))
+
+    def _run_list(self, tasks: List[Dict[str, Any]], variables: Dict[str, Any]):
+        for task in tasks:
+            self._run_task(task, variables)
+
+    def _run_task(self, task: Dict[str, Any], variables: Dict[str, Any]):
+        from ansible.errors import AnsibleError
+        from ansible.template import Templar
+
+        templar = Templar(loader=self.loader, variables=variables)
+        try:
+            when = task.get("when")
+            for condition in when if isinstance(when, list) else [when] if when is not None else []:
+                self.templated += 1
+                if not templar.evaluate_conditional(condition):
+                    return
+            if "block" in task:
+                for section in ("block", "rescue", "always"):
+                    self._run_list(task.get(section) or [], variables)
+                return
+
+            action = next((key for key in task if key not in TASK_KEYWORDS), None)
+            loop = task.get("loop", task.get("with_items"))
+            items = templar.template(loop) if loop is not None else [None]
+            loop_var = (task.get("loop_control") or {}).get("loop_var", "item")
+            args = None
+            for item in items:
+                item_templar = templar
+                if loop is not None:
+                    item_templar = Templar(loader=self.loader, variables=dict(variables, **{loop_var: item}))
+                args = item_templar.template(task.get(action)) if action else None
+                self.templated += 1
+            if action and action.rsplit(".", 1)[-1] == "set_fact" and isinstance(args, dict):
+                variables.update(args)
+        except AnsibleError:
+            self.errors += 1
+
+
+# =============================================================================
+# PHASES
+# =============================================================================
+
+
+def measure(phase: str, results: Dict[str, Any], function: Callable[[], Any], hosts: int, fleet: int) -> Any:
+    """Run one phase over hosts of a fleet of fleet hosts; its CPU time is scaled up to the fleet."""
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    value = function()
+    cpu = time.process_time() - started_cpu
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results[phase] = {
+        "cpu_seconds": round(cpu * fleet / max(hosts, 1), 3),
+        "cpu_ms_per_host": round(1000 * cpu / max(hosts, 1), 3),
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "hosts": hosts,
+        "estimated": hosts < fleet,
+        "peak_rss_mb": round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+    }
+    return value
+
+
+def sample_hosts(items: List[Any], sample: int) -> List[Any]:
+    """sample items spread evenly over items (all of them when sample is 0 or larger)."""
+    if sample <= 0 or sample >= len(items):
+        return items
+    return [items[i * len(items) // sample] for i in range(sample)]
+
+
+def run_size(
+    hosts: int, packages: int, users: int, rules: int, fleet_dir: Path, sample: int = DEFAULT_SAMPLE
+) -> Dict[str, Any]:
+    """All phases for one fleet size, in this process."""
+    from ansible.inventory.manager import InventoryManager
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.vars.manager import VariableManager
+
+    phases: Dict[str, Any] = {}
+    fleet = measure(
+        "render",
+        phases,
+        lambda: generate_fleet.generate_fleet(fleet_dir, hosts, packages, users, rules, jobs=1),
+        hosts,
+        hosts,
+    )
+    loader = DataLoader()
+    inventory = measure(
+        "inventory",
+        phases,
+        lambda: InventoryManager(loader=loader, sources=[str(fleet_dir / "hosts.yml")]),
+        hosts,
+        hosts,
+    )
+    variable_manager = VariableManager(loader=loader, inventory=inventory)
+    all_vars = measure(
+        "host_vars",
+        phases,
+        lambda: [variable_manager.get_vars(host=host, include_hostvars=False) for host in inventory.get_hosts()],
+        hosts,
+        hosts,
+    )
+    sampled = sample_hosts(all_vars, sample)
+
+    runner = TaskRunner(loader)
+
+    def combine():
+        for variables in sampled:
+            family = variables.get("ansible_os_family")
+            runner.run(ROLES_DIR / "configure_software" / "tasks" / f"manage-packages-{family}.yml", variables)
+
+    def firewall():
+        for variables in sampled:
+            runner.run(ROLES_DIR / "configure_operating_system" / "tasks" / "security-Linux.yml", variables)
+
+    def users_loop():
+        for variables in sampled:
+            for user in variables.get("users") or []:
+                runner.run(
+                    ROLES_DIR / "configure_users" / "tasks" / "configure-single-user.yml",
+                    dict(variables, target_user=user),
+                )
+
+    counts = {}
+    for phase, function in (("combine", combine), ("firewall", firewall), ("users", users_loop)):
+        before = runner.templated, runner.errors
+        measure(phase, phases, function, len(sampled), hosts)
+        counts[phase] = {"templated": runner.templated - before[0], "errors": runner.errors - before[1]}
+        phases[phase].update(counts[phase])
+    return {"hosts": hosts, "host_vars_bytes": fleet["host_vars_bytes"], "phases": phases}
+
+
+def run_isolated(hosts: int, packages: int, users: int, rules: int, sample: int) -> Dict[str, Any]:
+    """run_size in a fresh interpreter so peak RSS belongs to this size alone."""
+    with tempfile.TemporaryDirectory(prefix="fleet-scale-") as tmp:
+        argv = [sys.executable, __file__, "--worker", str(hosts), "--fleet-dir", str(Path(tmp) / "fleet")]
+        argv += ["--packages", str(packages), "--users", str(users), "--rules", str(rules), "--sample", str(sample)]
+        completed = subprocess.run(argv, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"fleet of {hosts} hosts failed:\n{completed.stderr[-4000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+
+def growth(results: List[Dict[str, Any]], phase: str) -> Optional[float]:
+    """Exponent k of cpu ~ hosts^k between the two largest sizes, or None when too fast to tell."""
+    if len(results) < 2:
+        return None
+    small, large = results[-2], results[-1]
+    before, after = small["phases"][phase]["cpu_seconds"], large["phases"][phase]["cpu_seconds"]
+    if before < 0.01 or after < 0.01:
+        return None
+    return round(math.log(after / before) / math.log(large["hosts"] / small["hosts"]), 2)
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    width = 32
+    lines = [f"{'hosts':<10} " + " ".join(f"{r['hosts']:>{width}}" for r in results) + "   growth"]
+    lines.append(f"{'phase':<10} " + " ".join(f"{'cpu s, ms/host, peak RSS MB':>{width}}" for _ in results))
+    for phase in PHASES:
+        cells = []
+        for result in results:
+            metrics = result["phases"][phase]
+            cpu = ("~" if metrics["estimated"] else "") + f"{metrics['cpu_seconds']:.2f}"
+            cells.append(f"{cpu:>11} {metrics['cpu_ms_per_host']:>10.2f} {metrics['peak_rss_mb']:>9.1f}")
+        exponent = growth(results, phase)
+        lines.append(f"{phase:<10} " + " ".join(cells) + (f"   {exponent:.2f}" if exponent is not None else "   -"))
+    errors = dict((phase, results[-1]["phases"][phase].get("errors", 0)) for phase in ("combine", "firewall", "users"))
+    lines.append(f"\ntemplating errors at {results[-1]['hosts']} hosts (tasks needing a real run): {errors}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Fleet sizes (hosts)")
+    parser.add_argument("-m", "--packages", type=int, default=200, help="Packages per host (default: 200)")
+    parser.add_argument("-k", "--users", type=int, default=5, help="Users per host (default: 5)")
+    parser.add_argument("-r", "--rules", type=int, default=20, help="Firewall rules per host (default: 20)")
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=DEFAULT_SAMPLE,
+        help=f"Hosts the role templating phases run on (default: {DEFAULT_SAMPLE}, 0 for all)",
+    )
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--fleet-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.packages, args.users, args.rules, args.fleet_dir, args.sample)))
+        return 0
+
+    results = []
+    for hosts in sorted(args.sizes):
+        print(f"fleet of {hosts} hosts...", flush=True)
+        results.append(run_isolated(hosts, args.packages, args.users, args.rules, args.sample))
+    print(format_report(results))
+    if args.json:
+        args.json.write_text(json.dumps({"results": results}, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
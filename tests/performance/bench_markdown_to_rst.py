@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark markdown_to_rst (scripts/generate_collection_docs.py).
+
+Compares the streaming converter against the previous regex implementation,
+kept here as legacy_markdown_to_rst:
+
+- identity: both produce the same RST for the SRD sections used by the
+  collection overview and for the whole SRD
+- scaling: conversion time on synthetic documents of growing size; the
+  legacy converter is only timed up to --legacy-limit bytes because its
+  table pattern backtracks badly on large inputs
+
+    python tests/performance/bench_markdown_to_rst.py
+    python tests/performance/bench_markdown_to_rst.py --sizes 10000 1000000 --legacy-limit 0
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+import generate_collection_docs  # noqa: E402
+import srd_index  # noqa: E402
+
+SECTIONS = [
+    ("1. Collection Overview", 2),
+    ("2. Collection-Wide Requirements", 2),
+    ("4. Known Issues and Limitations", 2),
+    ("5. Future Requirements", 2),
+]
+
+CHUNK = """## {n}. Section {n}
+
+Text with `inline code` and **bold** words, a `span that
+continues` on the next line.
+
+### {n}.1 Example
+
+```yaml
+# Comment in a code block
+key_{n}: `value`
+```
+
+| Platform | Status | Notes |
+|---|---|---|
+| Ubuntu | Tested | `apt` |
+| Arch | Tested | `pacman` |
+
+#### {n}.1.1 Details
+
+~~Removed text~~ and a trailing ```yaml
+
+"""
+
+
+def legacy_markdown_to_rst(content: str) -> str:
+    """The regex implementation markdown_to_rst replaced."""
+
+    def replace_header(match):
+        level = len(match.group(1))
+        title = match.group(2)
+        underline = {2: "=", 3: "-", 4: "~", 5: "^"}.get(level, "-") * len(title)
+        return f"{title}\n{underline}"
+
+    content = re.sub(r"^(#{2,5})\s+(.+)$", replace_header, content, flags=re.MULTILINE)
+    content = re.sub(r"```(\w+)?\n(.*?)\n```", r".. code-block:: \1\n\n\2\n", content, flags=re.DOTALL)
+    content = re.sub(r"```\w*\s*$", "", content, flags=re.MULTILINE)
+    content = re.sub(r"\*\*([^*]+)\*\*", r"**\1**", content)
+    content = re.sub(r"`([^`]+)`", r"``\1``", content)
+    table_pattern = r"\|[^|]+\|[^|]+\|.*?\n\|[-:|]+\|.*?\n(?:\|[^|]*\|.*?\n)+"
+    for table_match in re.finditer(table_pattern, content, re.MULTILINE | re.DOTALL):
+        rst_table = generate_collection_docs.convert_markdown_table_to_rst(table_match.group(0))
+        content = content.replace(table_match.group(0), rst_table)
+    content = re.sub(r"\n{3,}", "\n\n", content)
+    return content.strip()
+
+
+def synthetic_document(size: int) -> str:
+    """A markdown document of roughly size bytes built from CHUNK."""
+    chunks = []
+    total = 0
+    n = 0
+    while total < size:
+        n += 1
+        chunk = CHUNK.format(n=n)
+        chunks.append(chunk)
+        total += len(chunk)
+    return "".join(chunks)
+
+
+def best_of(convert: Callable[[str], str], content: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        convert(content)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def check_identity() -> List[str]:
+    """Names of the SRD inputs on which the two converters disagree."""
+    text = srd_index.SRD_FILE.read_text(encoding="utf-8")
+    index = srd_index.SrdIndex.from_text(text)
+    inputs = [
+        (title, generate_collection_docs.extract_section_content(index, title, level)) for title, level in SECTIONS
+    ]
+    inputs.append(("whole SRD", text))
+
+    failures = []
+    for name, content in inputs:
+        identical = generate_collection_docs.markdown_to_rst(content) == legacy_markdown_to_rst(content)
+        print(f"  {'✓' if identical else '✗'} {name} ({len(content)} bytes)")
+        if not identical:
+            failures.append(name)
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 50_000, 200_000, 1_000_000, 5_000_000],
+        help="Synthetic document sizes in bytes",
+    )
+    parser.add_argument(
+        "--legacy-limit", type=int, default=200_000, help="Largest document to time the legacy converter on"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported")
+    args = parser.parse_args(argv)
+
+    print("Identity against the legacy converter:")
+    failures = check_identity()
+
+    print(f"\n{'bytes':>10} {'streaming':>12} {'legacy':>12} {'speedup':>9}")
+    for size in args.sizes:
+        content = synthetic_document(size)
+        current = best_of(generate_collection_docs.markdown_to_rst, content, args.repeat)
+        if size <= args.legacy_limit:
+            legacy = best_of(legacy_markdown_to_rst, content, args.repeat)
+            print(f"{len(content):>10} {current:>11.4f}s {legacy:>11.4f}s {legacy / current:>8.1f}x")
+        else:
+            print(f"{len(content):>10} {current:>11.4f}s {'-':>12} {'-':>9}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
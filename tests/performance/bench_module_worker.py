@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Per-task module latency with and without the persistent worker connection plugins.
+
+For a molecule target, a role (roles/<role>/molecule/default) or a
+collection scenario (molecule/<scenario>, default minimal), the benchmark:
+
+1. creates the scenario's containers (not timed)
+2. runs a playbook of --tasks module tasks (ping, stat, command and file in
+   turn, no fact gathering) against all of them, --repeat times per mode:
+
+   - default      the base connection plugin, community.docker.docker for
+                  molecule's Docker driver, without pipelining
+   - pipelining   the base plugin with pipelining
+   - worker       its worker variant, wolskies.infrastructure.docker_worker;
+                  every run starts fresh workers, so their startup is included
+
+3. destroys the containers (unless --keep)
+
+The per-task latency of a mode is the wall time of the playbook minus that
+of the same playbook without tasks, divided by the number of tasks; the
+median over the repeats is reported. With --local the playbook runs against
+localhost (local and local_worker) and with --inventory against any
+inventory, over ssh by default, instead of molecule containers.
+
+    python tests/performance/bench_module_worker.py
+    python tests/performance/bench_module_worker.py configure_system --tasks 200 --keep
+    python tests/performance/bench_module_worker.py --local
+    python tests/performance/bench_module_worker.py --inventory hosts.yml --connection ssh --json worker.json
+
+The collection must be installed where ansible-playbook finds it
+(just install-local), so the worker plugins load from the version under
+test; the Docker modes also need community.docker.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+COLLECTION_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(COLLECTION_ROOT / "scripts"))
+
+import benchmark_roles  # noqa: E402
+
+MODES = ["default", "pipelining", "worker"]
+
+WORKER_PLUGINS = {
+    "community.docker.docker": "wolskies.infrastructure.docker_worker",
+    "ssh": "wolskies.infrastructure.ssh_worker",
+    "local": "wolskies.infrastructure.local_worker",
+}
+
+# One task per entry, repeated in turn up to --tasks
+MODULE_TASKS = [
+    {"ansible.builtin.ping": {}},
+    {"ansible.builtin.stat": {"path": "/etc/hostname"}},
+    {"ansible.builtin.command": "true", "changed_when": False},
+    {"ansible.builtin.file": {"path": "/tmp", "state": "directory"}},
+]
+
+
+def write_playbook(path: Path, tasks: int) -> Path:
+    body = [dict(MODULE_TASKS[i % len(MODULE_TASKS)], name=f"task {i}") for i in range(tasks)]
+    path.write_text(yaml.safe_dump([{"hosts": "all", "gather_facts": False, "tasks": body}], sort_keys=False))
+    return path
+
+
+def write_inventory(path: Path, hosts: List[str]) -> Path:
+    inventory = {"all": {"hosts": {host: {} for host in hosts}, "vars": {"ansible_python_interpreter": "auto_silent"}}}
+    path.write_text(yaml.safe_dump(inventory))
+    return path
+
+
+def molecule_hosts(target: str) -> List[str]:
+    """Container names of a molecule target; the Docker connection reaches them by name."""
+    cwd, scenario = benchmark_roles.resolve_target(target)
+    molecule_file = cwd / "molecule" / scenario / "molecule.yml"
+    platforms = yaml.safe_load(molecule_file.read_text()).get("platforms") or []
+    return [platform["name"] for platform in platforms]
+
+
+def run_playbook(
+    command: List[str], inventory: Path, playbook: Path, connection: str, mode: str, forks: int, workdir: Path
+) -> float:
+    """Wall seconds of one ansible-playbook run in mode."""
+    env = dict(os.environ)
+    env["ANSIBLE_PIPELINING"] = str(mode != "default")
+    env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
+    if mode == "worker":
+        connection = WORKER_PLUGINS[connection]
+        # A fresh worker directory per run, so no worker from an earlier run is reused
+        env["ANSIBLE_WORKER_DIR"] = tempfile.mkdtemp(prefix="w", dir=workdir)
+        env["ANSIBLE_WORKER_IDLE_TIMEOUT"] = "5"
+    args = command + ["-i", str(inventory), "-c", connection, "-f", str(forks), str(playbook)]
+    started = time.monotonic()
+    completed = subprocess.run(args, env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    seconds = time.monotonic() - started
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stdout[-4000:] + completed.stderr[-4000:])
+        raise RuntimeError(f"{' '.join(args)} failed (exit {completed.returncode})")
+    return seconds
+
+
+def benchmark(
+    hosts: List[str],
+    connection: str,
+    command: List[str],
+    tasks: int,
+    repeat: int,
+    forks: int,
+    inventory: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """Per-mode playbook timings and per-task latency against hosts, from inventory if given."""
+    results: Dict[str, Any] = {"hosts": len(hosts), "tasks": tasks, "connection": connection, "modes": {}}
+    # Socket paths are limited in length, so the worker directories go under /tmp
+    with tempfile.TemporaryDirectory(prefix="bmw-", dir="/tmp") as tmp:
+        workdir = Path(tmp)
+        inventory = inventory or write_inventory(workdir / "hosts.yml", hosts)
+        playbook = write_playbook(workdir / "tasks.yml", tasks)
+        empty = write_playbook(workdir / "empty.yml", 0)
+        overhead = statistics.median(
+            run_playbook(command, inventory, empty, connection, "default", forks, workdir) for _ in range(repeat)
+        )
+        results["overhead_seconds"] = round(overhead, 3)
+        for mode in MODES:
+            runs = [run_playbook(command, inventory, playbook, connection, mode, forks, workdir) for _ in range(repeat)]
+            seconds = statistics.median(runs)
+            results["modes"][mode] = {
+                "seconds": round(seconds, 3),
+                "runs": [round(run, 3) for run in runs],
+                "ms_per_task": round(1000 * max(seconds - overhead, 0) / tasks, 1),
+            }
+    return results
+
+
+def format_report(results: Dict[str, Any]) -> str:
+    lines = [
+        f"{results['tasks']} tasks on {results['hosts']} host(s) over {results['connection']}, "
+        f"playbook overhead {results['overhead_seconds']:.2f}s",
+        f"{'mode':<12} {'playbook s':>10} {'ms/task':>8} {'vs default':>11}",
+    ]
+    default = results["modes"]["default"]["ms_per_task"]
+    for mode in MODES:
+        metrics = results["modes"][mode]
+        ratio = f"{100 * (metrics['ms_per_task'] - default) / default:+.0f}%" if default else "-"
+        lines.append(f"{mode:<12} {metrics['seconds']:>10.2f} {metrics['ms_per_task']:>8.1f} {ratio:>11}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("target", nargs="?", default="minimal", help="Role or collection scenario (default: minimal)")
+    parser.add_argument("--tasks", type=int, default=100, help="Module tasks per playbook (default: 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the median counts (default: 3)")
+    parser.add_argument("--forks", type=int, default=5, help="ansible-playbook forks (default: 5)")
+    parser.add_argument("--local", action="store_true", help="Run against localhost instead of containers")
+    parser.add_argument("--inventory", type=Path, help="Run against this inventory instead of containers")
+    parser.add_argument(
+        "--connection", default="ssh", choices=sorted(WORKER_PLUGINS), help="Base plugin for --inventory"
+    )
+    parser.add_argument("--keep", action="store_true", help="Leave the containers running afterwards")
+    parser.add_argument("--molecule", default="molecule", help="Command that runs molecule (e.g. 'uv run molecule')")
+    parser.add_argument("--ansible-playbook", default="ansible-playbook", help="Command that runs ansible-playbook")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    command = shlex.split(args.ansible_playbook)
+    try:
+        if args.local:
+            results = benchmark(["localhost"], "local", command, args.tasks, args.repeat, args.forks)
+        elif args.inventory:
+            listing = ["ansible", "all", "-i", str(args.inventory), "--list-hosts"]
+            listed = subprocess.run(listing, capture_output=True, text=True, check=True).stdout
+            hosts = [line.strip() for line in listed.splitlines()[1:] if line.strip()]
+            results = benchmark(
+                hosts, args.connection, command, args.tasks, args.repeat, args.forks, args.inventory.resolve()
+            )
+        else:
+            molecule = shlex.split(args.molecule)
+            cwd, scenario = benchmark_roles.resolve_target(args.target)
+            benchmark_roles.molecule(molecule, "create", scenario, cwd)
+            try:
+                hosts = molecule_hosts(args.target)
+                results = benchmark(hosts, "community.docker.docker", command, args.tasks, args.repeat, args.forks)
+            finally:
+                if not args.keep:
+                    benchmark_roles.molecule(molecule, "destroy", scenario, cwd)
+    except (ValueError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"✗ {e}")
+        return 2
+    print(format_report(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Render-time smoke test for every role template at growing input sizes.
+
+Syntax validation (scripts/validate_templates.py) does not catch a render
+that is slow or blows up on large inputs. This benchmark renders each
+roles/*/templates/*.j2 with Ansible's real filters against sample variables
+generated from the role's meta/argument_specs.yml:
+
+- every list (and every dict without declared options) gets N items, for
+  each N in --sizes (default 1, 100 and 10000); nested lists stay small
+- variables no argument spec declares (facts, set_fact results) come from
+  render_vars.yml next to this script, in the same format
+- render time (best of --repeat) and output size are recorded per size
+
+A template is flagged when its render time or output size grows
+superlinearly between the two largest sizes. Output sizes are
+deterministic and stored with the timings in baselines/template_render.json,
+so a change in what a template produces, or a large slowdown, shows up as a
+baseline diff in review.
+
+    python tests/performance/bench_template_render.py              # compare with the baseline
+    python tests/performance/bench_template_render.py --update     # rewrite the baseline
+    python tests/performance/bench_template_render.py discovery    # one role
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+COLLECTION_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(COLLECTION_ROOT / "scripts"))
+
+import validate_templates  # noqa: E402
+from jinja2 import meta  # noqa: E402
+
+ROLES_DIR = COLLECTION_ROOT / "roles"
+RENDER_VARS = Path(__file__).resolve().parent / "render_vars.yml"
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines" / "template_render.json"
+
+DEFAULT_SIZES = [1, 100, 10000]
+
+# Lists inside list items are capped so the input grows linearly with N
+NESTED_ITEMS = 3
+
+# Growth exponent above which a template counts as superlinear; 1.0 is linear
+SUPERLINEAR = 1.25
+
+# Renders faster than this at the largest size are too noisy to judge or compare
+NOISE_FLOOR = 0.005
+
+
+# =============================================================================
+# SAMPLE VARIABLES
+# =============================================================================
+
+
+def load_argument_specs(role: str) -> Dict[str, Any]:
+    """Options of all entry points of a role's argument spec, merged."""
+    path = ROLES_DIR / role / "meta" / "argument_specs.yml"
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        specs = (yaml.safe_load(f) or {}).get("argument_specs") or {}
+    options: Dict[str, Any] = {}
+    for entry_point in specs.values():
+        options.update(entry_point.get("options") or {})
+    return options
+
+
+def resolve_from(reference: str) -> Dict[str, Any]:
+    """The argument spec entry named by role.option[.suboption...]."""
+    role, *path = reference.split(".")
+    spec: Dict[str, Any] = {"options": load_argument_specs(role)}
+    for name in path:
+        options = spec.get("options") or {}
+        if name not in options:
+            raise KeyError(f"{reference}: no option {name!r}")
+        spec = options[name]
+    return spec
+
+
+def sample_value(name: str, spec: Dict[str, Any], size: int, index: int = 0, nested: bool = False) -> Any:
+    """A value of the declared type, with `size` items for lists and open dicts."""
+    if "value" in spec:
+        return spec["value"]
+    if "from" in spec:
+        return sample_value(name, resolve_from(spec["from"]), size, index, nested)
+
+    kind = spec.get("type", "str")
+    default = spec.get("default")
+    if spec.get("choices"):
+        return spec["choices"][0]
+    if kind == "bool":
+        return default if isinstance(default, bool) else True
+    if kind == "int":
+        return default if isinstance(default, int) and default else index + 1
+    if kind == "float":
+        return float(index + 1)
+    if kind == "path":
+        return f"/srv/{name}/{index}"
+    if kind == "list":
+        count = min(size, NESTED_ITEMS) if nested else size
+        element = dict(type=spec.get("elements", "str"), options=spec.get("options"))
+        return [sample_value(name, element, size, i, nested=True) for i in range(count)]
+    if kind == "dict":
+        if spec.get("options"):
+            return dict(
+                (option, sample_value(option, option_spec or {}, size, index, nested=nested))
+                for option, option_spec in spec["options"].items()
+            )
+        count = min(size, NESTED_ITEMS) if nested else size
+        return dict((f"{name}_{i}", f"value-{i}") for i in range(count))
+    if isinstance(default, str) and default:
+        return default
+    return f"{name}-{index}"
+
+
+def template_variables(env, template: Path) -> List[str]:
+    return sorted(meta.find_undeclared_variables(env.parse(template.read_text(encoding="utf-8"))))
+
+
+def sample_variables(
+    role: str, names: List[str], size: int, render_vars: Dict[str, Any]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Sample values for the named variables, and the names nothing declares."""
+    declared = dict(load_argument_specs(role))
+    declared.update(render_vars.get("common") or {})
+    declared.update((render_vars.get("roles") or {}).get(role) or {})
+
+    variables = {}
+    missing = []
+    for name in names:
+        if name in declared:
+            variables[name] = sample_value(name, declared[name] or {}, size)
+        else:
+            missing.append(name)
+    return variables, missing
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+
+def best_render(template, variables: Dict[str, Any], repeat: int) -> Tuple[float, int]:
+    timings = []
+    output = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = template.render(variables)
+        timings.append(time.perf_counter() - started)
+        if timings[-1] > 1.0:
+            break  # slow enough that a single render is a stable measurement
+    return min(timings), len(output.encode("utf-8"))
+
+
+def growth(small: Tuple[int, float], large: Tuple[int, float]) -> Optional[float]:
+    """Exponent k in cost ~ N**k between two measurements."""
+    (n1, v1), (n2, v2) = small, large
+    if n2 <= n1 or v1 <= 0 or v2 <= 0:
+        return None
+    return math.log(v2 / v1) / math.log(n2 / n1)
+
+
+def measure(roles: List[str], sizes: List[int], repeat: int) -> Dict[str, Any]:
+    """Render every template of the roles at each size; returns {template: result}."""
+    with open(RENDER_VARS, encoding="utf-8") as f:
+        render_vars = yaml.safe_load(f) or {}
+
+    results = {}
+    for role in roles:
+        for template_path in sorted((ROLES_DIR / role / "templates").glob("*.j2")):
+            key = str(template_path.relative_to(COLLECTION_ROOT))
+            env = validate_templates.build_environment(str(template_path.parent))
+            names = template_variables(env, template_path)
+            template = env.get_template(template_path.name)
+
+            runs = {}
+            error = None
+            for size in sizes:
+                variables, missing = sample_variables(role, names, size, render_vars)
+                if missing:
+                    error = f"no sample for: {', '.join(missing)} (declare them in {RENDER_VARS.name})"
+                    break
+                try:
+                    seconds, output_bytes = best_render(template, variables, repeat)
+                except Exception as e:
+                    error = f"render failed at size {size}: {e}"
+                    break
+                runs[str(size)] = dict(seconds=round(seconds, 4), bytes=output_bytes)
+
+            result: Dict[str, Any] = dict(sizes=runs)
+            if error:
+                result["error"] = error
+            elif len(sizes) > 1:
+                small, large = str(sizes[-2]), str(sizes[-1])
+                time_growth = growth((sizes[-2], runs[small]["seconds"]), (sizes[-1], runs[large]["seconds"]))
+                bytes_growth = growth((sizes[-2], runs[small]["bytes"]), (sizes[-1], runs[large]["bytes"]))
+                if runs[large]["seconds"] < NOISE_FLOOR:
+                    time_growth = None
+                result["time_growth"] = None if time_growth is None else round(time_growth, 2)
+                result["bytes_growth"] = None if bytes_growth is None else round(bytes_growth, 2)
+            results[key] = result
+    return results
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+
+def problems(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Superlinear growth, render errors, and changes against the baseline."""
+    found = []
+    for key, result in results.items():
+        if "error" in result:
+            found.append(f"{key}: {result['error']}")
+            continue
+        if (result.get("time_growth") or 0) > SUPERLINEAR:
+            found.append(f"{key}: render time grows as N^{result['time_growth']}")
+        if (result.get("bytes_growth") or 0) > SUPERLINEAR:
+            found.append(f"{key}: output size grows as N^{result['bytes_growth']}")
+
+        previous = baseline.get(key, {}).get("sizes", {})
+        for size, run in result["sizes"].items():
+            if size not in previous:
+                continue
+            if run["bytes"] != previous[size]["bytes"]:
+                found.append(f"{key}: output at N={size} is {run['bytes']} bytes, baseline {previous[size]['bytes']}")
+            if run["seconds"] >= NOISE_FLOOR and run["seconds"] > tolerance * previous[size]["seconds"]:
+                found.append(
+                    f"{key}: N={size} renders in {run['seconds']:.4f}s, "
+                    f"over {tolerance:g}x the baseline {previous[size]['seconds']:.4f}s"
+                )
+    return found
+
+
+def format_table(results: Dict[str, Any], sizes: List[int]) -> str:
+    width = max([len("template")] + [len(key) for key in results]) + 2
+    header = f"{'template':<{width}}" + "".join(f"{'N=' + str(size):>20}" for size in sizes) + f"{'growth':>8}"
+    lines = [header]
+    for key, result in results.items():
+        cells = []
+        for size in sizes:
+            run = result["sizes"].get(str(size))
+            cells.append(f"{run['seconds']:>9.4f}s {run['bytes']:>8}B" if run else f"{'-':>20}")
+        exponent = result.get("time_growth")
+        lines.append(
+            f"{key:<{width}}" + "".join(cells) + (f"{exponent:>8.2f}" if exponent is not None else f"{'-':>8}")
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("roles", nargs="*", help="Roles to benchmark (default: every role with templates)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="List sizes to render with")
+    parser.add_argument("--repeat", type=int, default=3, help="Renders per measurement; the best is reported")
+    parser.add_argument(
+        "--tolerance", type=float, default=3.0, help="Slowdown against the baseline that counts as a regression"
+    )
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(set(args.sizes))
+    roles = args.roles or sorted(path.parent.name for path in ROLES_DIR.glob("*/templates"))
+    results = measure(roles, sizes, args.repeat)
+    print(format_table(results, sizes))
+
+    baseline = {}
+    if BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8")).get("templates", {})
+    found = problems(results, {} if args.update else baseline, args.tolerance)
+
+    if args.update:
+        if not args.roles:
+            baseline = {}
+        baseline.update(results)
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        data = dict(sizes=sizes, templates=dict(sorted(baseline.items())))
+        BASELINE_FILE.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+        print(f"\n✓ Baseline written to {BASELINE_FILE.relative_to(COLLECTION_ROOT)}")
+
+    if found:
+        print("\nProblems:")
+        for problem in found:
+            print(f"  ✗ {problem}")
+        return 1
+    print("\n✓ All templates render in linear time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
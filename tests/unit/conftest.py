@@ -0,0 +1,29 @@
+"""
+Shared fixtures for wolskies.infrastructure unit tests.
+"""
+
+import sys
+import types
+from pathlib import Path
+
+COLLECTION_ROOT = Path(__file__).parent.parent.parent
+
+# Make the standalone tools in scripts/ importable
+sys.path.insert(0, str(COLLECTION_ROOT / "scripts"))
+
+
+def _register_collection():
+    """Expose this checkout as ansible_collections.wolskies.infrastructure, as ansible-test does."""
+    packages = {
+        "ansible_collections": [],
+        "ansible_collections.wolskies": [],
+        "ansible_collections.wolskies.infrastructure": [str(COLLECTION_ROOT)],
+    }
+    for name, path in packages.items():
+        if name not in sys.modules:
+            module = types.ModuleType(name)
+            module.__path__ = path
+            sys.modules[name] = module
+
+
+_register_collection()
@@ -0,0 +1,74 @@
+"""
+Unit tests for the perf_metrics callback plugin (plugins/callback/perf_metrics.py).
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.callback import perf_metrics
+
+
+@pytest.fixture
+def callback(monkeypatch, tmp_path):
+    options = {"output_file": str(tmp_path / "out" / "metrics.json"), "slowest_tasks": 2}
+    module = perf_metrics.CallbackModule()
+    monkeypatch.setattr(module, "get_option", options.get)
+    return module
+
+
+def task(name, action, args=None, loop=None):
+    return SimpleNamespace(action=action, args=args or {}, loop=loop, get_name=lambda: name)
+
+
+def run(callback, play):
+    """Feed (task, [(callback method, result dict), ...]) pairs through the callback."""
+    callback.v2_playbook_on_start(None)
+    for current, results in play:
+        callback.v2_playbook_on_task_start(current, False)
+        for method, data in results:
+            getattr(callback, method)(SimpleNamespace(task=current, result=data))
+    callback.v2_playbook_on_stats(None)
+
+
+def test_counts_tasks_invocations_and_payload(callback, tmp_path):
+    install = task("Install packages", "ansible.builtin.apt", {"name": "git"})
+    users = task("Create users", "user", loop=["a", "b", "c"])
+    facts = task("Set facts", "ansible.builtin.set_fact", {"x": 1})
+    missing = task("Skipped", "ansible.builtin.copy")
+
+    run(
+        callback,
+        [
+            (install, [("v2_runner_on_ok", {"changed": True}), ("v2_runner_on_ok", {"changed": False})]),
+            (
+                users,
+                [
+                    (
+                        "v2_runner_on_ok",
+                        {"results": [{"changed": True}, {"skipped": True}, {"changed": False}], "changed": True},
+                    )
+                ],
+            ),
+            (facts, [("v2_runner_on_ok", {"ansible_facts": {"x": 1}})]),
+            (missing, [("v2_runner_on_skipped", {"skipped": True})]),
+        ],
+    )
+    metrics = json.loads((tmp_path / "out" / "metrics.json").read_text())
+
+    assert metrics["tasks"] == 4
+    assert metrics["module_invocations"] == 4
+    assert metrics["changed"] == 2 and metrics["failed"] == 0 and metrics["skipped"] == 2
+    assert metrics["payload_bytes"] > len('{"name":"git"}') * 2
+    assert metrics["seconds"] >= 0
+    assert len(metrics["slowest_tasks"]) == 2
+
+
+def test_failures_are_counted(callback):
+    command = task("Run command", "ansible.legacy.command", {"cmd": "false"})
+
+    run(callback, [(command, [("v2_runner_on_failed", {"rc": 1}), ("v2_runner_on_unreachable", {})])])
+
+    assert callback.metrics()["failed"] == 2
+    assert callback.metrics()["module_invocations"] == 2
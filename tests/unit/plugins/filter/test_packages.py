@@ -0,0 +1,50 @@
+"""
+Unit tests for the package staging filters (plugins/filter/packages.py).
+"""
+
+import pytest
+
+from ansible.errors import AnsibleFilterError
+
+from ansible_collections.wolskies.infrastructure.plugins.filter.packages import package_staging_groups
+
+
+def host(distribution, version, family, packages, release=None, arch="x86_64", **extra):
+    facts = dict(distribution=distribution, distribution_version=version, os_family=family, architecture=arch)
+    if release:
+        facts["distribution_release"] = release
+    return dict(ansible_facts=facts, _final_packages={distribution: packages}, **extra)
+
+
+def test_hosts_are_grouped_and_package_sets_merged():
+    hostvars = {
+        "web1": host("Ubuntu", "24.04", "Debian", [{"name": "nginx"}, {"name": "telnet", "state": "absent"}], "noble"),
+        "web2": host("Ubuntu", "24.04", "Debian", [{"name": "nginx"}, {"name": "htop"}], "noble"),
+        "arm1": host("Ubuntu", "24.04", "Debian", ["htop"], "noble", arch="aarch64"),
+        "old1": host("Ubuntu", "22.04", "Debian", [], "jammy"),
+        "arch1": host("Archlinux", "", "Archlinux", [{"name": "git"}], release="rolling"),
+        "arch2": host("Archlinux", "", "Archlinux", [{"name": "yay"}], pacman={"enable_aur": True}),
+        "mac1": host("MacOSX", "14.5", "Darwin", [{"name": "git"}]),
+    }
+    staging = package_staging_groups(sorted(hostvars), hostvars, {"ubuntu-noble-x86_64": "build01"})
+
+    assert staging["hosts"] == {
+        "arch1": "archlinux-rolling-x86_64",
+        "arm1": "ubuntu-noble-aarch64",
+        "web1": "ubuntu-noble-x86_64",
+        "web2": "ubuntu-noble-x86_64",
+    }
+    web = staging["groups"]["ubuntu-noble-x86_64"]
+    assert (web["manager"], web["builder"], web["leader"]) == ("apt", "build01", "web1")
+    assert (web["hosts"], web["packages"]) == (["web1", "web2"], ["htop", "nginx"])
+    arm = staging["groups"]["ubuntu-noble-aarch64"]
+    assert (arm["builder"], arm["packages"]) == ("arm1", ["htop"])
+    assert staging["groups"]["archlinux-rolling-x86_64"]["manager"] == "pacman"
+
+
+def test_missing_facts_and_bad_builders_are_rejected():
+    hostvars = {"web1": {"ansible_facts": {"os_family": "Debian"}, "_final_packages": {None: ["htop"]}}}
+    with pytest.raises(AnsibleFilterError, match="facts"):
+        package_staging_groups(["web1"], hostvars)
+    with pytest.raises(AnsibleFilterError, match="builders"):
+        package_staging_groups([], {}, ["build01"])
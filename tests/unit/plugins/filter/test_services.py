@@ -0,0 +1,97 @@
+"""
+Unit tests for the configure_services filters (plugins/filter/services.py).
+"""
+
+import pytest
+
+from ansible.errors import AnsibleFilterError
+
+from ansible_collections.wolskies.infrastructure.plugins.filter.services import (
+    service_aggregate,
+    service_waves,
+)
+
+
+def names(waves):
+    return [[s["name"] for s in wave["services"]] for wave in waves]
+
+
+def test_waves_follow_dependencies():
+    waves = service_waves(
+        [
+            {"role": "wolskies.infrastructure.install_gitlab", "depends_on": "install_certbot"},
+            "install_certbot",
+            {"name": "grafana", "compose": {"image": "grafana/grafana"}},
+            {"name": "backup", "compose": {"image": "restic"}, "depends_on": ["install_gitlab", "grafana"]},
+        ]
+    )
+
+    assert names(waves) == [["install_certbot", "grafana"], ["install_gitlab"], ["backup"]]
+    assert [w["index"] for w in waves] == [1, 2, 3]
+    assert waves[0]["roles"][0]["role"] == "install_certbot"
+    assert waves[0]["compose"] == [{"image": "grafana/grafana", "name": "grafana", "enabled": True}]
+    assert waves[1]["roles"][0]["interface"] == "install_gitlab"
+
+
+def test_host_entries_replace_group_entries():
+    waves = service_waves(
+        [{"name": "web", "compose": {"image": "nginx:1.25"}}, "install_certbot"],
+        [{"name": "web", "compose": {"image": "nginx:1.27"}, "enabled": False}],
+    )
+
+    assert names(waves) == [["web", "install_certbot"]]
+    assert waves[0]["compose"] == [{"image": "nginx:1.27", "name": "web", "enabled": False}]
+
+
+@pytest.mark.parametrize(
+    "services, message",
+    [
+        ([{"role": "a", "depends_on": "b"}], "undeclared service(s): b"),
+        ([{"role": "a", "depends_on": "b"}, {"role": "b", "depends_on": "a"}, "c"], "cycle between: a, b"),
+        ([{"name": "x", "role": "a", "compose": {}}], "exactly one of role or compose"),
+        ([{"compose": {"image": "nginx"}}], "need a name"),
+    ],
+)
+def test_invalid_services(services, message):
+    with pytest.raises(AnsibleFilterError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        service_waves(services)
+
+
+def test_aggregate_merges_and_deduplicates():
+    waves = service_waves(
+        [
+            "install_gitlab",
+            {
+                "name": "grafana",
+                "compose": {"image": "grafana/grafana"},
+                "firewall_rules": [{"rule": "allow", "port": 443, "protocol": "tcp"}],
+                "reverse_proxy": {"host": "grafana.example.com", "port": 3000},
+                "backup_paths": ["/srv/docker/grafana", "/var/opt/gitlab/backups"],
+                "health_check": {"url": "http://localhost:3000/api/health"},
+            },
+            {"name": "old", "compose": {"image": "old"}, "enabled": False, "backup_paths": ["/srv/old"]},
+        ]
+    )
+    exported = {
+        "install_gitlab": {
+            "firewall_rules": [{"rule": "allow", "port": 443, "proto": "tcp", "comment": "GitLab HTTPS"}],
+            "reverse_proxy_config": {"host": "gitlab.example.com", "port": 8080},
+            "backup_paths": ["/var/opt/gitlab/backups"],
+            "health_check": {},
+        }
+    }
+
+    result = service_aggregate(waves, exported)
+
+    assert result["firewall_rules"] == [{"rule": "allow", "port": 443, "proto": "tcp", "comment": "GitLab HTTPS"}]
+    assert [p["service"] for p in result["reverse_proxy"]] == ["install_gitlab", "grafana"]
+    assert result["backup_paths"] == ["/srv/docker/grafana", "/var/opt/gitlab/backups"]
+    assert result["health_checks"] == [{"url": "http://localhost:3000/api/health", "service": "grafana"}]
+
+
+def test_aggregate_default_comment():
+    waves = service_waves([{"role": "install_certbot", "firewall_rules": [{"port": 80, "protocol": "tcp"}]}])
+
+    assert service_aggregate(waves)["firewall_rules"] == [
+        {"port": 80, "proto": "tcp", "comment": "install_certbot service"}
+    ]
@@ -0,0 +1,28 @@
+"""
+Unit tests for the tree_digest lookup (plugins/lookup/tree_digest.py).
+"""
+
+import shutil
+
+from ansible_collections.wolskies.infrastructure.plugins.lookup.tree_digest import tree_digest
+
+
+def test_digest_covers_nested_files_and_names_but_not_location(tmp_path):
+    role = tmp_path / "role"
+    (role / "files" / "nvim" / "lua").mkdir(parents=True)
+    (role / "files" / "nvim" / "lua" / "init.lua").write_text("vim.o.number = true\n")
+    (role / "files" / "__pycache__").mkdir()
+    (role / "files" / "__pycache__" / "x.cpython-312.pyc").write_bytes(b"\0")
+    terms = [str(role / "files"), str(role / "missing")]
+    digest = tree_digest(terms)
+
+    shutil.copytree(role, tmp_path / "moved")
+    assert tree_digest([str(tmp_path / "moved" / "files"), str(tmp_path / "missing")]) == digest
+    (role / "files" / "__pycache__" / "x.cpython-312.pyc").write_bytes(b"\1")
+    assert tree_digest(terms) == digest
+
+    (role / "files" / "nvim" / "lua" / "init.lua").write_text("vim.o.number = false\n")
+    edited = tree_digest(terms)
+    assert edited != digest
+    (role / "files" / "nvim" / "lua" / "init.lua").rename(role / "files" / "nvim" / "init.lua")
+    assert tree_digest(terms) not in (digest, edited)
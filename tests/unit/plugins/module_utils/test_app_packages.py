@@ -0,0 +1,143 @@
+"""
+Unit tests for batched flatpak and snap management (plugins/module_utils/app_packages.py).
+"""
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import app_packages
+
+
+class FakeSnap:
+    """snap CLI over an installed set; names in broken fail to install."""
+
+    def __init__(self, installed=(), broken=()):
+        self.installed = set(installed)
+        self.broken = set(broken)
+        self.calls = []
+
+    def __call__(self, argv):
+        self.calls.append(argv)
+        verb, names = argv[1], [arg for arg in argv[2:] if not arg.startswith("--")]
+        if verb == "list":
+            if not self.installed:
+                return 1, "", "No snaps are installed yet. Try 'snap install hello-world'.\n"
+            rows = ["%s  1.0  10  latest/stable  canonical*  -" % name for name in sorted(self.installed)]
+            return 0, "\n".join(["Name  Version  Rev  Tracking  Publisher  Notes"] + rows) + "\n", ""
+        if verb == "install":
+            self.installed.update(name for name in names if name not in self.broken)
+            if self.broken & set(names):
+                return 1, "", 'error: snap "%s" not found\n' % sorted(self.broken & set(names))[0]
+            return 0, "", ""
+        if verb == "remove":
+            self.installed.difference_update(names)
+            return 0, "", ""
+        raise AssertionError(argv)
+
+
+def run_snap(fake, packages, check_mode=False):
+    packages = app_packages.deduplicate(packages)
+    install, remove = app_packages.plan(packages, app_packages.snap_installed(fake, "snap"))
+    commands = app_packages.snap_commands("snap", install, remove)
+    return app_packages.apply(
+        fake, lambda: app_packages.snap_installed(fake, "snap"), packages, commands, check_mode=check_mode
+    )
+
+
+def test_snaps_install_and_remove_in_one_call_each():
+    fake = FakeSnap(installed=["core22", "chromium", "spotify"])
+    results = run_snap(
+        fake,
+        [
+            {"name": "discord"},
+            {"name": "code", "classic": True},
+            {"name": "slack"},
+            {"name": "spotify"},
+            {"name": "chromium", "state": "absent"},
+            {"name": "vlc", "state": "absent"},
+        ],
+    )
+
+    assert fake.calls[1:] == [
+        ["snap", "install", "discord", "slack"],
+        ["snap", "install", "code", "--classic"],
+        ["snap", "remove", "chromium"],
+    ]
+    assert [(r["name"], r["action"], r["changed"]) for r in results] == [
+        ("discord", "installed", True),
+        ("code", "installed", True),
+        ("slack", "installed", True),
+        ("spotify", "unchanged", False),
+        ("chromium", "removed", True),
+        ("vlc", "unchanged", False),
+    ]
+
+    fake.calls = []
+    assert not any(r["changed"] for r in run_snap(fake, [{"name": "discord"}, {"name": "chromium", "state": "absent"}]))
+    assert fake.calls == [["snap", "list"]]
+
+
+def test_failed_batch_is_attributed_per_package():
+    fake = FakeSnap(installed=["core22"], broken=["no-such-snap"])
+    results = run_snap(fake, [{"name": "discord"}, {"name": "no-such-snap"}])
+
+    assert [(r["name"], r["action"]) for r in results] == [("discord", "installed"), ("no-such-snap", "failed")]
+    assert results[1]["msg"] == 'error: snap "no-such-snap" not found'
+
+
+def test_base_snaps_are_removed_last_and_check_mode_runs_nothing():
+    fake = FakeSnap(installed=["snapd", "core20", "firefox", "gnome-42-2204", "core22"])
+    remove = [{"name": name, "state": "absent"} for name in sorted(fake.installed)]
+    install, removing = app_packages.plan(remove, fake.installed)
+    assert app_packages.snap_commands("snap", install, removing) == [
+        (["snap", "remove", "firefox", "gnome-42-2204"], ["firefox", "gnome-42-2204"], "removed"),
+        (["snap", "remove", "core20", "core22", "snapd"], ["core20", "core22", "snapd"], "removed"),
+    ]
+
+    results = run_snap(fake, remove, check_mode=True)
+    assert all(r["action"] == "removed" for r in results)
+    assert fake.calls == [["snap", "list"]] and len(fake.installed) == 5
+    assert app_packages.snap_installed(FakeSnap(), "snap") == set()
+
+
+def test_flatpak_delta_matches_on_application_id():
+    installed = {"org.mozilla.firefox", "org.freedesktop.Platform", "com.spotify.Client"}
+    calls = []
+
+    def flatpak(argv):
+        calls.append(argv)
+        if argv[1] == "list":
+            return 0, "\n".join(sorted(installed)) + "\n", ""
+        return 0, "", ""
+
+    packages = app_packages.deduplicate(
+        [
+            {"name": "org.gimp.GIMP", "state": "absent"},
+            {"name": "org.mozilla.firefox//stable"},
+            {"name": "org.gimp.GIMP"},
+            {"name": "org.inkscape.Inkscape"},
+            {"name": "com.spotify.Client", "state": "absent"},
+        ]
+    )
+    found = app_packages.flatpak_installed(flatpak, "flatpak", "system")
+    install, remove = app_packages.plan(packages, found, key=app_packages.flatpak_id)
+    commands = app_packages.flatpak_commands("flatpak", "system", "flathub", install, remove)
+    results = app_packages.apply(flatpak, None, packages, commands, key=app_packages.flatpak_id)
+
+    assert calls == [
+        ["flatpak", "list", "--system", "--columns=application"],
+        [
+            "flatpak",
+            "install",
+            "--system",
+            "--noninteractive",
+            "-y",
+            "flathub",
+            "org.gimp.GIMP",
+            "org.inkscape.Inkscape",
+        ],
+        ["flatpak", "uninstall", "--system", "--noninteractive", "-y", "com.spotify.Client"],
+    ]
+    assert [(r["name"], r["action"]) for r in results] == [
+        ("org.mozilla.firefox//stable", "unchanged"),
+        ("org.gimp.GIMP", "installed"),
+        ("org.inkscape.Inkscape", "installed"),
+        ("com.spotify.Client", "removed"),
+    ]
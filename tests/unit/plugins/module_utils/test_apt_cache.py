@@ -0,0 +1,65 @@
+"""
+Unit tests for APT index freshness (plugins/module_utils/apt_cache.py).
+"""
+
+import os
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import apt_cache
+
+
+@pytest.fixture
+def apt_root(tmp_path, monkeypatch):
+    (tmp_path / "sources.list.d").mkdir()
+    (tmp_path / "lists").mkdir()
+    (tmp_path / "sources.list").write_text("deb http://deb.debian.org/debian bookworm main\n")
+    monkeypatch.setattr(apt_cache, "UPDATE_STAMP", str(tmp_path / "periodic" / "update-success-stamp"))
+    monkeypatch.setattr(apt_cache, "LISTS_DIR", str(tmp_path / "lists"))
+    monkeypatch.setattr(
+        apt_cache, "SOURCE_PATTERNS", [str(tmp_path / "sources.list"), str(tmp_path / "sources.list.d" / "*")]
+    )
+    return tmp_path
+
+
+def set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def test_fresh_index_is_not_stale(apt_root):
+    apt_cache.mark_updated()
+    assert apt_cache.staleness(3600) is None
+    assert apt_cache.staleness(3600, force=True) == "forced"
+
+
+def test_old_index_is_stale(apt_root):
+    apt_cache.mark_updated()
+    set_mtime(apt_cache.UPDATE_STAMP, 1000)
+    set_mtime(apt_root / "sources.list", 500)
+    set_mtime(apt_root / "sources.list.d", 500)
+    assert apt_cache.staleness(3600, now=1000 + 3599) is None
+    assert apt_cache.staleness(3600, now=1000 + 3601) == "older than 3600s"
+
+
+def test_new_source_makes_index_stale(apt_root):
+    apt_cache.mark_updated()
+    stamp = os.stat(apt_cache.UPDATE_STAMP).st_mtime
+    source = apt_root / "sources.list.d" / "nodesource.sources"
+    source.write_text("Types: deb\n")
+    set_mtime(source, stamp + 10)
+    assert apt_cache.staleness(3600, now=stamp + 20) == "sources changed"
+
+
+def test_removed_source_makes_index_stale(apt_root):
+    source = apt_root / "sources.list.d" / "old.list"
+    source.write_text("deb http://example.invalid stable main\n")
+    apt_cache.mark_updated()
+    stamp = os.stat(apt_cache.UPDATE_STAMP).st_mtime
+    source.unlink()
+    set_mtime(apt_root / "sources.list.d", stamp + 10)
+    assert apt_cache.staleness(3600, now=stamp + 20) == "sources changed"
+
+
+def test_lists_dir_fallback(apt_root):
+    set_mtime(apt_root / "lists", 5000)
+    assert apt_cache.last_update_time() == 5000
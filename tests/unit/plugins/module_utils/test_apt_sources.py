@@ -0,0 +1,121 @@
+"""
+Unit tests for APT source file parsing (plugins/module_utils/apt_sources.py).
+"""
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import apt_sources
+
+UBUNTU_SOURCES = """\
+## Ubuntu sources have moved to /etc/apt/sources.list.d/ubuntu.sources
+Types: deb
+URIs: http://archive.ubuntu.com/ubuntu/
+Suites: noble noble-updates noble-backports
+Components: main restricted universe multiverse
+Signed-By: /usr/share/keyrings/ubuntu-archive-keyring.gpg
+
+Types: deb
+URIs: http://security.ubuntu.com/ubuntu/
+Suites: noble-security
+Components: main restricted universe multiverse
+Signed-By: /usr/share/keyrings/ubuntu-archive-keyring.gpg
+"""
+
+INLINE_KEY = """\
+Types: deb
+URIs: https://repo.example.com/apt
+Suites: stable
+Components: main
+Enabled: no
+Signed-By:
+ -----BEGIN PGP PUBLIC KEY BLOCK-----
+ .
+ mQINBGXexample
+ -----END PGP PUBLIC KEY BLOCK-----
+"""
+
+
+@pytest.fixture
+def apt_dir(tmp_path):
+    (tmp_path / "sources.list.d").mkdir()
+    (tmp_path / "sources.list").write_text("# See sources.list(5)\n")
+    return tmp_path
+
+
+def write(apt_dir, name, text):
+    (apt_dir / "sources.list.d" / name).write_text(text)
+
+
+def read(apt_dir, key_mapping=None):
+    paths = [str(apt_dir / "sources.list"), str(apt_dir / "sources.list.d")]
+    return apt_sources.read_repositories(paths, key_mapping)
+
+
+def test_deb822_stanzas_and_inline_keys(apt_dir):
+    write(apt_dir, "ubuntu.sources", UBUNTU_SOURCES)
+    write(apt_dir, "example.sources", INLINE_KEY)
+
+    repositories, files, duplicates = read(apt_dir)
+    assert [r["name"] for r in repositories] == ["example", "ubuntu", "ubuntu-2"]
+    assert len(files) == 3 and duplicates == []
+
+    example, ubuntu, security = repositories
+    assert example["enabled"] is False
+    assert example["signed_by"].splitlines() == [
+        "-----BEGIN PGP PUBLIC KEY BLOCK-----",
+        "",
+        "mQINBGXexample",
+        "-----END PGP PUBLIC KEY BLOCK-----",
+    ]
+    assert ubuntu["suites"] == ["noble", "noble-updates", "noble-backports"]
+    assert ubuntu["components"] == ["main", "restricted", "universe", "multiverse"]
+    assert security["suites"] == "noble-security"
+    assert security["signed_by"] == "/usr/share/keyrings/ubuntu-archive-keyring.gpg"
+
+
+def test_one_line_entries_merge_only_when_equivalent(apt_dir):
+    write(
+        apt_dir,
+        "pgdg.list",
+        "deb [arch=amd64,arm64 signed-by=/etc/apt/keyrings/pgdg.asc] https://apt.postgresql.org/pub/repos/apt "
+        "noble-pgdg main\n"
+        "deb-src [arch=amd64,arm64 signed-by=/etc/apt/keyrings/pgdg.asc] https://apt.postgresql.org/pub/repos/apt "
+        "noble-pgdg main\n",
+    )
+    write(
+        apt_dir,
+        "mixed.list",
+        "deb http://deb.example.com/debian bookworm main\n"
+        "deb http://deb.example.com/debian bookworm-updates main  # updates\n"
+        "deb-src http://deb.example.com/debian bookworm main\n"
+        "# deb http://deb.example.com/debian sid main\n",
+    )
+
+    repositories, _, _ = read(apt_dir)
+    mixed, mixed_src, pgdg = repositories
+    assert pgdg["types"] == ["deb", "deb-src"] and pgdg["suites"] == "noble-pgdg"
+    assert pgdg["architectures"] == ["amd64", "arm64"]
+    assert pgdg["signed_by"] == "/etc/apt/keyrings/pgdg.asc"
+    # deb-src lacks bookworm-updates, so merging the types would add a source that is not configured
+    assert (mixed["name"], mixed["types"], mixed["suites"]) == ("mixed", "deb", ["bookworm", "bookworm-updates"])
+    assert (mixed_src["name"], mixed_src["types"], mixed_src["suites"]) == ("mixed-2", "deb-src", "bookworm")
+
+
+def test_key_mapping_and_duplicates(apt_dir):
+    write(
+        apt_dir,
+        "docker.sources",
+        "Types: deb\nURIs: https://download.docker.com/linux/ubuntu\nSuites: noble\nComponents: stable\n",
+    )
+    write(apt_dir, "docker-ce.list", "deb https://download.docker.com/linux/ubuntu noble stable\n")
+    write(apt_dir, "ppa.list", "deb https://ppa.launchpadcontent.net/x/y/ubuntu noble main\n")
+
+    key_mapping = {"docker.com": "https://download.docker.com/linux/ubuntu/gpg", "launchpadcontent.net": None}
+    repositories, _, duplicates = read(apt_dir, key_mapping)
+    assert [(r["name"], r["signed_by"]) for r in repositories] == [
+        ("docker-ce", "https://download.docker.com/linux/ubuntu/gpg"),
+        ("ppa", None),
+    ]
+    assert duplicates == [
+        {"name": "docker", "file": str(apt_dir / "sources.list.d" / "docker.sources"), "same_as": "docker-ce"}
+    ]
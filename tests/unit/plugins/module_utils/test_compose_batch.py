@@ -0,0 +1,147 @@
+"""
+Unit tests for concurrent compose deployment (plugins/module_utils/compose_batch.py).
+"""
+
+import threading
+import time
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import compose_batch
+
+
+class FakeDocker:
+    """Minimal docker CLI: one container per project, running the image it was created from."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.containers = {}  # project path -> (image, image id)
+        self.images = {}  # image -> image id
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def __call__(self, argv):
+        with self.lock:
+            self.calls.append(argv)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return self.dispatch(argv)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def dispatch(self, argv):
+        if argv[1] == "compose":
+            path, verb = argv[3], argv[6]
+            if verb == "ps":
+                return 0, ("c:" + path) if path in self.containers else "", ""
+            time.sleep(self.delay)
+            if verb == "up":
+                if path not in self.containers or "--force-recreate" in argv:
+                    image = "img" + path
+                    self.containers[path] = (image, self.images.setdefault(image, "sha256:1"))
+                    return 0, "", " Container x  Recreated\n"
+                return 0, "", " Container x  Running\n"
+            if verb == "down":
+                self.containers.pop(path)
+                return 0, "", " Container x  Removed\n"
+            return 0, "", ""
+        if argv[1] == "inspect":
+            return 0, "\n".join("%s %s true" % self.containers[c[2:]] for c in argv[4:]), ""
+        if argv[1:3] == ["image", "inspect"]:
+            return 0, "\n".join(self.images[name] for name in argv[5:]), ""
+        raise AssertionError(argv)
+
+
+@pytest.fixture
+def projects(tmp_path):
+    result = []
+    for name in "abc":
+        path = tmp_path / name
+        path.mkdir()
+        (path / "docker-compose.yml").write_text("services:\n  %s:\n    image: %s\n" % (name, name))
+        result.append(dict(name=name, path=str(path)))
+    return result
+
+
+def deploy(docker, projects, **kwargs):
+    return dict((r["name"], r) for r in compose_batch.deploy_projects(docker, "docker", projects, **kwargs))
+
+
+def test_compose_command_for_each_state():
+    project = dict(name="a", path="/srv/docker/a")
+    base = ["docker", "compose", "--project-directory", "/srv/docker/a", "-f", "/srv/docker/a/docker-compose.yml"]
+    assert compose_batch.compose_command("docker", project) == base + ["up", "--detach", "--remove-orphans"]
+    assert compose_batch.compose_command("docker", project, recreate=True)[-1] == "--force-recreate"
+    project["state"] = "absent"
+    assert compose_batch.compose_command("docker", project, recreate=True) == base + ["down", "--remove-orphans"]
+
+
+def test_compose_changed_ignores_running_containers():
+    assert not compose_batch.compose_changed(" Container web  Running\n")
+    assert compose_batch.compose_changed(" Network web_default  Creating\n Container web  Started\n")
+    assert compose_batch.compose_changed(" Container web  Removed\n")
+
+
+def test_config_hash_covers_env_file(projects):
+    path = projects[0]["path"]
+    before = compose_batch.config_hash(path)
+    with open(path + "/.env", "w") as f:
+        f.write("X=1\n")
+    assert compose_batch.config_hash(path) != before
+
+
+def test_only_changed_projects_are_recreated(projects):
+    docker = FakeDocker()
+    first = deploy(docker, projects)
+    assert [r["action"] for r in first.values()] == ["created"] * 3
+
+    assert [r["action"] for r in deploy(docker, projects).values()] == ["unchanged"] * 3
+
+    with open(projects[0]["path"] + "/docker-compose.yml", "a") as f:
+        f.write("    restart: always\n")
+    docker.images["img" + projects[1]["path"]] = "sha256:2"
+    results = deploy(docker, projects)
+
+    assert results["a"]["reasons"] == ["config changed"] and results["a"]["recreated"]
+    assert results["b"]["reasons"] == ["image changed"] and results["b"]["recreated"]
+    assert results["c"]["action"] == "unchanged" and results["c"]["downtime"] == 0.0
+    assert results["a"]["downtime"] == results["a"]["duration"]
+
+
+def test_check_mode_reports_without_deploying(projects):
+    docker = FakeDocker()
+    results = deploy(docker, projects, check_mode=True)
+    assert all(r["action"] == "created" and r["changed"] for r in results.values())
+    assert not any(argv[6] in ("pull", "up") for argv in docker.calls if argv[1] == "compose")
+
+
+def test_images_are_pulled_before_any_container_is_touched(projects):
+    docker = FakeDocker(delay=0.02)
+    deploy(docker, projects, parallelism=3)
+    verbs = [argv[6] for argv in docker.calls if argv[1] == "compose" and argv[6] in ("pull", "up")]
+    assert verbs == ["pull"] * 3 + ["up"] * 3
+
+
+def test_parallelism_is_limited_and_order_kept(tmp_path):
+    docker = FakeDocker(delay=0.05)
+    projects = [dict(name=name, path=str(tmp_path / name)) for name in "abcdefg"]
+    for project in projects:
+        (tmp_path / project["name"]).mkdir()
+    results = compose_batch.deploy_projects(docker, "docker", projects, parallelism=3, pull=False)
+    assert [r["name"] for r in results] == list("abcdefg")
+    assert docker.peak == 3
+
+
+def test_failed_project_does_not_stop_others(projects):
+    def run(argv):
+        if argv[1] == "compose" and argv[6] == "up" and argv[3] == projects[1]["path"]:
+            return 1, "", "no such image"
+        return 0, "", ""
+
+    results = compose_batch.deploy_projects(run, "docker", projects)
+    assert [r["rc"] for r in results] == [0, 1, 0]
+    assert results[1]["action"] == "failed" and results[1]["stderr"] == "no such image"
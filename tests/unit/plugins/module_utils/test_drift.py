@@ -0,0 +1,52 @@
+"""
+Unit tests for the drift index (plugins/module_utils/drift.py).
+"""
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils.drift import (
+    StateIndex,
+    canonical,
+    diff_state,
+    state_hash,
+)
+
+
+def test_hash_ignores_list_order():
+    assert state_hash({"packages": ["git", "vim"]}) == state_hash({"packages": ["vim", "git"]})
+    assert state_hash({"packages": ["git"]}) != state_hash({"packages": ["git", "vim"]})
+
+
+def test_diff_nested_state():
+    previous = canonical({"enabled": True, "rules": [{"port": "22"}], "package": "ufw"})
+    current = canonical({"enabled": False, "rules": [{"port": "22"}, {"port": "443"}], "fail2ban": True})
+    assert diff_state(previous, current) == [
+        {"path": "enabled", "change": "changed", "from": True, "to": False},
+        {"path": "fail2ban", "change": "added", "value": True},
+        {"path": "package", "change": "removed", "value": "ufw"},
+        {"path": "rules", "change": "added", "value": {"port": "443"}},
+    ]
+
+
+def test_index_baselines_then_reports_only_changed_collectors(tmp_path):
+    index = StateIndex(str(tmp_path / "index.sqlite"))
+    observed = {"packages": {"host": ["git", "vim"]}, "system": {"timezone": "UTC"}}
+
+    drift, baselined = index.update("web01", observed, now=1)
+    assert drift == {}
+    assert baselined == ["packages", "system"]
+
+    drift, baselined = index.update("web01", {"packages": {"host": ["vim", "git"]}, "system": {"timezone": "UTC"}})
+    assert drift == {} and baselined == []
+
+    drift, _ = index.update("web01", {"packages": {"host": ["git"]}, "system": {"timezone": "UTC"}})
+    assert drift == {"packages": [{"path": "host", "change": "removed", "value": "vim"}]}
+    index.close()
+
+
+def test_index_without_record_leaves_state(tmp_path):
+    index = StateIndex(str(tmp_path / "index.sqlite"))
+    index.update("web01", {"packages": ["git"]})
+
+    drift, _ = index.update("web01", {"packages": ["git", "vim"]}, record=False)
+    assert drift == {"packages": [{"path": "", "change": "added", "value": "vim"}]}
+    assert index.state("web01", "packages") == ["git"]
+    index.close()
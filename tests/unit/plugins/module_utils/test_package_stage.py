@@ -0,0 +1,139 @@
+"""
+Unit tests for offline package staging (plugins/module_utils/package_stage.py).
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import package_stage
+
+DEPENDS = """\
+nginx
+  Depends: nginx-common
+  Depends: libc6
+  Recommends: <httpd>
+nginx-common
+  Depends: libc6
+libc6
+<httpd>
+htop
+  Depends: libc6
+"""
+
+
+class FakeApt:
+    """apt-cache, apt-get and apt-ftparchive over a mirror of {package: version}."""
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+        self.calls = []
+
+    def filename(self, package):
+        return "%s_%s_amd64.deb" % (package, self.mirror[package])
+
+    def content(self, package):
+        return ("%s %s" % (package, self.mirror[package])).encode()
+
+    def __call__(self, argv, cwd=None):
+        self.calls.append(argv)
+        if argv[:2] == ["apt-cache", "depends"]:
+            return 0, DEPENDS, ""
+        if argv[:3] == ["apt-get", "download", "--print-uris"]:
+            lines = [
+                "'http://mirror/%s' %s %d SHA256:%s"
+                % (
+                    self.filename(p),
+                    self.filename(p),
+                    len(self.content(p)),
+                    hashlib.sha256(self.content(p)).hexdigest(),
+                )
+                for p in argv[3:]
+            ]
+            return 0, "\n".join(lines) + "\n", ""
+        if argv[:2] == ["apt-get", "download"]:
+            for package in argv[2:]:
+                with open(os.path.join(cwd, self.filename(package)), "wb") as f:
+                    f.write(self.content(package))
+            return 0, "", ""
+        if argv[0] == "apt-ftparchive":
+            return 0, "%s of %s\n" % (argv[1], sorted(os.listdir(cwd))), ""
+        raise AssertionError(argv)
+
+
+def test_apt_stage_downloads_closure_once_and_refreshes_changed_versions(tmp_path):
+    mirror = {"nginx": "1.24", "nginx-common": "1.24", "libc6": "2.39", "htop": "3.3"}
+    apt = FakeApt(mirror)
+    path = str(tmp_path)
+
+    downloaded = package_stage.stage_apt(apt, path, ["htop", "nginx"])
+    assert apt.calls[0][-2:] == ["htop", "nginx"]
+    assert apt.calls[1][3:] == ["htop", "libc6", "nginx", "nginx-common"]
+    assert downloaded == sorted(apt.filename(p) for p in mirror)
+    files = package_stage.read_manifest(path)
+    assert sorted(files) == sorted(downloaded + ["Packages", "Release"])
+
+    mirror["nginx"] = mirror["nginx-common"] = "1.26"
+    (tmp_path / "stray.deb").write_text("left over")
+    apt.calls = []
+    downloaded = package_stage.stage_apt(apt, path, ["htop", "nginx"])
+    assert ["apt-get", "download", "nginx", "nginx-common"] in apt.calls
+    assert downloaded == ["nginx-common_1.26_amd64.deb", "nginx_1.26_amd64.deb"]
+    assert sorted(f for f in os.listdir(path) if f.endswith(".deb")) == sorted(apt.filename(p) for p in mirror)
+
+
+def test_unpack_verifies_digests_and_prunes(tmp_path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (source / "a.deb").write_text("a")
+    (source / "Packages").write_text("index")
+    (target / "old.deb").write_text("old")
+    files = package_stage.scan(str(source))
+    archive = package_stage.pack(str(source), ["a.deb", "Packages"], str(tmp_path / "sync.tar"))
+
+    assert package_stage.unpack(archive, str(target), files) == (["Packages", "a.deb"], ["old.deb"])
+    assert package_stage.recorded(str(target)) == files
+    assert package_stage.missing(package_stage.recorded(str(target)), files) == []
+
+    files["a.deb"]["sha256"] = "0" * 64
+    with pytest.raises(package_stage.StagingError, match="a.deb"):
+        package_stage.unpack(archive, str(target), files)
+    assert (target / "a.deb").read_text() == "a"
+
+
+def test_install_uses_only_the_staged_repository(tmp_path):
+    installed = {"libc6": "2.39", "telnet": "0.17"}
+    calls = []
+
+    def run(argv, cwd=None):
+        calls.append(argv)
+        if argv[0] == "dpkg-query":
+            return 0, "".join("%s %s ii\n" % item for item in sorted(installed.items())), ""
+        if argv[1] == "install":
+            installed.update((name, "1.0") for name in argv if name in ("htop", "nginx"))
+        if argv[1] == "remove":
+            installed.pop("telnet")
+        return 0, "", ""
+
+    packages = ["htop", {"name": "nginx"}, {"name": "libc6"}, {"name": "telnet", "state": "absent"}]
+    results = package_stage.install_staged(run, "apt", str(tmp_path), packages)
+
+    options = package_stage.apt_options(str(tmp_path))
+    assert calls[1:4] == [
+        ["apt-get", "update", "-q"] + options,
+        ["apt-get", "install", "-y", "-q"] + options + ["htop", "nginx"],
+        ["apt-get", "remove", "-y", "-q"] + options + ["telnet"],
+    ]
+    assert (tmp_path / ".staged.list").read_text() == "deb [trusted=yes] file:%s ./\n" % tmp_path
+    assert [(r["name"], r["action"]) for r in results] == [
+        ("htop", "installed"),
+        ("libc6", "unchanged"),
+        ("nginx", "installed"),
+        ("telnet", "removed"),
+    ]
+
+    calls[:] = []
+    assert not any(r["changed"] for r in package_stage.install_staged(run, "apt", str(tmp_path), packages))
+    assert len(calls) == 1
@@ -0,0 +1,146 @@
+"""
+Unit tests for declarative state assertions (plugins/module_utils/verify_state.py).
+"""
+
+import os
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import verify_state
+
+
+class FakeHost:
+    """run_command and get_bin_path for a host with systemd and dpkg."""
+
+    def __init__(self, services=None, packages=None, binaries=("systemctl", "dpkg-query", "sysctl")):
+        self.services = services or {}  # unit -> (active, enabled)
+        self.packages = packages or {}  # name -> dpkg status
+        self.binaries = binaries
+        self.calls = []
+
+    def run(self, argv):
+        self.calls.append(argv)
+        name = os.path.basename(argv[0])
+        if name == "systemctl":
+            active, enabled = self.services.get(argv[2], (False, False))
+            if argv[1] == "is-active":
+                return (0, "active\n", "") if active else (3, "inactive\n", "")
+            return (0, "enabled\n", "") if enabled else (1, "disabled\n", "")
+        if name == "dpkg-query":
+            if argv[-1] not in self.packages:
+                return 1, "", "dpkg-query: no packages found matching %s\n" % argv[-1]
+            return 0, self.packages[argv[-1]], ""
+        if name == "sysctl":
+            return 255, "", "sysctl: cannot stat /proc/sys/%s\n" % argv[-1]
+        if name == "echo":
+            return 0, " ".join(argv[1:]) + "\n", ""
+        raise AssertionError(argv)
+
+    def get_bin_path(self, name):
+        return "/usr/bin/" + name if name in self.binaries else None
+
+
+@pytest.fixture
+def host():
+    return FakeHost(
+        services={"ssh": (True, True), "fail2ban": (True, False)},
+        packages={"git": "install ok installed 1:2.43.0-1", "telnet": "deinstall ok config-files 0.17"},
+    )
+
+
+def run(host, assertions, parallelism=4):
+    results = verify_state.evaluate_all(verify_state.Context(host.run, host.get_bin_path), assertions, parallelism)
+    return dict((r["name"], (r["passed"], r["msg"])) for r in results)
+
+
+def test_file_assertions(host, tmp_path):
+    config = tmp_path / "sshd_config"
+    config.write_text("Port 22\nPermitRootLogin no\n")
+    os.chmod(config, 0o600)
+
+    assert run(
+        host,
+        [
+            {"name": "exists", "file": str(config)},
+            {"name": "mode", "file": str(config), "state": "file", "mode": "0600", "contains": "^PermitRootLogin no$"},
+            {"name": "wrong mode", "file": str(config), "mode": 420},
+            {"name": "not a dir", "file": str(config), "state": "directory"},
+            {"name": "content", "file": str(config), "contains": ["^Port 22$", "^UsePAM"], "absent_content": "Port"},
+            {"name": "absent", "file": str(tmp_path / "missing"), "state": "absent"},
+            {"name": "missing", "file": str(tmp_path / "missing"), "fail_msg": "config not deployed"},
+        ],
+    ) == {
+        "exists": (True, ""),
+        "mode": (True, ""),
+        "wrong mode": (False, "%s mode is 0600, expected 0644" % config),
+        "not a dir": (False, "%s is a file, expected a directory" % config),
+        "content": (False, "%s does not match '^UsePAM'; %s unexpectedly matches 'Port'" % (config, config)),
+        "absent": (True, ""),
+        "missing": (False, "config not deployed"),
+    }
+
+
+def test_service_package_and_sysctl_assertions(host):
+    results = run(
+        host,
+        [
+            {"service": "ssh", "active": True, "enabled": True},
+            {"service": "fail2ban", "enabled": True},
+            {"service": "telnetd", "active": False},
+            {"package": "git"},
+            {"package": "telnet", "installed": False},
+            {"package": "nginx"},
+            {"sysctl": "no.such.key", "value": 1},
+        ],
+    )
+
+    assert results == {
+        "service ssh": (True, ""),
+        "service fail2ban": (False, "fail2ban is disabled, expected enabled"),
+        "service telnetd": (True, ""),
+        "package git": (True, ""),
+        "package telnet": (True, ""),
+        "package nginx": (False, "nginx is not installed"),
+        "sysctl no.such.key": (False, "sysctl no.such.key: sysctl: cannot stat /proc/sys/no.such.key"),
+    }
+
+
+def test_command_assertions_and_skips(host):
+    results = run(
+        host,
+        [
+            {"command": "echo hello world", "stdout": "^hello", "stdout_absent": "error"},
+            {"command": ["echo", "x"], "rc": 1},
+            {"name": "skipped", "command": "false", "when": False},
+        ],
+        parallelism=1,
+    )
+
+    assert results == {
+        "command echo hello world": (True, ""),
+        "command echo x": (False, "exit code 0, expected 1"),
+        "skipped": (True, "skipped"),
+    }
+    assert ["false"] not in host.calls
+
+
+def test_malformed_assertions_fail_without_stopping_others(host):
+    results = verify_state.evaluate_all(
+        verify_state.Context(host.run, host.get_bin_path),
+        [{"file": "/etc/hosts", "service": "ssh"}, {"service": "ssh", "running": True}, {"service": "ssh"}],
+    )
+
+    assert [r["passed"] for r in results] == [False, False, True]
+    assert "exactly one of" in results[0]["msg"]
+    assert results[1]["msg"] == "unsupported keys for a service assertion: running"
+    assert all("duration" in r for r in results)
+
+
+def test_package_manager_is_detected_once():
+    host = FakeHost(binaries=("dpkg-query",), packages={"git": "install ok installed 1:2.43.0-1"})
+
+    run(host, [{"package": "git"}, {"package": "git"}], parallelism=1)
+
+    assert host.calls == [["/usr/bin/dpkg-query", "-W", "-f=${Status} ${Version}", "git"]] * 2
+    with pytest.raises(verify_state.InvalidAssertion):
+        verify_state.Context(host.run, lambda name: None).package_query()
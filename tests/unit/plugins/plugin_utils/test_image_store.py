@@ -0,0 +1,70 @@
+"""
+Unit tests for the controller image store (plugins/plugin_utils/image_store.py).
+"""
+
+import gzip
+import os
+import stat
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils import image_store
+
+
+@pytest.fixture
+def docker(tmp_path):
+    """A docker CLI that knows two names for one image and one other image."""
+    script = tmp_path / "docker"
+    log = tmp_path / "calls"
+    script.write_text(
+        "#!/bin/sh\n"
+        'echo "$@" >> %s\n'
+        'case "$1 $2 $5" in\n'
+        '  "image inspect nginx:alpine"|"image inspect mirror/nginx:alpine") echo sha256:aaa;;\n'
+        '  "image inspect redis:latest") echo sha256:bbb;;\n'
+        '  "image inspect "*) echo "No such image" >&2; exit 1;;\n'
+        '  save*) echo "tarball of $2";;\n'
+        "esac\n" % log
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script), log
+
+
+def test_normalize_adds_latest_tag():
+    assert image_store.normalize("redis") == "redis:latest"
+    assert image_store.normalize("registry:5000/team/app") == "registry:5000/team/app:latest"
+    assert image_store.normalize("nginx:alpine") == "nginx:alpine"
+    assert image_store.normalize("nginx@sha256:abc") == "nginx@sha256:abc"
+
+
+def test_images_are_saved_once_per_id(tmp_path, docker):
+    path, log = docker
+    store = image_store.ImageStore(str(tmp_path / "store"), docker=path)
+
+    image_id, blob, saved = store.ensure("nginx:alpine")
+    assert (image_id, saved) == ("sha256:aaa", True)
+    assert blob == str(tmp_path / "store" / "sha256" / "aaa.tar.gz")
+    with gzip.open(blob, "rt") as f:
+        assert f.read() == "tarball of nginx:alpine\n"
+
+    assert store.ensure("mirror/nginx:alpine") == ("sha256:aaa", blob, False)
+    assert store.ensure("redis")[2] is True
+    assert log.read_text().count("save") == 2
+    assert store.refs() == {
+        "mirror/nginx:alpine": "sha256:aaa",
+        "nginx:alpine": "sha256:aaa",
+        "redis:latest": "sha256:bbb",
+    }
+
+
+def test_store_works_without_controller_docker(tmp_path, docker):
+    path, log = docker
+    image_store.ImageStore(str(tmp_path / "store"), docker=path).ensure("nginx:alpine")
+
+    offline = image_store.ImageStore(str(tmp_path / "store"), docker=str(tmp_path / "missing-docker"))
+    image_id, blob, saved = offline.ensure("nginx:alpine")
+    assert (image_id, saved) == ("sha256:aaa", False)
+    assert os.path.exists(blob)
+
+    with pytest.raises(image_store.ImageStoreError, match="pull or load it on the controller"):
+        offline.ensure("postgres:15")
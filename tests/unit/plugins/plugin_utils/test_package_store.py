@@ -0,0 +1,33 @@
+"""
+Unit tests for the controller package store (plugins/plugin_utils/package_store.py).
+"""
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.module_utils import package_stage
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils import package_store
+
+
+def test_store_takes_only_changed_files(tmp_path):
+    build = tmp_path / "build"
+    build.mkdir()
+    (build / "htop_3.3_amd64.deb").write_text("htop")
+    (build / "Packages").write_text("v1")
+    store = package_store.PackageStore(str(tmp_path / "store"))
+
+    files = package_stage.scan(str(build))
+    assert store.missing("ubuntu-noble-x86_64", files) == ["Packages", "htop_3.3_amd64.deb"]
+    archive = package_stage.pack(str(build), sorted(files), str(tmp_path / "pull.tar"))
+    assert store.update("ubuntu-noble-x86_64", archive, files) == (["Packages", "htop_3.3_amd64.deb"], [])
+
+    (build / "Packages").write_text("v2")
+    files = package_stage.scan(str(build))
+    assert store.missing("ubuntu-noble-x86_64", files) == ["Packages"]
+    assert store.files("ubuntu-noble-x86_64")["htop_3.3_amd64.deb"] == files["htop_3.3_amd64.deb"]
+
+
+def test_group_names_cannot_escape_the_store(tmp_path):
+    store = package_store.PackageStore(str(tmp_path))
+    for group in ("../etc", "", ".hidden"):
+        with pytest.raises(package_store.PackageStoreError):
+            store.group_path(group)
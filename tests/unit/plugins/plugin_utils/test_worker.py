@@ -0,0 +1,158 @@
+"""
+Unit tests for the persistent module workers (plugins/plugin_utils/worker.py).
+"""
+
+import base64
+import io
+import os
+import shlex
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ansible_collections.wolskies.infrastructure.plugins.plugin_utils import worker, worker_remote
+
+PAYLOAD = b"""#!python
+_ANSIBALLZ_WRAPPER = True
+import os
+import sys
+print(os.environ.get("WORKER_TEST"), getattr(sys, "worker_test_state", None))
+sys.worker_test_state = "leaked"
+sys.stderr.write("warning\\n")
+sys.exit(3)
+"""
+
+
+def test_worker_command_keeps_the_shell_quoting():
+    assert worker.worker_command("/bin/sh -c /usr/bin/python3", "/usr/bin/python3") == (
+        "/bin/sh -c '/usr/bin/python3 -q -i'"
+    )
+    become = "/bin/sh -c 'sudo -H -S -n -u root /bin/sh -c '\"'\"'echo BECOME-SUCCESS-abc ; /usr/bin/python3'\"'\"''"
+    assert worker.worker_command(become, "/usr/bin/python3") == become.replace("python3'", "python3 -q -i'")
+    assert worker.worker_command("/bin/sh -c /usr/bin/python3.12", "/usr/libexec/platform-python") is None
+
+
+def test_only_ansiballz_payloads_reach_the_worker():
+    assert worker.pipelined_interpreter(PAYLOAD) == "python"
+    assert worker.pipelined_interpreter(b"#!/bin/sh\necho hi\n") is None
+    assert worker.pipelined_interpreter(None) is None
+    # The become success marker changes per task, the worker must not
+    assert worker.worker_key(["sh", "-c", "echo BECOME-SUCCESS-abc; python"]) == worker.worker_key(
+        ["sh", "-c", "echo BECOME-SUCCESS-xyz; python"]
+    )
+
+
+def test_worker_runs_payloads_in_isolated_children_and_persists(tmp_path):
+    command = "WORKER_TEST=set " + worker.worker_command(shlex.quote(sys.executable), sys.executable)
+    argv = ["/bin/sh", "-c", "echo BECOME-SUCCESS-abc; " + command]
+    directory = str(tmp_path / "workers")
+
+    assert worker.run(worker.connect(directory, argv, 5), PAYLOAD) == (3, b"set None\n", b"warning\n")
+    sockets = os.listdir(directory)
+    assert worker.run(worker.connect(directory, argv, 5), PAYLOAD) == (3, b"set None\n", b"warning\n")
+    assert os.listdir(directory) == sockets
+
+    failing = ["/bin/sh", "-c", "echo no python here >&2; exit 1"]
+    with pytest.raises(worker.WorkerError, match="no python here"):
+        worker.connect(directory, failing, 5)
+    with pytest.raises(worker.WorkerError, match="failed to start"):
+        worker.connect(directory, failing, 5)
+
+
+def module_utils_payload(value):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("ansible_collections/__init__.py", "")
+        archive.writestr("ansible_collections/demo/tools/plugins/module_utils/wtest.py", "VALUE = %r\n" % value)
+    return b"""#!python
+_ANSIBALLZ_WRAPPER = True
+from ansible_collections.demo.tools.plugins.module_utils import wtest
+print(wtest.VALUE)
+# zip_data='%s'
+""" % base64.b64encode(data.getvalue())
+
+
+def test_changed_module_utils_restart_the_worker(tmp_path):
+    argv = ["/bin/sh", "-c", worker.worker_command(shlex.quote(sys.executable), sys.executable)]
+    directory = str(tmp_path / "workers")
+
+    for value in ("old", "old", "new", "new"):
+        rc, stdout, stderr = worker.run(worker.connect(directory, argv, 5), module_utils_payload(value))
+        assert (rc, stdout) == (0, b"%s\n" % value.encode()), stderr
+
+
+def sleeper(seconds, pidfile="/dev/null"):
+    return b"""#!python
+_ANSIBALLZ_WRAPPER = True
+import subprocess
+process = subprocess.Popen(["sleep", "%d"])
+with open(%r, "w") as f:
+    f.write(str(process.pid))
+process.wait()
+print("slept")
+""" % (seconds, pidfile)
+
+
+def running(pid):
+    """Whether pid is alive; killed children of an exited parent may stay zombies in containers."""
+    try:
+        with open("/proc/%d/stat" % pid) as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+def test_tasks_sharing_a_worker_run_concurrently(tmp_path):
+    argv = ["/bin/sh", "-c", worker.worker_command(shlex.quote(sys.executable), sys.executable)]
+    directory = str(tmp_path / "workers")
+    worker.run(worker.connect(directory, argv, 5), sleeper(0))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: worker.run(worker.connect(directory, argv, 5), sleeper(1)), range(4)))
+    assert [result[:2] for result in results] == [(0, b"slept\n")] * 4
+    assert time.monotonic() - started < 3
+
+
+def test_abandoned_tasks_are_cancelled(tmp_path):
+    argv = ["/bin/sh", "-c", worker.worker_command(shlex.quote(sys.executable), sys.executable)]
+    directory = str(tmp_path / "workers")
+    pidfile = tmp_path / "sleep.pid"
+
+    # A task killed by its timeout closes its connection without reading the result
+    client = worker.connect(directory, argv, 5)
+    worker_remote.write_frame(client.fileno(), sleeper(60, str(pidfile)))
+    deadline = time.monotonic() + 10
+    while not pidfile.exists() or not pidfile.read_text():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    pid = int(pidfile.read_text())
+    client.close()
+
+    started = time.monotonic()
+    assert worker.run(worker.connect(directory, argv, 5), PAYLOAD)[0] == 3
+    assert time.monotonic() - started < 5
+    while running(pid):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_module_utils_are_extracted_once(tmp_path):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("ansible/__init__.py", "")
+        archive.writestr("ansible/module_utils/__init__.py", "")
+        archive.writestr("ansible/module_utils/basic.py", "X = 1\n")
+        archive.writestr("ansible/modules/ping.py", "")
+    payload = b"_ansiballz_main(zip_data='%s')" % base64.b64encode(data.getvalue())
+    crcs = {}
+
+    names = worker_remote.unpack_payload(payload, str(tmp_path), crcs)
+    assert names == ["ansible.module_utils", "ansible.module_utils.basic"]
+    assert (tmp_path / "ansible" / "modules" / "ping.py").exists()
+    (tmp_path / "ansible" / "module_utils" / "basic.py").write_text("changed")
+    worker_remote.unpack_payload(payload, str(tmp_path), crcs)
+    assert (tmp_path / "ansible" / "module_utils" / "basic.py").read_text() == "changed"
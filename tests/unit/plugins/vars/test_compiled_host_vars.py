@@ -0,0 +1,115 @@
+"""
+Unit tests for the compiled_host_vars vars plugin (plugins/vars/compiled_host_vars.py).
+"""
+
+import os
+
+import pytest
+from ansible.parsing.dataloader import DataLoader
+from ansible.template import is_trusted_as_template
+
+from ansible_collections.wolskies.infrastructure.plugins.vars import compiled_host_vars
+
+HOST_VARS = """\
+packages:
+  present:
+    host:
+      Ubuntu:
+        - name: git
+        - name: vim
+greeting: "{{ base }}-x"
+literal: !unsafe "{{ not_a_template }}"
+port: 22
+"""
+
+
+@pytest.fixture
+def plugin(monkeypatch):
+    for cache in (compiled_host_vars.FOUND, compiled_host_vars.NAK, compiled_host_vars.LOADED):
+        cache.clear()
+    compiled_host_vars.CANONICAL_PATHS.clear()
+    module = compiled_host_vars.VarsModule()
+    module._load_name = "wolskies.infrastructure.compiled_host_vars"
+    monkeypatch.setattr(module, "get_option", lambda name: None)
+    return module
+
+
+@pytest.fixture
+def host_vars(tmp_path):
+    path = tmp_path / "host_vars" / "web01"
+    path.mkdir(parents=True)
+    (path / "vars.yml").write_text(HOST_VARS)
+    return path / "vars.yml"
+
+
+def load(plugin, path):
+    compiled_host_vars.LOADED.clear()
+    return plugin.load_file(DataLoader(), str(path))
+
+
+def test_compiled_sidecar_round_trip(plugin, host_vars):
+    parsed = load(plugin, host_vars)
+    sidecar = host_vars.parent / ".vars.yml.compiled"
+    assert sidecar.exists()
+
+    cached = load(plugin, host_vars)
+    assert cached == parsed
+    assert cached["packages"]["present"]["host"]["Ubuntu"] == [{"name": "git"}, {"name": "vim"}]
+    assert cached["port"] == 22
+
+
+def test_template_trust_survives_cache(plugin, host_vars):
+    load(plugin, host_vars)
+    cached = load(plugin, host_vars)
+    assert is_trusted_as_template(cached["greeting"])
+    assert not is_trusted_as_template(cached["literal"])
+
+
+def test_loaded_data_is_not_shared_between_callers(plugin, host_vars):
+    load(plugin, host_vars)
+    first = load(plugin, host_vars)
+    first["packages"]["present"]["host"]["Ubuntu"].append({"name": "mutated"})
+    second = plugin.load_file(DataLoader(), str(host_vars))
+    assert second["packages"]["present"]["host"]["Ubuntu"] == [{"name": "git"}, {"name": "vim"}]
+    assert is_trusted_as_template(second["greeting"])
+
+
+def test_changed_file_falls_back_to_yaml(plugin, host_vars):
+    load(plugin, host_vars)
+    host_vars.write_text(HOST_VARS.replace("port: 22", "port: 2222"))
+    stat = os.stat(host_vars)
+    os.utime(host_vars, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    assert load(plugin, host_vars)["port"] == 2222
+    assert load(plugin, host_vars)["port"] == 2222
+
+
+def test_vaulted_files_are_not_cached(plugin, tmp_path):
+    path = tmp_path / "vars.yml"
+    path.write_text("secret: value\n# $ANSIBLE_VAULT marker\n")
+    load(plugin, path)
+    assert not (tmp_path / ".vars.yml.compiled").exists()
+
+
+def test_non_plain_values_are_not_compilable():
+    import datetime
+
+    with pytest.raises(compiled_host_vars.NotCompilable):
+        compiled_host_vars.compile_vars({"when": datetime.date(2024, 1, 1)})
+
+
+def test_cache_dir_option(plugin, host_vars, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(plugin, "get_option", lambda name: str(cache_dir) if name == "cache_dir" else None)
+    load(plugin, host_vars)
+    assert not (host_vars.parent / ".vars.yml.compiled").exists()
+    assert len(list(cache_dir.glob("*.compiled"))) == 1
+
+
+def test_get_vars_for_host(plugin, host_vars):
+    from ansible.inventory.host import Host
+
+    inventory = host_vars.parent.parent.parent / "hosts.yml"
+    inventory.write_text("all:\n  hosts:\n    web01:\n")
+    data = plugin.get_vars(DataLoader(), str(inventory), [Host("web01")])
+    assert data["port"] == 22
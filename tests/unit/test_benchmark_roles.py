@@ -0,0 +1,56 @@
+"""
+Unit tests for the role benchmark harness (scripts/benchmark_roles.py).
+"""
+
+import pytest
+
+import benchmark_roles
+
+BASELINE = {
+    "cold": {"seconds": 60.0, "tasks": 100, "module_invocations": 80, "payload_bytes": 50000, "changed": 30},
+    "idempotent": {"seconds": 20.0, "tasks": 100, "module_invocations": 80, "payload_bytes": 40000, "changed": 0},
+}
+
+
+def metrics(**changes):
+    current = dict((run, dict(values)) for run, values in BASELINE.items())
+    for key, value in changes.items():
+        run, metric = key.split("__")
+        current[run][metric] = value
+    return current
+
+
+def test_unchanged_and_small_changes_pass():
+    assert benchmark_roles.regressions("r", metrics(), BASELINE) == []
+    assert benchmark_roles.regressions("r", metrics(cold__seconds=70.0, idempotent__tasks=105), BASELINE) == []
+    # Under the noise floor even though +25% is exceeded
+    assert benchmark_roles.regressions("r", dict(idempotent={"seconds": 1.5}), dict(idempotent={"seconds": 1.0})) == []
+
+
+def test_regressions_are_reported():
+    found = benchmark_roles.regressions(
+        "configure_software",
+        metrics(idempotent__seconds=30.0, idempotent__module_invocations=120, idempotent__changed=2),
+        BASELINE,
+    )
+
+    assert found == [
+        "configure_software idempotent seconds: 20.0 -> 30.0 (+50%, allowed 25%)",
+        "configure_software idempotent module_invocations: 80 -> 120 (+50%, allowed 10%)",
+        "configure_software idempotent changed: 0 -> 2 (was 0, allowed 0%)",
+    ]
+
+
+def test_targets_and_callback_environment(monkeypatch, tmp_path):
+    assert benchmark_roles.resolve_target("configure_software") == (
+        benchmark_roles.ROLES_DIR / "configure_software",
+        "default",
+    )
+    assert benchmark_roles.resolve_target("minimal") == (benchmark_roles.COLLECTION_ROOT, "minimal")
+    with pytest.raises(ValueError):
+        benchmark_roles.resolve_target("no_such_role")
+
+    monkeypatch.setenv("ANSIBLE_CALLBACKS_ENABLED", "ansible.posix.profile_tasks")
+    env = benchmark_roles.callback_environment(tmp_path / "m.json")
+    assert env["ANSIBLE_CALLBACKS_ENABLED"] == "ansible.posix.profile_tasks,wolskies.infrastructure.perf_metrics"
+    assert env["PERF_METRICS_FILE"] == str(tmp_path / "m.json")
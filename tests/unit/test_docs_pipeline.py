@@ -0,0 +1,57 @@
+"""
+Unit tests for the incremental documentation pipeline (scripts/docs_pipeline.py).
+"""
+
+import docs_pipeline
+
+
+def build(tmp_path, roles=("install_go", "install_rust"), **kwargs):
+    return docs_pipeline.run_pipeline(
+        list(roles),
+        collection=False,
+        jobs=1,
+        cache_file=tmp_path / "cache.pickle",
+        output_dir=tmp_path / "generated",
+        **kwargs,
+    )
+
+
+def test_unchanged_inputs_are_neither_parsed_nor_written(tmp_path):
+    first = build(tmp_path)
+    page = tmp_path / "generated" / "role_install_go.rst"
+    mtime = page.stat().st_mtime_ns
+
+    second = build(tmp_path)
+
+    assert len(first["written"]) == 2 and first["cache_hits"] == 0
+    assert second["written"] == [] and len(second["unchanged"]) == 2
+    assert second["cache_misses"] == 0 and second["cache_hits"] == first["cache_misses"]
+    assert page.stat().st_mtime_ns == mtime
+    assert page.read_text().startswith("Install Go Role\n")
+
+
+def test_output_matches_direct_rendering(tmp_path):
+    build(tmp_path, roles=["install_go"])
+
+    expected = docs_pipeline.generate_enhanced_docs.generate_role_documentation(
+        "install_go", docs_pipeline.ROLES_DIR / "install_go"
+    )
+    assert (tmp_path / "generated" / "role_install_go.rst").read_text() == expected
+
+
+def test_partial_runs_keep_the_cache(tmp_path):
+    build(tmp_path)
+    build(tmp_path, roles=["install_go"], prune=False)
+
+    assert build(tmp_path)["cache_misses"] == 0
+
+
+def test_changed_page_is_rewritten(tmp_path):
+    build(tmp_path, roles=["install_go"])
+    page = tmp_path / "generated" / "role_install_go.rst"
+    page.write_text("stale\n")
+
+    result = build(tmp_path, roles=["install_go"])
+
+    assert result["written"] == [page]
+    assert page.read_text() != "stale\n"
@@ -0,0 +1,45 @@
+"""
+Unit tests for the synthetic fleet generator (scripts/generate_fleet.py).
+"""
+
+import yaml
+
+import generate_fleet
+
+
+def load(path):
+    return yaml.safe_load(path.read_text())
+
+
+def test_fleet_layout(tmp_path):
+    summary = generate_fleet.generate_fleet(tmp_path / "fleet", hosts=4, packages=8, users=3, rules=5, jobs=1)
+    fleet = tmp_path / "fleet"
+
+    assert summary["hosts"] == 4 and summary["host_vars_bytes"] > 0
+    groups = load(fleet / "hosts.yml")["all"]["children"]
+    assert dict((group, list(members["hosts"])) for group, members in groups.items()) == {
+        "ubuntu": ["ubuntu-00000", "ubuntu-00003"],
+        "debian": ["debian-00001"],
+        "archlinux": ["archlinux-00002"],
+    }
+    assert len(load(fleet / "group_vars" / "all.yml")["manage_packages_all"]["Ubuntu"]) == 4
+    debian = load(fleet / "group_vars" / "debian.yml")
+    assert debian["ansible_os_family"] == "Debian"
+    assert len(debian["manage_packages_group"]["Debian"]) == 2
+    assert "apt_repositories_group" not in load(fleet / "group_vars" / "archlinux.yml")
+
+    discovered = load(fleet / "host_vars" / "debian-00001" / "discovered.yml")
+    assert discovered["discovery_platform"]["distribution"] == "Debian"
+    assert [user["name"] for user in discovered["users"]] == ["user000", "user001", "user002"]
+    assert len(discovered["firewall"]["rules"]) == 5
+    assert len(discovered["packages"]["present"]["host"]["Debian"]) == 8
+    desired = load(fleet / "host_vars" / "debian-00001" / "main.yml")
+    assert desired["manage_packages_host"] == {"Debian": [{"name": "host00001-00000"}, {"name": "host00001-00001"}]}
+
+
+def test_fleet_is_deterministic(tmp_path):
+    generate_fleet.generate_fleet(tmp_path / "a", hosts=3, packages=4, users=2, rules=6, seed=7, jobs=1)
+    generate_fleet.generate_fleet(tmp_path / "b", hosts=3, packages=4, users=2, rules=6, seed=7, jobs=2)
+
+    for path in sorted((tmp_path / "a").rglob("*.yml")):
+        assert path.read_text() == (tmp_path / "b" / path.relative_to(tmp_path / "a")).read_text()
@@ -0,0 +1,171 @@
+"""
+Unit tests for the task performance linter (scripts/lint_performance.py).
+"""
+
+import json
+
+import lint_performance
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def rules(findings):
+    return [(f["rule"], f["line"]) for f in findings]
+
+
+def test_package_loop_and_update_cache(tmp_path):
+    tasks = write(
+        tmp_path / "tasks" / "main.yml",
+        """---
+- name: Refresh
+  ansible.builtin.apt:
+    update_cache: true
+
+- name: Refresh if stale
+  ansible.builtin.apt:
+    update_cache: true
+    cache_valid_time: 3600
+
+- name: Install one by one
+  ansible.builtin.apt:
+    name: "{{ pkg.name }}"
+  loop: "{{ _final_packages[ansible_distribution] | default([]) }}"
+  loop_control:
+    loop_var: pkg
+
+- name: Install as a batch
+  block:
+    - name: Install all
+      ansible.builtin.apt:
+        name: "{{ _final_packages | map(attribute='name') | list }}"
+
+- name: Per-item state of another module
+  ansible.builtin.file:
+    path: "/tmp/{{ item }}"
+    state: absent
+  loop: [a, b, c]
+""",
+    )
+
+    findings = lint_performance.lint_file(tasks)
+    assert rules(findings) == [("update-cache", 2), ("package-loop", 11)]
+    assert findings[1]["calls"] == 200 and findings[1]["task"] == "Install one by one"
+    assert lint_performance.lint_file(tasks, {"_final_packages": 7})[1]["calls"] == 7
+
+
+def test_include_and_set_fact_loops(tmp_path):
+    write(
+        tmp_path / "tasks" / "per-user.yml",
+        """---
+- name: Create user
+  ansible.builtin.user:
+    name: "{{ target_user.name }}"
+- name: Authorized keys
+  ansible.posix.authorized_key:
+    user: "{{ target_user.name }}"
+    key: "{{ key }}"
+  loop: [one, two]
+  loop_control:
+    loop_var: key
+- name: Remember
+  ansible.builtin.set_fact:
+    seen: true
+""",
+    )
+    main = write(
+        tmp_path / "tasks" / "main.yml",
+        """---
+- name: Per user
+  ansible.builtin.include_tasks: per-user.yml
+  loop: "{{ users | default([]) }}"
+  loop_control:
+    loop_var: target_user
+
+- name: Accumulate names
+  ansible.builtin.set_fact:
+    names: "{{ names | default([]) + [item.key] }}"
+  loop: "{{ ansible_facts.getent_passwd | dict2items }}"
+
+- name: Not accumulating
+  ansible.builtin.set_fact:
+    last: "{{ item }}"
+  loop: "{{ users }}"
+""",
+    )
+
+    findings = lint_performance.lint_file(main)
+    assert rules(findings) == [("include-loop", 2), ("set-fact-accumulate", 8)]
+    include, accumulate = findings
+    # 5 users, each running the user task once and the key task twice
+    assert (include["items"], include["calls"]) == (5, 15)
+    assert (accumulate["items"], accumulate["calls"]) == (40, 0)
+
+
+def test_command_guards(tmp_path):
+    tasks = write(
+        tmp_path / "tasks" / "main.yml",
+        """---
+- name: Probe
+  ansible.builtin.command: rustup show
+  register: rustup_show
+  changed_when: false
+
+- name: Install crate
+  ansible.builtin.command: cargo install {{ crate }}
+  loop: "{{ rust_packages }}"
+  loop_control:
+    loop_var: crate
+
+- name: Guarded by creates
+  ansible.builtin.command:
+    cmd: make install
+    creates: /usr/local/bin/tool
+
+- name: Guarded by a probe
+  ansible.builtin.shell: rustup default stable
+  when: "'stable' not in rustup_show.stdout"
+""",
+    )
+    handlers = write(
+        tmp_path / "handlers" / "main.yml",
+        """---
+- name: Reload udev
+  ansible.builtin.command: udevadm control --reload-rules
+""",
+    )
+
+    findings = lint_performance.lint_file(tasks)
+    assert rules(findings) == [("unguarded-command", 7)]
+    assert findings[0]["calls"] == 10
+    assert lint_performance.lint_file(handlers) == []
+
+
+def test_baseline_and_cli(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    assert lint_performance.main(["--baseline", str(baseline), "--update"]) == 0
+    assert json.loads(baseline.read_text())["findings"]
+    capsys.readouterr()
+
+    assert lint_performance.main(["--baseline", str(baseline)]) == 0
+    assert "No new performance findings" in capsys.readouterr().out
+
+    assert lint_performance.main(["--baseline", str(tmp_path / "none.json"), "--format", "json"]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert report["new"] == len(report["findings"]) == len(json.loads(baseline.read_text())["findings"])
+    assert report["findings"][0]["file"].startswith("roles/")
+
+
+def test_collection_findings_are_ranked():
+    findings = lint_performance.rank(
+        [item for path in lint_performance.task_files([]) for item in lint_performance.lint_file(path)]
+    )
+    top = [(f["rule"], f["file"]) for f in findings[:2]]
+    assert ("package-loop", "roles/configure_software/tasks/manage-packages-Debian.yml") in top
+    assert [f["calls"] for f in findings] == sorted((f["calls"] for f in findings), reverse=True)
+    assert lint_performance.task_files(["README.md", "roles/install_go/tasks/main.yml"]) == [
+        lint_performance.COLLECTION_ROOT / "roles" / "install_go" / "tasks" / "main.yml"
+    ]
@@ -0,0 +1,59 @@
+"""
+Unit tests for the markdown to RST converter (scripts/generate_collection_docs.py).
+"""
+
+import pytest
+
+from generate_collection_docs import markdown_to_rst
+
+
+@pytest.mark.parametrize(
+    "markdown, rst",
+    [
+        ("## 1. Overview", "1. Overview\n==========="),
+        ("#### 3.1.1 Hostname", "3.1.1 Hostname\n~~~~~~~~~~~~~~"),
+        ("Use `apt` or `pacman`", "Use ``apt`` or ``pacman``"),
+        ("A `span that\ncontinues` here", "A ``span that\ncontinues`` here"),
+        ("one\n\n\n\ntwo", "one\n\ntwo"),
+    ],
+)
+def test_inline_and_headers(markdown, rst):
+    assert markdown_to_rst(markdown) == rst
+
+
+def test_code_blocks_are_left_verbatim():
+    markdown = "Example:\n\n```yaml\n## not a header\nkey: `value`\n\n\n\nother: 1\n```\nAfter `x`"
+
+    assert markdown_to_rst(markdown) == (
+        "Example:\n\n.. code-block:: yaml\n\n## not a header\nkey: `value`\n\nother: 1\n\nAfter ``x``"
+    )
+
+
+def test_unclosed_fence_is_dropped():
+    assert markdown_to_rst("Text ```yaml\n\n\n## Next") == "Text \nNext\n===="
+
+
+def test_tables_become_list_tables():
+    markdown = "| OS | Status |\n|---|---|\n| Ubuntu | `tested` |\n\nAfter"
+
+    assert markdown_to_rst(markdown) == (
+        ".. list-table:: Platform Support Matrix\n"
+        "   :header-rows: 1\n"
+        "   :widths: auto\n"
+        "\n"
+        "   * - OS\n"
+        "     - Status\n"
+        "   * - Ubuntu\n"
+        "     - ``tested``\n"
+        "\n"
+        "After"
+    )
+
+
+def test_large_documents_convert_in_linear_time():
+    chunk = "## Section\n\nText `a` and `b\nc`\n\n```yaml\nkey: value\n```\n\n| A | B |\n|---|---|\n| 1 | 2 |\n\n"
+
+    rst = markdown_to_rst(chunk * 20000)
+
+    assert rst.count(".. code-block:: yaml") == 20000
+    assert rst.count(".. list-table::") == 20000
@@ -0,0 +1,134 @@
+"""
+Unit tests for the offline change planner (scripts/plan_changes.py).
+"""
+
+import yaml
+
+import plan_changes
+
+
+def discovered_ubuntu(**extra):
+    state = {
+        "discovery_platform": {"system": "Linux", "os_family": "Debian", "distribution": "Ubuntu"},
+        "packages": {"present": {"host": {"Ubuntu": [{"name": "git"}, {"name": "telnet"}]}}},
+        "host_services": {"enable": ["ssh.service", "cron.service"], "disable": ["bluetooth.service"], "mask": []},
+        "firewall": {"enabled": True, "rules": [{"rule": "allow", "port": "22", "protocol": "tcp"}]},
+        "users": [{"name": "deploy", "uid": 1000}],
+    }
+    state.update(extra)
+    return state
+
+
+def actions(result):
+    return {(c["area"], c["action"], c["item"]) for c in result["changes"]}
+
+
+def test_converged_host_is_unchanged():
+    desired = {
+        "manage_packages_all": {"Ubuntu": [{"name": "git"}]},
+        "host_services": {"enable": ["ssh", "cron"]},
+        "firewall": {"enabled": True, "rules": [{"rule": "allow", "port": 22, "proto": "tcp"}]},
+    }
+    result = plan_changes.plan_host("web01", desired, discovered_ubuntu())
+    assert result["status"] == "unchanged"
+    assert result["changes"] == []
+
+
+def test_package_levels_merge_and_absent_state():
+    desired = {
+        "manage_packages_all": {"Ubuntu": [{"name": "git"}], "Archlinux": [{"name": "base-devel"}]},
+        "manage_packages_group": {"Ubuntu": [{"name": "nginx"}]},
+        "manage_packages_host": {"Ubuntu": [{"name": "telnet", "state": "absent"}]},
+    }
+    result = plan_changes.plan_host("web01", desired, discovered_ubuntu())
+    assert actions(result) == {("packages", "install", "nginx"), ("packages", "remove", "telnet")}
+    assert result["status"] == "changed"
+
+
+def test_services_and_firewall_changes():
+    desired = {
+        "host_services": {"enable": ["nginx"], "disable": ["bluetooth", "cups"], "mask": ["ssh"]},
+        "firewall": {
+            "enabled": True,
+            "rules": [
+                {"rule": "allow", "port": 22, "protocol": "tcp"},
+                {"rule": "allow", "port": 443, "proto": "tcp", "comment": "https"},
+                {"rule": "deny", "port": 23},
+            ],
+        },
+    }
+    result = plan_changes.plan_host("web01", desired, discovered_ubuntu())
+    assert actions(result) == {
+        ("services", "enable", "nginx"),
+        ("services", "disable", "cups"),
+        ("services", "mask", "ssh"),
+        ("firewall", "add", "rule=allow port=443 proto=tcp"),
+    }
+    assert [u["area"] for u in result["unknown"]] == ["firewall"]
+
+
+def test_firewall_enable_when_inactive():
+    desired = {"firewall": {"enabled": True}}
+    result = plan_changes.plan_host("web01", desired, discovered_ubuntu(firewall={"enabled": False}))
+    assert actions(result) == {("firewall", "enable", "ufw")}
+
+
+def test_users_toolchains_unknown_without_discovery_data():
+    desired = {
+        "users": [
+            {"name": "deploy", "rust": {"packages": ["ripgrep"]}},
+            {"name": "ghost", "nodejs": {"packages": ["typescript"]}},
+        ]
+    }
+    result = plan_changes.plan_host("web01", desired, discovered_ubuntu())
+    assert result["status"] == "unknown"
+    assert {u["item"] for u in result["unknown"]} == {"deploy/rust", "ghost"}
+
+
+def test_users_toolchains_compared_when_discovered():
+    desired = {"users": [{"name": "deploy", "rust": {"packages": ["ripgrep", "bat"]}}]}
+    discovered = discovered_ubuntu(users=[{"name": "deploy", "rust": {"packages": ["ripgrep"]}}])
+    result = plan_changes.plan_host("web01", desired, discovered)
+    assert actions(result) == {("users", "rust-install", "deploy/bat")}
+
+
+def test_legacy_output_infers_distribution():
+    discovered = discovered_ubuntu()
+    del discovered["discovery_platform"]
+    desired = {"manage_packages_all": {"Ubuntu": [{"name": "vim"}]}}
+    result = plan_changes.plan_host("web01", desired, discovered)
+    assert result["distribution"] == "Ubuntu"
+    assert actions(result) == {("packages", "install", "vim")}
+
+
+def test_undiscovered_host_is_targeted():
+    result = plan_changes.plan_host("web01", {}, None)
+    plan = {"hosts": [result]}
+    assert result["status"] == "undiscovered"
+    assert plan_changes.hosts_to_run(plan) == ["web01"]
+
+
+def test_build_plan_from_inventory(tmp_path):
+    inventory = tmp_path / "inventory"
+    (inventory / "group_vars").mkdir(parents=True)
+    (inventory / "hosts.yml").write_text(
+        yaml.safe_dump({"all": {"children": {"web": {"hosts": {"web01": {}, "web02": {}, "web03": {}}}}}})
+    )
+    (inventory / "group_vars" / "web.yml").write_text(
+        "web_server: nginx\n"
+        "manage_packages_group:\n"
+        "  Ubuntu:\n"
+        "    - name: git\n"
+        '    - name: "{{ web_server }}"\n'
+    )
+    discovered = tmp_path / "discovered"
+    for host, packages in (("web01", ["git", "nginx"]), ("web02", ["git"])):
+        (discovered / host).mkdir(parents=True)
+        state = discovered_ubuntu(packages={"present": {"host": {"Ubuntu": [{"name": p} for p in packages]}}})
+        (discovered / host / "vars.yml").write_text(yaml.safe_dump(state))
+
+    plan = plan_changes.build_plan([str(inventory / "hosts.yml")], discovered)
+    statuses = {h["host"]: h["status"] for h in plan["hosts"]}
+    assert statuses == {"web01": "unchanged", "web02": "changed", "web03": "undiscovered"}
+    assert plan["summary"]["total"] == 3
+    assert plan_changes.hosts_to_run(plan) == ["web02", "web03"]
@@ -0,0 +1,123 @@
+"""
+Unit tests for the parallel molecule scenario runner (scripts/run_molecule.py).
+"""
+
+import json
+import threading
+import time
+from xml.etree import ElementTree
+
+import pytest
+
+import run_molecule
+
+
+@pytest.fixture(scope="module")
+def scenarios():
+    return run_molecule.discover_scenarios()
+
+
+class FakeMolecule:
+    """Runner that records which scenarios ran and how many overlapped."""
+
+    def __init__(self, failing=(), delay=0.05):
+        self.failing = failing
+        self.delay = delay
+        self.ran = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, scenario, command, log_dir):
+        with self.lock:
+            self.ran.append(scenario.name)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        status = "failed" if scenario.name in self.failing else "passed"
+        return {"status": status, "returncode": int(status == "failed"), "duration": self.delay, "log": ""}
+
+
+def test_role_closure_follows_includes_and_playbooks(scenarios):
+    assert run_molecule.role_closure(scenarios["configure_users"]) == [
+        "configure_users",
+        "install_go",
+        "install_neovim",
+        "install_nodejs",
+        "install_rust",
+        "install_terminfo",
+    ]
+    assert run_molecule.role_closure(scenarios["minimal"]) == ["configure_operating_system", "configure_software"]
+    configure_system = run_molecule.scenario_files(scenarios["configure_system"])
+    assert run_molecule.COLLECTION_ROOT / "playbooks" / "configure_system.yml" in configure_system
+
+
+def test_selection_and_lanes(scenarios):
+    selected = run_molecule.select(scenarios, [])
+    assert "vm_test" not in [scenario.name for scenario in selected]
+    assert [scenario.name for scenario in run_molecule.select(scenarios, ["vm_test"])] == ["vm_test"]
+    with pytest.raises(ValueError):
+        run_molecule.select(scenarios, ["no_such_scenario"])
+
+    # Both define an ubuntu-edge-cases container, so they must not run at the same time
+    shared = [lane for lane in run_molecule.lanes(selected) if len(lane) > 1]
+    assert [[scenario.name for scenario in lane] for lane in shared] == [
+        ["configure_operating_system", "configure_software"]
+    ]
+
+
+def test_unchanged_scenarios_are_skipped(scenarios, tmp_path):
+    selected = run_molecule.select(scenarios, ["install_go", "install_rust", "install_terminfo", "minimal"])
+    state = tmp_path / "state.json"
+
+    first = FakeMolecule(failing=("install_rust",))
+    results = run_molecule.run(selected, ["molecule"], jobs=4, state_file=state, log_dir=tmp_path, runner=first)
+    assert sorted(first.ran) == ["install_go", "install_rust", "install_terminfo", "minimal"]
+    assert first.peak > 1
+    assert [r["status"] for r in results] == ["passed", "failed", "passed", "passed"]
+
+    second = FakeMolecule()
+    results = run_molecule.run(selected, ["molecule"], jobs=4, state_file=state, log_dir=tmp_path, runner=second)
+    assert second.ran == ["install_rust"]
+    assert [r["status"] for r in results] == ["skipped", "passed", "skipped", "skipped"]
+
+    forced = FakeMolecule()
+    run_molecule.run(selected[:1], ["molecule"], force=True, state_file=state, log_dir=tmp_path, runner=forced)
+    assert forced.ran == ["install_go"]
+
+
+def test_hash_changes_with_dependency(scenarios, monkeypatch):
+    before = run_molecule.scenario_hash(scenarios["configure_users"])
+    unrelated = run_molecule.scenario_hash(scenarios["install_go"])
+    original = run_molecule.role_files
+
+    def role_files(role):
+        files = original(role)
+        return files[1:] if role == "install_rust" else files
+
+    monkeypatch.setattr(run_molecule, "role_files", role_files)
+    assert run_molecule.scenario_hash(scenarios["configure_users"]) != before
+    assert run_molecule.scenario_hash(scenarios["install_go"]) == unrelated
+
+
+def test_reports(tmp_path):
+    log = tmp_path / "failed.log"
+    log.write_text("TASK [x]\nfatal: boom\n")
+    results = [
+        {"scenario": "install_go", "status": "passed", "duration": 12.5},
+        {"scenario": "install_rust", "status": "failed", "duration": 3.0, "returncode": 2, "log": str(log)},
+        {"scenario": "minimal", "status": "skipped", "duration": 0.0},
+    ]
+
+    run_molecule.write_json(results, tmp_path / "r.json", 15.5)
+    run_molecule.write_junit(results, tmp_path / "r.xml", 15.5)
+
+    summary = json.loads((tmp_path / "r.json").read_text())
+    assert (summary["passed"], summary["failed"], summary["skipped"]) == (1, 1, 1)
+    suite = ElementTree.parse(tmp_path / "r.xml").getroot()
+    assert (suite.get("tests"), suite.get("failures"), suite.get("skipped")) == ("3", "1", "1")
+    cases = suite.findall("testcase")
+    assert [case.get("time") for case in cases] == ["12.50", "3.00", "0.00"]
+    assert "fatal: boom" in cases[1].find("failure").text
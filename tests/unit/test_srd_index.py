@@ -0,0 +1,126 @@
+"""
+Unit tests for the SRD indexer (scripts/srd_index.py).
+"""
+
+import json
+
+import srd_index
+
+SRD = """# Software Requirements
+
+## 1. Collection Overview
+
+Overview text.
+
+## 2. Collection-Wide Requirements
+
+```yaml
+# A comment, not a heading
+key: value
+```
+
+**REQ-INFRA-001**: Roles SHALL use fully qualified module names
+across every task file.
+
+**Implementation**: Lint rule.
+
+## 3. Role Requirements
+
+### 3.1 os_configuration
+
+#### 3.1.1 Hostname
+
+**REQ-OS-001**: The system SHALL be capable of setting the hostname
+**REQ-OS-001a**: The system SHALL be capable of updating /etc/hosts
+
+~~**REQ-OS-002**: The system SHALL configure something obsolete~~
+
+### 3.2 configure_users
+
+**REQ-CU-001**: The system SHALL create user accounts with ansible.builtin.user
+
+**REQ-CU-002**: _Deprecated: replaced by REQ-CU-001_
+
+## 4. Known Issues
+"""
+
+
+def test_sections_form_a_tree_and_ignore_fenced_headings():
+    index = srd_index.SrdIndex.from_text(SRD)
+
+    titles = [s["title"] for s in index.sections]
+    assert "A comment, not a heading" not in titles
+    overview = index.find_section("2. Collection-Wide", level=2)
+    text = index.section_text(overview)
+    assert text.startswith("## 2. Collection-Wide Requirements") and text.endswith("**Implementation**: Lint rule.")
+
+    hostname = index.find_section("3.1.1")
+    assert index.sections[hostname["parent"]]["name"] == "os_configuration"
+    assert hostname["number"] == "3.1.1" and hostname["level"] == 4
+
+
+def test_requirements_and_their_descriptions():
+    index = srd_index.SrdIndex.from_text(SRD)
+    requirements = index.requirements
+
+    assert list(requirements) == [
+        "REQ-INFRA-001",
+        "REQ-OS-001",
+        "REQ-OS-001a",
+        "REQ-OS-002",
+        "REQ-CU-001",
+        "REQ-CU-002",
+    ]
+    assert requirements["REQ-INFRA-001"]["text"] == (
+        "Roles SHALL use fully qualified module names across every task file."
+    )
+    assert requirements["REQ-OS-001"]["text"] == "The system SHALL be capable of setting the hostname"
+    assert [requirements[i]["status"] for i in ("REQ-OS-001", "REQ-OS-002", "REQ-CU-002")] == [
+        "active",
+        "removed",
+        "deprecated",
+    ]
+
+
+def test_role_lookups():
+    index = srd_index.SrdIndex.from_text(SRD)
+
+    assert [r["id"] for r in index.role_requirements("configure_users")] == ["REQ-CU-001", "REQ-CU-002"]
+    assert len(index.role_requirements("os_configuration")) == 3
+    assert index.role_requirements("install_go") == []
+    assert index.role_section_for(["REQ-OS-001", "REQ-OS-001a", "REQ-CU-001"])["name"] == "os_configuration"
+
+
+def test_reports(tmp_path):
+    index = srd_index.SrdIndex.from_text(SRD)
+    references = {
+        "configure_operating_system": {"REQ-OS-001": ["molecule/default/verify.yml"], "REQ-OS-099": ["tasks/main.yml"]},
+        "configure_users": {"REQ-CU-001": ["molecule/default/verify.yml"]},
+    }
+
+    report = {r["role"]: r for r in srd_index.coverage(index, references)}
+    result = srd_index.missing(index, references)
+
+    assert report["configure_operating_system"]["section"] == "3.1 os_configuration"
+    assert report["configure_operating_system"]["untested"] == ["REQ-OS-001a"]
+    assert report["configure_operating_system"]["undefined"] == ["REQ-OS-099"]
+    assert [r["id"] for r in result["untested"]] == ["REQ-INFRA-001", "REQ-OS-001a"]
+    assert result["undefined"] == [{"id": "REQ-OS-099", "roles": ["configure_operating_system"]}]
+
+
+def test_index_is_cached_by_content_hash(tmp_path):
+    srd = tmp_path / "SRD.md"
+    cache = tmp_path / "srd_index.json"
+    srd.write_text(SRD)
+
+    srd_index.load_index(srd, cache)
+    cached = json.loads(cache.read_text())
+    cached["index"]["requirements"]["REQ-CU-001"]["text"] = "from cache"
+    cache.write_text(json.dumps(cached))
+
+    assert srd_index.load_index(srd, cache).requirements["REQ-CU-001"]["text"] == "from cache"
+
+    srd.write_text(SRD + "\n**REQ-CU-003**: The system SHALL do one more thing\n")
+    index = srd_index.load_index(srd, cache)
+    assert index.requirements["REQ-CU-001"]["text"] != "from cache"
+    assert "REQ-CU-003" in index.requirements
@@ -0,0 +1,85 @@
+"""
+Unit tests for the Jinja2 template validator (scripts/validate_templates.py).
+"""
+
+import validate_templates
+
+
+def write(directory, name, content):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.write_text(content)
+    return str(path)
+
+
+def validate(tmp_path, templates, **kwargs):
+    return validate_templates.validate_templates(templates, jobs=1, cache_file=tmp_path / "cache.json", **kwargs)
+
+
+def test_real_ansible_plugins_are_available(tmp_path):
+    templates = [
+        write(
+            tmp_path / "a",
+            "ok.j2",
+            "{{ data | to_nice_yaml | indent(2) }}{% if x is ansible.builtin.version('1', '>') %}{% endif %}",
+        ),
+        write(
+            tmp_path / "a",
+            "fqcn.j2",
+            "{{ services | wolskies.infrastructure.service_waves | ansible.builtin.to_json }}",
+        ),
+        write(tmp_path / "b", "unknown.j2", "{{ data | no_such_filter }}"),
+        write(tmp_path / "b", "syntax.j2", "{% if x %}"),
+    ]
+
+    summary = validate(tmp_path, templates)
+
+    assert [path for path, error in summary["validated"] if error is None] == templates[:2]
+    assert summary["errors"][0].startswith(f"{templates[2]}: ") and "no_such_filter" in summary["errors"][0]
+    assert summary["errors"][1].startswith(f"{templates[3]}: Syntax error at line 1")
+
+
+def test_collection_filters_need_their_fully_qualified_name(tmp_path):
+    template = write(tmp_path / "a", "short.j2", "{{ services | service_waves }}")
+
+    summary = validate(tmp_path, [template])
+
+    assert len(summary["errors"]) == 1 and "service_waves" in summary["errors"][0]
+
+
+def test_other_collections_resolve_through_the_plugin_loader():
+    class Plugin:
+        j2_function = staticmethod(len)
+
+    class Loader:
+        def get(self, name):
+            if name.startswith("missing."):
+                raise KeyError(name)
+            return Plugin() if name == "community.general.json_query" else None
+
+    filters = validate_templates.PluginMap({"to_json": str}, Loader())
+
+    assert filters.get("community.general.json_query") is len
+    assert "community.general.json_query" in filters and "to_json" in filters
+    assert filters.get("community.general.nope") is None
+    assert "missing.collection.filter" not in filters
+    assert filters.get("json_query") is None
+
+
+def test_templates_that_passed_are_skipped_until_they_change(tmp_path):
+    good = write(tmp_path / "t", "good.j2", "{{ x | default('') }}")
+    bad = write(tmp_path / "t", "bad.j2", "{{ x | no_such_filter }}")
+    validate(tmp_path, [good, bad])
+
+    second = validate(tmp_path, [good, bad])
+    write(tmp_path / "t", "good.j2", "{{ x | default('changed') }}")
+    third = validate(tmp_path, [good, bad])
+
+    assert second["cached"] == [good] and [path for path, _ in second["validated"]] == [bad]
+    assert third["cached"] == [] and len(third["errors"]) == 1
+
+
+def test_missing_file_is_an_error(tmp_path):
+    summary = validate(tmp_path, [str(tmp_path / "absent.j2")])
+
+    assert summary["errors"] == [f"File not found: {tmp_path / 'absent.j2'}"]
@@ -0,0 +1,84 @@
+"""
+Unit tests for the VM test validation engine (vm-test-infrastructure/validation/validate.py).
+"""
+
+import importlib.util
+
+import yaml
+
+from conftest import COLLECTION_ROOT
+
+spec = importlib.util.spec_from_file_location(
+    "vm_validate", COLLECTION_ROOT / "vm-test-infrastructure" / "validation" / "validate.py"
+)
+validate = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(validate)
+
+SERVER = {
+    "domain_timezone": "America/New_York",
+    "users": [{"name": "ed"}],
+    "firewall": {"enabled": True},
+    "fail2ban": {"enabled": True},
+}
+
+
+def discovered(tmp_path, host, data):
+    path = tmp_path / host / "vars.yml"
+    path.parent.mkdir(parents=True)
+    path.write_text(yaml.safe_dump(data))
+
+
+def checks(result):
+    return dict((check["test"], (check["actual"], check["passed"])) for check in result["checks"])
+
+
+def test_server_checks(tmp_path):
+    discovered(
+        tmp_path,
+        "web",
+        {
+            "domain_timezone": "America/New_York",
+            "users": [{"name": "ed"}, {"name": "ops"}],
+            "firewall": {"enabled": True},
+            "packages": {"present": {"host": {"Debian": [{"name": "ufw"}, {"name": "nginx"}, {"name": "ufw"}]}}},
+        },
+    )
+
+    result = validate.validate_host("web", "server", SERVER, tmp_path)
+
+    assert checks(result) == {
+        "timezone": ("America/New_York", True),
+        "target_user": (["ed", "ops"], True),
+        "firewall_enabled": (True, True),
+        "fail2ban_enabled": (False, False),
+        "sample_packages_installed": (["ufw", "nginx"], False),
+    }
+    assert (result["status"], result["passed"], result["failed"]) == ("fail", 3, 2)
+
+
+def test_workstation_without_discovery_results(tmp_path):
+    result = validate.validate_host("arch-ws", "workstation", {"domain_timezone": "UTC", "users": []}, tmp_path)
+
+    assert checks(result) == {
+        "timezone": ("not_found", False),
+        "sample_packages_installed": ([], False),
+    }
+    assert result["errors"] and result["status"] == "fail"
+
+
+def test_report_renders_from_results(tmp_path):
+    discovered(
+        tmp_path,
+        "arch-ws",
+        {
+            "domain_timezone": "UTC",
+            "packages": {"present": {"host": {"Archlinux": [{"name": n} for n in ("firefox", "mc", "lynx")]}}},
+        },
+    )
+    results = [validate.validate_host("arch-ws", "workstation", {"domain_timezone": "UTC"}, tmp_path)]
+
+    report = validate.render_report(results)
+
+    assert "**OVERALL STATUS: PASS**" in report
+    assert "✅ sample_packages_installed: PASS" in report
+    assert "### Arch\n- Tested: 1 VM(s)" in report
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Validate VM test results against the expected test-scenario configuration.
+
+Compares the host_vars written by the discovery role for every test VM with
+the scenario the VM was deployed from (test-scenarios/server-config.yml or
+workstation-config.yml). The checks are the rows of CHECKS below; every
+scenario and every host's discovery results are loaded once and all hosts
+are evaluated in a single pass, spread over a process pool.
+
+Writes the results as JSON (the validation_results list the report template
+expects) and renders templates/final-report.j2 from them:
+
+    python validation/validate.py --servers debian12-server,ubuntu2204-server \\
+        --workstations arch-workstation
+    python validation/validate.py --inventory inventory/hosts.ini
+
+Paths are relative to vm-test-infrastructure/. Exits 1 when any host fails.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+TEST_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = {
+    "server": TEST_DIR / "test-scenarios" / "server-config.yml",
+    "workstation": TEST_DIR / "test-scenarios" / "workstation-config.yml",
+}
+HOST_VARS_DIR = TEST_DIR / "inventory" / "host_vars"
+REPORT_TEMPLATE = Path(__file__).resolve().parent / "templates" / "final-report.j2"
+REPORT_FILE = Path(__file__).resolve().parent / "reports" / "final-test-report.txt"
+RESULTS_FILE = Path(__file__).resolve().parent / "reports" / "validation-results.json"
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+
+
+def get(data: Dict[str, Any], path: str, default: Any = None) -> Any:
+    """Value at a dotted path of nested dicts, or default."""
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return default
+        data = data[key]
+    return data
+
+
+def user_names(actual: Dict[str, Any]) -> List[str]:
+    return [user.get("name") for user in actual.get("users") or [] if isinstance(user, dict)]
+
+
+def installed_packages(actual: Dict[str, Any]) -> List[str]:
+    names = []
+    for packages in (get(actual, "packages.present.host") or {}).values():
+        names.extend(package.get("name") for package in packages or [] if isinstance(package, dict))
+    return names
+
+
+def sample_packages(host_type: str, actual: Dict[str, Any]) -> List[str]:
+    """Representative packages the scenario installs; not meant to be exhaustive."""
+    if host_type == "server":
+        return ["nginx", "fail2ban", "ufw"]
+    if "Archlinux" in (get(actual, "packages.present.host") or {}):
+        return ["firefox", "mc", "lynx"]
+    return ["mc", "emacs-nox", "lynx"]
+
+
+def intersect(items: List[Any], other: List[Any]) -> List[Any]:
+    """Items also in other, in their original order and without duplicates."""
+    seen = set(other)
+    result = []
+    for item in items:
+        if item in seen and item not in result:
+            result.append(item)
+    return result
+
+
+class Check:
+    """One row of the check table.
+
+    expected and actual map (host type, expected config, discovered config)
+    to the values shown in the report; passed compares them. A check runs
+    for the listed host types when its condition (if any) holds.
+    """
+
+    def __init__(
+        self,
+        test: str,
+        types: List[str],
+        expected: Callable[[str, Dict, Dict], Any],
+        actual: Callable[[str, Dict, Dict], Any],
+        passed: Callable[[Any, Any], bool],
+        condition: Optional[Callable[[Dict], bool]] = None,
+    ):
+        self.test = test
+        self.types = types
+        self.expected = expected
+        self.actual = actual
+        self.passed = passed
+        self.condition = condition
+
+    def applies(self, host_type: str, expected: Dict[str, Any]) -> bool:
+        return host_type in self.types and (self.condition is None or self.condition(expected))
+
+    def run(self, host_type: str, expected_config: Dict[str, Any], actual_config: Dict[str, Any]) -> Dict[str, Any]:
+        expected = self.expected(host_type, expected_config, actual_config)
+        actual = self.actual(host_type, expected_config, actual_config)
+        return {
+            "test": self.test,
+            "expected": expected,
+            "actual": actual,
+            "passed": bool(self.passed(expected, actual)),
+        }
+
+
+BOTH = ["server", "workstation"]
+
+CHECKS = [
+    Check(
+        "timezone",
+        BOTH,
+        expected=lambda t, e, a: e.get("domain_timezone"),
+        actual=lambda t, e, a: a.get("domain_timezone", "not_found"),
+        passed=lambda expected, actual: actual == expected,
+    ),
+    Check(
+        "target_user",
+        BOTH,
+        expected=lambda t, e, a: e["users"][0]["name"],
+        actual=lambda t, e, a: user_names(a),
+        passed=lambda expected, actual: expected in actual,
+        condition=lambda e: len(e.get("users") or []) > 0,
+    ),
+    Check(
+        "firewall_enabled",
+        ["server"],
+        expected=lambda t, e, a: get(e, "firewall.enabled", False),
+        actual=lambda t, e, a: get(a, "firewall.enabled", False),
+        passed=lambda expected, actual: actual == expected,
+    ),
+    Check(
+        "fail2ban_enabled",
+        ["server"],
+        expected=lambda t, e, a: get(e, "fail2ban.enabled", False),
+        actual=lambda t, e, a: get(a, "fail2ban.enabled", False),
+        passed=lambda expected, actual: actual == expected,
+    ),
+    Check(
+        "sample_packages_installed",
+        BOTH,
+        expected=lambda t, e, a: sample_packages(t, a),
+        actual=lambda t, e, a: intersect(installed_packages(a), sample_packages(t, a)),
+        passed=lambda expected, actual: set(expected) <= set(actual),
+    ),
+]
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+
+def load_yaml(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return yaml.load(f, Loader=Loader) or {}  # nosec B506 - SafeLoader or CSafeLoader
+    except OSError:
+        return None
+
+
+def validate_host(
+    hostname: str, host_type: str, expected_config: Dict[str, Any], host_vars_dir: Path = HOST_VARS_DIR
+) -> Dict[str, Any]:
+    """Run every applicable check for one host; returns its validation_results entry."""
+    actual_config = load_yaml(host_vars_dir / hostname / "vars.yml")
+    errors = []
+    if actual_config is None:
+        errors.append(f"No discovery results at {host_vars_dir / hostname / 'vars.yml'}")
+        actual_config = {}
+
+    checks = []
+    for check in CHECKS:
+        if check.applies(host_type, expected_config):
+            checks.append(check.run(host_type, expected_config, actual_config))
+    failed = sum(1 for check in checks if not check["passed"])
+    return {
+        "hostname": hostname,
+        "type": host_type,
+        "status": "pass" if failed == 0 else "fail",
+        "checks": checks,
+        "passed": len(checks) - failed,
+        "failed": failed,
+        "errors": errors,
+    }
+
+
+def _validate_job(job: Tuple[str, str, Dict[str, Any], Path]) -> Dict[str, Any]:
+    return validate_host(*job)
+
+
+def validate(
+    hosts: Dict[str, List[str]], host_vars_dir: Path = HOST_VARS_DIR, jobs: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Validate {host type: [hostnames]}; servers first, then workstations.
+
+    Parsing the discovery host_vars dominates, so hosts are spread over a
+    process pool; results keep the input order.
+    """
+    host_jobs = []
+    for host_type in BOTH:
+        if not hosts.get(host_type):
+            continue
+        expected_config = load_yaml(SCENARIOS[host_type]) or {}
+        host_jobs.extend((hostname, host_type, expected_config, host_vars_dir) for hostname in hosts[host_type])
+
+    workers = min(jobs or os.cpu_count() or 1, len(host_jobs))
+    if workers <= 1:
+        return [_validate_job(job) for job in host_jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_validate_job, host_jobs))
+
+
+def render_report(results: List[Dict[str, Any]], template: Path = REPORT_TEMPLATE) -> str:
+    """Render the final report from the results, as the template module would."""
+    sys.path.insert(0, str(TEST_DIR.parent / "scripts"))
+    import validate_templates
+
+    env = validate_templates.build_environment(str(template.parent))
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    facts = {"iso8601": now.isoformat().replace("+00:00", "Z")}
+    return env.get_template(template.name).render(validation_results=results, ansible_date_time=facts)
+
+
+def inventory_hosts(inventory: str) -> Dict[str, List[str]]:
+    from ansible.inventory.manager import InventoryManager
+    from ansible.parsing.dataloader import DataLoader
+
+    manager = InventoryManager(loader=DataLoader(), sources=[inventory])
+    groups = manager.get_groups_dict()
+    return {"server": groups.get("servers", []), "workstation": groups.get("workstations", [])}
+
+
+def split_hosts(values: List[str]) -> List[str]:
+    return [host for value in values for host in value.split(",") if host]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--servers", action="append", default=[], help="Server hostnames (comma-separated)")
+    parser.add_argument("--workstations", action="append", default=[], help="Workstation hostnames (comma-separated)")
+    parser.add_argument("--inventory", help="Take the servers and workstations groups from this inventory")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--host-vars", type=Path, default=HOST_VARS_DIR, help="Discovery host_vars directory")
+    parser.add_argument("--json", type=Path, default=RESULTS_FILE, help="Where to write the JSON results")
+    parser.add_argument("--report", type=Path, default=REPORT_FILE, help="Where to write the text report")
+    args = parser.parse_args(argv)
+
+    hosts = {"server": split_hosts(args.servers), "workstation": split_hosts(args.workstations)}
+    if args.inventory:
+        for host_type, names in inventory_hosts(args.inventory).items():
+            hosts[host_type].extend(name for name in names if name not in hosts[host_type])
+
+    results = validate(hosts, args.host_vars, args.jobs)
+    args.json.parent.mkdir(parents=True, exist_ok=True)
+    args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    args.report.write_text(render_report(results), encoding="utf-8")
+
+    for result in results:
+        failed = [check["test"] for check in result["checks"] if not check["passed"]]
+        print(f"{result['type'].title()} {result['hostname']}: {result['status'].upper()}")
+        print(f"  Passed: {result['passed']}/{len(result['checks'])}" + (f"  Failed: {failed}" if failed else ""))
+    print(f"\n{len(results)} hosts validated; report: {args.report}, results: {args.json}")
+    return 1 if any(result["status"] == "fail" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())